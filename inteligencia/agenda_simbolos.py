@@ -0,0 +1,135 @@
+import threading
+import time
+
+import buffer_velas
+
+# ==============================================================================
+# 🗓️ AGENDA ADAPTATIVA DEL RADAR (SÍMBOLOS CALIENTES A MENUDO, FRÍOS RARA VEZ)
+# ==============================================================================
+# Antes cada pasada re-evaluaba todos los activos_top por igual, aunque un símbolo
+# hubiera sacado 20 puntos y no hubiera cerrado ninguna vela desde entonces.
+#
+# Cada símbolo evaluado recibe una hora de "próxima revisión" según:
+#   - su último score de evaluar_setup_determinista (caliente / templado / frío)
+#   - su volatilidad (ATR% alto -> antes; ATR% bajo -> después)
+#   - el cierre de vela de config.TEMPORALIDAD (nunca más tarde del próximo cierre:
+#     una vela cerrada cambia la estructura para todos)
+# El escáner solo descarga/evalúa los que ya "tocan"; los nuevos van primero.
+# ==============================================================================
+
+SCORE_CALIENTE = 45   # setup formándose: revisar cada pocos segundos
+SCORE_TEMPLADO = 30
+INTERVALO_CALIENTE_S = 20.0
+ATR_PCT_REFERENCIA = 1.0  # ATR% "normal" en 15m; por encima se acorta el intervalo
+MARGEN_CIERRE_S = 3.0     # esperar a que el exchange publique la vela recién cerrada
+
+
+class AgendaSimbolos:
+    def __init__(self, timeframe="15m"):
+        self.timeframe = timeframe
+        self.tf_s = max(60.0, buffer_velas.timeframe_a_ms(timeframe) / 1000.0)
+        self._estado = {}
+        self._lock = threading.Lock()
+
+    def _intervalo_por_score(self, score):
+        if score >= SCORE_CALIENTE:
+            return INTERVALO_CALIENTE_S
+        if score >= SCORE_TEMPLADO:
+            return self.tf_s / 4.0
+        return None  # frío: hasta el próximo cierre de vela
+
+    def registrar(self, simbolo, score, atr_pct=None, ts_ultima_vela_ms=None, ahora=None):
+        """Anota el resultado de una evaluación y calcula la próxima revisión del símbolo."""
+        ahora = time.time() if ahora is None else float(ahora)
+        try:
+            score = float(score or 0.0)
+        except Exception:
+            score = 0.0
+        try:
+            atr_pct = float(atr_pct) if atr_pct is not None else None
+        except Exception:
+            atr_pct = None
+
+        # Cierre de la vela en formación (ts de apertura + temporalidad)
+        if ts_ultima_vela_ms:
+            cierre = float(ts_ultima_vela_ms) / 1000.0 + self.tf_s
+            while cierre <= ahora:
+                cierre += self.tf_s
+        else:
+            cierre = (ahora // self.tf_s + 1) * self.tf_s
+        cierre += MARGEN_CIERRE_S
+
+        intervalo = self._intervalo_por_score(score)
+        if intervalo is None:
+            proximo = cierre
+        else:
+            if atr_pct and atr_pct > 0:
+                factor = min(2.0, max(0.5, ATR_PCT_REFERENCIA / atr_pct))
+                intervalo *= factor
+            proximo = min(ahora + intervalo, cierre)
+
+        with self._lock:
+            previo = self._estado.get(simbolo) or {}
+            self._estado[simbolo] = {
+                "proximo": proximo,
+                "score": score,
+                "atr_pct": atr_pct,
+                "cierre": cierre,
+                "evaluaciones": int(previo.get("evaluaciones", 0)) + 1,
+                "ultima": ahora,
+            }
+
+    def pendientes(self, simbolos, ahora=None):
+        """Símbolos de `simbolos` que toca evaluar: nuevos primero, luego por score y retraso."""
+        ahora = time.time() if ahora is None else float(ahora)
+        nuevos, vencidos = [], []
+        with self._lock:
+            for s in simbolos or []:
+                e = self._estado.get(s)
+                if e is None:
+                    nuevos.append(s)
+                elif e["proximo"] <= ahora:
+                    vencidos.append((-e["score"], e["proximo"], s))
+        vencidos.sort()
+        return nuevos + [s for _, _, s in vencidos]
+
+    def segundos_hasta_proximo(self, simbolos, ahora=None):
+        """Espera hasta que venza el primero de `simbolos` (0 si alguno ya toca o es nuevo)."""
+        ahora = time.time() if ahora is None else float(ahora)
+        minimo = None
+        with self._lock:
+            for s in simbolos or []:
+                e = self._estado.get(s)
+                if e is None:
+                    return 0.0
+                espera = e["proximo"] - ahora
+                minimo = espera if minimo is None else min(minimo, espera)
+        return max(0.0, minimo or 0.0)
+
+    def olvidar(self, simbolo):
+        with self._lock:
+            self._estado.pop(simbolo, None)
+
+    def resumen(self, maximo=10, ahora=None):
+        """Estado de la cola para UI/heartbeat: conteos y los próximos símbolos en turno."""
+        ahora = time.time() if ahora is None else float(ahora)
+        with self._lock:
+            filas = sorted(self._estado.items(), key=lambda kv: kv[1]["proximo"])
+        calientes = sum(1 for _, e in filas if e["score"] >= SCORE_CALIENTE)
+        frios = sum(1 for _, e in filas if e["score"] < SCORE_TEMPLADO)
+        return {
+            "simbolos": len(filas),
+            "calientes": calientes,
+            "templados": len(filas) - calientes - frios,
+            "frios": frios,
+            "vencidos": sum(1 for _, e in filas if e["proximo"] <= ahora),
+            "cola": [
+                {
+                    "simbolo": s,
+                    "en_s": round(max(0.0, e["proximo"] - ahora), 1),
+                    "score": round(e["score"], 1),
+                    "atr_pct": round(e["atr_pct"], 3) if e["atr_pct"] is not None else None,
+                }
+                for s, e in filas[: max(0, int(maximo))]
+            ],
+        }
@@ -0,0 +1,178 @@
+"""
+Caché de señales del motor determinista por vela cerrada.
+
+El escáner vuelve a pasar por cada símbolo varias veces dentro de la misma vela
+(15m => decenas de pasadas). Indicadores, patrón chartista, swing Fibonacci y
+divergencias solo cambian de verdad cuando cierra una vela, así que la parte cara
+del motor (scoring_confluencias.analizar_estructura) se guarda por símbolo con la
+clave (timeframe, ts de la última vela cerrada, huella de parámetros).
+
+En un acierto:
+  - refrescar_precio=True (por defecto): se recompone la señal con el precio vivo
+    (lado del VWAP, cercanía a retrocesos Fibonacci, scoring, SL/TP/RR). Cuesta
+    decenas de µs frente a los ~10 ms del motor completo.
+  - refrescar_precio=False: se devuelve la señal anterior tal cual (copia).
+
+perezosa=True devuelve la señal sin texto (ver scoring_confluencias.materializar_senal).
+
+Compromiso asumido: dentro de una vela la estructura es la de la primera pasada
+(con la vela en formación de ese momento); el precio vivo sí se mira siempre.
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from .scoring_confluencias import (
+    analizar_estructura,
+    componer_senal,
+    evaluar_setup_determinista,
+    materializar_senal,
+)
+
+# Subir al cambiar reglas del motor: invalida todas las entradas en caliente
+VERSION_MOTOR = 1
+
+
+def huella_parametros(parametros: Optional[Dict[str, Any]] = None) -> str:
+    """Hash estable de los parámetros que afectan a la señal (+ versión del motor)."""
+    carga = {"version_motor": VERSION_MOTOR, "parametros": parametros or {}}
+    texto = json.dumps(carga, sort_keys=True, default=str)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def ts_ultima_vela_cerrada(
+    df: pd.DataFrame, paso_ms: Optional[float] = None, ahora_ms: Optional[float] = None
+) -> Optional[float]:
+    """
+    Timestamp (ms) de la última vela cerrada del frame.
+
+    La última fila es la vela en formación salvo que ya haya pasado su cierre
+    (ts + paso <= ahora). Sin `paso_ms` se deduce de las dos últimas filas.
+    """
+    if df is None or len(df) < 2 or "timestamp" not in df:
+        return None
+    ts = df["timestamp"]
+    ultimo = float(ts.iloc[-1])
+    previo = float(ts.iloc[-2])
+    paso = float(paso_ms) if paso_ms else ultimo - previo
+    ahora = time.time() * 1000.0 if ahora_ms is None else float(ahora_ms)
+    if paso > 0 and ultimo + paso <= ahora:
+        return ultimo
+    return previo
+
+
+class CacheSenales:
+    """
+    Una entrada por (símbolo, timeframe): la clave de vela/parámetros con la que se
+    calculó, la estructura y la última señal. Thread-safe; acotada a `max_entradas`
+    (se descarta la menos usada).
+    """
+
+    def __init__(
+        self,
+        refrescar_precio: bool = True,
+        paso_ms: Optional[float] = None,
+        max_entradas: int = 2048,
+        swings: Optional[Any] = None,
+    ):
+        self.refrescar_precio = bool(refrescar_precio)
+        self.swings = swings  # RegistroSwings opcional para analizar_estructura
+        self.paso_ms = paso_ms
+        self.max_entradas = max(1, int(max_entradas))
+        self._entradas: Dict[Tuple[str, str], Tuple[Tuple[float, str], Dict[str, Any], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def evaluar(
+        self,
+        df: pd.DataFrame,
+        simbolo: str,
+        temporalidad: str,
+        parametros: Optional[Dict[str, Any]] = None,
+        precio: Optional[float] = None,
+        refrescar_precio: Optional[bool] = None,
+        ahora_ms: Optional[float] = None,
+        perezosa: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Igual que evaluar_setup_determinista(df, simbolo, temporalidad), salvo que
+        reutiliza la estructura si no ha cerrado vela desde la última evaluación.
+        `precio` sustituye al último close del frame (p. ej. un ticker más fresco).
+        """
+        if df is None or len(df) < 50:
+            return evaluar_setup_determinista(
+                df, simbolo=simbolo, temporalidad=temporalidad, perezosa=perezosa, swings=self.swings
+            )
+
+        vela = ts_ultima_vela_cerrada(df, paso_ms=self.paso_ms, ahora_ms=ahora_ms)
+        if vela is None:
+            return evaluar_setup_determinista(
+                df, simbolo=simbolo, temporalidad=temporalidad, perezosa=perezosa, swings=self.swings
+            )
+        clave = (vela, huella_parametros(parametros))
+        precio_vivo = float(df["close"].iloc[-1]) if precio is None else float(precio)
+        refrescar = self.refrescar_precio if refrescar_precio is None else bool(refrescar_precio)
+        id_entrada = (simbolo, temporalidad)
+
+        with self._lock:
+            entrada = self._entradas.get(id_entrada)
+            if entrada is not None and entrada[0] == clave:
+                self.aciertos += 1
+                # Reinsertar: el orden del dict hace de LRU
+                self._entradas[id_entrada] = self._entradas.pop(id_entrada)
+            else:
+                entrada = None
+                self.fallos += 1
+
+        if entrada is not None:
+            if refrescar:
+                senal = componer_senal(
+                    entrada[1], precio_vivo, simbolo=simbolo, temporalidad=temporalidad, perezosa=perezosa
+                )
+                senal["meta"]["cache"] = "REFRESCO"
+            else:
+                # La guardada puede ser perezosa (el detalle diferido no se copia)
+                senal = copy.deepcopy(entrada[2])
+                if not perezosa:
+                    senal = materializar_senal(senal)
+                senal["meta"]["cache"] = "ACIERTO"
+            return senal
+
+        estructura = analizar_estructura(df, simbolo=simbolo, swings=self.swings)
+        senal = componer_senal(estructura, precio_vivo, simbolo=simbolo, temporalidad=temporalidad, perezosa=perezosa)
+        with self._lock:
+            self._entradas.pop(id_entrada, None)
+            self._entradas[id_entrada] = (clave, estructura, copy.deepcopy(senal))
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.pop(next(iter(self._entradas)))
+        senal["meta"]["cache"] = "CALCULADA"
+        return senal
+
+    def invalidar(self, simbolo: Optional[str] = None) -> None:
+        """Olvida un símbolo (todas sus temporalidades) o toda la caché."""
+        with self._lock:
+            if simbolo is None:
+                self._entradas.clear()
+                return
+            for id_entrada in [k for k in self._entradas if k[0] == simbolo]:
+                del self._entradas[id_entrada]
+
+    def resumen(self) -> Dict[str, Any]:
+        """Contadores para el heartbeat."""
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_acierto": round(self.aciertos / total, 3) if total else 0.0,
+            }
@@ -0,0 +1,137 @@
+"""
+Contexto de indicadores memoizado por DataFrame de velas.
+
+Para un mismo símbolo el radar calculaba RSI y ATR (dos veces), el motor
+determinista volvía a calcular RSI/ATR/EMAs/MACD/ADX (que a su vez recalcula el
+TR)/VWAP/volumen y tpsl_profesional repetía los extremos de estructura.
+
+`contexto_de(df)` devuelve un único ContextoIndicadores pegado al propio frame:
+cada serie se calcula una vez, se guarda por (nombre, parámetros) y la reciben
+todos los consumidores. Si el frame cambia (vela en formación actualizada en
+sitio, vela nueva) la huella deja de coincidir y la memoria se vacía.
+Los valores son exactamente los de `indicadores` (mismas funciones y operaciones).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import indicadores
+
+_ATRIBUTO = "_zerox_contexto_indicadores"
+
+
+def _huella(df: pd.DataFrame) -> Tuple[Any, ...]:
+    """Identifica el contenido relevante del frame sin recorrerlo entero."""
+    n = len(df)
+    if n == 0:
+        return (0,)
+    # Vela nueva o vela en formación actualizada => cambia la última fila
+    return (n, df.index[-1], tuple(df.iloc[-1].values))
+
+
+class ContextoIndicadores:
+    """Series de indicadores de un frame, calculadas bajo demanda y una sola vez."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._huella = _huella(df)
+        self._memo: Dict[Hashable, Any] = {}
+        self.aciertos = 0
+        self.calculos = 0
+
+    def vigente(self) -> bool:
+        return _huella(self.df) == self._huella
+
+    def memo(self, clave: Hashable, calcular: Callable[[], Any]) -> Any:
+        """Memoiza un cálculo arbitrario sobre el frame (pivotes, swings...) bajo `clave`."""
+        return self._memo_o_calcular(clave, calcular)
+
+    def _memo_o_calcular(self, clave: Hashable, calcular: Callable[[], Any]) -> Any:
+        try:
+            valor = self._memo[clave]
+            self.aciertos += 1
+            return valor
+        except KeyError:
+            pass
+        valor = self._memo[clave] = calcular()
+        self.calculos += 1
+        return valor
+
+    # ------------------------------------------------------------------
+    # Columnas
+    # ------------------------------------------------------------------
+    def serie(self, columna: str) -> pd.Series:
+        return self._memo_o_calcular(("serie", columna), lambda: self.df[columna].astype(float))
+
+
+    # ------------------------------------------------------------------
+    # Indicadores
+    # ------------------------------------------------------------------
+    def ema(self, periodo: int) -> pd.Series:
+        periodo = int(periodo)
+        return self._memo_o_calcular(("ema", periodo), lambda: indicadores.ema(self.serie("close"), periodo))
+
+    def rsi(self, periodo: int = 14) -> pd.Series:
+        periodo = int(periodo)
+        return self._memo_o_calcular(("rsi", periodo), lambda: indicadores.rsi(self.serie("close"), periodo=periodo))
+
+    def macd(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        fast, slow, signal = int(fast), int(slow), int(signal)
+
+        def _calcular():
+            # Mismas operaciones que indicadores.macd, reutilizando las EMAs memoizadas
+            macd_line = self.ema(fast) - self.ema(slow)
+            signal_line = indicadores.ema(macd_line, signal)
+            return macd_line, signal_line, macd_line - signal_line
+
+        return self._memo_o_calcular(("macd", fast, slow, signal), _calcular)
+
+    def rango_verdadero(self) -> pd.Series:
+        return self._memo_o_calcular(("tr",), lambda: indicadores.rango_verdadero(self.df))
+
+    def atr(self, periodo: int = 14) -> pd.Series:
+        periodo = int(periodo)
+        return self._memo_o_calcular(
+            ("atr", periodo), lambda: indicadores.atr(self.df, periodo=periodo, tr=self.rango_verdadero())
+        )
+
+    def adx(self, periodo: int = 14) -> pd.Series:
+        periodo = int(periodo)
+        return self._memo_o_calcular(
+            ("adx", periodo), lambda: indicadores.adx(self.df, periodo=periodo, tr=self.rango_verdadero())
+        )
+
+    def vwap(self) -> pd.Series:
+        return self._memo_o_calcular(("vwap",), lambda: indicadores.vwap(self.df))
+
+    def volumen_ratio(self, periodo: int = 20) -> float:
+        periodo = int(periodo)
+        return self._memo_o_calcular(
+            ("volumen_ratio", periodo), lambda: float(indicadores.volumen_ratio(self.df, periodo=periodo))
+        )
+
+    def extremos(self, ventana: int = 50) -> Tuple[float, float]:
+        """(mínimo de low, máximo de high) de las últimas `ventana` velas (estructura para SL/TP)."""
+        ventana = int(ventana)
+
+        def _calcular():
+            low = self.serie("low").values[-ventana:]
+            high = self.serie("high").values[-ventana:]
+            if np.isnan(low).all() or np.isnan(high).all():
+                return float("nan"), float("nan")
+            return float(np.nanmin(low)), float(np.nanmax(high))
+
+        return self._memo_o_calcular(("extremos", ventana), _calcular)
+
+
+def contexto_de(df: pd.DataFrame) -> ContextoIndicadores:
+    """Contexto compartido del frame (se crea la primera vez y se renueva si el frame cambió)."""
+    ctx = df.__dict__.get(_ATRIBUTO)
+    if ctx is None or not ctx.vigente():
+        ctx = ContextoIndicadores(df)
+        object.__setattr__(df, _ATRIBUTO, ctx)
+    return ctx
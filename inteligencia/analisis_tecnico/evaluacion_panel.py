@@ -0,0 +1,324 @@
+"""
+Evaluación por lotes del motor determinista sobre un panel de velas.
+
+`evaluar_setup_determinista` trabaja con un DataFrame por símbolo: puntuar 200
+símbolos son 200 rondas de overhead de pandas. Aquí el panel es un único array
+contiguo (símbolos × velas × OHLCV) y el bloque de indicadores (EMA 20/50, MACD,
+RSI, ATR, ADX, VWAP, volumen) y su parte aditiva del score long/short se calculan
+vectorizados para todos los símbolos a la vez.
+
+Cada símbolo pasa después por `evaluar_setup_determinista` (patrones, Fibonacci,
+divergencias, plan y razones) con las series del panel ya sembradas en el contexto
+del frame: bit a bit iguales, no se recalculan. Los frames se agrupan por longitud y
+cada panel lleva todas sus velas (las EMA dependen de toda la historia).
+
+El score vectorizado de indicadores viaja en meta["scores_indicadores"] de cada
+símbolo del panel, para que el escáner pueda ordenar sin recorrer las razones.
+
+No hay filtro previo por score: patrón (+25), Fibonacci (+12) y divergencia (+10)
+suman hasta +47 a un lado, así que cualquier score de indicadores puede acabar en
+setup (y el SL por estructura siempre sale). Una cota correcta no descarta nada sin
+ejecutar esas fases, que son justo el camino por símbolo.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import contexto_indicadores
+from .scoring_confluencias import evaluar_setup_determinista
+
+COLUMNAS = ("open", "high", "low", "close", "volume")
+O, H, L, C, V = range(5)
+
+# Mínimo de velas del motor determinista (por debajo devuelve DATOS_INSUFICIENTES)
+VELAS_MIN_PANEL = 50
+
+
+def construir_panel(
+    frames: Mapping[str, pd.DataFrame], velas: Optional[int] = None
+) -> Tuple[List[str], np.ndarray, List[str]]:
+    """
+    Apila las últimas `velas` velas de cada frame en un array (S, velas, 5) float64.
+    velas=None: todas, con la longitud del primer frame (los de otra longitud se excluyen).
+    Devuelve (símbolos del panel, panel, símbolos excluidos: cortos, sin columnas o con NaN).
+    """
+    simbolos: List[str] = []
+    bloques: List[np.ndarray] = []
+    excluidos: List[str] = []
+    exacto = velas is None
+    if exacto:
+        velas = next((len(df) for df in frames.values() if df is not None), 0)
+    velas = int(velas)
+    for simbolo, df in frames.items():
+        try:
+            if df is None or len(df) < velas or (exacto and len(df) != velas):
+                raise ValueError
+            bloque = df[list(COLUMNAS)].to_numpy(dtype=np.float64)[-velas:]
+            if not np.isfinite(bloque).all():
+                raise ValueError
+        except Exception:
+            excluidos.append(simbolo)
+            continue
+        simbolos.append(simbolo)
+        bloques.append(bloque)
+    if not bloques:
+        return [], np.empty((0, velas, len(COLUMNAS))), excluidos
+    return simbolos, np.ascontiguousarray(np.stack(bloques)), excluidos
+
+
+# ------------------------------------------------------------------------------
+# Indicadores vectorizados (mismas fórmulas y mismo orden de operaciones que indicadores.py)
+# ------------------------------------------------------------------------------
+def _ema_series(x: np.ndarray, periodos: Sequence[int]) -> np.ndarray:
+    """EMAs (adjust=False) de x (S, B) para varios periodos a la vez: (K, S, B)."""
+    alfa = np.array([1.0 / (1.0 + (int(p) - 1) / 2.0) for p in periodos])[:, None]
+    peso = 1.0 - alfa
+    norma = peso + alfa
+    out = np.empty((len(periodos),) + x.shape)
+    v = np.repeat(x[None, :, 0], len(periodos), axis=0)
+    out[:, :, 0] = v
+    for t in range(1, x.shape[1]):
+        xt = x[None, :, t]
+        v = np.where(v != xt, (peso * v + alfa * xt) / norma, v)
+        out[:, :, t] = v
+    return out
+
+
+def _ventanas_moviles(x: np.ndarray, n: int, min_periodos: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Medias y sumas móviles (K, S, B) con el mismo algoritmo que pandas rolling (suma
+    compensada online, una compensación para altas y otra para bajas, valores constantes
+    y signo alrededor de cero): resultados bit a bit iguales a indicadores.*.
+    Bucle sobre las velas, vectorizado sobre todas las series y símbolos a la vez.
+    """
+    forma = x.shape[:-1]
+    suma = np.zeros(forma)
+    comp_alta = np.zeros(forma)
+    comp_baja = np.zeros(forma)
+    nobs = np.zeros(forma)
+    negativos = np.zeros(forma)
+    iguales = np.zeros(forma)
+    previo = np.full(forma, np.nan)
+    medias = np.empty(x.shape)
+    sumas = np.empty(x.shape)
+    for t in range(x.shape[-1]):
+        if t >= n:
+            viejo = x[..., t - n]
+            valido = viejo == viejo
+            y = np.where(valido, -viejo - comp_baja, 0.0)
+            tt = suma + y
+            comp_baja = np.where(valido, (tt - suma) - y, comp_baja)
+            suma = np.where(valido, tt, suma)
+            nobs -= valido
+            negativos -= valido & np.signbit(viejo)
+        nuevo = x[..., t]
+        valido = nuevo == nuevo
+        y = np.where(valido, nuevo - comp_alta, 0.0)
+        tt = suma + y
+        comp_alta = np.where(valido, (tt - suma) - y, comp_alta)
+        suma = np.where(valido, tt, suma)
+        nobs += valido
+        negativos += valido & np.signbit(nuevo)
+        iguales = np.where(valido, np.where(nuevo == previo, iguales + 1, 1), iguales)
+        previo = np.where(valido, nuevo, previo)
+
+        listo = (nobs >= min_periodos) & (nobs > 0)
+        constante = iguales >= nobs
+        with np.errstate(divide="ignore", invalid="ignore"):
+            media = suma / nobs
+        media = np.where(constante, previo, media)
+        media = np.where(~constante & (negativos == 0) & (media < 0), 0.0, media)
+        media = np.where(~constante & (negativos == nobs) & (media > 0), 0.0, media)
+        medias[..., t] = np.where(listo, media, np.nan)
+        sumas[..., t] = np.where(listo, np.where(constante, previo * nobs, suma), np.nan)
+    return medias, sumas
+
+
+def series_panel(panel: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Series (S, B) de los indicadores del motor determinista para todos los símbolos,
+    iguales bit a bit a las de indicadores.* sobre cada frame de B velas.
+    """
+    high, low, close, vol = panel[:, :, H], panel[:, :, L], panel[:, :, C], panel[:, :, V]
+
+    # EMAs y MACD (12/26/9)
+    emas = _ema_series(close, (20, 50, 12, 26))
+    linea = emas[2] - emas[3]
+    senal = _ema_series(linea, (9,))[0]
+
+    # Entradas de las ventanas de 14: ganancias, pérdidas, TR, +DM, -DM
+    delta = np.full(close.shape, np.nan)
+    delta[:, 1:] = np.diff(close, axis=1)
+    ganancia = np.where(delta > 0, delta, 0.0)
+    perdida = -np.where(delta < 0, delta, 0.0)
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[:, 1:] = close[:, :-1]
+    with np.errstate(invalid="ignore"):
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    sube = np.full(close.shape, np.nan)
+    baja = np.full(close.shape, np.nan)
+    sube[:, 1:] = np.diff(high, axis=1)
+    baja[:, 1:] = -np.diff(low, axis=1)
+    with np.errstate(invalid="ignore"):
+        dm_mas = np.where((sube > baja) & (sube > 0), sube, 0.0)
+        dm_menos = np.where((baja > sube) & (baja > 0), baja, 0.0)
+    medias, sumas = _ventanas_moviles(np.stack([ganancia, perdida, tr, dm_mas, dm_menos]), 14, 14)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media_p = np.where(medias[1] == 0, np.nan, medias[1])
+        rsi = 100 - (100 / (1 + medias[0] / media_p))
+        rsi = np.where(np.isnan(rsi), 50.0, rsi)
+
+        tr_n = np.where(sumas[2] == 0, np.nan, sumas[2])
+        di_mas = 100 * (sumas[3] / tr_n)
+        di_menos = 100 * (sumas[4] / tr_n)
+        suma_di = di_mas + di_menos
+        dx = 100 * (np.abs(di_mas - di_menos) / np.where(suma_di == 0, np.nan, suma_di))
+    adx = _ventanas_moviles(dx[None], 14, 14)[0][0]
+
+    # VWAP acumulado (volumen 0 no cuenta; se arrastra el último valor)
+    tipico = (high + low + close) / 3.0
+    vol_nan = np.where(vol == 0, np.nan, vol)
+    pv = tipico * vol_nan
+    cum_pv = np.cumsum(np.where(np.isnan(pv), 0.0, pv), axis=1)
+    cum_v = np.cumsum(np.where(np.isnan(vol_nan), 0.0, vol_nan), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = np.where(np.isnan(pv), np.nan, cum_pv / cum_v)
+    vwap = pd.DataFrame(vwap.T).ffill().values.T
+    vwap = np.where(np.isnan(vwap), tipico, vwap)
+
+    media_vol = _ventanas_moviles(vol[None], 20, 10)[0][0]
+
+    return {
+        "rsi": rsi,
+        "ema_20": emas[0],
+        "ema_50": emas[1],
+        "ema_12": emas[2],
+        "ema_26": emas[3],
+        "macd": linea,
+        "macd_signal": senal,
+        "macd_hist": linea - senal,
+        "tr": tr,
+        "atr": np.where(np.isnan(medias[2]), 0.0, medias[2]),
+        "adx": np.where(np.isnan(adx), 0.0, adx),
+        "vwap": vwap,
+        "media_volumen": media_vol,
+    }
+
+
+def indicadores_panel(panel: np.ndarray, series: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """Último valor de cada indicador del motor determinista para todos los símbolos (S,)."""
+    if series is None:
+        series = series_panel(panel)
+    vol = panel[:, :, V]
+    media_vol = series["media_volumen"][:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vol_ratio = np.where(np.isnan(media_vol) | (media_vol <= 0), 0.0, vol[:, -1] / media_vol)
+    if panel.shape[1] < 3:
+        vol_ratio = np.zeros_like(vol_ratio)
+    return {
+        "precio": panel[:, -1, C].copy(),
+        "rsi": series["rsi"][:, -1],
+        "ema_fast": series["ema_20"][:, -1],
+        "ema_slow": series["ema_50"][:, -1],
+        "macd": series["macd"][:, -1],
+        "macd_signal": series["macd_signal"][:, -1],
+        "macd_hist": series["macd_hist"][:, -1],
+        "atr": series["atr"][:, -1],
+        "adx": series["adx"][:, -1],
+        "vwap": series["vwap"][:, -1],
+        "vol_ratio": vol_ratio,
+    }
+
+
+def sembrar_contexto(df: pd.DataFrame, series: Mapping[str, np.ndarray], i: int, vol_ratio: float) -> None:
+    """
+    Deja en el contexto de indicadores del frame las series ya calculadas en el panel:
+    el camino completo por símbolo (evaluar_setup_determinista) no recalcula nada.
+    """
+    ctx = contexto_indicadores.contexto_de(df)
+    indice = df.index
+
+    def _s(nombre):
+        return pd.Series(series[nombre][i], index=indice)
+
+    for clave, nombre in (
+        (("rsi", 14), "rsi"),
+        (("ema", 20), "ema_20"),
+        (("ema", 50), "ema_50"),
+        (("ema", 12), "ema_12"),
+        (("ema", 26), "ema_26"),
+        (("tr",), "tr"),
+        (("atr", 14), "atr"),
+        (("adx", 14), "adx"),
+        (("vwap",), "vwap"),
+    ):
+        ctx.memo(clave, lambda n=nombre: _s(n))
+    ctx.memo(("macd", 12, 26, 9), lambda: (_s("macd"), _s("macd_signal"), _s("macd_hist")))
+    ctx.memo(("volumen_ratio", 20), lambda: float(vol_ratio))
+
+
+def puntuar_panel(ind: Mapping[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Parte aditiva del score long/short que sale solo de indicadores (misma tabla que el motor)."""
+    precio = ind["precio"]
+    alcista = ind["ema_fast"] > ind["ema_slow"]
+    bajista = ind["ema_fast"] < ind["ema_slow"]
+    macd, sig, hist = ind["macd"], ind["macd_signal"], ind["macd_hist"]
+    rsi, adx, vwap, vr = ind["rsi"], ind["adx"], ind["vwap"], ind["vol_ratio"]
+
+    largo = np.full(precio.shape, 50.0)
+    corto = np.full(precio.shape, 50.0)
+    largo += 15 * alcista
+    corto += 15 * bajista
+    largo += 12 * ((hist > 0) & (macd > sig))
+    corto += 12 * ((hist < 0) & (macd < sig))
+    largo += 6 * (rsi <= 35)
+    corto += 6 * (rsi >= 65)
+    fuerte = adx >= 25
+    largo += 4 * (fuerte & alcista)
+    corto += 4 * (fuerte & bajista)
+    largo += 3 * (precio > vwap)
+    corto += 3 * (precio < vwap)
+    volumen = vr >= 1.5
+    largo += 8 * (volumen & alcista)
+    corto += 8 * (volumen & bajista)
+    return np.clip(largo, 0, 100), np.clip(corto, 0, 100)
+
+
+def evaluar_panel(frames: Mapping[str, pd.DataFrame], temporalidad: str = "") -> Dict[str, Dict[str, Any]]:
+    """
+    Evalúa muchos símbolos a la vez. Devuelve {simbolo: evaluar_setup_determinista(...)}.
+    Los indicadores salen de un panel por longitud de frame; los frames que no caben
+    (menos de VELAS_MIN_PANEL velas, NaN, sin columnas) se evalúan sin sembrar.
+    A los del panel se les añade meta["scores_indicadores"] = {"long", "short"}
+    (puntuar_panel: solo indicadores, sin patrón, Fibonacci ni divergencia).
+    """
+    scores: Dict[str, Dict[str, int]] = {}
+    por_longitud: Dict[int, Dict[str, pd.DataFrame]] = {}
+    for simbolo, df in frames.items():
+        n = len(df) if df is not None else 0
+        if n >= VELAS_MIN_PANEL:
+            por_longitud.setdefault(n, {})[simbolo] = df
+
+    for grupo in por_longitud.values():
+        simbolos, panel, _ = construir_panel(grupo)
+        if not simbolos:
+            continue
+        series = series_panel(panel)
+        ind = indicadores_panel(panel, series)
+        largo, corto = puntuar_panel(ind)
+        for i, simbolo in enumerate(simbolos):
+            sembrar_contexto(grupo[simbolo], series, i, float(ind["vol_ratio"][i]))
+            scores[simbolo] = {"long": int(round(largo[i])), "short": int(round(corto[i]))}
+
+    resultados: Dict[str, Dict[str, Any]] = {}
+    for simbolo, df in frames.items():
+        senal = evaluar_setup_determinista(df, simbolo=simbolo, temporalidad=temporalidad)
+        if simbolo in scores and isinstance(senal.get("meta"), dict):
+            senal["meta"]["scores_indicadores"] = scores[simbolo]
+        resultados[simbolo] = senal
+    return resultados
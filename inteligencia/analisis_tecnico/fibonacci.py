@@ -1,6 +1,7 @@
 import math
+from bisect import bisect_left
 from dataclasses import dataclass
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -110,6 +111,69 @@ def nivel_cercano(precio: float, niveles: Dict[str, float], tolerancia_abs: floa
     return mejor
 
 
+class IndiceNiveles:
+    """
+    Niveles (de uno o varios swings) en un array ordenado por precio: el más cercano
+    dentro de tolerancia sale por búsqueda binaria en vez de recorrer todos.
+
+    `niveles` es un iterable de (nombre, precio, dato); `dato` viaja con el nivel
+    (p. ej. la dirección de su swing). Con empate de distancia gana el primero en el
+    orden de entrada, igual que nivel_cercano sobre un dict.
+    """
+
+    __slots__ = ("precios", "nombres", "datos", "orden")
+
+    def __init__(self, niveles: Iterable[Tuple[str, float, Any]] = ()):
+        filas = []
+        for orden, (nombre, p, dato) in enumerate(niveles):
+            try:
+                p = float(p)
+            except Exception:
+                continue
+            if math.isfinite(p):
+                filas.append((p, orden, nombre, dato))
+        filas.sort(key=lambda f: (f[0], f[1]))
+        self.precios: List[float] = [f[0] for f in filas]
+        self.orden: List[int] = [f[1] for f in filas]
+        self.nombres: List[str] = [f[2] for f in filas]
+        self.datos: List[Any] = [f[3] for f in filas]
+
+    def __len__(self) -> int:
+        return len(self.precios)
+
+    def cercano(self, precio: float, tolerancia_abs: float) -> Optional[Tuple[str, float, float, Any]]:
+        """(nombre, precio_nivel, distancia_abs, dato) del más cercano dentro de tolerancia."""
+        try:
+            precio = float(precio)
+            tolerancia_abs = float(tolerancia_abs)
+        except Exception:
+            return None
+        precios = self.precios
+        if tolerancia_abs <= 0 or not precios:
+            return None
+
+        i = bisect_left(precios, precio)
+        mejor = -1
+        mejor_d = 0.0
+        # A cada lado, el más cercano y los que empaten con él en distancia
+        for j, paso in ((i - 1, -1), (i, 1)):
+            if j < 0 or j >= len(precios):
+                continue
+            d = abs(precio - precios[j])
+            while True:
+                if d <= tolerancia_abs and (
+                    mejor < 0 or d < mejor_d or (d == mejor_d and self.orden[j] < self.orden[mejor])
+                ):
+                    mejor, mejor_d = j, d
+                k = j + paso
+                if k < 0 or k >= len(precios) or abs(precio - precios[k]) != d:
+                    break
+                j = k
+        if mejor < 0:
+            return None
+        return self.nombres[mejor], precios[mejor], mejor_d, self.datos[mejor]
+
+
 def tolerancia_por_atr(atr: float, multiplicador: float = 0.35, min_pct: float = 0.001) -> float:
     """
     Tolerancia absoluta para "estar cerca" de un nivel.
@@ -1,3 +1,5 @@
+from typing import Optional
+
 import numpy as np
 import pandas as pd
 
@@ -30,8 +32,8 @@ def macd(serie: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
     return macd_line, signal_line, hist
 
 
-def atr(df: pd.DataFrame, periodo: int = 14) -> pd.Series:
-    periodo = int(periodo)
+def rango_verdadero(df: pd.DataFrame) -> pd.Series:
+    """True Range por vela (la primera solo tiene high-low)."""
     high = df["high"].astype(float)
     low = df["low"].astype(float)
     close = df["close"].astype(float)
@@ -39,14 +41,22 @@ def atr(df: pd.DataFrame, periodo: int = 14) -> pd.Series:
     tr1 = high - low
     tr2 = (high - prev_close).abs()
     tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    # fmax ignora NaN igual que max(axis=1) de pandas, sin construir un DataFrame intermedio
+    return pd.Series(np.fmax(tr1.values, np.fmax(tr2.values, tr3.values)), index=df.index)
+
+
+def atr(df: pd.DataFrame, periodo: int = 14, tr: Optional[pd.Series] = None) -> pd.Series:
+    periodo = int(periodo)
+    if tr is None:
+        tr = rango_verdadero(df)
     return tr.rolling(window=periodo, min_periods=periodo).mean().fillna(0.0)
 
 
-def adx(df: pd.DataFrame, periodo: int = 14) -> pd.Series:
+def adx(df: pd.DataFrame, periodo: int = 14, tr: Optional[pd.Series] = None) -> pd.Series:
     """
     ADX (Average Directional Index) simplificado.
     Devuelve serie 0..100 (aprox). Si no hay datos suficientes, devuelve 0.
+    `tr`: True Range ya calculado (rango_verdadero) para no repetirlo.
     """
     periodo = int(periodo)
     high = df["high"].astype(float)
@@ -59,7 +69,8 @@ def adx(df: pd.DataFrame, periodo: int = 14) -> pd.Series:
     plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
     minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
 
-    tr = atr(df, periodo=1)
+    if tr is None:
+        tr = rango_verdadero(df)
     tr_n = tr.rolling(window=periodo, min_periods=periodo).sum()
 
     plus_di = 100 * (pd.Series(plus_dm, index=df.index).rolling(window=periodo, min_periods=periodo).sum() / tr_n.replace(0, np.nan))
@@ -0,0 +1,491 @@
+"""
+Motor incremental O(1) de indicadores (streaming).
+
+`indicadores` recalcula cada serie completa con pandas en cada pasada. Aquí cada
+indicador guarda su estado y se actualiza en tiempo constante:
+- `cerrar_vela(vela)`: confirma una vela cerrada (modifica el estado).
+- `vela_en_vivo(vela)`: valores con la vela en formación SIN tocar el estado
+  (se puede llamar en cada tick).
+- `estado()` / `desde_estado()`: estado JSON-serializable para arrancar en
+  caliente tras un reinicio sin re-procesar el histórico.
+
+Equivalencia con la versión batch (ver scripts/paridad_indicadores.py): alimentado
+con la misma historia desde la misma primera vela, cada valor coincide con el de
+`indicadores` (medias/sumas móviles con la misma suma compensada que pandas).
+Ojo: EMA, MACD, VWAP y OBV dependen de la primera vela de la historia; RSI, ATR,
+ADX y ratio de volumen solo de las últimas `periodo` velas.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+NAN = float("nan")
+
+
+def _es_nan(x: float) -> bool:
+    return x != x
+
+
+def _nan_a(x: float, defecto: float) -> float:
+    return defecto if x != x else x
+
+
+class _VentanaMovil:
+    """
+    Media/suma móvil O(1) con la suma compensada (Kahan) de pandas rolling: una
+    compensación para las altas y otra para las bajas, el caso de valores constantes
+    y el ajuste de signo alrededor de cero.
+    """
+
+    __slots__ = ("n", "min_periodos", "valores", "suma", "comp", "comp_baja", "nobs", "negativos", "iguales", "previo")
+
+    def __init__(self, n: int, min_periodos: Optional[int] = None):
+        self.n = int(n)
+        self.min_periodos = int(self.n if min_periodos is None else min_periodos)
+        self.valores = deque(maxlen=self.n)
+        self.suma = 0.0
+        self.comp = 0.0
+        self.comp_baja = 0.0
+        self.nobs = 0
+        self.negativos = 0
+        self.iguales = 0
+        self.previo = NAN
+
+    @staticmethod
+    def _sumar(suma: float, comp: float, x: float):
+        y = x - comp
+        t = suma + y
+        return t, (t - suma) - y
+
+    def _avanzar(self, x: float):
+        """Estado (suma, comp, comp_baja, nobs, negativos, iguales, previo) tras quitar el más antiguo y añadir x."""
+        suma, comp, comp_baja, nobs, negativos = self.suma, self.comp, self.comp_baja, self.nobs, self.negativos
+        iguales, previo = self.iguales, self.previo
+        if len(self.valores) == self.n:
+            viejo = self.valores[0]
+            if viejo == viejo:
+                nobs -= 1
+                suma, comp_baja = self._sumar(suma, comp_baja, -viejo)
+                if math.copysign(1.0, viejo) < 0:
+                    negativos -= 1
+        if x == x:
+            nobs += 1
+            suma, comp = self._sumar(suma, comp, x)
+            if math.copysign(1.0, x) < 0:
+                negativos += 1
+            iguales = iguales + 1 if x == previo else 1
+            previo = x
+        return suma, comp, comp_baja, nobs, negativos, iguales, previo
+
+    def empujar(self, x: float) -> None:
+        x = float(x)
+        (self.suma, self.comp, self.comp_baja, self.nobs, self.negativos, self.iguales, self.previo) = self._avanzar(x)
+        self.valores.append(x)
+
+    def media(self, x: Optional[float] = None) -> float:
+        """Media actual (o la que habría tras empujar x, sin modificar nada)."""
+        if x is None:
+            suma, nobs, negativos, iguales, previo = self.suma, self.nobs, self.negativos, self.iguales, self.previo
+        else:
+            suma, _, _, nobs, negativos, iguales, previo = self._avanzar(float(x))
+        if nobs < self.min_periodos or nobs <= 0:
+            return NAN
+        resultado = suma / nobs
+        if iguales >= nobs:
+            return previo
+        if negativos == 0 and resultado < 0:
+            return 0.0
+        if negativos == nobs and resultado > 0:
+            return 0.0
+        return resultado
+
+    def total(self, x: Optional[float] = None) -> float:
+        """Suma actual (o tras empujar x, sin modificar nada)."""
+        if x is None:
+            suma, nobs, iguales, previo = self.suma, self.nobs, self.iguales, self.previo
+        else:
+            suma, _, _, nobs, _, iguales, previo = self._avanzar(float(x))
+        if nobs == 0 == self.min_periodos:
+            return 0.0
+        if nobs < self.min_periodos:
+            return NAN
+        if iguales >= nobs:
+            return previo * nobs
+        return suma
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "n": self.n,
+            "min_periodos": self.min_periodos,
+            "valores": list(self.valores),
+            "suma": self.suma,
+            "comp": self.comp,
+            "comp_baja": self.comp_baja,
+            "nobs": self.nobs,
+            "negativos": self.negativos,
+            "iguales": self.iguales,
+            "previo": self.previo,
+        }
+
+    @classmethod
+    def desde_estado(cls, d: Dict[str, Any]) -> "_VentanaMovil":
+        v = cls(d["n"], d["min_periodos"])
+        v.valores.extend(float(x) for x in d["valores"])
+        v.suma, v.comp, v.comp_baja = float(d["suma"]), float(d["comp"]), float(d["comp_baja"])
+        v.nobs, v.negativos, v.iguales = int(d["nobs"]), int(d["negativos"]), int(d["iguales"])
+        v.previo = float(d["previo"])
+        return v
+
+
+class _EMA:
+    """ewm(span, adjust=False).mean() de pandas, paso a paso."""
+
+    __slots__ = ("periodo", "alfa", "peso", "valor")
+
+    def __init__(self, periodo: int):
+        self.periodo = int(periodo)
+        com = (self.periodo - 1) / 2.0
+        self.alfa = 1.0 / (1.0 + com)
+        self.peso = 1.0 - self.alfa
+        self.valor = None  # None = sin velas todavía
+
+    def siguiente(self, x: float) -> float:
+        x = float(x)
+        if self.valor is None:
+            return x
+        v = self.valor
+        if v == v:
+            if x == x and v != x:
+                v = self.peso * v + self.alfa * x
+                v /= self.peso + self.alfa
+            return v
+        return x if x == x else v
+
+    def empujar(self, x: float) -> float:
+        self.valor = self.siguiente(x)
+        return self.valor
+
+    def estado(self) -> Dict[str, Any]:
+        return {"periodo": self.periodo, "valor": self.valor}
+
+    @classmethod
+    def desde_estado(cls, d: Dict[str, Any]) -> "_EMA":
+        e = cls(d["periodo"])
+        e.valor = None if d.get("valor") is None else float(d["valor"])
+        return e
+
+
+class MotorIndicadores:
+    """
+    Estado incremental de un símbolo/temporalidad: EMAs, RSI, MACD, ATR, ADX, VWAP,
+    OBV y ratio de volumen con los mismos periodos que usa el motor determinista.
+    Una vela es (timestamp, open, high, low, close, volume) o un dict con esas claves.
+    """
+
+    VERSION = 1
+
+    def __init__(
+        self,
+        emas: Sequence[int] = (20, 50),
+        periodo_rsi: int = 14,
+        macd: Sequence[int] = (12, 26, 9),
+        periodo_atr: int = 14,
+        periodo_adx: int = 14,
+        periodo_volumen: int = 20,
+    ):
+        self.periodos = {
+            "emas": [int(p) for p in emas],
+            "rsi": int(periodo_rsi),
+            "macd": [int(p) for p in macd],
+            "atr": int(periodo_atr),
+            "adx": int(periodo_adx),
+            "volumen": int(periodo_volumen),
+        }
+        self._emas = {p: _EMA(p) for p in self.periodos["emas"]}
+        self._rsi_ganancia = _VentanaMovil(self.periodos["rsi"])
+        self._rsi_perdida = _VentanaMovil(self.periodos["rsi"])
+        fast, slow, signal = self.periodos["macd"]
+        self._macd_rapida = _EMA(fast)
+        self._macd_lenta = _EMA(slow)
+        self._macd_senal = _EMA(signal)
+        self._atr = _VentanaMovil(self.periodos["atr"])
+        pa = self.periodos["adx"]
+        self._adx_tr = _VentanaMovil(pa)
+        self._adx_mas = _VentanaMovil(pa)
+        self._adx_menos = _VentanaMovil(pa)
+        self._adx_dx = _VentanaMovil(pa)
+        pv = self.periodos["volumen"]
+        self._volumen = _VentanaMovil(pv, max(3, pv // 2))
+        self._prev = None  # (high, low, close) de la última vela cerrada
+        self._vwap_pv = 0.0
+        self._vwap_v = 0.0
+        self._vwap_ultimo = None
+        self._obv = 0.0
+        self.velas = 0
+        self.ts_ultima = None
+        self.valores: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Paso
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _normalizar(vela) -> tuple:
+        if isinstance(vela, dict):
+            return (
+                vela.get("timestamp"),
+                float(vela["open"]),
+                float(vela["high"]),
+                float(vela["low"]),
+                float(vela["close"]),
+                float(vela["volume"]),
+            )
+        ts, o, h, l, c, v = vela[:6]
+        return ts, float(o), float(h), float(l), float(c), float(v)
+
+    def _paso(self, vela, confirmar: bool) -> Dict[str, float]:
+        ts, _o, high, low, close, volumen = self._normalizar(vela)
+        prev = self._prev
+        out: Dict[str, float] = {}
+
+        # EMAs
+        for p, e in self._emas.items():
+            out[f"ema_{p}"] = e.empujar(close) if confirmar else e.siguiente(close)
+
+        # RSI (medias simples de ganancias/pérdidas, como indicadores.rsi)
+        if prev is None:
+            ganancia, perdida = 0.0, -0.0
+        else:
+            delta = close - prev[2]
+            ganancia = delta if delta > 0 else 0.0
+            perdida = -(delta if delta < 0 else 0.0)
+        if confirmar:
+            self._rsi_ganancia.empujar(ganancia)
+            self._rsi_perdida.empujar(perdida)
+            media_g, media_p = self._rsi_ganancia.media(), self._rsi_perdida.media()
+        else:
+            media_g, media_p = self._rsi_ganancia.media(ganancia), self._rsi_perdida.media(perdida)
+        rs = NAN if (media_p == 0 or _es_nan(media_p)) else media_g / media_p
+        out["rsi"] = _nan_a(100 - (100 / (1 + rs)), 50.0)
+
+        # MACD
+        if confirmar:
+            rapida, lenta = self._macd_rapida.empujar(close), self._macd_lenta.empujar(close)
+            linea = rapida - lenta
+            senal = self._macd_senal.empujar(linea)
+        else:
+            linea = self._macd_rapida.siguiente(close) - self._macd_lenta.siguiente(close)
+            senal = self._macd_senal.siguiente(linea)
+        out["macd"], out["macd_signal"], out["macd_hist"] = linea, senal, linea - senal
+
+        # True Range (compartido por ATR y ADX)
+        tr = high - low
+        if prev is not None:
+            tr = max(tr, abs(high - prev[2]), abs(low - prev[2]))
+        if confirmar:
+            self._atr.empujar(tr)
+            out["atr"] = _nan_a(self._atr.media(), 0.0)
+        else:
+            out["atr"] = _nan_a(self._atr.media(tr), 0.0)
+
+        # ADX
+        if prev is None:
+            dm_mas = dm_menos = 0.0
+        else:
+            sube = high - prev[0]
+            baja = -(low - prev[1])
+            dm_mas = sube if (sube > baja and sube > 0) else 0.0
+            dm_menos = baja if (baja > sube and baja > 0) else 0.0
+        if confirmar:
+            for v, x in ((self._adx_tr, tr), (self._adx_mas, dm_mas), (self._adx_menos, dm_menos)):
+                v.empujar(x)
+            tr_n, s_mas, s_menos = self._adx_tr.total(), self._adx_mas.total(), self._adx_menos.total()
+        else:
+            tr_n, s_mas, s_menos = self._adx_tr.total(tr), self._adx_mas.total(dm_mas), self._adx_menos.total(dm_menos)
+        tr_n = NAN if tr_n == 0 else tr_n
+        di_mas = 100 * (s_mas / tr_n)
+        di_menos = 100 * (s_menos / tr_n)
+        suma_di = di_mas + di_menos
+        dx = NAN if (suma_di == 0 or _es_nan(suma_di)) else 100 * (abs(di_mas - di_menos) / suma_di)
+        if confirmar:
+            self._adx_dx.empujar(dx)
+            out["adx"] = _nan_a(self._adx_dx.media(), 0.0)
+        else:
+            out["adx"] = _nan_a(self._adx_dx.media(dx), 0.0)
+
+        # VWAP acumulado (volumen 0 => mantiene el último)
+        tipico = (high + low + close) / 3.0
+        vwap_pv, vwap_v, vwap_ultimo = self._vwap_pv, self._vwap_v, self._vwap_ultimo
+        if volumen != 0 and volumen == volumen:
+            vwap_pv += tipico * volumen
+            vwap_v += volumen
+            vwap_ultimo = vwap_pv / vwap_v
+        out["vwap"] = vwap_ultimo if vwap_ultimo is not None else tipico
+
+        # OBV
+        direccion = 0.0 if prev is None else float((close > prev[2]) - (close < prev[2]))
+        obv = self._obv + direccion * volumen if volumen == volumen else self._obv
+        out["obv"] = obv if volumen == volumen else 0.0
+
+        # Ratio de volumen (indicadores.volumen_ratio)
+        media_v = self._volumen.media(volumen) if not confirmar else None
+        if confirmar:
+            self._volumen.empujar(volumen)
+            media_v = self._volumen.media()
+        velas = self.velas + 1
+        if velas < 3 or _es_nan(media_v) or media_v <= 0:
+            out["volumen_ratio"] = 0.0
+        else:
+            out["volumen_ratio"] = volumen / media_v
+
+        if confirmar:
+            self._prev = (high, low, close)
+            self._vwap_pv, self._vwap_v, self._vwap_ultimo = vwap_pv, vwap_v, vwap_ultimo
+            self._obv = obv
+            self.velas = velas
+            self.ts_ultima = ts
+            self.valores = out
+        return out
+
+    def cerrar_vela(self, vela) -> Dict[str, float]:
+        """Confirma una vela cerrada y devuelve los valores a su cierre."""
+        return self._paso(vela, confirmar=True)
+
+    def vela_en_vivo(self, vela) -> Dict[str, float]:
+        """Valores con la vela en formación (no modifica el estado: se puede llamar en cada tick)."""
+        return self._paso(vela, confirmar=False)
+
+    def cargar_historia(self, velas: Iterable) -> Dict[str, float]:
+        for vela in velas:
+            self.cerrar_vela(vela)
+        return self.valores
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "version": self.VERSION,
+            "periodos": self.periodos,
+            "emas": {str(p): e.estado() for p, e in self._emas.items()},
+            "rsi": [self._rsi_ganancia.estado(), self._rsi_perdida.estado()],
+            "macd": [self._macd_rapida.estado(), self._macd_lenta.estado(), self._macd_senal.estado()],
+            "atr": self._atr.estado(),
+            "adx": [v.estado() for v in (self._adx_tr, self._adx_mas, self._adx_menos, self._adx_dx)],
+            "volumen": self._volumen.estado(),
+            "prev": list(self._prev) if self._prev is not None else None,
+            "vwap": [self._vwap_pv, self._vwap_v, self._vwap_ultimo],
+            "obv": self._obv,
+            "velas": self.velas,
+            "ts_ultima": self.ts_ultima,
+            "valores": self.valores,
+        }
+
+    @classmethod
+    def desde_estado(cls, d: Dict[str, Any]) -> "MotorIndicadores":
+        if int(d.get("version", 0)) != cls.VERSION:
+            raise ValueError("Versión de estado de indicadores incompatible")
+        p = d["periodos"]
+        m = cls(p["emas"], p["rsi"], p["macd"], p["atr"], p["adx"], p["volumen"])
+        m._emas = {int(k): _EMA.desde_estado(v) for k, v in d["emas"].items()}
+        m._rsi_ganancia, m._rsi_perdida = (_VentanaMovil.desde_estado(v) for v in d["rsi"])
+        m._macd_rapida, m._macd_lenta, m._macd_senal = (_EMA.desde_estado(v) for v in d["macd"])
+        m._atr = _VentanaMovil.desde_estado(d["atr"])
+        m._adx_tr, m._adx_mas, m._adx_menos, m._adx_dx = (_VentanaMovil.desde_estado(v) for v in d["adx"])
+        m._volumen = _VentanaMovil.desde_estado(d["volumen"])
+        m._prev = tuple(float(x) for x in d["prev"]) if d.get("prev") is not None else None
+        m._vwap_pv, m._vwap_v = float(d["vwap"][0]), float(d["vwap"][1])
+        m._vwap_ultimo = None if d["vwap"][2] is None else float(d["vwap"][2])
+        m._obv = float(d["obv"])
+        m.velas = int(d["velas"])
+        m.ts_ultima = d.get("ts_ultima")
+        m.valores = dict(d.get("valores") or {})
+        return m
+
+
+class RegistroMotores:
+    """
+    Un MotorIndicadores por símbolo, sincronizado con los frames de velas del escáner
+    (todas las filas menos la última son velas cerradas; la última es la vela en
+    formación) y persistido en JSON para el arranque en caliente.
+    """
+
+    def __init__(self, ruta: Optional[str] = None, intervalo_guardado_s: float = 60.0):
+        self.ruta = ruta
+        self.intervalo_guardado_s = float(intervalo_guardado_s)
+        self.motores: Dict[str, MotorIndicadores] = {}
+        self._lock = threading.Lock()
+        self._ultimo_guardado = time.time()
+
+    def sincronizar(self, simbolo: str, df) -> Dict[str, float]:
+        """Alimenta las velas cerradas nuevas de `df` y devuelve los valores con la vela en vivo."""
+        if df is None or len(df) == 0:
+            return {}
+        filas = df[["timestamp", "open", "high", "low", "close", "volume"]].values
+        with self._lock:
+            return self._sincronizar(simbolo, filas)
+
+    def _sincronizar(self, simbolo: str, filas) -> Dict[str, float]:
+        ts = filas[:, 0]
+        motor = self.motores.get(simbolo)
+
+        inicio = 0
+        if motor is not None and motor.ts_ultima is not None:
+            posteriores = (ts > float(motor.ts_ultima)).nonzero()[0]
+            inicio = int(posteriores[0]) if len(posteriores) else len(filas)
+            # Hueco entre la última vela conocida y el frame => no se puede continuar
+            if inicio == 0 and len(filas) > 1:
+                paso = float(ts[1]) - float(ts[0])
+                if float(ts[0]) - float(motor.ts_ultima) > paso:
+                    motor = None
+        if motor is None:
+            motor = self.motores[simbolo] = MotorIndicadores()
+            inicio = 0
+
+        for fila in filas[inicio:-1]:
+            motor.cerrar_vela(fila)
+        return motor.vela_en_vivo(filas[-1])
+
+    def guardar(self, ruta: Optional[str] = None, forzar: bool = True) -> bool:
+        """Escritura atómica del estado (sin `forzar`, como mucho cada intervalo_guardado_s)."""
+        ruta = ruta or self.ruta
+        if not ruta:
+            return False
+        ahora = time.time()
+        if not forzar and (ahora - self._ultimo_guardado) < self.intervalo_guardado_s:
+            return False
+        self._ultimo_guardado = ahora
+        with self._lock:
+            estados = {s: m.estado() for s, m in self.motores.items()}
+        ruta_tmp = ruta + ".tmp"
+        try:
+            with open(ruta_tmp, "w", encoding="utf-8") as f:
+                json.dump(estados, f)
+            os.replace(ruta_tmp, ruta)
+            return True
+        except Exception as e:
+            print(f"⚠️ INDICADORES INCREMENTALES: no se pudo guardar el estado: {e}")
+            return False
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "RegistroMotores":
+        registro = cls(ruta)
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+            for simbolo, estado in (datos or {}).items():
+                try:
+                    registro.motores[simbolo] = MotorIndicadores.desde_estado(estado)
+                except Exception:
+                    continue
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ INDICADORES INCREMENTALES: estado ilegible, arranque en frío: {e}")
+        return registro
@@ -1,9 +1,15 @@
+import math
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from . import contexto_indicadores
+from . import patrones_kernel
+# Pivotes vectorizados (NumPy); el motor usa patrones_kernel.pivotes (Numba si está instalado)
+from .patrones_kernel import pivotes_numpy as pivotes_kernel  # noqa: F401
+
 
 @dataclass(frozen=True)
 class PatronDetectado:
@@ -13,28 +19,38 @@ class PatronDetectado:
     detalle: Dict
 
 
-def _pivotes(df: pd.DataFrame, ventana: int = 3) -> Tuple[List[int], List[int]]:
+def _pivotes_arrays(df: pd.DataFrame, ventana: int = 3, ctx=None) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Retorna listas de índices (en df) de pivot highs y pivot lows.
+    Índices de pivot highs / lows como arrays int64 de solo lectura.
+    Se calculan una vez por frame (contexto de indicadores) y los comparten todos los detect_*.
     """
     if df is None or len(df) < (ventana * 2 + 10):
-        return [], []
+        vacio = np.empty(0, dtype=np.int64)
+        return vacio, vacio
 
     ventana = int(max(2, ventana))
-    highs = df["high"].astype(float).values
-    lows = df["low"].astype(float).values
+    if ctx is None:
+        ctx = contexto_indicadores.contexto_de(df)
 
-    piv_hi = []
-    piv_lo = []
-    for i in range(ventana, len(df) - ventana):
-        h = highs[i]
-        l = lows[i]
-        if h == np.max(highs[i - ventana : i + ventana + 1]):
-            piv_hi.append(i)
-        if l == np.min(lows[i - ventana : i + ventana + 1]):
-            piv_lo.append(i)
+    def _calcular():
+        piv_hi, piv_lo = patrones_kernel.pivotes(
+            np.ascontiguousarray(ctx.serie("high").values), np.ascontiguousarray(ctx.serie("low").values), ventana
+        )
+        piv_hi = np.asarray(piv_hi, dtype=np.int64)
+        piv_lo = np.asarray(piv_lo, dtype=np.int64)
+        piv_hi.flags.writeable = False
+        piv_lo.flags.writeable = False
+        return piv_hi, piv_lo
 
-    return piv_hi, piv_lo
+    return ctx.memo(("pivotes", ventana), _calcular)
+
+
+def _pivotes(df: pd.DataFrame, ventana: int = 3) -> Tuple[List[int], List[int]]:
+    """
+    Retorna listas de índices (en df) de pivot highs y pivot lows.
+    """
+    piv_hi, piv_lo = _pivotes_arrays(df, ventana)
+    return piv_hi.tolist(), piv_lo.tolist()
 
 
 def _tolerancia(tol_abs: float, precio: float, tol_pct: float = 0.003) -> float:
@@ -427,7 +443,75 @@ def detectar_cuna(df: pd.DataFrame, atr: float = 0.0, ventana_pivote: int = 3) -
     return None
 
 
-def detectar_patron(df: pd.DataFrame, atr: float = 0.0) -> Optional[PatronDetectado]:
+_DIRECCIONES = {1.0: "LONG", -1.0: "SHORT", 0.0: "ESPERAR"}
+_RUPTURAS = {1.0: "ARRIBA", -1.0: "ABAJO", 0.0: False}
+
+
+def _patron_desde_fila(k: int, fila: np.ndarray) -> PatronDetectado:
+    """Traduce una fila de patrones_kernel.evaluar_detectores al PatronDetectado del detector k."""
+    kn = patrones_kernel
+    variante = int(fila[kn.VARIANTE])
+    direccion = _DIRECCIONES[float(fila[kn.DIRECCION])]
+    fuerza = float(fila[kn.FUERZA])
+    ruptura = float(fila[kn.RUPTURA])
+    v = [float(x) for x in fila[kn.VALORES :]]
+
+    if k == kn.HCH:
+        detalle = {"hombro_izq": v[0], "cabeza": v[1], "hombro_der": v[2], "neckline": v[3], "ruptura": bool(ruptura)}
+        return PatronDetectado("HCHi" if variante else "HCH", direccion, fuerza, detalle)
+    if k == kn.TRIPLE:
+        clave = "suelos" if variante else "picos"
+        detalle = {clave: v[0:3], "neckline": v[3], "ruptura": bool(ruptura)}
+        return PatronDetectado("TRIPLE_SUELO" if variante else "TRIPLE_TECHO", direccion, fuerza, detalle)
+    if k == kn.DOBLE:
+        if variante:
+            detalle = {"suelo1": v[0], "suelo2": v[1], "neckline": v[2], "ruptura": bool(ruptura)}
+            return PatronDetectado("DOBLE_SUELO", direccion, fuerza, detalle)
+        detalle = {"pico1": v[0], "pico2": v[1], "neckline": v[2], "ruptura": bool(ruptura)}
+        return PatronDetectado("DOBLE_TECHO", direccion, fuerza, detalle)
+    if k == kn.TRIANGULO_ASC_DESC:
+        if variante:
+            detalle = {"soporte": v[0], "highs": v[1:4], "ruptura": _RUPTURAS[ruptura]}
+            return PatronDetectado("TRIANGULO_DESCENDENTE", direccion, fuerza, detalle)
+        detalle = {"resistencia": v[0], "lows": v[1:4], "ruptura": _RUPTURAS[ruptura]}
+        return PatronDetectado("TRIANGULO_ASCENDENTE", direccion, fuerza, detalle)
+    if k == kn.TRIANGULO:
+        detalle = {"highs": v[0:3], "lows": v[3:6], "ruptura": _RUPTURAS[ruptura]}
+        return PatronDetectado("TRIANGULO_SIMETRICO", direccion, fuerza, detalle)
+    if k == kn.RECTANGULO:
+        detalle = {"rango_alto": v[0], "rango_bajo": v[1], "ruptura": _RUPTURAS[ruptura]}
+        return PatronDetectado("RECTANGULO", direccion, fuerza, detalle)
+    if k == kn.CUNA:
+        detalle = {"highs": v[0:3], "lows": v[3:6], "ruptura": _RUPTURAS[ruptura]}
+        return PatronDetectado("CUÑA_BAJISTA" if variante else "CUÑA_ALCISTA", direccion, fuerza, detalle)
+    detalle = {"impulso": v[0], "rango_consolidacion": v[1], "ruptura": _RUPTURAS[ruptura]}
+    return PatronDetectado("BANDERA_BAJISTA" if variante else "BANDERA_ALCISTA", direccion, fuerza, detalle)
+
+
+def _candidatos_kernel(df: pd.DataFrame, atr: float) -> Optional[List[PatronDetectado]]:
+    """
+    Los 8 detectores en una pasada sobre arrays (patrones_kernel). None si el frame
+    no cumple lo que asume el núcleo (sin NaN, ATR numérico): entonces se usan los detect_*.
+    """
+    try:
+        atr = float(atr)
+    except Exception:
+        return None
+    if df is None or len(df) == 0 or not math.isfinite(atr):
+        return None
+    ctx = contexto_indicadores.contexto_de(df)
+    high = np.ascontiguousarray(ctx.serie("high").values)
+    low = np.ascontiguousarray(ctx.serie("low").values)
+    close = float(ctx.serie("close").iloc[-1])
+    if not (math.isfinite(close) and np.isfinite(high).all() and np.isfinite(low).all()):
+        return None
+    piv_hi, piv_lo = _pivotes_arrays(df, 3, ctx)
+    matriz = patrones_kernel.evaluar_detectores(high, low, close, atr, piv_hi, piv_lo)
+    return [_patron_desde_fila(k, matriz[k]) for k in range(patrones_kernel.N_DETECTORES) if matriz[k, patrones_kernel.ACTIVO]]
+
+
+def _candidatos_detectores(df: pd.DataFrame, atr: float) -> List[PatronDetectado]:
+    """Implementación de referencia: cada detect_* por separado sobre el DataFrame."""
     candidatos: List[PatronDetectado] = []
     for detector in (
         detectar_hch,
@@ -445,6 +529,22 @@ def detectar_patron(df: pd.DataFrame, atr: float = 0.0) -> Optional[PatronDetect
                 candidatos.append(patron)
         except Exception:
             continue
+    return candidatos
+
+
+def detectar_patron(df: pd.DataFrame, atr: float = 0.0, rapido: bool = True) -> Optional[PatronDetectado]:
+    """
+    Mejor patrón del frame. `rapido` usa el núcleo sobre arrays (mismos resultados);
+    False fuerza los detect_* de referencia.
+    """
+    candidatos = None
+    if rapido:
+        try:
+            candidatos = _candidatos_kernel(df, atr)
+        except Exception:
+            candidatos = None
+    if candidatos is None:
+        candidatos = _candidatos_detectores(df, atr)
 
     if not candidatos:
         return None
@@ -0,0 +1,329 @@
+"""
+Núcleo numérico de los detectores chartistas sobre arrays float64.
+
+Los detect_* de patrones_chartistas leen el frame con `df.iloc[...]` escalar y
+slices de pandas (~10 µs por acceso): con los indicadores ya memoizados eran la
+mayor parte del coste por símbolo. Aquí los 8 detectores de detectar_patron se
+evalúan en una sola pasada sobre high/low (+ último close, ATR y pivotes) y el
+resultado se devuelve como una matriz (8, ANCHO) que patrones_chartistas traduce
+a PatronDetectado.
+
+Numba es opcional: si está instalado, `pivotes` y `evaluar_detectores` se
+compilan (njit); si no, `pivotes` usa las vistas deslizantes de NumPy y
+`evaluar_detectores` corre como Python sobre arrays NumPy. Las dos variantes sin
+compilar quedan accesibles (`*_py`) para la prueba de paridad.
+
+Paridad exacta con los detectores originales: las medias usan el mismo orden de
+suma que numpy/pandas (`_suma_numpy`), no la suma secuencial que haría numba.
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Numba opcional (sin él: NumPy / Python puro, mismos resultados)
+try:
+    import numba
+except Exception:
+    numba = None
+
+NUMBA_DISPONIBLE = numba is not None
+
+
+def _compilar(fn):
+    if numba is None:
+        return fn
+    return numba.njit(cache=True, nogil=True)(fn)
+
+
+# Filas de la matriz de resultados (mismo orden que detectar_patron)
+HCH, TRIPLE, DOBLE, TRIANGULO_ASC_DESC, TRIANGULO, RECTANGULO, CUNA, BANDERA = range(8)
+N_DETECTORES = 8
+
+# Columnas: activo, variante (0/1), dirección (1 LONG, -1 SHORT, 0 ESPERAR), fuerza,
+# ruptura (1 sí/ARRIBA, -1 ABAJO, 0 no) y hasta 7 valores del detalle
+ACTIVO, VARIANTE, DIRECCION, FUERZA, RUPTURA, VALORES = 0, 1, 2, 3, 4, 5
+ANCHO = VALORES + 7
+
+
+def pivotes_numpy(highs: np.ndarray, lows: np.ndarray, ventana: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pivotes vectorizados: i es pivot high si highs[i] es el máximo de [i-ventana, i+ventana]
+    (idem low con el mínimo). Máximo/mínimo deslizante sobre vistas con strides, sin bucle.
+    """
+    n = len(highs)
+    ancho = 2 * ventana + 1
+    if n < ancho:
+        vacio = np.empty(0, dtype=np.int64)
+        return vacio, vacio
+    max_h = sliding_window_view(highs, ancho).max(axis=1)
+    min_l = sliding_window_view(lows, ancho).min(axis=1)
+    piv_hi = np.flatnonzero(highs[ventana : n - ventana] == max_h) + ventana
+    piv_lo = np.flatnonzero(lows[ventana : n - ventana] == min_l) + ventana
+    return piv_hi, piv_lo
+
+
+def _pivotes_bucle(highs, lows, ventana):
+    """Misma definición que pivotes_numpy en un bucle (para numba: sin ventanas temporales)."""
+    n = len(highs)
+    piv_hi = np.empty(max(0, n), dtype=np.int64)
+    piv_lo = np.empty(max(0, n), dtype=np.int64)
+    n_hi = 0
+    n_lo = 0
+    for i in range(ventana, n - ventana):
+        es_hi = True
+        es_lo = True
+        for j in range(i - ventana, i + ventana + 1):
+            # `x == max(ventana)` en NumPy: un NaN en la ventana impide el pivote
+            if not highs[j] <= highs[i]:
+                es_hi = False
+            if not lows[j] >= lows[i]:
+                es_lo = False
+        if es_hi:
+            piv_hi[n_hi] = i
+            n_hi += 1
+        if es_lo:
+            piv_lo[n_lo] = i
+            n_lo += 1
+    return piv_hi[:n_hi], piv_lo[:n_lo]
+
+
+def _suma_numpy(x):
+    """
+    Suma con el orden de np.add.reduce (pairwise: 8 acumuladores; secuencial con
+    menos de 8 elementos). Válida hasta 128 elementos, que es lo que se usa aquí.
+    """
+    n = len(x)
+    if n < 8:
+        res = x[0] if n else 0.0
+        for i in range(1, n):
+            res += x[i]
+        return res
+    r0, r1, r2, r3, r4, r5, r6, r7 = x[0], x[1], x[2], x[3], x[4], x[5], x[6], x[7]
+    i = 8
+    tope = n - (n % 8)
+    while i < tope:
+        r0 += x[i]
+        r1 += x[i + 1]
+        r2 += x[i + 2]
+        r3 += x[i + 3]
+        r4 += x[i + 4]
+        r5 += x[i + 5]
+        r6 += x[i + 6]
+        r7 += x[i + 7]
+        i += 8
+    res = ((r0 + r1) + (r2 + r3)) + ((r4 + r5) + (r6 + r7))
+    while i < n:
+        res += x[i]
+        i += 1
+    return res
+
+
+def _tolerancia(tol_abs, precio, tol_pct):
+    if tol_abs > 0:
+        return tol_abs
+    return abs(precio) * tol_pct
+
+
+def evaluar_detectores(high, low, close, atr, piv_hi, piv_lo):
+    """
+    Los 8 detectores de detectar_patron sobre arrays. `close` es el último cierre,
+    `piv_hi`/`piv_lo` los índices de pivotes (ventana 3). Devuelve (8, ANCHO).
+    """
+    out = np.zeros((N_DETECTORES, ANCHO))
+    n_hi = len(piv_hi)
+    n_lo = len(piv_lo)
+
+    # --- HCH / HCHi ---
+    tol = _tolerancia(atr * 0.7, close, 0.005)
+    hecho = False
+    if n_hi >= 3:
+        i1, i2, i3 = piv_hi[n_hi - 3], piv_hi[n_hi - 2], piv_hi[n_hi - 1]
+        p1, p2, p3 = high[i1], high[i2], high[i3]
+        if abs(p1 - p3) <= tol and p2 > p1 + tol * 0.5 and p2 > p3 + tol * 0.5:
+            neckline = min(low[min(i1, i2) : max(i1, i2) + 1].min(), low[min(i2, i3) : max(i2, i3) + 1].min())
+            ruptura = close < neckline
+            fila = out[HCH]
+            fila[ACTIVO], fila[VARIANTE], fila[DIRECCION] = 1.0, 0.0, -1.0
+            fila[FUERZA] = min(1.0, 0.8 + (0.15 if ruptura else 0.0))
+            fila[RUPTURA] = 1.0 if ruptura else 0.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2], fila[VALORES + 3] = p1, p2, p3, neckline
+            hecho = True
+    if not hecho and n_lo >= 3:
+        i1, i2, i3 = piv_lo[n_lo - 3], piv_lo[n_lo - 2], piv_lo[n_lo - 1]
+        p1, p2, p3 = low[i1], low[i2], low[i3]
+        if abs(p1 - p3) <= tol and p2 < p1 - tol * 0.5 and p2 < p3 - tol * 0.5:
+            neckline = max(high[min(i1, i2) : max(i1, i2) + 1].max(), high[min(i2, i3) : max(i2, i3) + 1].max())
+            ruptura = close > neckline
+            fila = out[HCH]
+            fila[ACTIVO], fila[VARIANTE], fila[DIRECCION] = 1.0, 1.0, 1.0
+            fila[FUERZA] = min(1.0, 0.8 + (0.15 if ruptura else 0.0))
+            fila[RUPTURA] = 1.0 if ruptura else 0.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2], fila[VALORES + 3] = p1, p2, p3, neckline
+
+    # --- Triple techo / suelo ---
+    tol = _tolerancia(atr * 0.65, close, 0.004)
+    hecho = False
+    if n_hi >= 3:
+        a, b, c = piv_hi[n_hi - 3], piv_hi[n_hi - 2], piv_hi[n_hi - 1]
+        pa, pb, pc = high[a], high[b], high[c]
+        if max(pa, pb, pc) - min(pa, pb, pc) <= tol:
+            neckline = low[min(a, c) : max(a, c) + 1].min()
+            ruptura = close < neckline
+            fila = out[TRIPLE]
+            fila[ACTIVO], fila[VARIANTE], fila[DIRECCION] = 1.0, 0.0, -1.0
+            fila[FUERZA] = min(1.0, 0.78 + (0.15 if ruptura else 0.0))
+            fila[RUPTURA] = 1.0 if ruptura else 0.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2], fila[VALORES + 3] = pa, pb, pc, neckline
+            hecho = True
+    if not hecho and n_lo >= 3:
+        a, b, c = piv_lo[n_lo - 3], piv_lo[n_lo - 2], piv_lo[n_lo - 1]
+        pa, pb, pc = low[a], low[b], low[c]
+        if max(pa, pb, pc) - min(pa, pb, pc) <= tol:
+            neckline = high[min(a, c) : max(a, c) + 1].max()
+            ruptura = close > neckline
+            fila = out[TRIPLE]
+            fila[ACTIVO], fila[VARIANTE], fila[DIRECCION] = 1.0, 1.0, 1.0
+            fila[FUERZA] = min(1.0, 0.78 + (0.15 if ruptura else 0.0))
+            fila[RUPTURA] = 1.0 if ruptura else 0.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2], fila[VALORES + 3] = pa, pb, pc, neckline
+
+    # --- Doble techo / suelo ---
+    tol = _tolerancia(atr * 0.6, close, 0.004)
+    hecho = False
+    if n_hi >= 2:
+        a, b = piv_hi[n_hi - 2], piv_hi[n_hi - 1]
+        pa, pb = high[a], high[b]
+        if abs(pa - pb) <= tol:
+            neckline = low[min(a, b) : max(a, b) + 1].min()
+            ruptura = close < neckline
+            fila = out[DOBLE]
+            fila[ACTIVO], fila[VARIANTE], fila[DIRECCION] = 1.0, 0.0, -1.0
+            fila[FUERZA] = min(1.0, 0.75 + (0.15 if ruptura else 0.0))
+            fila[RUPTURA] = 1.0 if ruptura else 0.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2] = pa, pb, neckline
+            hecho = True
+    if not hecho and n_lo >= 2:
+        a, b = piv_lo[n_lo - 2], piv_lo[n_lo - 1]
+        pa, pb = low[a], low[b]
+        if abs(pa - pb) <= tol:
+            neckline = high[min(a, b) : max(a, b) + 1].max()
+            ruptura = close > neckline
+            fila = out[DOBLE]
+            fila[ACTIVO], fila[VARIANTE], fila[DIRECCION] = 1.0, 1.0, 1.0
+            fila[FUERZA] = min(1.0, 0.75 + (0.15 if ruptura else 0.0))
+            fila[RUPTURA] = 1.0 if ruptura else 0.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2] = pa, pb, neckline
+
+    if n_hi >= 3 and n_lo >= 3:
+        h0, h1, h2 = high[piv_hi[n_hi - 3]], high[piv_hi[n_hi - 2]], high[piv_hi[n_hi - 1]]
+        l0, l1, l2 = low[piv_lo[n_lo - 3]], low[piv_lo[n_lo - 2]], low[piv_lo[n_lo - 1]]
+        highs_decrecientes = h0 > h1 and h1 > h2
+        lows_crecientes = l0 < l1 and l1 < l2
+
+        # --- Triángulo ascendente / descendente ---
+        tol = _tolerancia(atr * 0.55, close, 0.004)
+        resistencia = _suma_numpy(np.array([h0, h1, h2])) / 3.0
+        soporte = _suma_numpy(np.array([l0, l1, l2])) / 3.0
+        fila = out[TRIANGULO_ASC_DESC]
+        if max(h0, h1, h2) - min(h0, h1, h2) <= tol and lows_crecientes:
+            fila[ACTIVO], fila[VARIANTE] = 1.0, 0.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2], fila[VALORES + 3] = resistencia, l0, l1, l2
+            if close > resistencia:
+                fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 1.0, 0.78, 1.0
+            elif close < l2:
+                fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = -1.0, 0.70, -1.0
+            else:
+                fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 0.0, 0.55, 0.0
+        elif max(l0, l1, l2) - min(l0, l1, l2) <= tol and highs_decrecientes:
+            fila[ACTIVO], fila[VARIANTE] = 1.0, 1.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2], fila[VALORES + 3] = soporte, h0, h1, h2
+            if close < soporte:
+                fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = -1.0, 0.78, -1.0
+            elif close > h2:
+                fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 1.0, 0.70, 1.0
+            else:
+                fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 0.0, 0.55, 0.0
+
+        # --- Triángulo simétrico ---
+        if highs_decrecientes and lows_crecientes:
+            fila = out[TRIANGULO]
+            fila[ACTIVO] = 1.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2] = h0, h1, h2
+            fila[VALORES + 3], fila[VALORES + 4], fila[VALORES + 5] = l0, l1, l2
+            if close > h2:
+                fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 1.0, 0.7 + 0.2, 1.0
+            elif close < l2:
+                fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = -1.0, 0.7 + 0.2, -1.0
+            else:
+                fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 0.0, 0.55, 0.0
+
+        # --- Cuña ---
+        rango_0 = h0 - l0
+        rango_2 = h2 - l2
+        if rango_0 > 0 and rango_2 < (rango_0 * 0.85):
+            fila = out[CUNA]
+            if h0 < h1 < h2 and l0 < l1 < l2:
+                ruptura = close < l2
+                fila[ACTIVO], fila[VARIANTE] = 1.0, 0.0
+                fila[DIRECCION] = -1.0 if ruptura else 0.0
+                fila[FUERZA] = min(1.0, 0.62 + (0.20 if ruptura else 0.0))
+                fila[RUPTURA] = -1.0 if ruptura else 0.0
+            elif h0 > h1 > h2 and l0 > l1 > l2:
+                ruptura = close > h2
+                fila[ACTIVO], fila[VARIANTE] = 1.0, 1.0
+                fila[DIRECCION] = 1.0 if ruptura else 0.0
+                fila[FUERZA] = min(1.0, 0.62 + (0.20 if ruptura else 0.0))
+                fila[RUPTURA] = 1.0 if ruptura else 0.0
+            fila[VALORES], fila[VALORES + 1], fila[VALORES + 2] = h0, h1, h2
+            fila[VALORES + 3], fila[VALORES + 4], fila[VALORES + 5] = l0, l1, l2
+
+    # --- Rectángulo ---
+    if n_hi >= 2 and n_lo >= 2:
+        tol = _tolerancia(atr * 0.55, close, 0.004)
+        h0, h1 = high[piv_hi[n_hi - 2]], high[piv_hi[n_hi - 1]]
+        l0, l1 = low[piv_lo[n_lo - 2]], low[piv_lo[n_lo - 1]]
+        if max(h0, h1) - min(h0, h1) <= tol and max(l0, l1) - min(l0, l1) <= tol:
+            rango_alto = (h0 + h1) / 2.0
+            rango_bajo = (l0 + l1) / 2.0
+            if not (rango_bajo <= 0 or rango_alto <= rango_bajo):
+                fila = out[RECTANGULO]
+                fila[ACTIVO] = 1.0
+                fila[VALORES], fila[VALORES + 1] = rango_alto, rango_bajo
+                if close > rango_alto:
+                    fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 1.0, 0.72, 1.0
+                elif close < rango_bajo:
+                    fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = -1.0, 0.72, -1.0
+                else:
+                    fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 0.0, 0.50, 0.0
+
+    # --- Bandera ---
+    n = len(high)
+    if n >= 40 and atr > 0:
+        impulso = (high[n - 30 : n - 10] - low[n - 30 : n - 10]).max()
+        if not impulso < 2.0 * atr:
+            rango_med = _suma_numpy(high[n - 10 :] - low[n - 10 :]) / 10.0
+            if not rango_med > 1.0 * atr:
+                fila = out[BANDERA]
+                fila[VALORES], fila[VALORES + 1] = impulso, rango_med
+                if close > high[n - 10 :].max():
+                    fila[ACTIVO], fila[VARIANTE], fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 1.0, 0.0, 1.0, 0.75, 1.0
+                elif close < low[n - 10 :].min():
+                    fila[ACTIVO], fila[VARIANTE], fila[DIRECCION], fila[FUERZA], fila[RUPTURA] = 1.0, 1.0, -1.0, 0.75, -1.0
+
+    return out
+
+
+# Variantes sin compilar (paridad) y las que usa el motor
+pivotes_py = _pivotes_bucle
+evaluar_detectores_py = evaluar_detectores
+if NUMBA_DISPONIBLE:
+    _suma_numpy = _compilar(_suma_numpy)
+    _tolerancia = _compilar(_tolerancia)
+    pivotes = _compilar(_pivotes_bucle)
+    evaluar_detectores = _compilar(evaluar_detectores)
+else:
+    pivotes = pivotes_numpy
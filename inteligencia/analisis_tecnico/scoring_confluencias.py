@@ -1,15 +1,30 @@
 from __future__ import annotations
 
 import math
+import time
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from . import contexto_indicadores
 from . import fibonacci
-from . import indicadores
 from . import patrones_chartistas
 
+# Tramos de tiempo (opcional: solo existe cuando corre dentro del core)
+try:
+    import tiempos_ciclo
+except Exception:
+    tiempos_ciclo = None
+
+
+def _medir(etapa: str, inicio: float, simbolo: str = "") -> float:
+    """Registra el tramo [inicio, ahora] y devuelve `ahora` (inicio del siguiente)."""
+    ahora = time.perf_counter()
+    if tiempos_ciclo is not None:
+        tiempos_ciclo.MEDIDOR.registrar(etapa, ahora - inicio, simbolo or None)
+    return ahora
+
 
 def _clamp(x: float, a: float, b: float) -> float:
     try:
@@ -62,14 +77,18 @@ def _sl_por_estructura(df: pd.DataFrame, direccion: str, precio: float, atr: flo
     """
     if df is None or len(df) < 30:
         return None
+    return _sl_desde_extremos(contexto_indicadores.contexto_de(df).extremos(50), direccion, precio, atr)
 
+
+def _sl_desde_extremos(
+    extremos: Tuple[float, float], direccion: str, precio: float, atr: float
+) -> Optional[Dict[str, float]]:
+    """SL por estructura a partir de (swing_low, swing_high) ya calculados."""
     direccion = str(direccion).upper()
     precio = float(precio)
     atr = float(atr or 0.0)
 
-    sub = df.iloc[-50:] if len(df) >= 50 else df
-    swing_low = float(sub["low"].astype(float).min())
-    swing_high = float(sub["high"].astype(float).max())
+    swing_low, swing_high = extremos
 
     buffer = max(atr * 0.35, precio * 0.0015)  # ATR o ~0.15% del precio
 
@@ -137,7 +156,13 @@ def _detectar_divergencia_rsi(
     return None
 
 
-def evaluar_setup_determinista(df: pd.DataFrame, simbolo: str = "", temporalidad: str = "") -> Dict[str, Any]:
+def evaluar_setup_determinista(
+    df: pd.DataFrame,
+    simbolo: str = "",
+    temporalidad: str = "",
+    perezosa: bool = False,
+    swings: Optional[Any] = None,
+) -> Dict[str, Any]:
     """
     Motor de señales determinista + scoring por confluencias.
 
@@ -150,6 +175,10 @@ def evaluar_setup_determinista(df: pd.DataFrame, simbolo: str = "", temporalidad
       "confluencias": [...],
       "invalidaciones": [...]
     }
+
+    perezosa=True: solo scores, decisión y plan; el texto (razones, confluencias,
+    razon, detalle_setup) se construye con materializar_senal si hace falta.
+    swings: RegistroSwings opcional (ver analizar_estructura).
     """
     if df is None or len(df) < 50:
         razones = ["Datos insuficientes para análisis técnico determinista."]
@@ -169,133 +198,284 @@ def evaluar_setup_determinista(df: pd.DataFrame, simbolo: str = "", temporalidad
             "meta": {"simbolo": simbolo, "temporalidad": temporalidad, "scores": {"long": 0, "short": 0}},
         }
 
-    precio = float(df["close"].iloc[-1])
-    decs = _decimales_por_precio(precio)
-
-    rsi_series = indicadores.rsi(df["close"].astype(float), periodo=14)
-    rsi_val = float(rsi_series.iloc[-1])
-    ema_fast = float(indicadores.ema(df["close"].astype(float), 20).iloc[-1])
-    ema_slow = float(indicadores.ema(df["close"].astype(float), 50).iloc[-1])
-    macd_line, macd_sig, macd_hist = indicadores.macd(df["close"].astype(float))
-    macd_val = float(macd_line.iloc[-1])
-    macd_sig_val = float(macd_sig.iloc[-1])
-    macd_hist_val = float(macd_hist.iloc[-1])
-    atr_series = indicadores.atr(df, periodo=14)
+    estructura = analizar_estructura(df, simbolo=simbolo, swings=swings)
+    return componer_senal(
+        estructura, float(df["close"].iloc[-1]), simbolo=simbolo, temporalidad=temporalidad, perezosa=perezosa
+    )
+
+
+def analizar_estructura(df: pd.DataFrame, simbolo: str = "", swings: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Fase del motor que depende solo del frame: indicadores, patrón, swing/retrocesos
+    Fibonacci, divergencias RSI y extremos para el SL por estructura.
+
+    No mira el precio vivo, así que el resultado vale mientras no cierre otra vela
+    (ver `cache_senales`). Requiere >= 50 velas (lo garantiza evaluar_setup_determinista).
+
+    Con `swings` (swings_incrementales.RegistroSwings) y `simbolo`, el swing sale del
+    rastreador incremental del símbolo y los niveles de todos sus lookbacks van a
+    índices por búsqueda binaria ("niveles_fibo"). Con el lookback 60 solo, mismo
+    resultado que detectar_swing_basico.
+    """
+    t_tramo = time.perf_counter()
+
+    # Contexto compartido: el radar (RSI/ATR) y tpsl_profesional reutilizan estas series
+    ctx = contexto_indicadores.contexto_de(df)
+    rsi_series = ctx.rsi(14)
+    macd_line, macd_sig, macd_hist = ctx.macd()
+    atr_series = ctx.atr(14)
+    adx_series = ctx.adx(14)
+    vwap_series = ctx.vwap()
     atr_val = float(atr_series.iloc[-1]) if len(atr_series) else 0.0
-    adx_series = indicadores.adx(df, periodo=14)
-    adx_val = float(adx_series.iloc[-1]) if len(adx_series) else 0.0
-    vwap_series = indicadores.vwap(df)
-    vwap_val = float(vwap_series.iloc[-1]) if len(vwap_series) else precio
-    vol_ratio = float(indicadores.volumen_ratio(df, periodo=20))
+    indicadores = {
+        "rsi": float(rsi_series.iloc[-1]),
+        "ema_fast": float(ctx.ema(20).iloc[-1]),
+        "ema_slow": float(ctx.ema(50).iloc[-1]),
+        "macd": float(macd_line.iloc[-1]),
+        "macd_signal": float(macd_sig.iloc[-1]),
+        "macd_hist": float(macd_hist.iloc[-1]),
+        "atr": atr_val,
+        "adx": float(adx_series.iloc[-1]) if len(adx_series) else 0.0,
+        "vwap": float(vwap_series.iloc[-1]) if len(vwap_series) else float(df["close"].iloc[-1]),
+        "vol_ratio": ctx.volumen_ratio(20),
+    }
+    t_tramo = _medir("indicadores", t_tramo, simbolo)
+
+    # --- Patrones ---
+    patron = patrones_chartistas.detectar_patron(df, atr=atr_val)
+    t_tramo = _medir("patrones", t_tramo, simbolo)
+
+    # --- Fibonacci (swing y niveles; la cercanía al precio se mira al componer) ---
+    swing = None
+    niveles_fibo = None
+    incremental = swings is not None and bool(simbolo)
+    if incremental:
+        try:
+            swing, indice_retro, indice_ext = swings.niveles(simbolo, df)
+            if swing is not None and atr_val > 0:
+                niveles_fibo = {"retrocesos": indice_retro, "extensiones": indice_ext}
+        except Exception:
+            incremental = False
+    if not incremental:
+        swing = fibonacci.detectar_swing_basico(df, lookback=60)
+    retro = fibonacci.niveles_retroceso(swing) if swing is not None and atr_val > 0 else None
+
+    # --- Divergencias RSI ---
+    divergencia = _detectar_divergencia_rsi(df, rsi_series, ventana_pivote=3, min_delta_rsi=2.0)
+    t_tramo = _medir("fibonacci_divergencias", t_tramo, simbolo)
+
+    return {
+        "indicadores": indicadores,
+        "patron": patron,
+        "swing": swing,
+        "retro": retro,
+        "niveles_fibo": niveles_fibo,
+        "divergencia": divergencia,
+        "extremos": ctx.extremos(50) if len(df) >= 30 else None,
+    }
+
+
+# Orden de las claves de la señal (esquema nuevo + legacy)
+_ORDEN_CLAVES = (
+    "setup", "lado", "score", "razones", "confluencias", "invalidaciones",
+    "decision", "confianza", "razon", "detalle_setup", "plan", "meta",
+)
+
+# Códigos de las señales de scoring que cuentan como confluencia (RSI extremo, ADX y VWAP solo suman)
+_CONFLUENCIAS = frozenset(("EMA", "MACD", "DIVERGENCIA_RSI", "VOLUMEN", "PATRON", "FIBONACCI"))
+
+# Clave privada de una señal perezosa: lo necesario para redactarla más tarde
+CLAVE_DIFERIDA = "_detalle_diferido"
+
+
+class _Diferida:
+    """Estructura + puntuación de una señal perezosa. Inmutable en la práctica: no se copia."""
+
+    __slots__ = ("estructura", "puntuacion")
+
+    def __init__(self, estructura: Dict[str, Any], puntuacion: Dict[str, Any]):
+        self.estructura = estructura
+        self.puntuacion = puntuacion
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self) -> str:
+        return "<detalle diferido>"
+
+
+def componer_senal(
+    estructura: Dict[str, Any],
+    precio: float,
+    simbolo: str = "",
+    temporalidad: str = "",
+    perezosa: bool = False,
+) -> Dict[str, Any]:
+    """
+    Fase del motor que depende del precio vivo: lado del VWAP, cercanía a los
+    retrocesos Fibonacci, scoring, decisión y plan (SL/TP/RR/apalancamiento).
+
+    Con la `estructura` de analizar_estructura y el último close del mismo frame
+    reproduce exactamente evaluar_setup_determinista.
+
+    perezosa=True devuelve solo la parte numérica (setup, lado, score, invalidaciones,
+    decision, confianza, plan, meta): sin razones, confluencias, razon ni
+    detalle_setup. `materializar_senal` la completa cuando el símbolo se promueve.
+    """
+    puntuacion = _puntuar(estructura, float(precio))
+    senal = _senal_numerica(puntuacion, simbolo, temporalidad)
+    if perezosa:
+        senal[CLAVE_DIFERIDA] = _Diferida(estructura, puntuacion)
+        return senal
+    return _ordenar(senal, _redactar(estructura, puntuacion))
+
+
+def materializar_senal(senal: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Completa una señal perezosa (razones, confluencias, razon, detalle_setup) y
+    devuelve el mismo dict que habría dado el modo completo. Lo añadido después
+    (p. ej. meta["cache"]) se conserva. Una señal ya completa se devuelve tal cual.
+    """
+    diferida = (senal or {}).get(CLAVE_DIFERIDA)
+    if diferida is None:
+        return senal
+    base = {k: v for k, v in senal.items() if k != CLAVE_DIFERIDA}
+    return _ordenar(base, _redactar(diferida.estructura, diferida.puntuacion))
+
+
+def es_perezosa(senal: Optional[Dict[str, Any]]) -> bool:
+    return bool(senal) and CLAVE_DIFERIDA in senal
+
+
+def _ordenar(numerica: Dict[str, Any], redaccion: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for clave in _ORDEN_CLAVES:
+        if clave in redaccion:
+            out[clave] = redaccion[clave]
+        elif clave in numerica:
+            out[clave] = numerica[clave]
+    for clave, valor in numerica.items():
+        if clave not in out:
+            out[clave] = valor
+    return out
+
+
+def _puntuar(estructura: Dict[str, Any], precio: float) -> Dict[str, Any]:
+    """Scoring, decisión y plan sin construir texto: las señales activas van como códigos."""
+    ind = estructura["indicadores"]
+    rsi_val = ind["rsi"]
+    ema_fast = ind["ema_fast"]
+    ema_slow = ind["ema_slow"]
+    macd_val = ind["macd"]
+    macd_sig_val = ind["macd_signal"]
+    macd_hist_val = ind["macd_hist"]
+    atr_val = ind["atr"]
+    adx_val = ind["adx"]
+    vwap_val = ind["vwap"]
+    vol_ratio = ind["vol_ratio"]
+    patron = estructura["patron"]
+    swing = estructura["swing"]
+    retro = estructura["retro"]
+    niveles_fibo = estructura.get("niveles_fibo")
+    divergencia = estructura["divergencia"]
 
     atr_pct = (atr_val / precio * 100) if precio > 0 else 0.0
 
     tendencia_alcista = ema_fast > ema_slow
     tendencia_bajista = ema_fast < ema_slow
 
-    # --- Patrones ---
-    patron = patrones_chartistas.detectar_patron(df, atr=atr_val)
-
-    # --- Fibonacci ---
-    swing = fibonacci.detectar_swing_basico(df, lookback=60)
+    # --- Fibonacci: ¿precio cerca de un retroceso? ---
     fibo_info = None
-    if swing is not None and atr_val > 0:
-        retro = fibonacci.niveles_retroceso(swing)
+    if retro is not None:
         tol_abs = fibonacci.tolerancia_por_atr(atr_val, multiplicador=0.35, min_pct=0.001)
         if tol_abs <= 0:
             tol_abs = precio * 0.0015
-        nivel = fibonacci.nivel_cercano(precio, retro, tolerancia_abs=tol_abs)
+        if niveles_fibo is not None:
+            # Índice de todos los lookbacks: la dirección es la del swing del nivel
+            nivel = niveles_fibo["retrocesos"].cercano(precio, tol_abs)
+            direccion_swing = nivel[3] if nivel is not None else None
+        else:
+            nivel = fibonacci.nivel_cercano(precio, retro, tolerancia_abs=tol_abs)
+            direccion_swing = swing.direccion
         if nivel is not None:
-            fibo_info = {"nivel": nivel[0], "precio": float(nivel[1]), "direccion_swing": swing.direccion}
-
-    # --- Divergencias RSI ---
-    divergencia = _detectar_divergencia_rsi(df, rsi_series, ventana_pivote=3, min_delta_rsi=2.0)
+            fibo_info = {"nivel": nivel[0], "precio": float(nivel[1]), "direccion_swing": direccion_swing}
 
     # --- Scoring ---
     long_score = 50.0
     short_score = 50.0
-    razones_long: List[str] = []
-    razones_short: List[str] = []
-    conf_long: List[str] = []
-    conf_short: List[str] = []
+    senales_long: List[str] = []
+    senales_short: List[str] = []
     invalidaciones: List[str] = []
 
     # Tendencia (EMA)
     if tendencia_alcista:
         long_score += 15
-        razones_long.append("Tendencia alcista (EMA20>EMA50)")
-        conf_long.append("EMA")
+        senales_long.append("EMA")
     if tendencia_bajista:
         short_score += 15
-        razones_short.append("Tendencia bajista (EMA20<EMA50)")
-        conf_short.append("EMA")
+        senales_short.append("EMA")
 
     # MACD
     if macd_hist_val > 0 and macd_val > macd_sig_val:
         long_score += 12
-        razones_long.append("MACD alcista (hist>0)")
-        conf_long.append("MACD")
+        senales_long.append("MACD")
     if macd_hist_val < 0 and macd_val < macd_sig_val:
         short_score += 12
-        razones_short.append("MACD bajista (hist<0)")
-        conf_short.append("MACD")
+        senales_short.append("MACD")
 
     # RSI (extremos)
     if rsi_val <= 35:
         long_score += 6
-        razones_long.append(f"RSI sobreventa ({rsi_val:.1f})")
+        senales_long.append("RSI")
     if rsi_val >= 65:
         short_score += 6
-        razones_short.append(f"RSI sobrecompra ({rsi_val:.1f})")
+        senales_short.append("RSI")
 
     # RSI divergencias
     if divergencia and divergencia.get("tipo") == "ALCISTA":
         long_score += 10
-        razones_long.append("Divergencia RSI alcista")
-        conf_long.append("DIVERGENCIA_RSI")
+        senales_long.append("DIVERGENCIA_RSI")
     if divergencia and divergencia.get("tipo") == "BAJISTA":
         short_score += 10
-        razones_short.append("Divergencia RSI bajista")
-        conf_short.append("DIVERGENCIA_RSI")
+        senales_short.append("DIVERGENCIA_RSI")
 
     # ADX (tendencia fuerte)
     if adx_val >= 25:
         if tendencia_alcista:
             long_score += 4
-            razones_long.append(f"ADX fuerte ({adx_val:.1f})")
+            senales_long.append("ADX")
         if tendencia_bajista:
             short_score += 4
-            razones_short.append(f"ADX fuerte ({adx_val:.1f})")
+            senales_short.append("ADX")
 
     # VWAP (sesgo)
     if precio > vwap_val:
         long_score += 3
-        razones_long.append("Precio sobre VWAP")
+        senales_long.append("VWAP")
     if precio < vwap_val:
         short_score += 3
-        razones_short.append("Precio bajo VWAP")
+        senales_short.append("VWAP")
 
     # Volumen (confirmación)
     if vol_ratio >= 1.5:
         if tendencia_alcista:
             long_score += 8
-            razones_long.append(f"Volumen de ruptura ({vol_ratio:.2f}x)")
-            conf_long.append("VOLUMEN")
+            senales_long.append("VOLUMEN")
         if tendencia_bajista:
             short_score += 8
-            razones_short.append(f"Volumen de ruptura ({vol_ratio:.2f}x)")
-            conf_short.append("VOLUMEN")
+            senales_short.append("VOLUMEN")
 
     # Patrón chartista
     if patron is not None:
         if patron.direccion == "LONG":
             long_score += 25 * float(patron.fuerza)
-            razones_long.append(f"Patrón {patron.nombre}")
-            conf_long.append("PATRON")
+            senales_long.append("PATRON")
         elif patron.direccion == "SHORT":
             short_score += 25 * float(patron.fuerza)
-            razones_short.append(f"Patrón {patron.nombre}")
-            conf_short.append("PATRON")
+            senales_short.append("PATRON")
         else:
             long_score += 6 * float(patron.fuerza)
             short_score += 6 * float(patron.fuerza)
@@ -304,12 +484,10 @@ def evaluar_setup_determinista(df: pd.DataFrame, simbolo: str = "", temporalidad
     if fibo_info is not None:
         if str(fibo_info.get("direccion_swing")) == "ALCISTA":
             long_score += 12
-            razones_long.append(f"Confluencia Fibonacci {fibo_info['nivel']}")
-            conf_long.append("FIBONACCI")
+            senales_long.append("FIBONACCI")
         elif str(fibo_info.get("direccion_swing")) == "BAJISTA":
             short_score += 12
-            razones_short.append(f"Confluencia Fibonacci {fibo_info['nivel']}")
-            conf_short.append("FIBONACCI")
+            senales_short.append("FIBONACCI")
 
     long_score = _clamp(long_score, 0, 100)
     short_score = _clamp(short_score, 0, 100)
@@ -333,14 +511,15 @@ def evaluar_setup_determinista(df: pd.DataFrame, simbolo: str = "", temporalidad
     tp = None
     rr = None
     leverage_sugerido = 1
-    estructura = None
+    sl_estructura = None
 
     if direccion in ("LONG", "SHORT") and precio > 0:
-        estructura = _sl_por_estructura(df, direccion, precio, atr_val)
-        if estructura is None:
+        if estructura["extremos"] is not None:
+            sl_estructura = _sl_desde_extremos(estructura["extremos"], direccion, precio, atr_val)
+        if sl_estructura is None:
             invalidaciones.append("SL_INCALCULABLE")
         else:
-            sl = float(estructura["sl"])
+            sl = float(sl_estructura["sl"])
             sl_dist = abs(precio - sl)
             sl_dist_pct = (sl_dist / precio * 100) if precio > 0 else 0.0
             rr = _rr_dinamico(conf, adx_val, atr_pct)
@@ -348,9 +527,12 @@ def evaluar_setup_determinista(df: pd.DataFrame, simbolo: str = "", temporalidad
 
             # Ajuste por extensiones fibo (si encaja)
             if swing is not None and atr_val > 0 and tp is not None:
-                exts = fibonacci.niveles_extension(swing)
                 tol_abs = max(atr_val * 0.5, precio * 0.002)
-                nivel_ext = fibonacci.nivel_cercano(tp, exts, tolerancia_abs=tol_abs)
+                if niveles_fibo is not None:
+                    nivel_ext = niveles_fibo["extensiones"].cercano(tp, tol_abs)
+                else:
+                    exts = fibonacci.niveles_extension(swing)
+                    nivel_ext = fibonacci.nivel_cercano(tp, exts, tolerancia_abs=tol_abs)
                 if nivel_ext is not None:
                     tp = float(nivel_ext[1])
 
@@ -378,65 +560,118 @@ def evaluar_setup_determinista(df: pd.DataFrame, simbolo: str = "", temporalidad
         direccion = None
         invalidaciones.append("SIN_TP_SL")
 
+    return {
+        "precio": precio,
+        "long": long_score,
+        "short": short_score,
+        "senales_long": senales_long,
+        "senales_short": senales_short,
+        "fibo": fibo_info,
+        "decision": decision,
+        "conf": conf,
+        "setup_ok": setup_ok,
+        "invalidaciones": invalidaciones,
+        "sl": sl,
+        "tp": tp,
+        "rr": rr,
+        "apalancamiento": leverage_sugerido,
+    }
+
+
+def _senal_numerica(p: Dict[str, Any], simbolo: str, temporalidad: str) -> Dict[str, Any]:
+    decision = p["decision"]
+    decs = _decimales_por_precio(p["precio"])
+    sl, tp, rr = p["sl"], p["tp"], p["rr"]
+    return {
+        # NUEVO (requerido)
+        "setup": bool(decision in ("COMPRA", "VENTA") and p["setup_ok"]),
+        "lado": "LONG" if decision == "COMPRA" else ("SHORT" if decision == "VENTA" else "ESPERAR"),
+        "score": int(round(max(p["long"], p["short"]))),
+        "invalidaciones": list(p["invalidaciones"]),
+        # LEGACY (para compatibilidad con el core actual)
+        "decision": decision,
+        "confianza": int(round(p["conf"])) if decision in ("COMPRA", "VENTA") else 0,
+        "plan": {
+            "sl": round(sl, decs) if sl is not None else None,
+            "tp": round(tp, decs) if tp is not None else None,
+            "rr": round(rr, 2) if rr is not None else None,
+            "apalancamiento_sugerido": int(p["apalancamiento"]),
+        },
+        "meta": {
+            "simbolo": simbolo,
+            "temporalidad": temporalidad,
+            "scores": {"long": int(round(p["long"])), "short": int(round(p["short"]))},
+        },
+    }
+
+
+def _razon(codigo: str, lado: str, ind: Dict[str, Any], patron: Any, fibo_info: Optional[Dict[str, Any]]) -> str:
+    alcista = lado == "LONG"
+    if codigo == "EMA":
+        return "Tendencia alcista (EMA20>EMA50)" if alcista else "Tendencia bajista (EMA20<EMA50)"
+    if codigo == "MACD":
+        return "MACD alcista (hist>0)" if alcista else "MACD bajista (hist<0)"
+    if codigo == "RSI":
+        return f"RSI sobreventa ({ind['rsi']:.1f})" if alcista else f"RSI sobrecompra ({ind['rsi']:.1f})"
+    if codigo == "DIVERGENCIA_RSI":
+        return "Divergencia RSI alcista" if alcista else "Divergencia RSI bajista"
+    if codigo == "ADX":
+        return f"ADX fuerte ({ind['adx']:.1f})"
+    if codigo == "VWAP":
+        return "Precio sobre VWAP" if alcista else "Precio bajo VWAP"
+    if codigo == "VOLUMEN":
+        return f"Volumen de ruptura ({ind['vol_ratio']:.2f}x)"
+    if codigo == "PATRON":
+        return f"Patrón {patron.nombre}"
+    if codigo == "FIBONACCI":
+        return f"Confluencia Fibonacci {fibo_info['nivel']}"
+    return codigo
+
+
+def _redactar(estructura: Dict[str, Any], p: Dict[str, Any]) -> Dict[str, Any]:
+    """Razones, confluencias y detalle_setup (la parte de texto que el escáner casi nunca usa)."""
+    ind = estructura["indicadores"]
+    patron = estructura["patron"]
+    fibo_info = p["fibo"]
+    decision = p["decision"]
+    decs = _decimales_por_precio(p["precio"])
+
     # --- Razones finales ---
-    if decision == "COMPRA":
-        razones = razones_long
-        confluencias = list(dict.fromkeys(conf_long))
-    elif decision == "VENTA":
-        razones = razones_short
-        confluencias = list(dict.fromkeys(conf_short))
+    if decision in ("COMPRA", "VENTA"):
+        lado = "LONG" if decision == "COMPRA" else "SHORT"
+        senales = p["senales_long"] if lado == "LONG" else p["senales_short"]
+        razones = [_razon(c, lado, ind, patron, fibo_info) for c in senales]
+        confluencias = list(dict.fromkeys(c for c in senales if c in _CONFLUENCIAS))
     else:
         razones = []
-        if long_score >= 55:
+        if p["long"] >= 55:
             razones.append("Señal LONG parcial (sin confluencia suficiente)")
-        if short_score >= 55:
+        if p["short"] >= 55:
             razones.append("Señal SHORT parcial (sin confluencia suficiente)")
         if not razones:
             razones.append("Sin confluencia suficiente (esperar)")
         confluencias = []
 
-    razon_txt = " | ".join(razones)
-
-    out = {
-        # NUEVO (requerido)
-        "setup": bool(decision in ("COMPRA", "VENTA") and setup_ok),
-        "lado": "LONG" if decision == "COMPRA" else ("SHORT" if decision == "VENTA" else "ESPERAR"),
-        "score": int(round(max(long_score, short_score))),
+    vol_ratio = ind["vol_ratio"]
+    return {
         "razones": razones,
         "confluencias": confluencias,
-        "invalidaciones": invalidaciones,
-        # LEGACY (para compatibilidad con el core actual)
-        "decision": decision,
-        "confianza": int(round(conf)) if decision in ("COMPRA", "VENTA") else 0,
-        "razon": razon_txt,
+        "razon": " | ".join(razones),
         "detalle_setup": {
             "patron": patron.nombre if patron is not None else None,
             "fibo": fibo_info,
-            "divergencias": divergencia,
+            "divergencias": estructura["divergencia"],
             "indicadores": {
-                "rsi": round(rsi_val, 2),
-                "macd": round(macd_val, 6),
-                "macd_signal": round(macd_sig_val, 6),
-                "macd_hist": round(macd_hist_val, 6),
-                "atr": round(atr_val, decs),
-                "adx": round(adx_val, 2),
-                "ema_fast": round(ema_fast, decs),
-                "ema_slow": round(ema_slow, decs),
-                "vwap": round(vwap_val, decs),
+                "rsi": round(ind["rsi"], 2),
+                "macd": round(ind["macd"], 6),
+                "macd_signal": round(ind["macd_signal"], 6),
+                "macd_hist": round(ind["macd_hist"], 6),
+                "atr": round(ind["atr"], decs),
+                "adx": round(ind["adx"], 2),
+                "ema_fast": round(ind["ema_fast"], decs),
+                "ema_slow": round(ind["ema_slow"], decs),
+                "vwap": round(ind["vwap"], decs),
             },
             "volumen": {"breakout": bool(vol_ratio >= 1.5), "ratio": round(vol_ratio, 2)} if vol_ratio else None,
         },
-        "plan": {
-            "sl": round(sl, decs) if sl is not None else None,
-            "tp": round(tp, decs) if tp is not None else None,
-            "rr": round(rr, 2) if rr is not None else None,
-            "apalancamiento_sugerido": int(leverage_sugerido),
-        },
-        "meta": {
-            "simbolo": simbolo,
-            "temporalidad": temporalidad,
-            "scores": {"long": int(round(long_score)), "short": int(round(short_score))},
-        },
     }
-    return out
-
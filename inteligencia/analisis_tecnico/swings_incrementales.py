@@ -0,0 +1,194 @@
+"""
+Swings Fibonacci incrementales por símbolo.
+
+`fibonacci.detectar_swing_basico` vuelve a recorrer las últimas `lookback` velas en
+cada evaluación y `fibonacci.nivel_cercano` recorre un dict de niveles. Aquí, por
+cada lookback, el máximo y el mínimo de las velas cerradas viven en una deque
+monótona (O(1) amortizado por vela cerrada); al consultar solo se combinan con la
+vela en formación. Los retrocesos y extensiones de todos los lookbacks van a dos
+`fibonacci.IndiceNiveles` (búsqueda binaria), así que añadir swings más largos no
+encarece la consulta por pasada.
+
+Equivalencia (ver scripts/paridad_swings.py): con las velas cerradas de un frame ya
+alimentadas y su última fila como vela viva, el swing de un lookback <= len(frame)
+es el de detectar_swing_basico(frame, lookback), índices incluidos (empates: la
+primera vela, como np.argmax). Los lookbacks más largos que el frame usan la
+historia que el rastreador haya visto desde el arranque (no se persiste: con el
+frame de 100 velas del escáner el swing base de 60 está disponible desde la
+primera pasada).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import deque
+from typing import Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from . import fibonacci
+from .fibonacci import IndiceNiveles, Swing
+
+# Mismo mínimo de velas que detectar_swing_basico
+MIN_VELAS = 30
+
+
+class _ExtremoMovil:
+    """Máximo (o mínimo) de las últimas `n` velas cerradas; empates -> la más antigua."""
+
+    __slots__ = ("n", "maximo", "cola")
+
+    def __init__(self, n: int, maximo: bool):
+        self.n = max(0, int(n))
+        self.maximo = bool(maximo)
+        self.cola = deque()  # (índice de vela, valor), valores no crecientes (máx) / no decrecientes (mín)
+
+    def empujar(self, idx: int, valor: float) -> None:
+        cola = self.cola
+        if self.maximo:
+            while cola and cola[-1][1] < valor:
+                cola.pop()
+        else:
+            while cola and cola[-1][1] > valor:
+                cola.pop()
+        cola.append((idx, valor))
+        while cola and cola[0][0] <= idx - self.n:
+            cola.popleft()
+
+    def extremo(self) -> Optional[Tuple[int, float]]:
+        return self.cola[0] if self.cola else None
+
+
+class RastreadorSwings:
+    """
+    Swings de un símbolo/temporalidad para varios lookbacks. El primero es el swing
+    base del motor (el que alimenta detalle_setup y el ajuste del TP).
+    """
+
+    def __init__(self, lookbacks: Sequence[int] = (60,)):
+        self.lookbacks = tuple(dict.fromkeys(max(2, int(lb)) for lb in lookbacks)) or (60,)
+        # La ventana de velas cerradas es lookback-1: la vela viva completa el lookback
+        self._maximos = {lb: _ExtremoMovil(lb - 1, True) for lb in self.lookbacks}
+        self._minimos = {lb: _ExtremoMovil(lb - 1, False) for lb in self.lookbacks}
+        self.velas = 0
+        self.ts_ultima = None
+
+    def cerrar_vela(self, high: float, low: float, ts=None) -> None:
+        high = float(high)
+        low = float(low)
+        if not (math.isfinite(high) and math.isfinite(low)):
+            raise ValueError("vela con high/low no finitos")
+        idx = self.velas
+        for lb in self.lookbacks:
+            self._maximos[lb].empujar(idx, high)
+            self._minimos[lb].empujar(idx, low)
+        self.velas += 1
+        self.ts_ultima = ts
+
+    def swing(self, lookback: int, high_vivo: float, low_vivo: float, n_frame: Optional[int] = None) -> Optional[Swing]:
+        """
+        Swing con la vela en formación (high_vivo, low_vivo). Índices relativos a un
+        frame de `n_frame` filas que acaba en la vela viva (por defecto, toda la
+        historia vista); negativos = velas anteriores al frame.
+        """
+        lookback = int(lookback)
+        if lookback not in self._maximos or self.velas + 1 < MIN_VELAS:
+            return None
+        high_vivo = float(high_vivo)
+        low_vivo = float(low_vivo)
+        viva = self.velas
+        maximo = self._maximos[lookback].extremo()
+        minimo = self._minimos[lookback].extremo()
+        idx_high, high = maximo if maximo is not None and not high_vivo > maximo[1] else (viva, high_vivo)
+        idx_low, low = minimo if minimo is not None and not low_vivo < minimo[1] else (viva, low_vivo)
+
+        desfase = (viva + 1 if n_frame is None else int(n_frame)) - 1 - viva
+        idx_high += desfase
+        idx_low += desfase
+        direccion = "ALCISTA" if idx_high > idx_low else "BAJISTA"
+        return Swing(low_idx=idx_low, low=low, high_idx=idx_high, high=high, direccion=direccion)
+
+    def niveles(
+        self, high_vivo: float, low_vivo: float, n_frame: Optional[int] = None
+    ) -> Tuple[Optional[Swing], IndiceNiveles, IndiceNiveles]:
+        """
+        (swing base, índice de retrocesos, índice de extensiones) de todos los lookbacks.
+        Los niveles del swing base se llaman como en fibonacci ("0.618", "EXT_1.618");
+        los de los demás llevan el lookback ("0.618@240"). El dato de cada nivel es la
+        dirección de su swing.
+        """
+        base = None
+        retrocesos = []
+        extensiones = []
+        for k, lb in enumerate(self.lookbacks):
+            swing = self.swing(lb, high_vivo, low_vivo, n_frame=n_frame)
+            if k == 0:
+                base = swing
+            if swing is None:
+                continue
+            sufijo = "" if k == 0 else f"@{lb}"
+            for nombre, p in fibonacci.niveles_retroceso(swing).items():
+                retrocesos.append((nombre + sufijo, p, swing.direccion))
+            for nombre, p in fibonacci.niveles_extension(swing).items():
+                extensiones.append((nombre + sufijo, p, swing.direccion))
+        return base, IndiceNiveles(retrocesos), IndiceNiveles(extensiones)
+
+
+class RegistroSwings:
+    """
+    Un RastreadorSwings por símbolo, sincronizado con los frames del escáner como
+    RegistroMotores (todas las filas menos la última son velas cerradas; la última
+    es la vela en formación). Solo en memoria.
+    """
+
+    def __init__(self, lookbacks: Sequence[int] = (60,)):
+        self.lookbacks = tuple(lookbacks) or (60,)
+        self.rastreadores: Dict[str, RastreadorSwings] = {}
+        self._lock = threading.Lock()
+
+    def niveles(
+        self, simbolo: str, df: pd.DataFrame
+    ) -> Tuple[Optional[Swing], IndiceNiveles, IndiceNiveles]:
+        """Alimenta las velas cerradas nuevas de `df` y devuelve RastreadorSwings.niveles con su última fila."""
+        if df is None or len(df) == 0:
+            return None, IndiceNiveles(), IndiceNiveles()
+        # Columna a columna: df[[...]] cuesta más que todo el resto
+        ts = df["timestamp"].to_numpy(dtype=float)
+        high = df["high"].to_numpy(dtype=float)
+        low = df["low"].to_numpy(dtype=float)
+        with self._lock:
+            rastreador = self._sincronizar(simbolo, ts, high, low)
+            return rastreador.niveles(high[-1], low[-1], n_frame=len(ts))
+
+    def _sincronizar(self, simbolo: str, ts, high, low) -> RastreadorSwings:
+        rastreador = self.rastreadores.get(simbolo)
+
+        inicio = 0
+        if rastreador is not None and rastreador.ts_ultima is not None:
+            posteriores = (ts > float(rastreador.ts_ultima)).nonzero()[0]
+            inicio = int(posteriores[0]) if len(posteriores) else len(ts)
+            # Hueco entre la última vela conocida y el frame => no se puede continuar
+            if inicio == 0 and len(ts) > 1:
+                paso = float(ts[1]) - float(ts[0])
+                if float(ts[0]) - float(rastreador.ts_ultima) > paso:
+                    rastreador = None
+        if rastreador is None:
+            rastreador = self.rastreadores[simbolo] = RastreadorSwings(self.lookbacks)
+            inicio = 0
+
+        try:
+            for i in range(inicio, len(ts) - 1):
+                rastreador.cerrar_vela(high[i], low[i], ts=float(ts[i]))
+        except ValueError:
+            # Vela corrupta: se olvida el símbolo y el motor vuelve a detectar_swing_basico
+            self.rastreadores.pop(simbolo, None)
+            raise
+        return rastreador
+
+    def invalidar(self, simbolo: Optional[str] = None) -> None:
+        with self._lock:
+            if simbolo is None:
+                self.rastreadores.clear()
+            else:
+                self.rastreadores.pop(simbolo, None)
@@ -0,0 +1,321 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+
+# ==============================================================================
+# 👁️ FICHEROS JSON EN MEMORIA (VIGILADOS POR MTIME + ESCRITURA DIFERIDA ATÓMICA)
+# ==============================================================================
+# El estado de riesgo (estado_dia.json, riesgo_persistencia.json y los flags de tmp/) se
+# leía y reescribía entero en cada comprobación (parametros_activos.json: registro_parametros).
+#
+# Aquí:
+#   - JSONVigilado: JSON de solo lectura; se vuelve a parsear solo si cambia su firma
+#     (mtime_ns, tamaño, inodo). Un stat por consulta.
+#   - AlmacenJSON: documentos en memoria. Las lecturas no tocan disco salvo que la
+#     firma cambie (edición externa o borrado); las escrituras se agrupan y se vuelcan
+#     en un hilo tras `retardo_s` (tmp único + fsync + os.replace: el fichero nunca queda
+#     a medias; los volcados de una misma ruta van de uno en uno). `inmediato=True` vuelca en el momento (resets, bloqueos) y al salir del
+#     proceso se vuelca lo pendiente. Mientras hay una escritura pendiente manda la memoria.
+#   - FlagsDirectorio: presencia de ficheros flag con un stat del directorio; solo se
+#     miran los flags cuando cambia su mtime.
+# Firmas con mtime dentro de MARGEN_RECIENTE_S se vuelven a comprobar siempre (el mtime
+# puede no cambiar entre dos escrituras muy seguidas).
+# ==============================================================================
+
+MARGEN_RECIENTE_S = 2.0
+
+
+def firma(ruta):
+    """(mtime_ns, tamaño, inodo) del fichero, o None si no existe."""
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _reciente(f):
+    return f is not None and (time.time_ns() - f[0]) < MARGEN_RECIENTE_S * 1e9
+
+
+def escribir_json_atomico(ruta, datos):
+    """Escribe `datos` en `ruta` vía fichero temporal + fsync + os.replace. Devuelve la firma nueva."""
+    # Temporal con nombre único: dos escritores de la misma ruta no se truncan el uno al otro
+    fd, ruta_tmp = tempfile.mkstemp(prefix=f"{os.path.basename(ruta)}.", suffix=".tmp", dir=os.path.dirname(ruta) or ".")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(ruta_tmp, ruta)
+    except BaseException:
+        try:
+            os.remove(ruta_tmp)
+        except OSError:
+            pass
+        raise
+    return firma(ruta)
+
+
+def _copia(datos):
+    # Documentos planos (estado del día, persistencia): basta con copiar el primer nivel
+    return dict(datos) if isinstance(datos, dict) else datos
+
+
+class JSONVigilado:
+    """
+    JSON de solo lectura cacheado por firma.
+    `transformar(datos)` recibe lo parseado (None si no existe o no se puede leer) y su
+    resultado es lo que devuelve `obtener()`; el mismo objeto mientras no cambie el fichero.
+    """
+
+    def __init__(self, ruta, transformar=None):
+        self.ruta = ruta
+        self.transformar = transformar or (lambda datos: datos)
+        self._lock = threading.Lock()
+        self._firma = None
+        self._valor = None
+        self._cargado = False
+        self.recargas = 0
+
+    def obtener(self):
+        f = firma(self.ruta)
+        with self._lock:
+            if self._cargado and f == self._firma and not _reciente(f):
+                return self._valor
+            datos = None
+            if f is not None:
+                try:
+                    with open(self.ruta, "r", encoding="utf-8") as fh:
+                        datos = json.load(fh)
+                except Exception:
+                    datos = None
+            self._valor = self.transformar(datos)
+            self._firma = f
+            self._cargado = True
+            self.recargas += 1
+            return self._valor
+
+    def invalidar(self):
+        with self._lock:
+            self._cargado = False
+
+
+class _Documento:
+    __slots__ = ("datos", "error", "firma", "cargado", "sucio", "version", "de_disco")
+
+    def __init__(self):
+        self.datos = None
+        self.error = None
+        self.firma = None
+        self.cargado = False
+        self.sucio = False
+        self.version = 0
+        self.de_disco = False
+
+
+class AlmacenJSON:
+    """Documentos JSON en memoria con escritura diferida (ver cabecera)."""
+
+    def __init__(self, retardo_s=0.5):
+        self.retardo_s = max(0.0, float(retardo_s))
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._docs = {}
+        self._locks_volcado = {}
+        self._plazo = None
+        self._hilo = None
+        self.lecturas_disco = 0
+        self.escrituras_disco = 0
+        atexit.register(self.volcar)
+
+    def _doc(self, ruta):
+        doc = self._docs.get(ruta)
+        if doc is None:
+            doc = self._docs[ruta] = _Documento()
+        return doc
+
+    def _sincronizar(self, ruta, doc):
+        """Relee del disco si el fichero cambió por fuera (nunca con escritura pendiente)."""
+        if doc.sucio:
+            return
+        f = firma(ruta)
+        if doc.cargado and f == doc.firma and not (doc.de_disco and _reciente(f)):
+            return
+        doc.datos = None
+        doc.error = None
+        if f is not None:
+            try:
+                with open(ruta, "r", encoding="utf-8") as fh:
+                    doc.datos = json.load(fh)
+            except Exception as e:
+                doc.error = e
+            self.lecturas_disco += 1
+        doc.firma = f
+        doc.cargado = True
+        doc.de_disco = True
+
+    def leer(self, ruta):
+        """Copia del documento; None si no existe. Relanza el error si el fichero es ilegible."""
+        with self._lock:
+            doc = self._doc(ruta)
+            self._sincronizar(ruta, doc)
+            if doc.error is not None:
+                raise doc.error
+            return _copia(doc.datos)
+
+    def existe(self, ruta):
+        with self._lock:
+            doc = self._doc(ruta)
+            self._sincronizar(ruta, doc)
+            return doc.datos is not None or doc.error is not None
+
+    def escribir(self, ruta, datos, inmediato=False):
+        """Actualiza la memoria y programa el volcado (no escribe si no hay cambios)."""
+        datos = _copia(datos)
+        with self._lock:
+            doc = self._doc(ruta)
+            self._sincronizar(ruta, doc)
+            if doc.error is None and doc.datos is not None and doc.datos == datos:
+                if not (inmediato and doc.sucio):
+                    return
+            else:
+                doc.datos = datos
+                doc.error = None
+                doc.sucio = True
+                doc.version += 1
+                if not inmediato:
+                    self._programar()
+        if inmediato:
+            self._volcar_uno(ruta)
+
+    def borrar(self, ruta):
+        """Borra el documento (memoria y disco, en el momento)."""
+        with self._lock:
+            doc = self._doc(ruta)
+            doc.datos = None
+            doc.error = None
+            doc.sucio = False
+            doc.version += 1
+            doc.cargado = True
+            doc.de_disco = False
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            doc.firma = None
+
+    def pendientes(self):
+        with self._lock:
+            return [r for r, d in self._docs.items() if d.sucio]
+
+    def volcar(self):
+        """Escribe ya todo lo pendiente."""
+        for ruta in self.pendientes():
+            self._volcar_uno(ruta)
+
+    def _volcar_uno(self, ruta):
+        with self._lock:
+            lock_ruta = self._locks_volcado.get(ruta)
+            if lock_ruta is None:
+                lock_ruta = self._locks_volcado[ruta] = threading.Lock()
+        # Hilo de volcado, escrituras inmediatas y atexit pueden coincidir: uno por ruta, y
+        # cada uno toma la versión vigente al entrar (nunca se pisa una más nueva con una vieja)
+        with lock_ruta:
+            with self._lock:
+                doc = self._docs.get(ruta)
+                if doc is None or not doc.sucio or doc.datos is None:
+                    return
+                datos = doc.datos
+                version = doc.version
+            try:
+                f = escribir_json_atomico(ruta, datos)
+            except Exception as e:
+                print(f"⚠️ ARCHIVOS VIGILADOS: no se pudo guardar {os.path.basename(ruta)}: {e}")
+                return
+            with self._lock:
+                self.escrituras_disco += 1
+                # Si cambió mientras se escribía sigue pendiente (el hilo lo volverá a volcar)
+                if doc.version == version:
+                    doc.sucio = False
+                    doc.firma = f
+                    doc.de_disco = False
+
+    # ------------------------------------------------------------------
+    # Hilo de volcado
+    # ------------------------------------------------------------------
+    def _programar(self):
+        # Llamar con el lock: el primer cambio fija el plazo, los siguientes se agrupan
+        if self._plazo is None:
+            self._plazo = time.monotonic() + self.retardo_s
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._bucle, name="volcado_json", daemon=True)
+            self._hilo.start()
+        self._cond.notify()
+
+    def _bucle(self):
+        while True:
+            with self._cond:
+                while self._plazo is None:
+                    self._cond.wait()
+                espera = self._plazo - time.monotonic()
+                if espera > 0:
+                    self._cond.wait(espera)
+                    continue
+                self._plazo = None
+            self.volcar()
+
+
+class FlagsDirectorio:
+    """
+    Ficheros flag (tmp/*.flag) con un stat del directorio por consulta: la presencia de
+    cada flag solo se vuelve a mirar cuando cambia el mtime de su directorio.
+    """
+
+    def __init__(self, rutas):
+        self.rutas = tuple(os.path.abspath(r) for r in rutas)
+        # ruta tal cual o absoluta -> (ruta absoluta, directorio)
+        self._claves = {}
+        for original, ruta in zip(rutas, self.rutas):
+            self._claves[original] = self._claves[ruta] = (ruta, os.path.dirname(ruta))
+        self._lock = threading.Lock()
+        self._mtimes = {}
+        self._presentes = {}
+
+    def presente(self, ruta):
+        clave = self._claves.get(ruta)
+        if clave is None:
+            return os.path.exists(ruta)
+        ruta, directorio = clave
+        try:
+            st = os.stat(directorio)
+            mtime = st.st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            if (
+                directorio not in self._mtimes
+                or mtime != self._mtimes[directorio]
+                or (mtime is not None and _reciente((mtime,)))
+            ):
+                self._mtimes[directorio] = mtime
+                for r in self.rutas:
+                    if os.path.dirname(r) == directorio:
+                        self._presentes[r] = mtime is not None and os.path.exists(r)
+            return self._presentes.get(ruta, False)
+
+    def consumir(self, ruta):
+        """Borra el flag si está. True si estaba."""
+        if not self.presente(ruta):
+            return False
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            return False
+        finally:
+            with self._lock:
+                self._presentes[self._claves.get(ruta, (os.path.abspath(ruta),))[0]] = False
+        return True
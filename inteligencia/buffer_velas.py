@@ -0,0 +1,198 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# 🕯️ BUFFER INCREMENTAL DE VELAS (RING BUFFER POR SÍMBOLO + TEMPORALIDAD)
+# ==============================================================================
+# Antes: cada pasada pedía 100 velas por símbolo y construía un DataFrame nuevo,
+# aunque solo hubieran cambiado 1-2 velas.
+# Ahora: la primera vez se descarga la ventana completa; después solo se piden las
+# velas desde el último timestamp guardado (la vela en formación + las nuevas) y se
+# fusionan en un buffer circular de capacidad fija.
+#
+# El buffer guarda cada fila dos veces (posición i y i+capacidad), así la ventana
+# más reciente SIEMPRE es un tramo contiguo del array y se sirve sin copiar.
+# ==============================================================================
+
+COLUMNAS_OHLCV = ("timestamp", "open", "high", "low", "close", "volume")
+
+_MS_POR_UNIDAD = {
+    "m": 60_000,
+    "h": 3_600_000,
+    "d": 86_400_000,
+    "w": 604_800_000,
+}
+
+
+def timeframe_a_ms(timeframe):
+    """'15m' -> 900000. Devuelve 0 si no se reconoce."""
+    try:
+        tf = str(timeframe).strip()
+        unidad = tf[-1]
+        if unidad == "M":
+            return int(tf[:-1]) * 30 * 86_400_000
+        return int(tf[:-1]) * _MS_POR_UNIDAD[unidad.lower()]
+    except Exception:
+        return 0
+
+
+class BufferVelas:
+    """
+    Ventana deslizante OHLCV de capacidad fija respaldada por un array NumPy.
+
+    Importante: el DataFrame que devuelve `como_dataframe()` es una VISTA del buffer.
+    Es válido hasta la siguiente fusión de ese mismo símbolo (la pasada siguiente).
+    """
+
+    def __init__(self, capacidad=100):
+        self.capacidad = max(2, int(capacidad))
+        self._datos = np.zeros((self.capacidad * 2, len(COLUMNAS_OHLCV)), dtype=np.float64)
+        self._n = 0
+        self._fin = 0  # siguiente posición de escritura (0..capacidad-1)
+        self.version = 0
+        self.ultimo_refresco = 0.0
+        self.lock = threading.Lock()
+        self._df_cache = None
+        self._df_version = -1
+
+    def __len__(self):
+        return self._n
+
+    def reiniciar(self):
+        self._n = 0
+        self._fin = 0
+        self.version += 1
+
+    def ultimo_ts(self):
+        if self._n == 0:
+            return None
+        return float(self._datos[(self._fin - 1) % self.capacidad, 0])
+
+    def _escribir(self, pos, fila):
+        self._datos[pos] = fila
+        self._datos[pos + self.capacidad] = fila
+
+    def fusionar(self, velas):
+        """
+        Fusiona filas [ts, o, h, l, c, v] (orden CCXT):
+          - ts > último  -> vela nueva (append, descarta la más antigua si está lleno)
+          - ts == último -> vela en formación actualizada (reemplazo)
+          - ts < último  -> ya conocida, se ignora
+        Devuelve cuántas filas cambiaron.
+        """
+        cambios = 0
+        for vela in sorted(velas or [], key=lambda v: v[0]):
+            try:
+                fila = np.asarray(vela[:6], dtype=np.float64)
+            except Exception:
+                continue
+            if fila.shape[0] < 6 or not np.isfinite(fila[0]):
+                continue
+
+            ultimo = self.ultimo_ts()
+            if ultimo is None or fila[0] > ultimo:
+                self._escribir(self._fin, fila)
+                self._fin = (self._fin + 1) % self.capacidad
+                self._n = min(self._n + 1, self.capacidad)
+                cambios += 1
+            elif fila[0] == ultimo:
+                pos = (self._fin - 1) % self.capacidad
+                if not np.array_equal(self._datos[pos], fila):
+                    self._escribir(pos, fila)
+                    cambios += 1
+
+        if cambios:
+            self.version += 1
+        return cambios
+
+    def vista(self):
+        """Array (n, 6) contiguo con las últimas n velas, en orden cronológico. Sin copia."""
+        inicio = (self._fin - self._n) % self.capacidad
+        return self._datos[inicio : inicio + self._n]
+
+    def como_dataframe(self):
+        """DataFrame con las columnas de siempre (+ 'datetime'), reutilizado mientras no cambie el buffer."""
+        if self._df_cache is not None and self._df_version == self.version:
+            return self._df_cache
+        df = pd.DataFrame(self.vista(), columns=list(COLUMNAS_OHLCV), copy=False)
+        df["datetime"] = pd.to_datetime(df["timestamp"], unit="ms")
+        self._df_cache = df
+        self._df_version = self.version
+        return df
+
+
+class AlmacenVelas:
+    """Buffers por (símbolo, temporalidad). Seguro para el pool de descarga paralela."""
+
+    def __init__(self, capacidad=100):
+        self.capacidad = max(2, int(capacidad))
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def buffer(self, simbolo, timeframe):
+        clave = (simbolo, timeframe)
+        with self._lock:
+            buf = self._buffers.get(clave)
+            if buf is None:
+                buf = BufferVelas(self.capacidad)
+                self._buffers[clave] = buf
+            return buf
+
+    def descargar(self, exchange, simbolo, timeframe):
+        """
+        Actualiza el buffer del símbolo contra el exchange y devuelve el DataFrame (vista).
+        Recarga completa si está vacío o si el hueco desde la última vela supera la ventana.
+        """
+        buf = self.buffer(simbolo, timeframe)
+        with buf.lock:
+            tf_ms = timeframe_a_ms(timeframe)
+            ultimo = buf.ultimo_ts()
+            try:
+                ahora_ms = float(exchange.milliseconds())
+            except Exception:
+                ahora_ms = time.time() * 1000.0
+
+            recarga = ultimo is None or tf_ms <= 0 or (ahora_ms - ultimo) >= tf_ms * (buf.capacidad - 1)
+            if recarga:
+                velas = exchange.fetch_ohlcv(simbolo, timeframe, limit=buf.capacidad)
+                buf.reiniciar()
+                buf.fusionar(velas)
+            else:
+                # La vela en formación (ultimo) + las cerradas desde entonces (+1 de margen)
+                faltan = int((ahora_ms - ultimo) // tf_ms) + 2
+                velas = exchange.fetch_ohlcv(simbolo, timeframe, since=int(ultimo), limit=max(2, min(faltan, buf.capacidad)))
+                buf.fusionar(velas)
+
+            buf.ultimo_refresco = time.time()
+            return buf.como_dataframe()
+
+    def fusionar_flujo(self, simbolo, timeframe, velas):
+        """
+        Fusiona velas llegadas por el flujo WebSocket y devuelve el DataFrame (vista).
+        Devuelve None si el buffer está vacío o si las velas no enlazan con la última
+        guardada (hueco): en ese caso hay que pasar por `descargar()` (REST).
+        """
+        buf = self.buffer(simbolo, timeframe)
+        with buf.lock:
+            ultimo = buf.ultimo_ts()
+            if ultimo is None:
+                return None
+            if velas:
+                tf_ms = timeframe_a_ms(timeframe)
+                primero = min(float(v[0]) for v in velas)
+                if tf_ms <= 0 or primero > ultimo + tf_ms:
+                    return None
+                buf.fusionar(velas)
+            buf.ultimo_refresco = time.time()
+            return buf.como_dataframe()
+
+    def olvidar(self, simbolo=None):
+        with self._lock:
+            if simbolo is None:
+                self._buffers.clear()
+                return
+            for clave in [k for k in self._buffers if k[0] == simbolo]:
+                self._buffers.pop(clave, None)
@@ -0,0 +1,329 @@
+import gzip
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+
+import numpy as np
+
+# ==============================================================================
+# 🗂️ CACHE DE METADATOS DE MERCADO (PERSISTENTE + TTL + REFRESCO EN SEGUNDO PLANO)
+# ==============================================================================
+# load_markets() de Bitget baja y parsea cientos de mercados. Lo hacían el radar en
+# cada ciclo, la lista de operables y cada herramienta suelta en cada arranque.
+#
+# Aquí:
+#   - Los mercados se guardan en disco (JSON comprimido con gzip, escritura atómica).
+#   - Arranque en frío: si el fichero no ha caducado se inyecta en CCXT (set_markets)
+#     sin descargar nada.
+#   - Caducado: se sigue usando lo que hay y se refresca en un hilo aparte.
+#   - Se precalcula una tabla columnar (NumPy) con lo que el bot usa de cada mercado:
+#     coste mínimo, apalancamiento máximo, tamaño de contrato, paso de cantidad y de
+#     precio. Con ella el sizing (gestor_riesgo) no vuelve a derivar constantes de los
+#     dicts de CCXT y puede dimensionar todos los candidatos de una pasada de una vez.
+# ==============================================================================
+
+RUTA_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache_mercados.json.gz")
+TTL_DEFECTO_S = 6 * 3600
+MIN_COSTE_DEFECTO_USDT = 5.0
+
+# Modos de precisión de CCXT (ccxt.base.decimal_to_precision)
+DECIMAL_PLACES = 2
+TICK_SIZE = 4
+
+
+def _paso_decimal(paso):
+    try:
+        d = Decimal(str(paso))
+        return d if d.is_finite() and d > 0 else None
+    except Exception:
+        return None
+
+
+def _to_float(valor, defecto=np.nan):
+    try:
+        v = float(valor)
+        return v if np.isfinite(v) else defecto
+    except Exception:
+        return defecto
+
+
+class TablaMercados:
+    """
+    Vista columnar de los mercados. Las columnas son arrays alineados por fila;
+    `indice` traduce símbolo -> fila e `indice_id` id del exchange -> fila.
+    `modo_precision` es el de CCXT del exchange (TICK_SIZE: precision.amount es el paso;
+    DECIMAL_PLACES: número de decimales).
+    """
+
+    def __init__(self, mercados, modo_precision=None):
+        filas = [m for m in (mercados or {}).values() if isinstance(m, dict) and m.get("symbol")]
+        n = len(filas)
+        self.modo_precision = TICK_SIZE if modo_precision is None else int(modo_precision)
+        self.simbolos = np.array([m["symbol"] for m in filas], dtype=object)
+        self.ids = np.array([str(m.get("id") or "") for m in filas], dtype=object)
+        self.indice = {s: i for i, s in enumerate(self.simbolos)}
+        self.indice_id = {s: i for i, s in enumerate(self.ids) if s}
+
+        self.usdt_swap_activo = np.zeros(n, dtype=bool)
+        self.min_coste = np.full(n, np.nan)
+        self.lmax = np.full(n, np.nan)
+        self.lmin = np.full(n, np.nan)
+        self.paso_cantidad = np.full(n, np.nan)
+        self.paso_precio = np.full(n, np.nan)
+        self.min_cantidad = np.full(n, np.nan)
+        self.tamano_contrato = np.full(n, np.nan)
+
+        for i, m in enumerate(filas):
+            limites = m.get("limits") or {}
+            precision = m.get("precision") or {}
+            self.usdt_swap_activo[i] = bool(m.get("swap") and m.get("quote") == "USDT" and m.get("active"))
+            self.min_coste[i] = _to_float((limites.get("cost") or {}).get("min"))
+            self.lmax[i] = _to_float((limites.get("leverage") or {}).get("max"))
+            self.lmin[i] = _to_float((limites.get("leverage") or {}).get("min"))
+            self.min_cantidad[i] = _to_float((limites.get("amount") or {}).get("min"))
+            self.paso_cantidad[i] = _to_float(precision.get("amount"))
+            self.paso_precio[i] = _to_float(precision.get("price"))
+            self.tamano_contrato[i] = _to_float(m.get("contractSize"))
+
+        # Paso con el que amount_to_precision trunca la cantidad (según el modo de precisión),
+        # en decimal y como entero / 10**decimales para obtener el float exacto de k pasos
+        self.paso_truncado = np.full(n, np.nan)
+        self.paso_entero = np.zeros(n)
+        self.escala_paso = np.ones(n)
+        for i, p in enumerate(self.paso_cantidad):
+            if not np.isfinite(p):
+                continue
+            if self.modo_precision == DECIMAL_PLACES:
+                paso = Decimal(1).scaleb(-int(p)) if p == int(p) else None
+            else:
+                paso = _paso_decimal(p)
+            if paso is None:
+                continue
+            exponente = paso.normalize().as_tuple().exponent
+            decimales = max(0, -int(exponente))
+            self.paso_truncado[i] = float(paso)
+            self.paso_entero[i] = float(paso.scaleb(decimales))
+            self.escala_paso[i] = 10.0 ** decimales
+
+    def __len__(self):
+        return len(self.simbolos)
+
+    def fila(self, simbolo):
+        """Dict con los campos precalculados del símbolo (None si no existe)."""
+        i = self.indice.get(simbolo)
+        if i is None:
+            return None
+        return {
+            "symbol": simbolo,
+            "id": self.ids[i],
+            "min_coste": float(self.min_coste[i]),
+            "lmax": float(self.lmax[i]),
+            "lmin": float(self.lmin[i]),
+            "min_cantidad": float(self.min_cantidad[i]),
+            "paso_cantidad": float(self.paso_cantidad[i]),
+            "paso_precio": float(self.paso_precio[i]),
+            "tamano_contrato": float(self.tamano_contrato[i]),
+        }
+
+    def _columna(self, columna, filas, defecto=np.nan):
+        if len(columna) == 0:
+            return np.full(len(filas), defecto)
+        return np.where(filas >= 0, columna[filas], defecto)
+
+    def posiciones(self, simbolos):
+        """Filas de `simbolos` (símbolo CCXT o id del exchange); -1 si no está."""
+        return np.array(
+            [self.indice.get(s, self.indice_id.get(s, -1)) for s in simbolos],
+            dtype=np.int64,
+        )
+
+    def cantidad_a_precision(self, filas, cantidades):
+        """
+        exchange.amount_to_precision vectorizado (trunca al paso). Como
+        gestor_riesgo._ajustar_cantidad_precision: si CCXT no puede (sin paso, fila
+        desconocida o la cantidad se queda en 0) devuelve la cantidad tal cual.
+        """
+        filas = np.asarray(filas, dtype=np.int64)
+        cantidades = np.asarray(cantidades, dtype=float)
+        paso = self._columna(self.paso_truncado, filas)
+        entero = self._columna(self.paso_entero, filas)
+        escala = self._columna(self.escala_paso, filas, 1.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cociente = cantidades / paso
+            k = np.trunc(cociente)
+            # Junto a un múltiplo del paso el cociente en coma flotante no decide
+            # (0.3 / 0.1 = 2.9999999999999996). CCXT trunca str(cantidad) en decimal: llega al
+            # múltiplo k si y solo si la cantidad no es menor que el float de k pasos
+            cercano = np.round(cociente)
+            frontera = np.abs(cociente - cercano) <= 1e-6 * np.maximum(1.0, np.abs(cociente))
+            multiplo = cercano * entero / escala
+            k = np.where(frontera, np.where(np.abs(cantidades) >= np.abs(multiplo), cercano, cercano - np.sign(cercano)), k)
+            # k pasos -> (k * entero) / 10**decimales: el float más cercano al decimal exacto
+            truncada = k * entero / escala
+        valida = np.isfinite(paso) & np.isfinite(truncada) & (truncada != 0)
+        return np.where(valida, truncada, cantidades)
+
+    def cantidad_paso_arriba(self, filas, cantidades):
+        """gestor_riesgo._redondear_cantidad_paso vectorizado: ceil(cantidad / paso) * paso."""
+        filas = np.asarray(filas, dtype=np.int64)
+        cantidades = np.asarray(cantidades, dtype=float)
+        paso = self._columna(self.paso_cantidad, filas)
+        valido = np.isfinite(paso) & (paso > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(valido, np.ceil(cantidades / paso) * paso, cantidades)
+
+    def candidatos_usdt_swap(self):
+        """Símbolos de futuros USDT activos (mismo filtro que el radar)."""
+        return self.simbolos[self.usdt_swap_activo].tolist()
+
+    def operables(self, max_margin_usdt, lmax_defecto, excluidos=None):
+        """
+        Filtro vectorizado de cuentas pequeñas:
+        operable si min_coste <= max_margin_usdt * Lmax * 0.95 (sin coste conocido -> 5 USDT;
+        sin Lmax conocido -> lmax_defecto). `excluidos` es un callable simbolo -> bool.
+        """
+        min_coste = np.where(np.isfinite(self.min_coste) & (self.min_coste > 0), self.min_coste, MIN_COSTE_DEFECTO_USDT)
+        lmax = np.where(np.isfinite(self.lmax) & (self.lmax >= 1), np.floor(self.lmax), float(lmax_defecto))
+        mascara = self.usdt_swap_activo & (min_coste <= float(max_margin_usdt) * lmax * 0.95)
+        seleccion = self.simbolos[mascara].tolist()
+        if excluidos is not None:
+            seleccion = [s for s in seleccion if not excluidos(s)]
+        return seleccion
+
+
+class CacheMercados:
+    def __init__(self, ruta=RUTA_CACHE, ttl_s=TTL_DEFECTO_S):
+        self.ruta = ruta
+        try:
+            self.ttl_s = max(60.0, float(ttl_s))
+        except Exception:
+            self.ttl_s = float(TTL_DEFECTO_S)
+        self._lock = threading.Lock()
+        self._mercados = None
+        self._monedas = None
+        self._tabla = None
+        self._ts = 0.0
+        self._refrescando = False
+        self._ultimo_intento = 0.0
+        self._inyectado = {}  # id(exchange) -> ts de los mercados que ya tiene
+
+    # ------------------------------------------------------------------
+    # Disco
+    # ------------------------------------------------------------------
+    def _leer_disco(self):
+        try:
+            with gzip.open(self.ruta, "rt", encoding="utf-8") as f:
+                datos = json.load(f) or {}
+            mercados = datos.get("mercados") or {}
+            if not mercados:
+                return None
+            return mercados, datos.get("monedas") or {}, float(datos.get("ts") or 0.0), datos.get("modo_precision")
+        except Exception:
+            return None
+
+    def _guardar_disco(self, mercados, monedas, ts, modo_precision=None):
+        tmp = f"{self.ruta}.tmp"
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(
+                    {"ts": ts, "mercados": mercados, "monedas": monedas, "modo_precision": modo_precision},
+                    f,
+                    separators=(",", ":"),
+                    default=str,
+                )
+            os.replace(tmp, self.ruta)
+        except Exception as e:
+            print(f"⚠️ CACHE MERCADOS: no se pudo guardar en disco: {e}")
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+    def _publicar(self, mercados, monedas, ts, modo_precision=None):
+        # Una tabla por refresco de metadatos: el sizing nunca ve columnas a medio construir
+        tabla = TablaMercados(mercados, modo_precision=modo_precision)
+        with self._lock:
+            self._mercados = mercados
+            self._monedas = monedas
+            self._tabla = tabla
+            self._ts = ts
+
+    def _descargar(self, exchange):
+        mercados = exchange.load_markets(True) or {}
+        monedas = getattr(exchange, "currencies", None) or {}
+        modo_precision = getattr(exchange, "precisionMode", None)
+        ts = time.time()
+        self._publicar(mercados, monedas, ts, modo_precision)
+        self._inyectado[id(exchange)] = ts
+        self._guardar_disco(mercados, monedas, ts, modo_precision)
+        return mercados
+
+    def _refrescar_en_segundo_plano(self, exchange):
+        with self._lock:
+            # Un refresco a la vez y, si falla, no reintentar en bucle (1 intento/minuto)
+            if self._refrescando or (time.time() - self._ultimo_intento) < 60:
+                return
+            self._refrescando = True
+            self._ultimo_intento = time.time()
+
+        def _tarea():
+            try:
+                self._descargar(exchange)
+            except Exception as e:
+                print(f"⚠️ CACHE MERCADOS: refresco fallido ({e}). Se mantiene la copia anterior.")
+            finally:
+                self._refrescando = False
+
+        threading.Thread(target=_tarea, daemon=True, name="cache_mercados").start()
+
+    def edad_s(self):
+        return time.time() - self._ts if self._ts else float("inf")
+
+    def asegurar(self, exchange):
+        """
+        Deja `exchange` con mercados cargados y devuelve el dict de mercados.
+          - En memoria y vigente -> sin coste.
+          - Solo en disco y vigente -> set_markets (sin descarga).
+          - Caducado -> se devuelve lo que hay y se refresca en segundo plano.
+          - Sin nada -> descarga síncrona (primera vez).
+        """
+        if self._mercados is None:
+            leido = self._leer_disco()
+            if leido is not None:
+                self._publicar(*leido)
+
+        if self._mercados is None:
+            return self._descargar(exchange)
+
+        if self._inyectado.get(id(exchange)) != self._ts or not getattr(exchange, "markets", None):
+            try:
+                exchange.set_markets(self._mercados, self._monedas or None)
+                self._inyectado[id(exchange)] = self._ts
+            except Exception:
+                return self._descargar(exchange)
+
+        if self.edad_s() > self.ttl_s:
+            self._refrescar_en_segundo_plano(exchange)
+        return self._mercados
+
+    def tabla(self, exchange=None):
+        if exchange is not None:
+            self.asegurar(exchange)
+        return self._tabla
+
+
+# Instancia compartida del proceso (bot y herramientas sueltas)
+_CACHE = None
+
+
+def cache_compartida(ttl_s=None):
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = CacheMercados(ttl_s=ttl_s if ttl_s is not None else TTL_DEFECTO_S)
+    return _CACHE
+
+
+def preparar_exchange(exchange, ttl_s=None):
+    """Atajo para herramientas: sustituye `exchange.load_markets()` usando la cache en disco."""
+    return cache_compartida(ttl_s).asegurar(exchange)
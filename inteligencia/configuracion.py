@@ -42,6 +42,165 @@ except Exception:
 STOP_LOSS_PORCENTAJE = 0.05 # 5% de pérdida máxima por operación
 MAX_PAIRS_SCAN = 30 # (Legacy)
 MAXIMO_PARES_ESCANEO = 30 # Top criptomonedas a analizar
+try:
+    # Descargas de velas simultáneas en el radar (el envío se espacia con el rateLimit de CCXT)
+    MAXIMO_DESCARGAS_CONCURRENTES = max(1, int(os.getenv("MAXIMO_DESCARGAS_CONCURRENTES") or 8))
+except Exception:
+    MAXIMO_DESCARGAS_CONCURRENTES = 8
+
+# =========================================================
+# FLUJO DE MERCADO (WEBSOCKET) — REST queda siempre como respaldo
+# =========================================================
+# - `FLUJO_MERCADO=1`: tickers/velas (y posiciones/balance con credenciales) por WebSocket.
+# - Para pruebas sin red: `FLUJO_MERCADO_URL_PUBLICA=ws://127.0.0.1:8765` + `python replay_mercado.py`.
+FLUJO_MERCADO_HABILITADO = _env_flag("FLUJO_MERCADO", False)
+FLUJO_MERCADO_URL_PUBLICA = os.getenv("FLUJO_MERCADO_URL_PUBLICA") or "wss://ws.bitget.com/v2/ws/public"
+FLUJO_MERCADO_URL_PRIVADA = os.getenv("FLUJO_MERCADO_URL_PRIVADA") or "wss://ws.bitget.com/v2/ws/private"
+try:
+    # Segundos sin mensajes antes de considerar el flujo caído (vuelta a REST)
+    FLUJO_MERCADO_MAX_SILENCIO_S = float(os.getenv("FLUJO_MERCADO_MAX_SILENCIO_S") or 10.0)
+except Exception:
+    FLUJO_MERCADO_MAX_SILENCIO_S = 10.0
+try:
+    # Antigüedad máxima del último dato privado (positions/account) antes de volver a REST
+    FLUJO_MERCADO_MAX_EDAD_PRIVADO_S = float(os.getenv("FLUJO_MERCADO_MAX_EDAD_PRIVADO_S") or 30.0)
+except Exception:
+    FLUJO_MERCADO_MAX_EDAD_PRIVADO_S = 30.0
+
+# =========================================================
+# INSTANTÁNEA DE CUENTA (BALANCE + POSICIONES COMPARTIDOS)
+# =========================================================
+try:
+    # Cadencia con la que el vigilante refresca balance/posiciones (s)
+    CUENTA_CADENCIA_S = max(0.2, float(os.getenv("CUENTA_CADENCIA_S") or 1.0))
+except Exception:
+    CUENTA_CADENCIA_S = 1.0
+try:
+    # Antigüedad máxima tolerada para sizing y circuit breaker (s)
+    CUENTA_MAX_EDAD_SIZING_S = max(0.0, float(os.getenv("CUENTA_MAX_EDAD_SIZING_S") or 2.0))
+except Exception:
+    CUENTA_MAX_EDAD_SIZING_S = 2.0
+
+try:
+    # Vigencia de la cache de metadatos de mercado en disco (s). Caducada => refresco en segundo plano
+    CACHE_MERCADOS_TTL_S = max(60.0, float(os.getenv("CACHE_MERCADOS_TTL_S") or 6 * 3600))
+except Exception:
+    CACHE_MERCADOS_TTL_S = 6 * 3600
+
+# =========================================================
+# PREFILTRO DE TICKERS (ESCÁNER EN DOS ETAPAS)
+# =========================================================
+# - `PREFILTRO_TICKERS=0` vuelve al radar clásico (top por volumen).
+# - Con el prefiltro se puntúa todo el universo y solo MAXIMO_PARES_ESCANEO bajan velas.
+PREFILTRO_TICKERS_HABILITADO = _env_flag("PREFILTRO_TICKERS", True)
+try:
+    # Liquidez mínima (volumen 24h en USDT) para pasar a la etapa de velas
+    PREFILTRO_VOLUMEN_MIN_USDT = float(os.getenv("PREFILTRO_VOLUMEN_MIN_USDT") or 1_000_000)
+except Exception:
+    PREFILTRO_VOLUMEN_MIN_USDT = 1_000_000.0
+try:
+    # Ciclos equivalentes de la media móvil del volumen por símbolo (z-score)
+    PREFILTRO_VENTANA_BASE = max(2, int(os.getenv("PREFILTRO_VENTANA_BASE") or 96))
+except Exception:
+    PREFILTRO_VENTANA_BASE = 96
+
+# =========================================================
+# PUBLICADOR UI (el escáner no espera a la interfaz)
+# =========================================================
+try:
+    # Cadencia con la que el panel recibe los resultados del escáner (s)
+    UI_CADENCIA_S = max(0.0, float(os.getenv("UI_CADENCIA_S") or 0.5))
+except Exception:
+    UI_CADENCIA_S = 0.5
+try:
+    UI_COLA_MAX = max(1, int(os.getenv("UI_COLA_MAX") or 64))
+except Exception:
+    UI_COLA_MAX = 64
+
+# =========================================================
+# MOTOR ASYNC (alternativa al modo hilos, ccxt.async_support)
+# =========================================================
+# - `MOTOR_ASYNC=1`: escáner, vigilancia y heartbeat como corrutinas de un único event loop.
+# - Por defecto se mantiene el modo clásico con hilos.
+MOTOR_ASYNC_HABILITADO = _env_flag("MOTOR_ASYNC", False)
+
+# =========================================================
+# PLANIFICADOR DE PETICIONES (presupuestos por tipo de endpoint, req/s)
+# =========================================================
+# Por debajo de los límites de Bitget (20/s datos públicos por IP, 10/s cuenta y órdenes por UID)
+try:
+    PRESUPUESTO_PUBLICO_RPS = max(0.5, float(os.getenv("PRESUPUESTO_PUBLICO_RPS") or 18))
+except Exception:
+    PRESUPUESTO_PUBLICO_RPS = 18.0
+try:
+    PRESUPUESTO_PRIVADO_RPS = max(0.5, float(os.getenv("PRESUPUESTO_PRIVADO_RPS") or 9))
+except Exception:
+    PRESUPUESTO_PRIVADO_RPS = 9.0
+try:
+    PRESUPUESTO_TRADING_RPS = max(0.5, float(os.getenv("PRESUPUESTO_TRADING_RPS") or 9))
+except Exception:
+    PRESUPUESTO_TRADING_RPS = 9.0
+
+# Agenda adaptativa del radar: calientes a menudo, fríos al cierre de vela (`AGENDA_RADAR=0` -> todos cada pasada)
+AGENDA_RADAR_HABILITADA = _env_flag("AGENDA_RADAR", True)
+
+# Caché de señales por vela cerrada: sin vela nueva solo se recompone con el precio vivo
+# (`CACHE_SENALES=0` -> motor completo en cada pasada; `CACHE_SENALES_PRECIO=0` -> señal anterior tal cual)
+CACHE_SENALES_HABILITADA = _env_flag("CACHE_SENALES", True)
+CACHE_SENALES_REFRESCAR_PRECIO = _env_flag("CACHE_SENALES_PRECIO", True)
+
+# Motor determinista en modo perezoso: en cada pasada solo scores/decisión/plan; razones y
+# detalle se redactan solo para los candidatos (`MOTOR_PEREZOSO=0` -> señal completa siempre)
+MOTOR_PEREZOSO = _env_flag("MOTOR_PEREZOSO", True)
+
+# Swings Fibonacci incrementales por símbolo + índice de niveles por búsqueda binaria
+# (`SWINGS_INCREMENTALES=0` -> detectar_swing_basico en cada evaluación). En FIBO_LOOKBACKS el
+# primero es el swing base del motor (60 = comportamiento clásico); los demás añaden niveles "0.618@240"
+SWINGS_INCREMENTALES_HABILITADOS = _env_flag("SWINGS_INCREMENTALES", True)
+try:
+    FIBO_LOOKBACKS = tuple(max(2, int(x)) for x in (os.getenv("FIBO_LOOKBACKS") or "60").split(",") if x.strip())
+except Exception:
+    FIBO_LOOKBACKS = (60,)
+
+# Riesgo de cartera: covarianza EWMA online de los retornos del radar (O(n) por vela nueva) y
+# VaR paramétrico de posiciones abiertas + candidato antes del sizing. Si el VaR con el candidato
+# supera RIESGO_CARTERA_VAR_MAX_PCT (% del equity, a RIESGO_CARTERA_CONFIANZA y
+# RIESGO_CARTERA_HORIZONTE_VELAS velas) su riesgo % se recorta; por debajo del mínimo no entra
+# (`RIESGO_CARTERA=0` -> sizing sin mirar la cartera)
+RIESGO_CARTERA_HABILITADO = _env_flag("RIESGO_CARTERA", True)
+try:
+    RIESGO_CARTERA_LAMBDA = min(0.999, max(0.5, float(os.getenv("RIESGO_CARTERA_LAMBDA") or 0.97)))
+    RIESGO_CARTERA_MIN_OBS = max(2, int(os.getenv("RIESGO_CARTERA_MIN_OBS") or 30))
+    RIESGO_CARTERA_CONFIANZA = float(os.getenv("RIESGO_CARTERA_CONFIANZA") or 0.99)
+    RIESGO_CARTERA_HORIZONTE_VELAS = max(1, int(os.getenv("RIESGO_CARTERA_HORIZONTE_VELAS") or 1))
+    RIESGO_CARTERA_VAR_MAX_PCT = float(os.getenv("RIESGO_CARTERA_VAR_MAX_PCT") or 2.0)
+except Exception:
+    RIESGO_CARTERA_LAMBDA = 0.97
+    RIESGO_CARTERA_MIN_OBS = 30
+    RIESGO_CARTERA_CONFIANZA = 0.99
+    RIESGO_CARTERA_HORIZONTE_VELAS = 1
+    RIESGO_CARTERA_VAR_MAX_PCT = 2.0
+
+# Monte Carlo de ruina (simulador_ruina) en el auto-tuner: antes de guardar parámetros nuevos
+# se simulan actuales y candidatos (MONTECARLO_CAMINOS caminos x MONTECARLO_OPERACIONES, mismos
+# números aleatorios). Si la prob. de ruina de los candidatos supera MONTECARLO_RUINA_MAX_PCT y
+# empeora la actual, no se guardan (`MONTECARLO_ENTRENADOR=0` -> sin simulación)
+MONTECARLO_ENTRENADOR_HABILITADO = _env_flag("MONTECARLO_ENTRENADOR", True)
+try:
+    MONTECARLO_CAMINOS = max(1000, int(os.getenv("MONTECARLO_CAMINOS") or 20000))
+    MONTECARLO_OPERACIONES = max(10, int(os.getenv("MONTECARLO_OPERACIONES") or 500))
+    MONTECARLO_RUINA_MAX_PCT = float(os.getenv("MONTECARLO_RUINA_MAX_PCT") or 1.0)
+except Exception:
+    MONTECARLO_CAMINOS = 20000
+    MONTECARLO_OPERACIONES = 500
+    MONTECARLO_RUINA_MAX_PCT = 1.0
+
+try:
+    # parametros_activos.json se comprueba como mucho una vez por intervalo (s); el auto-tuner
+    # publica por registro_parametros y eso se ve en el momento
+    PARAMETROS_INTERVALO_CHEQUEO_S = max(0.0, float(os.getenv("PARAMETROS_INTERVALO_CHEQUEO_S") or 1.0))
+except Exception:
+    PARAMETROS_INTERVALO_CHEQUEO_S = 1.0
 
 # MODO DE OPERACIÓN
 # ¡¡MODO REAL ACTIVADO POR ORDEN DEL USUARIO!!
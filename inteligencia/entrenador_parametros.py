@@ -5,10 +5,14 @@ from typing import Any, Dict, List, Optional
 
 import numpy as np
 
+import configuracion as config
+import registro_parametros
+import simulador_ruina
+
 # RUTAS
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 RUTA_OPERACIONES = os.path.join(BASE_DIR, "operaciones")
-RUTA_PARAMETROS = os.path.join(BASE_DIR, "parametros_activos.json")
+RUTA_PARAMETROS = registro_parametros.RUTA_PARAMETROS_ACTIVOS
 RUTA_LOG_APRENDIZAJE = os.path.join(os.path.dirname(BASE_DIR), "tmp", "zerox_aprendizaje.log")
 RUTA_REPORTE_DIARIO = os.path.join(os.path.dirname(BASE_DIR), "tmp", "reporte_entrenador_diario.md")
 RUTA_HISTORICO = os.path.join(RUTA_OPERACIONES, "historico_entrenador.json")
@@ -36,9 +40,8 @@ def _guardar_json(path: str, data):
 
 
 def cargar_parametros() -> Dict[str, Any]:
-    params = _leer_json(RUTA_PARAMETROS, default={})
-    if not isinstance(params, dict):
-        params = {}
+    # Copia mutable de lo que hay en el fichero (sin los defaults del registro)
+    params = registro_parametros.REGISTRO.crudo()
 
     # Defaults iniciales (compatibilidad)
     params.setdefault("k_atr_mult", 1.5)
@@ -61,7 +64,8 @@ def cargar_parametros() -> Dict[str, Any]:
 
 
 def guardar_parametros(params: Dict[str, Any]):
-    _guardar_json(RUTA_PARAMETROS, params)
+    # Escritura atómica + versión nueva para los suscriptores del registro
+    registro_parametros.REGISTRO.publicar(params, origen="entrenador")
 
 
 def registrar_aprendizaje(mensaje: str):
@@ -176,7 +180,42 @@ def _revertir_a_ultimo_checkpoint() -> Optional[Dict[str, Any]]:
     return params if isinstance(params, dict) else None
 
 
-def generar_reporte_diario(metrics: Optional[Dict[str, Any]], params: Dict[str, Any], cambios: Optional[Dict[str, Any]] = None, nota: str = ""):
+def _evaluar_ruina(actuales: Dict[str, Any], candidatos: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Monte Carlo (simulador_ruina) de los parámetros actuales y los candidatos sobre la
+    distribución real de R, con los mismos números aleatorios. None si no aplica.
+    """
+    if not getattr(config, "MONTECARLO_ENTRENADOR_HABILITADO", True):
+        return None
+    try:
+        resultados, _ = simulador_ruina.cargar_resultados(RUTA_OPERACIONES)
+        if len(resultados) < 15:
+            return None
+        act, cand = simulador_ruina.evaluar_candidatos(
+            resultados,
+            [actuales, candidatos],
+            caminos=int(getattr(config, "MONTECARLO_CAMINOS", 20000)),
+            operaciones=int(getattr(config, "MONTECARLO_OPERACIONES", 500)),
+            rr_base=float(actuales.get("r_reward_mult", 1.0)),
+        )
+    except Exception as e:
+        registrar_aprendizaje(f"ENTRENADOR: Monte Carlo no disponible ({e}).")
+        return None
+
+    limite = float(getattr(config, "MONTECARLO_RUINA_MAX_PCT", 1.0)) / 100.0
+    return {
+        "ruina_actual": act["prob_ruina"],
+        "ruina_candidata": cand["prob_ruina"],
+        "dd_p95_actual": act["drawdown_max_pct"]["p95"],
+        "dd_p95_candidata": cand["drawdown_max_pct"]["p95"],
+        "objetivo_actual": act["prob_objetivo"],
+        "objetivo_candidata": cand["prob_objetivo"],
+        "caminos": cand["caminos"],
+        "veto": cand["prob_ruina"] > limite and cand["prob_ruina"] > act["prob_ruina"],
+    }
+
+
+def generar_reporte_diario(metrics: Optional[Dict[str, Any]], params: Dict[str, Any], cambios: Optional[Dict[str, Any]] = None, nota: str = "", montecarlo: Optional[Dict[str, Any]] = None):
     os.makedirs(os.path.dirname(RUTA_REPORTE_DIARIO), exist_ok=True)
 
     lineas = []
@@ -210,6 +249,13 @@ def generar_reporte_diario(metrics: Optional[Dict[str, Any]], params: Dict[str,
             lineas.append(f"- {k}: {v}")
         lineas.append("")
 
+    if montecarlo:
+        lineas.append(f"## Monte Carlo ({montecarlo['caminos']} caminos)")
+        lineas.append(f"- Prob. ruina: {montecarlo['ruina_actual']*100:.3f}% -> {montecarlo['ruina_candidata']*100:.3f}%")
+        lineas.append(f"- Drawdown máx p95: {montecarlo['dd_p95_actual']}% -> {montecarlo['dd_p95_candidata']}%")
+        lineas.append(f"- Prob. objetivo: {montecarlo['objetivo_actual']*100:.1f}% -> {montecarlo['objetivo_candidata']*100:.1f}%")
+        lineas.append("")
+
     with open(RUTA_REPORTE_DIARIO, "w", encoding="utf-8") as f:
         f.write("\n".join(lineas).strip() + "\n")
 
@@ -252,6 +298,7 @@ def auto_tunning():
     k_actual = float(params.get("k_atr_mult", 1.5))
     rr_mult_actual = float(params.get("r_reward_mult", 1.0))
     riesgo_actual = float(params.get("riesgo_base_pct", 1.0))
+    params_actuales = dict(params)
 
     # Límites
     riesgo_min = float((params.get("riesgo") or {}).get("riesgo_min_pct", 0.25))
@@ -301,6 +348,16 @@ def auto_tunning():
         cambios["riesgo_base_pct"] = f"{riesgo_actual:.3f} -> {riesgo_nuevo:.3f}"
         params["riesgo_base_pct"] = round(riesgo_nuevo, 3)
 
+    montecarlo = _evaluar_ruina(params_actuales, params) if cambios else None
+    if montecarlo and montecarlo["veto"]:
+        nota = (
+            f"Sin cambios: veto Monte Carlo (ruina {montecarlo['ruina_candidata']*100:.3f}% "
+            f"> {getattr(config, 'MONTECARLO_RUINA_MAX_PCT', 1.0)}%)."
+        )
+        generar_reporte_diario(metrics, params_actuales, nota=nota, montecarlo=montecarlo)
+        registrar_aprendizaje(f"ENTRENADOR: {nota} Cambios descartados: {', '.join(cambios.keys())}")
+        return
+
     if cambios:
         # Guardar checkpoint si métricas están "sanas"
         if pf >= 1.5 and metrics["expectancy"] >= 0:
@@ -309,7 +366,7 @@ def auto_tunning():
 
         params["version"] = datetime.now().strftime("%Y%m%d_%H%M")
         guardar_parametros(params)
-        generar_reporte_diario(metrics, params, cambios=cambios, nota="Cambios aplicados (EMA suave).")
+        generar_reporte_diario(metrics, params, cambios=cambios, nota="Cambios aplicados (EMA suave).", montecarlo=montecarlo)
         registrar_aprendizaje(f"ENTRENADOR: Parámetros optimizados y guardados: {', '.join(cambios.keys())}")
     else:
         generar_reporte_diario(metrics, params, nota="Sin cambios: sistema equilibrado.")
@@ -0,0 +1,571 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import deque
+
+# Dependencia opcional: sin `websockets` el bot sigue con REST (no puede tumbar el core)
+try:
+    import websockets
+    _ERROR_IMPORT = None
+except Exception as e:
+    websockets = None
+    _ERROR_IMPORT = str(e)
+
+# ==============================================================================
+# 📡 FLUJO DE MERCADO EN TIEMPO REAL (WEBSOCKET BITGET V2)
+# ==============================================================================
+# Suscripción a canales kline (candleXX), ticker y, con credenciales, positions/account.
+# Mantiene un "libro" en memoria con el último estado y expone los mismos accesos que
+# hoy hace el core por REST (tickers, velas, posiciones, balance).
+#
+# Regla de oro: si el flujo se cae o se queda mudo, `activo()` devuelve False y el
+# operador vuelve SOLO a REST. Nada aquí puede bloquear el ciclo principal.
+# Un socket que no devuelve ni el pong de su ping (conexión medio abierta) se cierra y
+# se reconecta.
+#
+# Datos privados: el canal positions solo empuja con eventos de la posición/órdenes,
+# así que su markPrice/unrealizedPnl se congelan entre fills. posiciones() toma el mark
+# del ticker del libro (y recalcula el PnL) y devuelve None si algún símbolo no tiene
+# ticker fresco o si el último dato privado tiene más de `max_edad_privado_s`.
+#
+# Las velas NO se escriben directamente en los buffers del escáner: se acumulan como
+# pendientes y el escáner las fusiona al pedirlas (así la vista que está analizando
+# no cambia bajo sus pies).
+# ==============================================================================
+
+URL_PUBLICA_BITGET = "wss://ws.bitget.com/v2/ws/public"
+URL_PRIVADA_BITGET = "wss://ws.bitget.com/v2/ws/private"
+TIPO_INSTRUMENTO = "USDT-FUTURES"
+MAX_ARGS_POR_MENSAJE = 50  # Bitget recomienda lotes pequeños de suscripción
+INTERVALO_PING_S = 25
+PLAZO_PONG_S = 10  # sin ningún mensaje en INTERVALO_PING_S + PLAZO_PONG_S -> reconectar
+
+
+def disponible():
+    return websockets is not None
+
+
+def motivo_no_disponible():
+    return _ERROR_IMPORT or ""
+
+
+def canal_vela(timeframe):
+    """'15m' -> 'candle15m', '1h' -> 'candle1H', '1d' -> 'candle1D' (nomenclatura Bitget)."""
+    tf = str(timeframe).strip()
+    if not tf:
+        return "candle15m"
+    unidad = tf[-1]
+    if unidad in ("h", "d", "w"):
+        unidad = unidad.upper()
+    return f"candle{tf[:-1]}{unidad}"
+
+
+def id_por_defecto(simbolo):
+    """BTC/USDT:USDT -> BTCUSDT (mismo criterio que rescate_critico.normalizar_simbolo)."""
+    return str(simbolo or "").split(":")[0].replace("/", "")
+
+
+def _to_float(valor, defecto=0.0):
+    try:
+        return float(valor)
+    except Exception:
+        return defecto
+
+
+class LibroMercado:
+    """Último estado conocido del mercado (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tickers = {}              # simbolo -> ticker estilo CCXT
+        self.ticker_ts = {}            # simbolo -> time.time() de recepción
+        self._velas_pendientes = {}    # simbolo -> {ts: fila}
+        self.vela_ts = {}              # simbolo -> time.time() de la última vela recibida
+        self.posiciones = {}           # simbolo -> posición estilo CCXT
+        self.balance = None            # dict estilo CCXT {"USDT": {...}}
+        self.privado_sincronizado = False
+        self.privado_ts = 0.0
+
+    def actualizar_ticker(self, simbolo, ticker):
+        with self._lock:
+            self.tickers[simbolo] = ticker
+            self.ticker_ts[simbolo] = time.time()
+
+    def agregar_velas(self, simbolo, filas):
+        with self._lock:
+            pendientes = self._velas_pendientes.setdefault(simbolo, {})
+            for fila in filas:
+                pendientes[fila[0]] = fila
+            self.vela_ts[simbolo] = time.time()
+
+    def drenar_velas(self, simbolo):
+        with self._lock:
+            pendientes = self._velas_pendientes.pop(simbolo, None) or {}
+        return [pendientes[k] for k in sorted(pendientes)]
+
+    def actualizar_posiciones(self, posiciones, snapshot=False):
+        with self._lock:
+            if snapshot:
+                self.posiciones = {}
+            for pos in posiciones:
+                clave = (pos.get("symbol"), pos.get("side"))
+                if _to_float(pos.get("contracts")) > 0:
+                    self.posiciones[clave] = pos
+                else:
+                    self.posiciones.pop(clave, None)
+            self.privado_ts = time.time()
+
+    def actualizar_balance(self, balance):
+        with self._lock:
+            self.balance = balance
+            self.privado_ts = time.time()
+
+    def marcar_desconexion_privada(self):
+        with self._lock:
+            self.privado_sincronizado = False
+
+    def copia_posiciones(self):
+        with self._lock:
+            return [dict(p) for p in self.posiciones.values()]
+
+
+class FlujoMercado:
+    """
+    Cliente WebSocket en un hilo daemon con su propio event loop (reconexión con backoff).
+
+    Accesos para el core (todos devuelven None si el flujo no es fiable -> usar REST):
+      - tickers(simbolos)
+      - drenar_velas(simbolo) / velas_suscritas(simbolo)
+      - posiciones() / balance()
+    """
+
+    def __init__(
+        self,
+        url_publica=URL_PUBLICA_BITGET,
+        url_privada=URL_PRIVADA_BITGET,
+        timeframe="15m",
+        credenciales=None,
+        id_de_simbolo=None,
+        max_silencio_s=10.0,
+        max_edad_privado_s=30.0,
+    ):
+        self.url_publica = url_publica
+        self.url_privada = url_privada
+        self.timeframe = timeframe
+        self.canal_velas = canal_vela(timeframe)
+        self.credenciales = credenciales or {}
+        self._id_de_simbolo = id_de_simbolo or id_por_defecto
+        try:
+            self.max_silencio_s = float(max_silencio_s)
+        except Exception:
+            self.max_silencio_s = 10.0
+        try:
+            self.max_edad_privado_s = float(max_edad_privado_s)
+        except Exception:
+            self.max_edad_privado_s = 30.0
+
+        self.libro = LibroMercado()
+        self._simbolo_por_id = {}
+        self._subs_tickers = set()
+        self._subs_velas = set()
+        self._lock = threading.Lock()
+
+        self._loop = None
+        self._hilo = None
+        self._cola_publica = None
+        self._corriendo = False
+
+        self.conectado_publico = False
+        self.conectado_privado = False
+        self.ultimo_mensaje_ts = 0.0
+        self.mensajes = 0
+        self.reconexiones = 0
+        self._latencias_ms = deque(maxlen=1000)
+        self._llegadas = deque(maxlen=5000)
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    def iniciar(self):
+        if not disponible():
+            print(f"FLUJO MERCADO: deshabilitado (websockets no disponible: {motivo_no_disponible()})")
+            return False
+        if self._hilo is not None and self._hilo.is_alive():
+            return True
+        self._corriendo = True
+        self._hilo = threading.Thread(target=self._ejecutar_loop, daemon=True, name="flujo_mercado")
+        self._hilo.start()
+        print(f"📡 FLUJO MERCADO INICIADO ({self.url_publica})")
+        return True
+
+    def detener(self):
+        self._corriendo = False
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(loop.stop)
+            except Exception:
+                pass
+
+    def _ejecutar_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._cola_publica = asyncio.Queue()
+        tareas = [self._loop.create_task(self._bucle_publico())]
+        if self.credenciales.get("apiKey") and self.url_privada:
+            tareas.append(self._loop.create_task(self._bucle_privado()))
+        try:
+            self._loop.run_forever()
+        finally:
+            for t in tareas:
+                t.cancel()
+            try:
+                self._loop.run_until_complete(asyncio.gather(*tareas, return_exceptions=True))
+            except Exception:
+                pass
+            self._loop.close()
+
+    # ------------------------------------------------------------------
+    # Suscripciones (llamables desde cualquier hilo, idempotentes)
+    # ------------------------------------------------------------------
+    def _registrar_id(self, simbolo):
+        try:
+            inst_id = self._id_de_simbolo(simbolo) or id_por_defecto(simbolo)
+        except Exception:
+            inst_id = id_por_defecto(simbolo)
+        self._simbolo_por_id[inst_id] = simbolo
+        return inst_id
+
+    def suscribir_tickers(self, simbolos):
+        self._suscribir(simbolos, self._subs_tickers, "ticker")
+
+    def suscribir_velas(self, simbolos):
+        self._suscribir(simbolos, self._subs_velas, self.canal_velas)
+
+    def _suscribir(self, simbolos, conjunto, canal):
+        nuevos = []
+        with self._lock:
+            for s in simbolos or []:
+                if s and s not in conjunto:
+                    conjunto.add(s)
+                    nuevos.append({"instType": TIPO_INSTRUMENTO, "channel": canal, "instId": self._registrar_id(s)})
+        if nuevos and self._loop is not None and self._cola_publica is not None:
+            try:
+                self._loop.call_soon_threadsafe(self._cola_publica.put_nowait, nuevos)
+            except Exception:
+                pass
+
+    def _args_actuales(self):
+        with self._lock:
+            args = [{"instType": TIPO_INSTRUMENTO, "channel": "ticker", "instId": self._registrar_id(s)} for s in self._subs_tickers]
+            args += [{"instType": TIPO_INSTRUMENTO, "channel": self.canal_velas, "instId": self._registrar_id(s)} for s in self._subs_velas]
+        return args
+
+    @staticmethod
+    async def _enviar_suscripcion(ws, args):
+        for i in range(0, len(args), MAX_ARGS_POR_MENSAJE):
+            await ws.send(json.dumps({"op": "subscribe", "args": args[i : i + MAX_ARGS_POR_MENSAJE]}))
+
+    # ------------------------------------------------------------------
+    # Conexiones
+    # ------------------------------------------------------------------
+    async def _ping(self, ws):
+        while True:
+            await asyncio.sleep(INTERVALO_PING_S)
+            await ws.send("ping")
+
+    @staticmethod
+    async def _mensajes(ws):
+        """Como `async for raw in ws`, pero corta si no llega nada (ni el pong) a tiempo."""
+        while True:
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=INTERVALO_PING_S + PLAZO_PONG_S)
+            except asyncio.TimeoutError:
+                raise ConnectionError("sin pong del servidor (conexión medio abierta)")
+            except websockets.exceptions.ConnectionClosedOK:
+                return
+            yield raw
+
+    async def _bucle_publico(self):
+        backoff_s = 1
+        while self._corriendo:
+            try:
+                async with websockets.connect(self.url_publica, ping_interval=None, max_size=None) as ws:
+                    self.conectado_publico = True
+                    backoff_s = 1
+                    # Al (re)conectar: vaciar la cola y re-suscribir todo lo conocido
+                    while not self._cola_publica.empty():
+                        self._cola_publica.get_nowait()
+                    await self._enviar_suscripcion(ws, self._args_actuales())
+
+                    async def _emisor():
+                        while True:
+                            args = await self._cola_publica.get()
+                            await self._enviar_suscripcion(ws, args)
+
+                    auxiliares = [asyncio.ensure_future(self._ping(ws)), asyncio.ensure_future(_emisor())]
+                    try:
+                        async for raw in self._mensajes(ws):
+                            self._procesar_mensaje(raw)
+                    finally:
+                        for t in auxiliares:
+                            t.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ FLUJO MERCADO: conexión pública caída ({e}). Reintento en {backoff_s}s (REST activo).")
+            self.conectado_publico = False
+            self.reconexiones += 1
+            await asyncio.sleep(backoff_s)
+            backoff_s = min(backoff_s * 2, 60)
+
+    def _firma_login(self, timestamp_s):
+        mensaje = f"{timestamp_s}GET/user/verify"
+        digest = hmac.new(str(self.credenciales.get("secret") or "").encode(), mensaje.encode(), hashlib.sha256).digest()
+        return base64.b64encode(digest).decode()
+
+    async def _bucle_privado(self):
+        backoff_s = 1
+        while self._corriendo:
+            try:
+                async with websockets.connect(self.url_privada, ping_interval=None, max_size=None) as ws:
+                    ts = str(int(time.time()))
+                    await ws.send(json.dumps({"op": "login", "args": [{
+                        "apiKey": self.credenciales.get("apiKey"),
+                        "passphrase": self.credenciales.get("password"),
+                        "timestamp": ts,
+                        "sign": self._firma_login(ts),
+                    }]}))
+                    ping = asyncio.ensure_future(self._ping(ws))
+                    try:
+                        async for raw in self._mensajes(ws):
+                            if raw == "pong":
+                                continue
+                            msg = json.loads(raw)
+                            if msg.get("event") == "login" and str(msg.get("code")) == "0":
+                                self.conectado_privado = True
+                                backoff_s = 1
+                                await self._enviar_suscripcion(ws, [
+                                    {"instType": TIPO_INSTRUMENTO, "channel": "positions", "instId": "default"},
+                                    {"instType": TIPO_INSTRUMENTO, "channel": "account", "coin": "default"},
+                                ])
+                                continue
+                            if msg.get("event") == "error":
+                                raise RuntimeError(f"Bitget WS privado: {msg.get('msg')}")
+                            self._procesar_privado(msg)
+                    finally:
+                        ping.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ FLUJO MERCADO: conexión privada caída ({e}). Reintento en {backoff_s}s (REST activo).")
+            self.conectado_privado = False
+            self.libro.marcar_desconexion_privada()
+            await asyncio.sleep(backoff_s)
+            backoff_s = min(backoff_s * 2, 60)
+
+    # ------------------------------------------------------------------
+    # Parseo
+    # ------------------------------------------------------------------
+    def _registrar_llegada(self, msg):
+        ahora = time.time()
+        self.ultimo_mensaje_ts = ahora
+        self.mensajes += 1
+        self._llegadas.append(ahora)
+        ts_envio = msg.get("ts")
+        if ts_envio is not None:
+            lat = ahora * 1000.0 - _to_float(ts_envio, ahora * 1000.0)
+            if lat >= 0:
+                self._latencias_ms.append(lat)
+
+    def _procesar_mensaje(self, raw):
+        if raw == "pong":
+            self.ultimo_mensaje_ts = time.time()
+            return
+        try:
+            msg = json.loads(raw)
+        except Exception:
+            return
+        if "event" in msg:
+            if msg.get("event") == "error":
+                print(f"⚠️ FLUJO MERCADO: {msg.get('msg')} ({msg.get('arg')})")
+            return
+
+        arg = msg.get("arg") or {}
+        datos = msg.get("data") or []
+        simbolo = self._simbolo_por_id.get(arg.get("instId"))
+        if not simbolo:
+            return
+        self._registrar_llegada(msg)
+
+        canal = arg.get("channel")
+        if canal == "ticker":
+            for t in datos:
+                self.libro.actualizar_ticker(simbolo, self._ticker_ccxt(simbolo, t))
+        elif canal == self.canal_velas:
+            filas = []
+            for v in datos:
+                try:
+                    filas.append([float(v[0]), float(v[1]), float(v[2]), float(v[3]), float(v[4]), float(v[5])])
+                except Exception:
+                    continue
+            if filas:
+                self.libro.agregar_velas(simbolo, filas)
+
+    @staticmethod
+    def _ticker_ccxt(simbolo, t):
+        cambio = _to_float(t.get("change24h"), None)
+        return {
+            "symbol": simbolo,
+            "timestamp": int(_to_float(t.get("ts"), time.time() * 1000)),
+            "last": _to_float(t.get("lastPr") or t.get("last"), None),
+            "bid": _to_float(t.get("bidPr"), None),
+            "ask": _to_float(t.get("askPr"), None),
+            "open": _to_float(t.get("open24h"), None),
+            "high": _to_float(t.get("high24h"), None),
+            "low": _to_float(t.get("low24h"), None),
+            "percentage": cambio * 100.0 if cambio is not None else None,
+            "markPrice": _to_float(t.get("markPrice"), None),
+            "baseVolume": _to_float(t.get("baseVolume"), None),
+            "quoteVolume": _to_float(t.get("quoteVolume"), None),
+        }
+
+    def _procesar_privado(self, msg):
+        arg = msg.get("arg") or {}
+        canal = arg.get("channel")
+        datos = msg.get("data") or []
+        self._registrar_llegada(msg)
+        if canal == "positions":
+            posiciones = []
+            for p in datos:
+                simbolo = self._simbolo_por_id.get(p.get("instId")) or self._registrar_simbolo_desde_id(p.get("instId"))
+                posiciones.append({
+                    "symbol": simbolo,
+                    "side": str(p.get("holdSide") or "").lower(),
+                    "contracts": _to_float(p.get("total")),
+                    "entryPrice": _to_float(p.get("openPriceAvg")),
+                    "markPrice": _to_float(p.get("markPrice"), None),
+                    "unrealizedPnl": _to_float(p.get("unrealizedPL")),
+                    "leverage": _to_float(p.get("leverage"), None),
+                    "info": p,
+                })
+            self.libro.actualizar_posiciones(posiciones, snapshot=(msg.get("action") == "snapshot"))
+            if msg.get("action") == "snapshot":
+                self.libro.privado_sincronizado = True
+        elif canal == "account":
+            for a in datos:
+                if str(a.get("marginCoin") or "").upper() != "USDT":
+                    continue
+                libre = _to_float(a.get("available"))
+                total = _to_float(a.get("usdtEquity") or a.get("accountEquity") or a.get("equity"))
+                self.libro.actualizar_balance({"USDT": {"free": libre, "total": total, "used": max(0.0, total - libre)}})
+
+    def _registrar_simbolo_desde_id(self, inst_id):
+        inst_id = str(inst_id or "")
+        if inst_id.endswith("USDT"):
+            simbolo = f"{inst_id[:-4]}/USDT:USDT"
+            self._simbolo_por_id[inst_id] = simbolo
+            return simbolo
+        return inst_id
+
+    # ------------------------------------------------------------------
+    # Accesos del core (None => usar REST)
+    # ------------------------------------------------------------------
+    def activo(self):
+        return bool(self.conectado_publico and (time.time() - self.ultimo_mensaje_ts) <= self.max_silencio_s)
+
+    def tickers(self, simbolos, cobertura_min=0.9):
+        """Tickers estilo CCXT si el flujo cubre al menos `cobertura_min` de los símbolos pedidos."""
+        if not self.activo():
+            return None
+        simbolos = list(simbolos or [])
+        if not simbolos:
+            return None
+        ahora = time.time()
+        limite = self._limite_frescura_s()
+        with self.libro._lock:
+            out = {
+                s: self.libro.tickers[s]
+                for s in simbolos
+                if s in self.libro.tickers and (ahora - self.libro.ticker_ts.get(s, 0.0)) <= limite
+            }
+        if len(out) < len(simbolos) * float(cobertura_min):
+            return None
+        return out
+
+    def _limite_frescura_s(self):
+        return max(self.max_silencio_s * 6, 60.0)
+
+    def velas_suscritas(self, simbolo):
+        """True si el símbolo recibe velas por el flujo y la última llegó hace poco."""
+        if not self.activo() or simbolo not in self._subs_velas:
+            return False
+        return (time.time() - self.libro.vela_ts.get(simbolo, 0.0)) <= self._limite_frescura_s()
+
+    def drenar_velas(self, simbolo):
+        return self.libro.drenar_velas(simbolo)
+
+    def _privado_fiable(self):
+        return bool(
+            self.conectado_privado
+            and self.libro.privado_sincronizado
+            and (time.time() - self.libro.privado_ts) <= self.max_edad_privado_s
+        )
+
+    def posiciones(self):
+        """Posiciones con markPrice/unrealizedPnl del ticker en vivo (None si algo no está fresco)."""
+        if not self._privado_fiable():
+            return None
+        posiciones = self.libro.copia_posiciones()
+        ahora = time.time()
+        sin_mark = []
+        with self.libro._lock:
+            for pos in posiciones:
+                simbolo = pos.get("symbol")
+                ticker = self.libro.tickers.get(simbolo)
+                if ticker is None or (ahora - self.libro.ticker_ts.get(simbolo, 0.0)) > self.max_silencio_s:
+                    sin_mark.append(simbolo)
+                    continue
+                mark = ticker.get("markPrice") or ticker.get("last")
+                if not mark:
+                    sin_mark.append(simbolo)
+                    continue
+                signo = -1.0 if pos.get("side") == "short" else 1.0
+                pos["markPrice"] = mark
+                pos["unrealizedPnl"] = (mark - _to_float(pos.get("entryPrice"))) * _to_float(pos.get("contracts")) * signo
+        if sin_mark:
+            # Sin ticker no hay mark fiable: REST esta vez y suscripción para las siguientes
+            self.suscribir_tickers(sin_mark)
+            return None
+        return posiciones
+
+    def balance(self):
+        if not self._privado_fiable() or self.libro.balance is None:
+            return None
+        return {k: dict(v) for k, v in self.libro.balance.items()}
+
+    def estadisticas(self):
+        """Latencia (envío->recepción) y throughput recientes, para heartbeat/pruebas con replay."""
+        lat = sorted(self._latencias_ms)
+        ahora = time.time()
+        ultimos_10s = sum(1 for t in self._llegadas if ahora - t <= 10.0)
+
+        def _pct(p):
+            if not lat:
+                return None
+            return round(lat[min(len(lat) - 1, int(p * len(lat)))], 2)
+
+        return {
+            "activo": self.activo(),
+            "privado": self._privado_fiable(),
+            "mensajes": self.mensajes,
+            "mensajes_s": round(ultimos_10s / 10.0, 2),
+            "latencia_p50_ms": _pct(0.50),
+            "latencia_p95_ms": _pct(0.95),
+            "reconexiones": self.reconexiones,
+            "suscripciones": {"ticker": len(self._subs_tickers), "velas": len(self._subs_velas)},
+        }
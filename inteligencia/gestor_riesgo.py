@@ -1,8 +1,13 @@
 import configuracion as config
 import puente_visual # Para mostrar la "mente" de la IA en pantalla
+import cache_mercados
+import archivos_vigilados
+import registro_parametros
 import json
 import math
 import os
+
+import numpy as np
 import time
 from datetime import datetime, timedelta
 
@@ -13,51 +18,47 @@ MAX_PERDIDA_DIARIA_PCT = -0.03
 
 RUTA_LOG_NO_ENTRA = os.path.join(os.path.dirname(__file__), "operaciones", "no_entra_motivos.log")
 RUTA_TMP_NO_ENTRA = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tmp", "zerox_no_entra.txt"))
-RUTA_PARAMETROS_ACTIVOS = os.path.join(os.path.dirname(__file__), "parametros_activos.json")
+RUTA_PARAMETROS_ACTIVOS = registro_parametros.RUTA_PARAMETROS_ACTIVOS
 RUTA_FLAG_RESET_DIA = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tmp", "reset_dia.flag"))
 RUTA_FLAG_RESET_RIESGO_HOY = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tmp", "reset_riesgo_hoy.flag"))
 
-def _cargar_parametros_activos():
+class EstadoRiesgo:
     """
-    Parámetros ajustables (aprendizaje suave). Deben vivir en JSON, nunca auto-editar .py.
+    Estado de riesgo residente en el proceso: parámetros activos (registro_parametros), baseline diario
+    (estado_dia.json), pausas/cooldowns (riesgo_persistencia.json) y flags de reset.
+
+    Las comprobaciones leen de memoria (un stat por fichero para ver si alguien lo ha
+    cambiado por fuera) y las escrituras se vuelcan de forma diferida y atómica
+    (ver archivos_vigilados). Resets y bloqueos se vuelcan en el momento.
     """
-    defaults = {
-        "timezone": "Europe/Madrid",
-        "daily_loss_soft_pct": 3.0,
-        "daily_loss_hard_pct": 10.0,
-        "cooldown_min": 60,
-        "riesgo_base_pct": 1.0,
-        "riesgo": {
-            "riesgo_min_pct": 0.25,
-            "riesgo_max_pct": 2.0,
-            "utilizacion_riesgo": 1.0,
-            "dd_reduccion_1": 0.9,
-            "dd_reduccion_2": 0.75,
-            "dd_reduccion_3": 0.5,
-        },
-        "apalancamiento": {"leverage_max": int(getattr(config, "APALANCAMIENTO_MAX", 5) or 5), "liq_buffer": 0.8},
-        "objetivo": {"OBJETIVO_EUR": int(getattr(config, "OBJETIVO_EUR", 10000000) or 10000000), "PERFIL_RIESGO": str(getattr(config, "PERFIL_RIESGO", "AGRESIVO_CONTROLADO") or "AGRESIVO_CONTROLADO")},
-        # Compatibilidad: KPI interno también en raíz (no implica promesa de ganancias)
-        "OBJETIVO_EUR": int(getattr(config, "OBJETIVO_EUR", 10000000) or 10000000),
-    }
 
-    try:
-        if os.path.exists(RUTA_PARAMETROS_ACTIVOS):
-            with open(RUTA_PARAMETROS_ACTIVOS, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-                if isinstance(data, dict):
-                    # Merge shallow + nested conocidos
-                    out = dict(defaults)
-                    out.update(data)
-                    for k in ("riesgo", "apalancamiento", "objetivo"):
-                        merged = dict(defaults.get(k, {}))
-                        merged.update((data.get(k) or {}) if isinstance(data.get(k), dict) else {})
-                        out[k] = merged
-                    return out
-    except Exception:
-        pass
+    def __init__(self, retardo_volcado_s=0.5, parametros=None):
+        self.parametros = parametros or registro_parametros.REGISTRO
+        self.almacen = archivos_vigilados.AlmacenJSON(retardo_s=retardo_volcado_s)
+        self.flags = archivos_vigilados.FlagsDirectorio([RUTA_FLAG_RESET_DIA, RUTA_FLAG_RESET_RIESGO_HOY])
+
+    def volcar(self):
+        self.almacen.volcar()
+
+    def resumen(self):
+        return {
+            "version_parametros": self.parametros.version,
+            "recargas_parametros": self.parametros.recargas,
+            "lecturas_disco": self.almacen.lecturas_disco,
+            "escrituras_disco": self.almacen.escrituras_disco,
+            "pendientes": len(self.almacen.pendientes()),
+        }
 
-    return defaults
+
+ESTADO = EstadoRiesgo()
+
+
+def _cargar_parametros_activos():
+    """
+    Parámetros ajustables (aprendizaje suave). Deben vivir en JSON, nunca auto-editar .py.
+    Instantánea validada de registro_parametros (solo lectura; se recarga cuando cambia el fichero).
+    """
+    return ESTADO.parametros.obtener()
 
 
 def _clamp_float(x, a, b):
@@ -296,11 +297,53 @@ def _info_mercado(exchange, simbolo):
         return exchange.market(simbolo) or {}
     except Exception:
         try:
-            exchange.load_markets()
+            cache_mercados.preparar_exchange(exchange)
             return exchange.market(simbolo) or {}
         except Exception:
             return {}
 
+def _constantes_mercado(exchange, simbolo):
+    """
+    Constantes de sizing del mercado, ya normalizadas como las usa _calcular_tamano_posicion_ccxt.
+    De la tabla de cache_mercados (precalculada en cada refresco de metadatos) si tiene el
+    símbolo; si no, del dict de CCXT. "mercado" lleva lo que necesita _redondear_cantidad_paso.
+    """
+    tabla = cache_mercados.cache_compartida().tabla()
+    i = tabla.indice.get(simbolo) if tabla is not None else None
+    if i is not None:
+        lmin = float(tabla.lmin[i])
+        lmax = float(tabla.lmax[i])
+        min_cost = float(tabla.min_coste[i])
+        min_amount = float(tabla.min_cantidad[i])
+        contract_size = float(tabla.tamano_contrato[i])
+        paso = float(tabla.paso_cantidad[i])
+        return {
+            "min_lev": lmin if math.isfinite(lmin) and lmin != 0 else 1.0,
+            "max_lev": lmax if math.isfinite(lmax) else None,
+            "min_cost": min_cost if math.isfinite(min_cost) and min_cost > 0 else 5.0,
+            "min_amount": min_amount if math.isfinite(min_amount) and min_amount != 0 else 0.0,
+            "contract_size": contract_size if math.isfinite(contract_size) and contract_size > 0 else 1.0,
+            "mercado": {"precision": {"amount": paso if math.isfinite(paso) else None}},
+        }
+
+    mercado = _info_mercado(exchange, simbolo)
+    limits = (mercado.get("limits") or {})
+    min_lev, max_lev = _obtener_limites_apalancamiento_mercado(mercado)
+    min_cost = _to_float((limits.get("cost") or {}).get("min"))
+    if min_cost is None or min_cost <= 0:
+        min_cost = 5.0
+    contract_size = _to_float(mercado.get("contractSize")) or 1.0
+    if contract_size <= 0:
+        contract_size = 1.0
+    return {
+        "min_lev": min_lev,
+        "max_lev": max_lev,
+        "min_cost": min_cost,
+        "min_amount": _to_float((limits.get("amount") or {}).get("min")) or 0.0,
+        "contract_size": contract_size,
+        "mercado": mercado,
+    }
+
 def _ajustar_cantidad_precision(exchange, simbolo, cantidad, mercado):
     try:
         return float(exchange.amount_to_precision(simbolo, cantidad))
@@ -336,10 +379,10 @@ def _calcular_tamano_posicion_ccxt(exchange, simbolo, precio_entrada, precio_sl,
     ps = _to_float(precio_sl)
     saldo = _to_float(saldo_cuenta)
 
-    mercado = _info_mercado(exchange, simbolo)
-    limits = (mercado.get("limits") or {})
+    constantes = _constantes_mercado(exchange, simbolo)
+    mercado = constantes["mercado"]
 
-    min_lev_market, max_lev_market = _obtener_limites_apalancamiento_mercado(mercado)
+    min_lev_market, max_lev_market = constantes["min_lev"], constantes["max_lev"]
     min_lev = int(max(1, min_lev_market))
     if max_lev_market is not None and max_lev_market > 0:
         Lmax = int(max_lev_market)
@@ -361,14 +404,9 @@ def _calcular_tamano_posicion_ccxt(exchange, simbolo, precio_entrada, precio_sl,
     if L_sugerido <= 0:
         L_sugerido = 1
 
-    min_cost = _to_float((limits.get("cost") or {}).get("min"))
-    if min_cost is None or min_cost <= 0:
-        min_cost = 5.0
-
-    min_amount = _to_float((limits.get("amount") or {}).get("min")) or 0.0
-    contract_size = _to_float(mercado.get("contractSize")) or 1.0
-    if contract_size <= 0:
-        contract_size = 1.0
+    min_cost = constantes["min_cost"]
+    min_amount = constantes["min_amount"]
+    contract_size = constantes["contract_size"]
 
     if pe is None or pe <= 0 or ps is None or saldo is None or saldo <= 0:
         _log_no_entra({
@@ -679,6 +717,203 @@ def _calcular_tamano_posicion_ccxt(exchange, simbolo, precio_entrada, precio_sl,
 
     return float(amount_prec), int(leverage_final)
 
+def _enteros(valores, n, defecto=1):
+    # int() tolerante elemento a elemento (como el L_sugerido del sizing escalar)
+    if np.isscalar(valores) or valores is None:
+        valores = [valores] * n
+    numeros = np.asarray(valores)
+    if numeros.dtype.kind in "biuf":
+        numeros = numeros.astype(float)
+        return np.where(np.isfinite(numeros), np.trunc(numeros), defecto).astype(np.int64)
+    out = np.empty(n, dtype=np.int64)
+    for k, v in enumerate(valores):
+        try:
+            out[k] = int(v)
+        except Exception:
+            out[k] = defecto
+    return out
+
+
+def _flotantes(valores, n):
+    # _to_float elemento a elemento; None/no numérico -> NaN
+    if np.isscalar(valores) or valores is None:
+        valores = [valores] * n
+    numeros = np.asarray(valores)
+    if numeros.dtype.kind in "biuf":
+        return numeros.astype(float)
+    out = np.empty(n, dtype=float)
+    for k, v in enumerate(valores):
+        x = _to_float(v)
+        out[k] = np.nan if x is None else x
+    return out
+
+
+def dimensionar_candidatos(simbolos, precios_entrada, precios_sl, saldo_cuenta, riesgo_pct=1.0, apalancamiento=1, tabla=None, params=None):
+    """
+    Sizing de varios candidatos de una vez sobre la tabla de cache_mercados (sin logs ni
+    prints). Mismas reglas y motivos que _calcular_tamano_posicion_ccxt; la precisión de
+    cantidad es TablaMercados.cantidad_a_precision (amount_to_precision vectorizado).
+    `riesgo_pct` y `apalancamiento` pueden ser escalares o uno por candidato.
+    Devuelve dict de arrays: cantidad, apalancamiento, motivo ("OK" si entra), notional, riesgo_usdt.
+    """
+    if tabla is None:
+        tabla = cache_mercados.cache_compartida().tabla()
+    if tabla is None:
+        raise RuntimeError("sin tabla de mercados (cache_mercados aún no cargada)")
+    if params is None:
+        params = _cargar_parametros_activos()
+
+    simbolos = list(simbolos)
+    n = len(simbolos)
+    filas = tabla.posiciones(simbolos)
+    pe = _flotantes(precios_entrada, n)
+    ps = _flotantes(precios_sl, n)
+    saldo = _flotantes(saldo_cuenta, n)
+    L_sugerido = _enteros(apalancamiento, n)
+    L_sugerido[L_sugerido <= 0] = 1
+
+    # --- constantes por fila (mismas normalizaciones que _constantes_mercado) ---
+    lmin = tabla._columna(tabla.lmin, filas)
+    lmax = tabla._columna(tabla.lmax, filas)
+    min_cost = tabla._columna(tabla.min_coste, filas)
+    min_amount = tabla._columna(tabla.min_cantidad, filas)
+    contract_size = tabla._columna(tabla.tamano_contrato, filas)
+    lmin = np.where(np.isfinite(lmin) & (lmin != 0), lmin, 1.0)
+    min_cost = np.where(np.isfinite(min_cost) & (min_cost > 0), min_cost, 5.0)
+    min_amount = np.where(np.isfinite(min_amount), min_amount, 0.0)
+    contract_size = np.where(np.isfinite(contract_size) & (contract_size > 0), contract_size, 1.0)
+
+    min_lev = np.trunc(np.maximum(1.0, lmin)).astype(np.int64)
+    Lmax = np.where(np.isfinite(lmax) & (lmax > 0), np.trunc(lmax), float(_obtener_lmax_respaldo())).astype(np.int64)
+    try:
+        cap_cfg = int(((params.get("apalancamiento") or {}).get("leverage_max")))
+        if cap_cfg > 0:
+            Lmax = np.maximum(1, np.minimum(Lmax, cap_cfg))
+    except Exception:
+        pass
+
+    cantidad = np.zeros(n)
+    leverage = np.maximum(1, np.minimum(Lmax, L_sugerido))
+    motivo = np.full(n, "", dtype=object)
+    notional = np.zeros(n)
+    riesgo_usdt = np.zeros(n)
+    activo = np.ones(n, dtype=bool)
+
+    def descartar(mascara, codigo, lev=None):
+        mascara = mascara & activo
+        motivo[mascara] = codigo
+        if lev is not None:
+            leverage[mascara] = lev[mascara] if np.ndim(lev) else lev
+        activo[mascara] = False
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        descartar(~(np.isfinite(pe) & (pe > 0)) | np.isnan(ps) | ~(np.isfinite(saldo) & (saldo > 0)), "INPUT_INVALIDO")
+        stop_dist = np.abs(pe - ps)
+        descartar(~(stop_dist > 0), "SL_INVALIDO")
+
+        try:
+            liq_buffer = float((params.get("apalancamiento") or {}).get("liq_buffer", 0.8))
+        except Exception:
+            liq_buffer = 0.8
+        if liq_buffer <= 0 or liq_buffer > 0.95:
+            liq_buffer = 0.8
+        stop_dist_frac = np.where(pe > 0, stop_dist / pe, 0.0)
+        L_max_liq = np.where(stop_dist_frac > 0, np.maximum(1.0, np.floor(liq_buffer / stop_dist_frac)), 1.0)
+        L_max_liq = np.where(np.isfinite(L_max_liq), L_max_liq, 1.0).astype(np.int64)
+        L_upper = np.maximum(min_lev, np.minimum(Lmax, L_max_liq))
+        leverage_final = np.maximum(min_lev, np.minimum(L_sugerido, L_upper))
+
+        # Clamp y normalización del riesgo (mismo orden que el escalar)
+        rv = _flotantes(riesgo_pct, n)
+        try:
+            rmin = float((params.get("riesgo") or {}).get("riesgo_min_pct", 0.25))
+            rmax = float((params.get("riesgo") or {}).get("riesgo_max_pct", 2.0))
+            positivo = np.isfinite(rv) & (rv > 0)
+            fraccion = positivo & (rv <= 0.2)
+            rv = np.where(fraccion, np.maximum(rmin / 100.0, np.minimum(rv, rmax / 100.0)), rv)
+            rv = np.where(positivo & ~fraccion, np.maximum(rmin, np.minimum(rv, rmax)), rv)
+        except Exception:
+            pass
+        riesgo_frac = np.where(rv <= 0.2, rv, np.where(rv <= 100, rv / 100.0, 1.0))
+        descartar(~(np.isfinite(rv) & (rv > 0)), "RIESGO_INVALIDO")
+
+        risk_usdt_target = saldo * riesgo_frac
+        descartar(~(risk_usdt_target > 0), "RIESGO_CERO")
+
+        max_margin = saldo * 0.95
+        descartar(min_cost > max_margin * Lmax * 0.95, "MIN_COST_IMPOSIBLE_POR_MARGEN", lev=1)
+
+        required_amount = np.maximum(min_amount, min_cost / (pe * contract_size))
+        amount_max_riesgo = risk_usdt_target / (contract_size * stop_dist)
+
+        # Mínimo del exchange por encima del riesgo: vía libre para cuentas pequeñas (5..250 USD)
+        supera = activo & (required_amount > amount_max_riesgo)
+        riesgo_usdt_minimo_ex = required_amount * contract_size * stop_dist
+        riesgo_pct_minimo_ex = riesgo_usdt_minimo_ex / saldo
+        pequena = supera & (saldo < 250.0) & (saldo >= 5.0)
+        descartar(supera & ~pequena, "MINIMO_SUPERA_RIESGO", lev=leverage_final)
+        descartar(pequena & ~(riesgo_pct_minimo_ex < 0.90), "RIESGO_SUICIDA_90PCT", lev=leverage_final)
+        agresivo = pequena & activo
+        amount_max_riesgo = np.where(agresivo, required_amount, amount_max_riesgo)
+        risk_usdt_target = np.where(agresivo, np.maximum(risk_usdt_target, riesgo_usdt_minimo_ex * 1.5), risk_usdt_target)
+
+        try:
+            util_riesgo = float((params.get("riesgo") or {}).get("utilizacion_riesgo", 1.0))
+        except Exception:
+            util_riesgo = 1.0
+        util_riesgo = float(max(0.2, min(1.0, util_riesgo)))
+        amount = np.maximum(required_amount, amount_max_riesgo * util_riesgo)
+
+        amount_prec = tabla.cantidad_a_precision(filas, amount)
+        descartar(~(amount_prec > 0), "PRECISION_INVALIDA", lev=leverage_final)
+
+        por_debajo = activo & (amount_prec < required_amount)
+        amount_up = tabla.cantidad_a_precision(filas, tabla.cantidad_paso_arriba(filas, required_amount))
+        descartar(por_debajo & ~(amount_up >= required_amount), "NO_CUMPLE_MINIMOS_PRECISION", lev=leverage_final)
+        amount_prec = np.where(por_debajo, amount_up, amount_prec)
+
+        riesgo_usdt_estimado = amount_prec * contract_size * stop_dist
+        descartar(riesgo_usdt_estimado > risk_usdt_target * 1.0001, "PRECISION_SUPERA_RIESGO", lev=leverage_final)
+
+        notional_final = amount_prec * contract_size * pe
+        leverage_necesario = np.ceil(notional_final / (max_margin * 0.95))
+        leverage_necesario = np.where(np.isfinite(leverage_necesario), leverage_necesario, 1).astype(np.int64)
+        upper = np.maximum(1, L_upper)
+        leverage_final = np.where(
+            leverage_necesario > leverage_final,
+            np.maximum(min_lev, np.minimum(leverage_necesario, upper)),
+            leverage_final,
+        )
+
+        # Ni con el máximo por SL/liquidación cabe el margen: reducir tamaño sin romper mínimos
+        no_cabe = activo & (leverage_necesario > upper)
+        amount_fit = np.where(contract_size * pe > 0, max_margin * upper * 0.95 / (contract_size * pe), 0.0)
+        descartar(no_cabe & ((amount_fit <= 0) | (amount_fit < required_amount)), "MARGIN_INSUFICIENTE_POR_LIMITE_LIQ", lev=leverage_final)
+        amount_fit_prec = tabla.cantidad_a_precision(filas, amount_fit)
+        amount_fit_prec = np.where(amount_fit_prec < required_amount, amount_up, amount_fit_prec)
+        descartar(no_cabe & ~(amount_fit_prec >= required_amount), "NO_CUMPLE_MINIMOS_POR_MARGEN_LIQ", lev=leverage_final)
+        amount_prec = np.where(no_cabe & activo, np.minimum(amount_prec, amount_fit_prec), amount_prec)
+        notional_final = amount_prec * contract_size * pe
+        riesgo_usdt_estimado = amount_prec * contract_size * stop_dist
+
+        margin_req = notional_final / np.maximum(leverage_final, 1)
+        descartar(notional_final < min_cost, "MIN_COST", lev=leverage_final)
+        descartar(margin_req > max_margin, "MARGIN_INSUFICIENTE", lev=leverage_final)
+
+    motivo[activo] = "OK"
+    cantidad[activo] = amount_prec[activo]
+    leverage[activo] = leverage_final[activo]
+    notional[activo] = notional_final[activo]
+    riesgo_usdt[activo] = riesgo_usdt_estimado[activo]
+    return {
+        "simbolos": simbolos,
+        "cantidad": cantidad,
+        "apalancamiento": leverage,
+        "motivo": motivo,
+        "notional": notional,
+        "riesgo_usdt": riesgo_usdt,
+    }
+
 def calcular_tamano_posicion(*args, **kwargs):
     """
     Wrapper tolerante (no falla por kwargs inesperados):
@@ -972,13 +1207,22 @@ def _tzinfo_desde_params(params):
         return None
 
 
+_FECHA_LOCAL_CACHE = [None, None]  # [(zona, segundo unix), "YYYY-MM-DD"]
+
+
 def _fecha_local_hoy(params):
+    # Mismo segundo y zona => misma fecha (los cambios de día caen en segundo entero)
+    clave = (str((params or {}).get("timezone") or "Europe/Madrid"), int(time.time()))
+    if _FECHA_LOCAL_CACHE[0] == clave:
+        return _FECHA_LOCAL_CACHE[1]
     tz = _tzinfo_desde_params(params)
     try:
         now = datetime.now(tz) if tz else datetime.now()
     except Exception:
         now = datetime.now()
-    return now.strftime("%Y-%m-%d")
+    hoy = now.strftime("%Y-%m-%d")
+    _FECHA_LOCAL_CACHE[0], _FECHA_LOCAL_CACHE[1] = clave, hoy
+    return hoy
 
 
 def _inicio_siguiente_dia_ts(params):
@@ -1007,11 +1251,9 @@ def _leer_estado_dia(params=None):
 
     hoy = _fecha_local_hoy(params)
     try:
-        if os.path.exists(RUTA_ESTADO_DIA):
-            with open(RUTA_ESTADO_DIA, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-                if isinstance(data, dict) and data.get("fecha_local") == hoy:
-                    return data
+        data = ESTADO.almacen.leer(RUTA_ESTADO_DIA) or {}
+        if isinstance(data, dict) and data.get("fecha_local") == hoy:
+            return data
     except Exception:
         return {"fecha_local": hoy, "equity_inicio_dia": 0.0, "equity_max_dia": 0.0}
 
@@ -1026,11 +1268,9 @@ def _leer_estado_dia_raw(params=None):
         params = _cargar_parametros_activos()
     hoy = _fecha_local_hoy(params)
     try:
-        if os.path.exists(RUTA_ESTADO_DIA):
-            with open(RUTA_ESTADO_DIA, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-                if isinstance(data, dict):
-                    return data
+        data = ESTADO.almacen.leer(RUTA_ESTADO_DIA) or {}
+        if isinstance(data, dict):
+            return data
     except Exception:
         pass
     return {"fecha_local": hoy, "equity_inicio_dia": 0.0, "equity_max_dia": 0.0}
@@ -1055,15 +1295,14 @@ def actualizar_estado_dia(equity_actual, params=None):
     hoy = _fecha_local_hoy(params)
     data = {}
     try:
-        if os.path.exists(RUTA_ESTADO_DIA):
-            with open(RUTA_ESTADO_DIA, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-                if not isinstance(data, dict):
-                    data = {}
+        data = ESTADO.almacen.leer(RUTA_ESTADO_DIA) or {}
+        if not isinstance(data, dict):
+            data = {}
     except Exception:
         data = {}
 
     cambiado = False
+    reiniciado = False
     
     # Check de Override manual por variable de entorno (una sola vez)
     fuerza_reset = False
@@ -1073,21 +1312,21 @@ def actualizar_estado_dia(equity_actual, params=None):
 
     # Check de Override por ARCHIVO (reset_dia.flag)
     # Esto permite al usuario forzar reset creando el archivo sin reiniciar env vars
-    if os.path.exists(RUTA_FLAG_RESET_DIA):
+    if ESTADO.flags.presente(RUTA_FLAG_RESET_DIA):
         fuerza_reset = True
         try:
             print("⚠️ RESET TOTAL (BACKEND) DETECTADO: Borrando memoria de riesgo y estado diario...")
             # 1. Borrar archivos de estado para un reinicio limpio al 100%
-            if os.path.exists(RUTA_ESTADO_DIA):
-                os.remove(RUTA_ESTADO_DIA)
+            if ESTADO.almacen.existe(RUTA_ESTADO_DIA):
+                ESTADO.almacen.borrar(RUTA_ESTADO_DIA)
                 print(f"   - Borrado: {os.path.basename(RUTA_ESTADO_DIA)}")
             
-            if os.path.exists(RUTA_PERSISTENCIA):
-                os.remove(RUTA_PERSISTENCIA)
+            if ESTADO.almacen.existe(RUTA_PERSISTENCIA):
+                ESTADO.almacen.borrar(RUTA_PERSISTENCIA)
                 print(f"   - Borrado: {os.path.basename(RUTA_PERSISTENCIA)}")
 
             # 2. Consumir flag
-            os.remove(RUTA_FLAG_RESET_DIA)
+            ESTADO.flags.consumir(RUTA_FLAG_RESET_DIA)
             
             # 3. Forzar regeneración de estado en memoria local para esta ejecución
             data = {} 
@@ -1105,17 +1344,18 @@ def actualizar_estado_dia(equity_actual, params=None):
             "equity_max_dia": float(equity_actual)
         }
         cambiado = True
+        reiniciado = True
         
         # En caso de reset automático por fecha (no forzado), limpiar flags de persistencia
         # si es que el archivo existe (si fue reset forzado ya se borró arriba)
         try:
-            if os.path.exists(RUTA_PERSISTENCIA):
+            if ESTADO.almacen.existe(RUTA_PERSISTENCIA):
                 p_data = _cargar_persistencia()
                 if p_data.get("hard_pausa_dia", False):
                     p_data["hard_pausa_dia"] = False
                     p_data["motivo_pausa"] = None
                     p_data["cooldown_hasta_ts"] = 0
-                    _guardar_persistencia(p_data)
+                    _guardar_persistencia(p_data, inmediato=True)
         except Exception: pass
     else:
         ini = _to_float(data.get("equity_inicio_dia"))
@@ -1137,11 +1377,8 @@ def actualizar_estado_dia(equity_actual, params=None):
                 cambiado = True
 
     if cambiado:
-        try:
-            with open(RUTA_ESTADO_DIA, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except Exception:
-            pass
+        # Día nuevo / reset: al disco ya. Nuevo máximo de equity: escritura diferida
+        ESTADO.almacen.escribir(RUTA_ESTADO_DIA, data, inmediato=fuerza_reset or reiniciado)
 
     return data
 
@@ -1160,24 +1397,20 @@ def _reset_diario(params):
 
 def _chequear_flag_reset_dia():
     try:
-        if os.path.exists(RUTA_FLAG_RESET_DIA):
-            os.remove(RUTA_FLAG_RESET_DIA)
-            return True
+        return ESTADO.flags.consumir(RUTA_FLAG_RESET_DIA)
     except Exception:
         pass
     return False
 
 
 def _aplicar_reset_riesgo_hoy():
-    if not os.path.exists(RUTA_FLAG_RESET_RIESGO_HOY):
+    if not ESTADO.flags.presente(RUTA_FLAG_RESET_RIESGO_HOY):
         return False
     try:
-        os.remove(RUTA_FLAG_RESET_RIESGO_HOY)
+        ESTADO.flags.consumir(RUTA_FLAG_RESET_RIESGO_HOY)
         print("⚠️ RESET_RIESGO_HOY detectado: limpiando baseline diario y persistencia.")
-        if os.path.exists(RUTA_ESTADO_DIA):
-            os.remove(RUTA_ESTADO_DIA)
-        if os.path.exists(RUTA_PERSISTENCIA):
-            os.remove(RUTA_PERSISTENCIA)
+        ESTADO.almacen.borrar(RUTA_ESTADO_DIA)
+        ESTADO.almacen.borrar(RUTA_PERSISTENCIA)
         return True
     except Exception as e:
         print(f"⚠️ Error aplicando RESET_RIESGO_HOY: {e}")
@@ -1217,11 +1450,7 @@ def _recalibrar_baseline(equity_actual, params, motivo):
     hoy = _fecha_local_hoy(params)
     data["baseline_recalibrado_fecha"] = hoy
     data["baseline_recalibrado_motivo"] = motivo
-    try:
-        with open(RUTA_ESTADO_DIA, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-    except Exception:
-        pass
+    ESTADO.almacen.escribir(RUTA_ESTADO_DIA, data, inmediato=True)
     print(f"⚠️ RIESGO DIARIO: {motivo}")
     return data
 
@@ -1232,38 +1461,37 @@ def _cargar_persistencia(params=None):
         params = _cargar_parametros_activos()
 
     try:
-        if os.path.exists(RUTA_PERSISTENCIA):
-            with open(RUTA_PERSISTENCIA, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-                if not isinstance(data, dict):
-                    data = {}
-
-                # Migración suave de claves antiguas
-                if "fecha_local" not in data and "fecha" in data:
-                    data["fecha_local"] = data.get("fecha")
-
-                # Eliminar bloqueos legacy (antes era permanente por -3%): ahora se calcula por equity + cooldown.
-                data.pop("estado_bloqueo", None)
-                data.pop("capital_inicial_dia", None)
-                data.pop("fecha", None)
-
-                hoy = _fecha_local_hoy(params)
-                if data.get("fecha_local") != hoy:
-                    return _reset_diario(params)
-
-                base = _reset_diario(params)
-                base.update(data)
-                return base
+        if ESTADO.almacen.existe(RUTA_PERSISTENCIA):
+            data = ESTADO.almacen.leer(RUTA_PERSISTENCIA) or {}
+            if not isinstance(data, dict):
+                data = {}
+
+            # Migración suave de claves antiguas
+            if "fecha_local" not in data and "fecha" in data:
+                data["fecha_local"] = data.get("fecha")
+
+            # Eliminar bloqueos legacy (antes era permanente por -3%): ahora se calcula por equity + cooldown.
+            data.pop("estado_bloqueo", None)
+            data.pop("capital_inicial_dia", None)
+            data.pop("fecha", None)
+
+            hoy = _fecha_local_hoy(params)
+            if data.get("fecha_local") != hoy:
+                return _reset_diario(params)
+
+            base = _reset_diario(params)
+            base.update(data)
+            return base
     except Exception as e:
         print(f"⚠️ Error cargando persistencia riesgo: {e}")
 
     return _reset_diario(params)
 
 
-def _guardar_persistencia(data):
+def _guardar_persistencia(data, inmediato=False):
+    """En memoria al momento; al disco con escritura diferida atómica (sin cambios => nada)."""
     try:
-        with open(RUTA_PERSISTENCIA, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        ESTADO.almacen.escribir(RUTA_PERSISTENCIA, data, inmediato=inmediato)
     except Exception:
         pass
 
@@ -1386,5 +1614,5 @@ def forzar_bloqueo(motivo):
     params = _cargar_parametros_activos()
     data = _cargar_persistencia(params=params)
     data["bloqueo_manual"] = str(motivo)
-    _guardar_persistencia(data)
+    _guardar_persistencia(data, inmediato=True)
     return False, str(motivo), "BLOQUEADO"
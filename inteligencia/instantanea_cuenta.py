@@ -0,0 +1,125 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+# ==============================================================================
+# 💼 INSTANTÁNEA DE CUENTA (BALANCE + POSICIONES COMPARTIDOS)
+# ==============================================================================
+# Antes: fetch_balance() por cada símbolo escaneado (solo para pintar el saldo),
+# otra vez en el circuit breaker, otra en cada orden y otra cada segundo en el
+# vigilante. Decenas de llamadas privadas por ciclo que se comen el rate limit.
+#
+# Ahora: una única instantánea (balance + posiciones + hora) que refresca su dueño
+# (el vigilante) a una cadencia fija. Cada lector declara cuánta antigüedad tolera:
+#   - obtener(max_edad_s=2.0) -> sizing: si es más vieja, se refresca antes de devolver
+#   - obtener(max_edad_s=None) -> UI: vale cualquiera (solo se pide si no hay ninguna)
+# Los refrescos concurrentes se agrupan: si otro hilo ya está refrescando, se espera
+# a su resultado en lugar de lanzar una segunda petición.
+# Con flujo privado, la instantánea lleva la hora del último dato recibido
+# (libro.privado_ts), no la de la lectura: un libro viejo no pasa el contrato y se va a REST.
+# ==============================================================================
+
+
+@dataclass(frozen=True)
+class InstantaneaCuenta:
+    balance: dict
+    posiciones: list = field(default_factory=list)
+    ts: float = 0.0
+    origen: str = "rest"  # "rest" | "flujo"
+
+    def edad_s(self):
+        return max(0.0, time.time() - self.ts)
+
+    def _usdt(self, clave):
+        try:
+            return float((self.balance.get("USDT") or {}).get(clave) or 0.0)
+        except Exception:
+            return 0.0
+
+    @property
+    def saldo_libre(self):
+        return self._usdt("free")
+
+    @property
+    def equity(self):
+        return self._usdt("total")
+
+
+class ServicioCuenta:
+    def __init__(self, exchange_getter, flujo_getter=None, cadencia_s=1.0):
+        """
+        exchange_getter: callable que devuelve el exchange CCXT actual (puede ser None).
+        flujo_getter: callable que devuelve el FlujoMercado (o None). Si su canal privado
+                      está sincronizado, se usa en lugar de REST.
+        cadencia_s: antigüedad máxima con la que el dueño (vigilante) mantiene la instantánea.
+        """
+        self._exchange_getter = exchange_getter
+        self._flujo_getter = flujo_getter or (lambda: None)
+        try:
+            self.cadencia_s = max(0.1, float(cadencia_s))
+        except Exception:
+            self.cadencia_s = 1.0
+        self._actual = None
+        self._lock_refresco = threading.Lock()
+        self.refrescos = 0
+
+    def _leer_flujo(self, max_edad_s):
+        try:
+            flujo = self._flujo_getter()
+        except Exception:
+            flujo = None
+        if flujo is None:
+            return None
+        ts = float(flujo.libro.privado_ts)
+        if time.time() - ts > max_edad_s:
+            return None
+        balance = flujo.balance()
+        posiciones = flujo.posiciones()
+        if balance is None or posiciones is None:
+            return None
+        return InstantaneaCuenta(balance=balance, posiciones=posiciones, ts=ts, origen="flujo")
+
+    def _leer_rest(self):
+        exchange = self._exchange_getter()
+        if exchange is None:
+            raise RuntimeError("Sin conexión a Bitget.")
+        balance = exchange.fetch_balance()
+        posiciones = exchange.fetch_positions(None)
+        return InstantaneaCuenta(balance=balance, posiciones=list(posiciones or []), ts=time.time(), origen="rest")
+
+    def refrescar(self, forzar=False, max_edad_s=0.0):
+        """
+        Refresca la instantánea. Si mientras se esperaba el turno otro hilo la dejó
+        suficientemente fresca (<= max_edad_s), se reutiliza sin nueva petición.
+        """
+        with self._lock_refresco:
+            actual = self._actual
+            if not forzar and actual is not None and actual.edad_s() <= max_edad_s:
+                return actual
+            nueva = self._leer_flujo(0.0 if forzar else max_edad_s) or self._leer_rest()
+            self._actual = nueva
+            self.refrescos += 1
+            return nueva
+
+    def obtener(self, max_edad_s=None):
+        """
+        Devuelve la instantánea respetando el contrato de frescura del lector.
+        max_edad_s=None -> cualquier antigüedad. Lanza excepción si no se puede leer.
+        """
+        actual = self._actual
+        if actual is not None and (max_edad_s is None or actual.edad_s() <= float(max_edad_s)):
+            return actual
+        return self.refrescar(max_edad_s=float(max_edad_s or 0.0))
+
+    def mantener(self):
+        """Llamado por el dueño (vigilante): refresca si la instantánea superó la cadencia."""
+        return self.obtener(max_edad_s=self.cadencia_s)
+
+    def invalidar(self):
+        """Tras enviar/cerrar órdenes: la próxima lectura con contrato de frescura irá al exchange."""
+        self._actual = None if self._actual is None else InstantaneaCuenta(
+            balance=self._actual.balance,
+            posiciones=self._actual.posiciones,
+            ts=0.0,
+            origen=self._actual.origen,
+        )
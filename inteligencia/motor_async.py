@@ -0,0 +1,237 @@
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+
+# Dependencia opcional: sin ccxt.async_support el bot sigue en modo hilos
+try:
+    import ccxt.async_support as ccxt_async
+    _ERROR_IMPORT = None
+except Exception as e:
+    ccxt_async = None
+    _ERROR_IMPORT = str(e)
+
+# ==============================================================================
+# ⚙️ MOTOR ASYNC (UN SOLO EVENT LOOP SOBRE ccxt.async_support)
+# ==============================================================================
+# Modo alternativo al de hilos (config.MOTOR_ASYNC_HABILITADO / env MOTOR_ASYNC=1):
+#   - Un event loop propietario de TODA la E/S con Bitget (cliente ccxt async, una
+#     sola sesión HTTP y un solo limitador de peticiones).
+#   - Vigilancia de cartera y heartbeat son corrutinas de ese loop.
+#   - Los métodos del operador (ejecutar_orden_ataque, _actualizar_cartera_y_gestion,
+#     cerrar_posicion...) se conservan tal cual: se ejecutan con asyncio.to_thread y
+#     su `self.exchange` es un puente que envía cada llamada al loop. Las esperas de
+#     red de escáner, vigilante y descargas se solapan en lugar de ir en serie.
+#   - El escáner (ejecutar_ciclo_depredador, bucle síncrono sin fin) va en un hilo
+#     daemon propio, no en el executor por defecto: asyncio.run espera a ese executor
+#     sin límite al salir. Con Ctrl-C (asyncio.run cancela _principal) se marca
+#     `detener_solicitado`, el escáner ejecuta su _shutdown_seguro con el loop aún vivo
+#     (sus órdenes pasan por el puente) y se le espera hasta PLAZO_PARADA_S.
+#
+# Regla: NUNCA llamar al puente desde el propio hilo del loop (se bloquearía);
+# desde corrutinas, usar `await motor.exchange_async.metodo(...)` directamente.
+# ==============================================================================
+
+
+PLAZO_PARADA_S = 90.0
+
+
+def disponible():
+    return ccxt_async is not None
+
+
+def motivo_no_disponible():
+    return _ERROR_IMPORT or ""
+
+
+class PuenteExchangeAsync:
+    """
+    Fachada síncrona de un cliente ccxt async. Los métodos corrutina se ejecutan en
+    el loop del motor y se espera su resultado; el resto de atributos (markets,
+    market(), amount_to_precision, rateLimit...) se leen directamente del cliente.
+    """
+
+    def __init__(self, cliente, loop, timeout_s=60.0):
+        object.__setattr__(self, "_cliente", cliente)
+        object.__setattr__(self, "_loop", loop)
+        object.__setattr__(self, "_timeout_s", float(timeout_s))
+        object.__setattr__(self, "_hilo_loop", None)
+
+    def _marcar_hilo_loop(self, ident):
+        object.__setattr__(self, "_hilo_loop", ident)
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._cliente, nombre)
+        if not inspect.iscoroutinefunction(atributo):
+            return atributo
+
+        def _llamada_sincrona(*args, **kwargs):
+            if threading.get_ident() == self._hilo_loop:
+                raise RuntimeError(f"PuenteExchangeAsync.{nombre} llamado desde el hilo del event loop (usar await).")
+            # La corrutina ve las contextvars del hilo que llama (p. ej. la llamada ya pagada en el planificador)
+            contexto = contextvars.copy_context()
+
+            async def _en_contexto():
+                for variable, valor in contexto.items():
+                    variable.set(valor)
+                return await atributo(*args, **kwargs)
+
+            futuro = asyncio.run_coroutine_threadsafe(_en_contexto(), self._loop)
+            return futuro.result(timeout=self._timeout_s)
+
+        _llamada_sincrona.__name__ = nombre
+        return _llamada_sincrona
+
+    def __setattr__(self, nombre, valor):
+        setattr(self._cliente, nombre, valor)
+
+    def __bool__(self):
+        return True
+
+    @property
+    def interno(self):
+        return self._cliente
+
+
+class MotorAsync:
+    def __init__(self, operador):
+        self.operador = operador
+        self.exchange_async = None
+        self._exchange_sync = None
+        self._tareas = []
+
+    # ------------------------------------------------------------------
+    # Exchange
+    # ------------------------------------------------------------------
+    def _crear_cliente_async(self, exchange_sync):
+        """Cliente ccxt async con la misma configuración (credenciales/opciones) que el síncrono."""
+        parametros = {
+            "enableRateLimit": True,
+            "options": dict(getattr(exchange_sync, "options", None) or {}),
+        }
+        for clave in ("apiKey", "secret", "password"):
+            valor = getattr(exchange_sync, clave, None)
+            if valor:
+                parametros[clave] = valor
+        cliente = ccxt_async.bitget(parametros)
+        mercados = getattr(exchange_sync, "markets", None)
+        if mercados:
+            cliente.set_markets(mercados, getattr(exchange_sync, "currencies", None) or None)
+        return cliente
+
+    def _instalar_puente(self, loop):
+        op = self.operador
+        self._exchange_sync = op.exchange
+        if op.exchange is None:
+            return
+        self.exchange_async = self._crear_cliente_async(op.exchange)
+        puente = PuenteExchangeAsync(self.exchange_async, loop)
+        puente._marcar_hilo_loop(threading.get_ident())
+        # Mismo planificador de peticiones que en modo hilos (prioridades y presupuestos)
+        planificador = getattr(op, "planificador", None)
+        op.exchange = planificador.envolver(puente) if planificador is not None else puente
+
+    async def _cerrar_exchange(self):
+        if self.exchange_async is not None:
+            try:
+                await self.exchange_async.close()
+            except Exception:
+                pass
+        # Dejar el operador con el cliente síncrono (por si el bucle de inmortalidad lo reutiliza)
+        if self._exchange_sync is not None:
+            self.operador.exchange = self._exchange_sync
+
+    # ------------------------------------------------------------------
+    # Corrutinas
+    # ------------------------------------------------------------------
+    async def _heartbeat(self):
+        op = self.operador
+        while True:
+            await asyncio.to_thread(op._escribir_latido)
+            await asyncio.sleep(2)  # mismo intervalo que el hilo clásico
+
+    async def _vigilancia(self, cadencia_s):
+        op = self.operador
+        await asyncio.sleep(5)  # Esperar arranque (igual que el hilo vigilante)
+        while True:
+            try:
+                inicio = time.perf_counter()
+                await asyncio.to_thread(op._actualizar_cartera_y_gestion)
+                op.tiempos.registrar("cartera", time.perf_counter() - inicio)
+                await asyncio.sleep(cadencia_s)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(5)
+
+    def _lanzar_escaner(self, loop):
+        """ejecutar_ciclo_depredador en un hilo daemon; devuelve un futuro del loop con su resultado."""
+        futuro = loop.create_future()
+
+        def _fijar(resultado, error):
+            if futuro.done():
+                return
+            if error is not None:
+                futuro.set_exception(error)
+            else:
+                futuro.set_result(resultado)
+
+        def _correr():
+            resultado, error = None, None
+            try:
+                resultado = self.operador.ejecutar_ciclo_depredador()
+            except BaseException as e:
+                error = e
+            try:
+                loop.call_soon_threadsafe(_fijar, resultado, error)
+            except RuntimeError:
+                pass  # loop ya cerrado (salida forzada)
+
+        threading.Thread(target=_correr, name="escaner", daemon=True).start()
+        return futuro
+
+    async def _principal(self, cadencia_vigilancia_s):
+        loop = asyncio.get_running_loop()
+        self._instalar_puente(loop)
+
+        op = self.operador
+        op.hb_running = False  # el heartbeat pasa a ser corrutina
+        self._tareas = [
+            asyncio.create_task(self._heartbeat(), name="heartbeat"),
+            asyncio.create_task(self._vigilancia(cadencia_vigilancia_s), name="vigilancia"),
+        ]
+        print(f"⚙️ MOTOR ASYNC ACTIVO (ccxt.async_support, vigilancia cada {cadencia_vigilancia_s}s)")
+        # Escáner: el ciclo del depredador tal cual, sus llamadas al exchange van al loop
+        escaner = self._lanzar_escaner(loop)
+        try:
+            return await asyncio.shield(escaner)
+        except asyncio.CancelledError:
+            # Ctrl-C: el hilo del escáner no recibe el KeyboardInterrupt; se le pide parar y
+            # se le espera con el loop vivo para que su _shutdown_seguro llegue al exchange
+            op.detener_solicitado = True
+            print(f"🛑 MOTOR ASYNC: interrupción recibida. Esperando al escáner (máx. {PLAZO_PARADA_S:.0f}s)...")
+            try:
+                await asyncio.wait_for(asyncio.shield(escaner), PLAZO_PARADA_S)
+            except asyncio.TimeoutError:
+                print("⚠️ MOTOR ASYNC: el escáner no terminó a tiempo; se abandona su hilo.")
+            except Exception:
+                pass
+            raise
+        finally:
+            for tarea in self._tareas:
+                tarea.cancel()
+            await asyncio.gather(*self._tareas, return_exceptions=True)
+            await self._cerrar_exchange()
+
+    def ejecutar(self, cadencia_vigilancia_s=1.0):
+        """Bloquea hasta que el escáner termina; devuelve lo mismo que ejecutar_ciclo_depredador()."""
+        try:
+            cadencia = max(0.2, float(cadencia_vigilancia_s))
+        except Exception:
+            cadencia = 1.0
+        inicio = time.time()
+        try:
+            return asyncio.run(self._principal(cadencia))
+        finally:
+            print(f"⚙️ MOTOR ASYNC DETENIDO tras {time.time() - inicio:.0f}s")
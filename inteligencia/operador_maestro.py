@@ -30,9 +30,14 @@ from datetime import datetime
 import json
 import random
 import requests
-from analisis_tecnico.scoring_confluencias import evaluar_setup_determinista
+from analisis_tecnico.scoring_confluencias import evaluar_setup_determinista, materializar_senal
+from analisis_tecnico.contexto_indicadores import contexto_de as contexto_indicadores
+from analisis_tecnico.indicadores_incrementales import RegistroMotores
+from analisis_tecnico.cache_senales import CacheSenales
+from analisis_tecnico.swings_incrementales import RegistroSwings
 
 RUTA_FLAG_RESET_BACKOFF = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tmp", "reset_backoff.flag"))
+RUTA_ESTADO_INDICADORES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "estado_indicadores.json")
 
 # Corrección de PATH para encontrar 'utilidades' (nivel superior)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -41,10 +46,23 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import configuracion as config
 from notificador import notificador
 import gestor_riesgo
+import registro_parametros # 🎛️ PARÁMETROS ACTIVOS (INSTANTÁNEA VERSIONADA, RECARGA EN CALIENTE)
 import tpsl_profesional # 🎯 NIVEL PRO (ATR + CONFIANZA)
 import puente_visual
 import gestor_ordenes # 🛡️ GESTOR DE ÓRDENES REALES (EVIDENCIA)
 import reloj_bitget # NUEVO MODULO DE TIEMPOual
+import pool_velas # 📥 DESCARGA PARALELA DE VELAS (RADAR)
+import buffer_velas # 🕯️ BUFFER INCREMENTAL DE VELAS (RING BUFFER)
+import flujo_mercado # 📡 FLUJO WEBSOCKET (TICKERS/VELAS/POSICIONES) CON RESPALDO REST
+import instantanea_cuenta # 💼 BALANCE + POSICIONES COMPARTIDOS (UN SOLO DUEÑO)
+import cache_mercados # 🗂️ METADATOS DE MERCADO EN DISCO (TTL)
+import prefiltro_tickers # 🔭 ETAPA 1 DEL RADAR (TODO EL UNIVERSO, VECTORIZADO)
+import publicador_ui # 🖥️ COLA ACOTADA ESCÁNER -> PANEL
+import motor_async # ⚙️ MODO ALTERNATIVO: UN EVENT LOOP (ccxt.async_support)
+import planificador_peticiones # 🚦 PRESUPUESTO DE PETICIONES POR PESO Y PRIORIDAD
+import agenda_simbolos # 🗓️ TURNOS DEL RADAR SEGÚN SCORE / ATR% / CIERRE DE VELA
+import tiempos_ciclo # ⏱️ TRAMOS p50/p95/p99 POR ETAPA (tiempos_ciclo.json)
+import riesgo_cartera # 🧮 COVARIANZA ONLINE DEL UNIVERSO + VaR DE CARTERA ANTES DEL SIZING
 
 import auto_mejora
 import mente_local as mente_maestra # 🧠 CEREBRO LOCAL (Ollama)
@@ -132,6 +150,101 @@ class OperadorDepredador:
         # Cache de velas locales para modo mantenimiento/offline
         self._cache_velas_local = {}
 
+        # Runtime: hilos (clásico) o motor async (config.MOTOR_ASYNC_HABILITADO)
+        self.usar_motor_async = bool(getattr(config, "MOTOR_ASYNC_HABILITADO", False))
+        if self.usar_motor_async and not motor_async.disponible():
+            print(f"⚠️ MOTOR ASYNC: no disponible ({motor_async.motivo_no_disponible()}). Se usa el modo hilos.")
+            self.usar_motor_async = False
+
+        # Tramos de tiempo por etapa (se publican junto a heartbeat.json)
+        self.tiempos = tiempos_ciclo.MEDIDOR
+
+        # Indicadores incrementales del radar (estado en disco: arranque en caliente)
+        self.indicadores_vivos = RegistroMotores.cargar(RUTA_ESTADO_INDICADORES)
+
+        # Planificador central de peticiones: todas las llamadas REST a Bitget pasan por aquí
+        self.planificador = planificador_peticiones.PlanificadorPeticiones(
+            tasa_publica=getattr(config, "PRESUPUESTO_PUBLICO_RPS", 18.0),
+            tasa_privada=getattr(config, "PRESUPUESTO_PRIVADO_RPS", 9.0),
+            tasa_trading=getattr(config, "PRESUPUESTO_TRADING_RPS", 9.0),
+        )
+
+        # Velas por símbolo en buffer circular: solo se piden las velas nuevas en cada pasada
+        self.almacen_velas = buffer_velas.AlmacenVelas(capacidad=100)
+
+        # Pool de descarga paralela de velas (radar): acotado por config
+        self.pool_velas = pool_velas.PoolDescargaVelas(
+            lambda: self.exchange,
+            max_workers=getattr(config, "MAXIMO_DESCARGAS_CONCURRENTES", 8),
+        )
+
+        # Metadatos de mercado persistentes (sin load_markets completo en cada ciclo/arranque)
+        self.cache_mercados = cache_mercados.cache_compartida(ttl_s=getattr(config, "CACHE_MERCADOS_TTL_S", None))
+
+        # Prefiltro vectorizado de tickers: decide qué símbolos merecen bajar velas
+        self.prefiltro_tickers = prefiltro_tickers.PrefiltroTickers(
+            ventana_base=getattr(config, "PREFILTRO_VENTANA_BASE", 96),
+            volumen_min_usdt=getattr(config, "PREFILTRO_VOLUMEN_MIN_USDT", 1_000_000.0),
+        )
+
+        # Agenda adaptativa del radar (None => todos los símbolos en cada pasada)
+        self.agenda_simbolos = (
+            agenda_simbolos.AgendaSimbolos(config.TEMPORALIDAD)
+            if bool(getattr(config, "AGENDA_RADAR_HABILITADA", True))
+            else None
+        )
+
+        # Swings Fibonacci incrementales por símbolo (None => detectar_swing_basico en cada evaluación)
+        self.swings_fibo = (
+            RegistroSwings(lookbacks=getattr(config, "FIBO_LOOKBACKS", (60,)))
+            if bool(getattr(config, "SWINGS_INCREMENTALES_HABILITADOS", True))
+            else None
+        )
+
+        # Riesgo de cartera: covarianza EWMA online del radar + VaR del candidato (None => sizing sin mirar la cartera)
+        self.riesgo_cartera = (
+            riesgo_cartera.RiesgoCartera(
+                paso_ms=buffer_velas.timeframe_a_ms(config.TEMPORALIDAD),
+                lam=getattr(config, "RIESGO_CARTERA_LAMBDA", 0.97),
+                min_obs=getattr(config, "RIESGO_CARTERA_MIN_OBS", 30),
+                confianza=getattr(config, "RIESGO_CARTERA_CONFIANZA", 0.99),
+                horizonte_velas=getattr(config, "RIESGO_CARTERA_HORIZONTE_VELAS", 1),
+            )
+            if bool(getattr(config, "RIESGO_CARTERA_HABILITADO", True))
+            else None
+        )
+
+        # Versión nueva de parametros_activos.json (auto-tuner o edición a mano) -> aviso en consola
+        registro_parametros.suscribir(self._parametros_actualizados)
+
+        # Caché de señales por vela cerrada (None => motor determinista completo en cada pasada)
+        self.cache_senales = (
+            CacheSenales(
+                refrescar_precio=bool(getattr(config, "CACHE_SENALES_REFRESCAR_PRECIO", True)),
+                paso_ms=buffer_velas.timeframe_a_ms(config.TEMPORALIDAD),
+                swings=self.swings_fibo,
+            )
+            if bool(getattr(config, "CACHE_SENALES_HABILITADA", True))
+            else None
+        )
+
+        # Publicador UI: el escáner deja sus resultados en una cola y el panel los recibe a su ritmo
+        self.publicador_ui = publicador_ui.PublicadorUI(
+            cadencia_s=getattr(config, "UI_CADENCIA_S", 0.5),
+            capacidad=getattr(config, "UI_COLA_MAX", 64),
+        )
+        self.publicador_ui.iniciar()
+
+        # Flujo WebSocket (opcional): se arranca tras conectar con Bitget. None => todo por REST
+        self.flujo_mercado = None
+
+        # Instantánea de cuenta compartida: la refresca el vigilante; cada lector declara su frescura
+        self.cuenta = instantanea_cuenta.ServicioCuenta(
+            lambda: self.exchange,
+            flujo_getter=lambda: self.flujo_mercado,
+            cadencia_s=getattr(config, "CUENTA_CADENCIA_S", 1.0),
+        )
+
         # Asegurar carpeta tmp (evidencias, crash reports, logs) desde cualquier CWD
         try:
             _tmp_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "tmp"))
@@ -141,7 +254,7 @@ class OperadorDepredador:
 
         print("\n" + "=" * 50)
         print("🦈 INICIANDO PROTOCOLO DEPREDADOR (MULTI-ACTIVO)")
-        print(f"🌍 MERCADO OBJETIVO: FUTUROS USDT | CAPACIDAD: {config.MAXIMO_PARES_ESCANEO} PARES")
+        print(f"🌍 MERCADO OBJETIVO: FUTUROS USDT | CAPACIDAD: {config.MAXIMO_PARES_ESCANEO} PARES | DESCARGAS PARALELAS: {self.pool_velas.max_workers}")
         print("=" * 50)
 
         # 1. Conexión con el Exchange (Bitget)
@@ -244,12 +357,18 @@ class OperadorDepredador:
         self.thread_noticias = threading.Thread(target=self._bucle_noticias, daemon=True)
         self.thread_noticias.start()
 
-        # 3. Vigilante de Cartera (REAL-TIME UI)
-        self.thread_vigilante = threading.Thread(target=self._hilo_vigilante_cartera, daemon=True)
-        self.thread_vigilante.start()
+        # 3. Flujo de mercado en tiempo real (antes del vigilante para que lo aproveche)
+        self._iniciar_flujo_mercado()
+
+        # 3. Vigilante de Cartera (REAL-TIME UI). En motor async es una corrutina (ver motor_async.py)
+        if not self.usar_motor_async:
+            self.thread_vigilante = threading.Thread(target=self._hilo_vigilante_cartera, daemon=True)
+            self.thread_vigilante.start()
+        else:
+            self.thread_vigilante = None
 
         try:
-            balance = self.exchange.fetch_balance()
+            balance = self.cuenta.obtener(max_edad_s=0).balance
             saldo_free = float((balance.get("USDT") or {}).get("free") or 0.0)
             equity_total = float((balance.get("USDT") or {}).get("total") or 0.0)
             print(f"✅ CONEXIÓN ESTABLECIDA. MUNICIÓN: {saldo_free:.2f} USDT | EQUITY: {equity_total:.2f} USDT")
@@ -279,6 +398,54 @@ class OperadorDepredador:
             else:
                 self._reportar_error_fatal(f"Error de credenciales: {e}")
 
+    def _parametros_actualizados(self, inst):
+        p = inst.parametros
+        print(
+            f"🎛️ PARÁMETROS v{inst.version} ({inst.origen}): riesgo_base={p.get('riesgo_base_pct')}% "
+            f"k_atr={p.get('k_atr_mult')} rr_mult={p.get('r_reward_mult')}"
+            + (f" | {len(inst.avisos)} avisos de validación" if inst.avisos else "")
+        )
+
+    def _iniciar_flujo_mercado(self):
+        """
+        📡 Arranca el flujo WebSocket si está habilitado (config.FLUJO_MERCADO_HABILITADO).
+        Nunca bloquea el arranque: si no hay librería o falla, se sigue por REST.
+        """
+        if not bool(getattr(config, "FLUJO_MERCADO_HABILITADO", False)):
+            return
+        if not flujo_mercado.disponible():
+            print(f"⚠️ FLUJO MERCADO: no disponible ({flujo_mercado.motivo_no_disponible()}). Se continúa por REST.")
+            return
+        try:
+            credenciales = {}
+            if self.exchange is not None and getattr(self.exchange, "apiKey", None):
+                credenciales = {
+                    "apiKey": self.exchange.apiKey,
+                    "secret": self.exchange.secret,
+                    "password": self.exchange.password,
+                }
+
+            def _id_de_simbolo(simbolo):
+                try:
+                    return self.exchange.market(simbolo)["id"]
+                except Exception:
+                    return flujo_mercado.id_por_defecto(simbolo)
+
+            self.flujo_mercado = flujo_mercado.FlujoMercado(
+                url_publica=getattr(config, "FLUJO_MERCADO_URL_PUBLICA", flujo_mercado.URL_PUBLICA_BITGET),
+                url_privada=getattr(config, "FLUJO_MERCADO_URL_PRIVADA", flujo_mercado.URL_PRIVADA_BITGET),
+                timeframe=config.TEMPORALIDAD,
+                credenciales=credenciales,
+                id_de_simbolo=_id_de_simbolo,
+                max_silencio_s=getattr(config, "FLUJO_MERCADO_MAX_SILENCIO_S", 10.0),
+                max_edad_privado_s=getattr(config, "FLUJO_MERCADO_MAX_EDAD_PRIVADO_S", 30.0),
+            )
+            if not self.flujo_mercado.iniciar():
+                self.flujo_mercado = None
+        except Exception as e:
+            print(f"⚠️ FLUJO MERCADO: no se pudo iniciar ({e}). Se continúa por REST.")
+            self.flujo_mercado = None
+
     def _conectar_exchange(self):
         """
         Conecta a Bitget en modo FUTUROS (SWAP).
@@ -302,6 +469,7 @@ class OperadorDepredador:
                             'createMarketBuyOrderRequiresPrice': False
                         }
                     })
+                    self.exchange = self.planificador.envolver(self.exchange)
                     self._actualizar_estado_hb("MANTENIMIENTO", "Sin credenciales: modo público (solo datos)")
                     return True
                 raise ValueError("Faltan credenciales en .env")
@@ -317,6 +485,7 @@ class OperadorDepredador:
                     'createMarketBuyOrderRequiresPrice': False
                 }
             })
+            self.exchange = self.planificador.envolver(self.exchange)
             # Verificar conexión
             balance = None
             try:
@@ -355,6 +524,74 @@ class OperadorDepredador:
             self._actualizar_estado_hb("BLOQUEADO", f"Fallo de conexion Bitget: {e}")
             return False
 
+    def _escribir_latido(self):
+        """Un latido: atiende la petición de dump del watchdog y escribe heartbeat.json (atómico)."""
+        import faulthandler
+
+        try:
+            # 1. Chequeo de bandera de dump (Solicitud de Watchdog)
+            dump_flag = os.path.join(os.path.dirname(__file__), "..", "tmp", "zerox_dump_request.flag")
+            if os.path.exists(dump_flag):
+                dump_out = os.path.join(os.path.dirname(__file__), "..", "tmp", "zerox_stackdump.txt")
+                with open(dump_out, "w") as f:
+                    f.write(f"STACK DUMP REQUESTED AT {datetime.now()}\n")
+                    faulthandler.dump_traceback(file=f, all_threads=True)
+                try: os.remove(dump_flag)
+                except: pass
+            
+            # 2. Leer estado compartido (Thread-safe logic simple)
+            with self.hb_lock:
+                 estado = self.hb_data['estado']
+                 motivo = self.hb_data['motivo']
+                 paso = self.hb_data['paso']
+                 paso_ts = self.hb_data['paso_ts']
+                 ciclo = self.hb_data['ciclo']
+            
+            # 3. Escribir Heartbeat Atómico
+            ruta_hb = os.path.join(os.path.dirname(__file__), "heartbeat.json")
+            ruta_tmp = ruta_hb + ".tmp"
+            
+            # Datos extra
+            offset_ms = 0
+            try: 
+                if hasattr(reloj_bitget, 'get_offset_ms'): offset_ms = reloj_bitget.get_offset_ms() or 0
+            except: pass
+            
+            hb_json = {
+                "timestamp": time.time(),
+                "timestamp_iso": datetime.now().isoformat(),
+                "estado_trading": estado,
+                "motivo_estado": motivo,
+                "modo_mantenimiento": bool(getattr(self, "modo_mantenimiento", False)),
+                "modo_trading": getattr(self, "modo_trading", "UNKNOWN"),
+                "ollama": "ONLINE" if self.modelo_ia else "OFFLINE", # Aprox
+                "bitget": "OK" if self.exchange else "FALLO",
+                "offset_ms": offset_ms,
+                "ciclo": ciclo,
+                "ultima_accion": paso,
+                "inicio_paso_ts": paso_ts,
+                "duracion_paso_s": time.time() - paso_ts,
+                "presupuesto_api": self.planificador.estado() if getattr(self, "planificador", None) else {},
+                "agenda_radar": self.agenda_simbolos.resumen(5) if getattr(self, "agenda_simbolos", None) else {},
+                "cache_senales": self.cache_senales.resumen() if getattr(self, "cache_senales", None) else {},
+            }
+            
+            with open(ruta_tmp, "w", encoding="utf-8", errors="replace") as f:
+                json.dump(hb_json, f, ensure_ascii=False)
+            
+            # Renombrado atómico (evita JSON corrupto)
+            os.replace(ruta_tmp, ruta_hb)
+
+            # Percentiles por etapa junto al heartbeat (tiempos_ciclo.json, cada ~5s)
+            tiempos_ciclo.MEDIDOR.publicar()
+
+            # Estado de los indicadores incrementales (cada ~60s)
+            if getattr(self, "indicadores_vivos", None) is not None:
+                self.indicadores_vivos.guardar(forzar=False)
+            
+        except Exception as e:
+            print(f"💔 Error en Hilo Heartbeat: {e}")
+
     def _iniciar_heartbeat_thread(self):
         """Inicia el hilo independiente de latido (Inmortalidad)"""
         import threading
@@ -375,60 +612,7 @@ class OperadorDepredador:
         
         def _latido():
             while self.hb_running:
-                try:
-                    # 1. Chequeo de bandera de dump (Solicitud de Watchdog)
-                    dump_flag = os.path.join(os.path.dirname(__file__), "..", "tmp", "zerox_dump_request.flag")
-                    if os.path.exists(dump_flag):
-                        dump_out = os.path.join(os.path.dirname(__file__), "..", "tmp", "zerox_stackdump.txt")
-                        with open(dump_out, "w") as f:
-                            f.write(f"STACK DUMP REQUESTED AT {datetime.now()}\n")
-                            faulthandler.dump_traceback(file=f, all_threads=True)
-                        try: os.remove(dump_flag)
-                        except: pass
-                    
-                    # 2. Leer estado compartido (Thread-safe logic simple)
-                    with self.hb_lock:
-                         estado = self.hb_data['estado']
-                         motivo = self.hb_data['motivo']
-                         paso = self.hb_data['paso']
-                         paso_ts = self.hb_data['paso_ts']
-                         ciclo = self.hb_data['ciclo']
-                    
-                    # 3. Escribir Heartbeat Atómico
-                    ruta_hb = os.path.join(os.path.dirname(__file__), "heartbeat.json")
-                    ruta_tmp = ruta_hb + ".tmp"
-                    
-                    # Datos extra
-                    offset_ms = 0
-                    try: 
-                        if hasattr(reloj_bitget, 'get_offset_ms'): offset_ms = reloj_bitget.get_offset_ms() or 0
-                    except: pass
-                    
-                    hb_json = {
-                        "timestamp": time.time(),
-                        "timestamp_iso": datetime.now().isoformat(),
-                        "estado_trading": estado,
-                        "motivo_estado": motivo,
-                        "modo_mantenimiento": bool(getattr(self, "modo_mantenimiento", False)),
-                        "modo_trading": getattr(self, "modo_trading", "UNKNOWN"),
-                        "ollama": "ONLINE" if self.modelo_ia else "OFFLINE", # Aprox
-                        "bitget": "OK" if self.exchange else "FALLO",
-                        "offset_ms": offset_ms,
-                        "ciclo": ciclo,
-                        "ultima_accion": paso,
-                        "inicio_paso_ts": paso_ts,
-                        "duracion_paso_s": time.time() - paso_ts
-                    }
-                    
-                    with open(ruta_tmp, "w", encoding="utf-8", errors="replace") as f:
-                        json.dump(hb_json, f, ensure_ascii=False)
-                    
-                    # Renombrado atómico (evita JSON corrupto)
-                    os.replace(ruta_tmp, ruta_hb)
-                    
-                except Exception as e:
-                    print(f"💔 Error en Hilo Heartbeat: {e}")
-                
+                self._escribir_latido()
                 time.sleep(2) # 2s intervalo fijo inquebrantable
 
         t = threading.Thread(target=_latido, daemon=True)
@@ -731,12 +915,30 @@ class OperadorDepredador:
             except Exception:
                 pass
 
-            self._cerrar_todas_posiciones_seguro(motivo)
+            with self.planificador.prioridad(planificador_peticiones.CRITICA):
+                self._cerrar_todas_posiciones_seguro(motivo)
         finally:
             try:
                 self.hb_running = False
             except Exception:
                 pass
+            try:
+                self.pool_velas.cerrar()
+            except Exception:
+                pass
+            try:
+                self.publicador_ui.detener()
+            except Exception:
+                pass
+            try:
+                if self.flujo_mercado is not None:
+                    self.flujo_mercado.detener()
+            except Exception:
+                pass
+            try:
+                self.indicadores_vivos.guardar()
+            except Exception:
+                pass
             self.detener_solicitado = True
 
     def _recuperacion_arranque(self):
@@ -855,61 +1057,61 @@ class OperadorDepredador:
         total = 0
 
         try:
-            mercados = self.exchange.load_markets() or {}
-        except Exception:
-            mercados = {}
-
-        for m in mercados.values():
-            try:
-                if not (m.get("swap") and m.get("quote") == "USDT" and m.get("active")):
-                    continue
-                simbolo = m.get("symbol")
-                if not simbolo:
-                    continue
-
-                total += 1
-
-                if self._simbolo_en_blacklist_persistente(simbolo, blacklist):
-                    continue
-
-                min_cost = self._min_cost_usdt_market(m)
-                Lmax = self._lmax_market(m)
-
-                if min_cost > (max_margin_usdt * float(Lmax) * 0.95):
-                    continue
-
-                operables.add(simbolo)
-            except Exception:
-                continue
+            # Tabla precalculada (min_cost / Lmax por mercado) -> filtro vectorizado
+            tabla = self.cache_mercados.tabla(self.exchange)
+            total = int(tabla.usdt_swap_activo.sum())
+            operables = set(tabla.operables(
+                max_margin_usdt,
+                lmax_defecto=self._lmax_market({}),
+                excluidos=lambda s: self._simbolo_en_blacklist_persistente(s, blacklist),
+            ))
+        except Exception as e:
+            print(f"⚠️ Error construyendo mercados operables: {e}")
 
         self.mercados_operables = operables
         print(f"Mercados operables: {len(operables)} / total: {total}")
         return operables
     
     def obtener_top_activos(self):
-        """Descarga el mercado entero y selecciona los 30 con más volumen."""
+        """
+        Descarga los tickers del mercado entero y selecciona los objetivos del radar:
+          - Prefiltro (por defecto): puntuación vectorizada de todo el universo operable.
+          - Clásico (PREFILTRO_TICKERS=0): los 30 con más volumen.
+        """
         try:
-            # 1. Obtener metadatos de mercados (para saber cuáles son USDT Futures)
-            mercados = self.exchange.load_markets()
-            
+            # 1. Obtener metadatos de mercados (cache en disco; se refresca sola al caducar)
             # Filtro: Solo Futuros (Swap), que sean USDT y estén activos
-            simbolos_candidatos = [
-                m['symbol'] for m in mercados.values()
-                if m['swap'] and m['quote'] == 'USDT' and m['active']
-            ]
+            simbolos_candidatos = self.cache_mercados.tabla(self.exchange).candidatos_usdt_swap()
             
             # 2. Obtener tickers de forma segura (con limpieza)
-            try:
-                tickers = self.exchange.fetch_tickers(simbolos_candidatos)
-            except Exception as e:
-                print(f"⚠️ Error masivo en fetch_tickers: {e}")
-                tickers = {}
+            # Con flujo WebSocket activo se leen del libro en memoria; si no cubre el universo, REST.
+            tickers = None
+            if self.flujo_mercado is not None:
+                self.flujo_mercado.suscribir_tickers(simbolos_candidatos)
+                tickers = self.flujo_mercado.tickers(simbolos_candidatos)
+            if tickers is None:
+                try:
+                    tickers = self.exchange.fetch_tickers(simbolos_candidatos)
+                except Exception as e:
+                    print(f"⚠️ Error masivo en fetch_tickers: {e}")
+                    tickers = {}
 
             # 🔥 CACHE DE PRECIOS MASIVO
             for s, t in tickers.items():
                 if t and 'last' in t and t['last']:
                     self.market_cache_precios[s] = float(t['last'])
 
+            operables = self.mercados_operables if isinstance(self.mercados_operables, set) else None
+
+            # Etapa 1: prefiltro de todo el universo (solo los promovidos bajan velas)
+            if bool(getattr(config, "PREFILTRO_TICKERS_HABILITADO", True)):
+                universo = [s for s in simbolos_candidatos if not operables or s in operables]
+                top_30 = self.prefiltro_tickers.seleccionar(universo, tickers, config.MAXIMO_PARES_ESCANEO)
+                if top_30:
+                    if self.flujo_mercado is not None:
+                        self.flujo_mercado.suscribir_velas(top_30)
+                    return top_30
+
             # Filtrar y Ordenar
             lista_ordenada = []
             for simbolo in simbolos_candidatos:
@@ -929,10 +1131,12 @@ class OperadorDepredador:
 
             # Filtro adicional para cuentas pequeñas (lista operable precalculada)
             try:
-                if isinstance(self.mercados_operables, set) and self.mercados_operables:
-                    top_30 = [s for s in top_30 if s in self.mercados_operables]
+                if operables:
+                    top_30 = [s for s in top_30 if s in operables]
             except Exception:
                 pass
+            if self.flujo_mercado is not None:
+                self.flujo_mercado.suscribir_velas(top_30)
             return top_30
 
         except Exception as e:
@@ -946,10 +1150,16 @@ class OperadorDepredador:
                 if self.modo_mantenimiento:
                     return self._cargar_velas_local(simbolo)
                 raise RuntimeError("Sin conexión a Bitget.")
-            velas_raw = self.exchange.fetch_ohlcv(simbolo, config.TEMPORALIDAD, limit=100)
-            df = pd.DataFrame(velas_raw, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['datetime'] = pd.to_datetime(df['timestamp'], unit='ms')
-            return df
+            with self.tiempos.tramo("mercado_velas", simbolo):
+                # Flujo WebSocket: fusionar las velas recibidas (sin petición). Si hay hueco, REST.
+                if self.flujo_mercado is not None and self.flujo_mercado.velas_suscritas(simbolo):
+                    df = self.almacen_velas.fusionar_flujo(
+                        simbolo, config.TEMPORALIDAD, self.flujo_mercado.drenar_velas(simbolo)
+                    )
+                    if df is not None:
+                        return df
+                # Incremental: la primera vez 100 velas; después solo la vela en formación + las nuevas
+                return self.almacen_velas.descargar(self.exchange, simbolo, config.TEMPORALIDAD)
         except Exception as e:
             print(f"⚠️ Error descargando datos de {simbolo}: {e}")
             return None
@@ -1034,7 +1244,8 @@ class OperadorDepredador:
         while True:
             try:
                 # 1. Fetch Rápido (Solo Balances y Pos)
-                self._actualizar_cartera_y_gestion()
+                with self.tiempos.tramo("cartera"):
+                    self._actualizar_cartera_y_gestion()
                 time.sleep(1) # ALTA FRECUENCIA (1s)
             except Exception as e:
                 # Silencioso para no ensuciar logs, el principal ya reporta
@@ -1136,6 +1347,79 @@ class OperadorDepredador:
             # Si falla, asumimos que ya está bien o que no se puede cambio
             pass
 
+    def _riesgo_por_cartera(self, simbolo, direccion, precio_entrada, precio_sl, saldo, riesgo_pct, apalancamiento):
+        """
+        Riesgo % del candidato ajustado al presupuesto de VaR de la cartera (posiciones abiertas +
+        candidato, covarianza online del radar). 0 => no entra (motivo en tmp/zerox_no_entra.txt).
+        """
+        if self.riesgo_cartera is None:
+            return riesgo_pct
+        try:
+            cuenta = None
+            if self.exchange is not None:
+                cuenta = self.cuenta.obtener(max_edad_s=getattr(config, "CUENTA_MAX_EDAD_SIZING_S", 2.0))
+            tabla = self.cache_mercados.tabla()
+            posiciones = riesgo_cartera.posiciones_netas(cuenta.posiciones if cuenta else [], tabla=tabla)
+            equity = (cuenta.equity if cuenta else None) or saldo
+
+            # Notional que saldría del sizing con este riesgo (mismas reglas, sin logs)
+            notional = None
+            if tabla is not None and simbolo in tabla.indice:
+                lote = gestor_riesgo.dimensionar_candidatos(
+                    [simbolo], [precio_entrada], [precio_sl], [saldo],
+                    riesgo_pct=riesgo_pct, apalancamiento=apalancamiento, tabla=tabla,
+                )
+                if lote["motivo"][0] != "OK":
+                    return riesgo_pct  # el sizing real ya dirá por qué no entra
+                notional = float(lote["notional"][0])
+            if not notional:
+                stop_frac = abs(float(precio_entrada) - float(precio_sl)) / float(precio_entrada)
+                notional = float(saldo) * float(riesgo_pct) / 100.0 / stop_frac
+            notional = notional if direccion == "LONG" else -notional
+
+            evaluacion = self.riesgo_cartera.evaluar(simbolo, notional, posiciones)
+            params = registro_parametros.obtener()
+            riesgo_min = float((params.get("riesgo") or {}).get("riesgo_min_pct", 0.25))
+            nuevo, motivo = riesgo_cartera.limitar_riesgo(
+                evaluacion, equity, riesgo_pct,
+                var_max_pct=getattr(config, "RIESGO_CARTERA_VAR_MAX_PCT", 2.0),
+                # gestor_riesgo lee <= 0.2 como fracción: por debajo no se puede pedir en %
+                riesgo_min_pct=max(riesgo_min, 0.201),
+            )
+        except Exception as e:
+            print(f"⚠️ RIESGO CARTERA: sin evaluación para {simbolo} ({e}). Sizing sin ajuste.")
+            return riesgo_pct
+
+        if motivo is None:
+            return riesgo_pct
+        correlacion = evaluacion.get("correlacion_max")
+        detalle = {
+            "ts": datetime.now().isoformat(),
+            "simbolo": simbolo,
+            "motivo": motivo,
+            "saldo": saldo,
+            "equity": equity,
+            "notional": round(abs(notional), 4),
+            "riesgo_pct": riesgo_pct,
+            "riesgo_pct_cartera": nuevo,
+            "var_cartera": round(evaluacion["var_cartera"], 4),
+            "var_con_candidato": round(evaluacion["var_con_candidato"], 4),
+            "var_incremental": round(evaluacion["var_incremental"], 4),
+            "var_marginal": round(evaluacion["var_marginal"], 6),
+            "exposicion_ajustada": round(evaluacion["exposicion_ajustada"], 4),
+            "correlacion_max": correlacion,
+            "posiciones": len(posiciones),
+        }
+        if nuevo <= 0:
+            gestor_riesgo._log_no_entra(detalle)
+        else:
+            print(
+                f"🧮 RIESGO CARTERA {simbolo}: VaR {evaluacion['var_cartera']:.2f} -> "
+                f"{evaluacion['var_con_candidato']:.2f} USDT (máx {equity * float(getattr(config, 'RIESGO_CARTERA_VAR_MAX_PCT', 2.0)) / 100.0:.2f}). "
+                f"Riesgo {riesgo_pct}% -> {nuevo}%"
+            )
+        return nuevo
+
     def ejecutar_orden_ataque(self, simbolo, direccion, precio_estimado, atr=None, confianza=0.9, apalancamiento_ia=1, df=None):
         """Ejecuta orden REAL con Sizing por Riesgo y Blindaje inmediato."""
         try:
@@ -1143,7 +1427,7 @@ class OperadorDepredador:
             saldo = 0.0
             try:
                 if self.exchange is not None:
-                    saldo = float(self.exchange.fetch_balance()['USDT']['free'])
+                    saldo = self.cuenta.obtener(max_edad_s=getattr(config, "CUENTA_MAX_EDAD_SIZING_S", 2.0)).saldo_libre
             except Exception:
                 saldo = 0.0
             if (saldo is None or saldo <= 0) and self.modo_mantenimiento:
@@ -1152,6 +1436,7 @@ class OperadorDepredador:
                 saldo = 0.0
             rr_mult_operativo = gestor_riesgo.obtener_rr_mult_operativo(saldo)
             
+            t_sizing = time.perf_counter()
             # 1. PRE-CÁLCULO DE TP/SL (Para Sizing)
             # Necesitamos el SL proyectado para calcular el tamaño de posición por riesgo
             tp_est, sl_est, motivo_tpsl = tpsl_profesional.calcular_tpsl_elite(
@@ -1171,6 +1456,14 @@ class OperadorDepredador:
             # Ahora llamamos al nuevo gestor de riesgo (CCXT aware)
             # Riesgo dinámico: modulado por drawdown + progreso objetivo (north-star)
             riesgo_pct_operativo = gestor_riesgo.obtener_riesgo_pct_operativo(saldo)
+            # Cartera: el candidato no puede llevar el VaR de posiciones abiertas + él por encima del presupuesto
+            riesgo_pct_operativo = self._riesgo_por_cartera(
+                simbolo, direccion, precio_estimado, sl_est, saldo, riesgo_pct_operativo, apalancamiento_ia
+            )
+            if riesgo_pct_operativo <= 0:
+                self.tiempos.registrar("sizing", time.perf_counter() - t_sizing, simbolo)
+                print(f"NO_ENTRA: VaR de cartera sin hueco para {simbolo}. Motivo en tmp/zerox_no_entra.txt")
+                return False
             if self.exchange is not None:
                 cantidad, leverage_final = gestor_riesgo.calcular_tamano_posicion(
                     self.exchange, simbolo, precio_estimado, sl_est, saldo,
@@ -1186,6 +1479,7 @@ class OperadorDepredador:
                     apalancamiento=apalancamiento_ia,
                     min_cost_usdt=5.0,
                 )
+            self.tiempos.registrar("sizing", time.perf_counter() - t_sizing, simbolo)
             
             if cantidad == 0:
                 print(f"NO_ENTRA: sizing=0 en {simbolo}. Motivo en tmp/zerox_no_entra.txt")
@@ -1228,7 +1522,8 @@ class OperadorDepredador:
 
             # B. FUEGO
             try:
-                orden = self.exchange.create_order(simbolo, 'market', side, cantidad)
+                with self.tiempos.tramo("orden", simbolo):
+                    orden = self.exchange.create_order(simbolo, 'market', side, cantidad)
             except Exception as e_order:
                 print(f"❌ ERROR CRÍTICO API ORDER: {e_order}")
                 if self._es_error_transitorio(e_order):
@@ -1242,6 +1537,7 @@ class OperadorDepredador:
                 return False
             
             # 5. POST-PROCESADO Y BLINDAJE
+            self.cuenta.invalidar()  # balance/posiciones cambiaron: próxima lectura fresca
             precio_real = orden.get('average')
             if not precio_real or precio_real == 0: precio_real = precio_estimado # Fallback
             order_id = orden.get('id', 'UNKNOWN')
@@ -1417,32 +1713,35 @@ class OperadorDepredador:
             return
 
         print(f"📉 CERRANDO POSICIÓN en {self.activo_actual}: {motivo}")
-        try:
-            # Buscar posición en el exchange
-            posiciones = self.exchange.fetch_positions([self.activo_actual])
-            for pos in posiciones:
-                tamano = float(pos['contracts'])
-                if tamano > 0:
-                    # Cierre Puro: Vender lo comprado (o comprar lo vendido)
-                    lado_cierre = 'sell' if pos['side'] == 'long' else 'buy'
+        # Cierre = prioridad CRITICA en el planificador (nunca detrás del escáner)
+        with self.planificador.prioridad(planificador_peticiones.CRITICA):
+            try:
+                # Buscar posición en el exchange
+                posiciones = self.exchange.fetch_positions([self.activo_actual])
+                for pos in posiciones:
+                    tamano = float(pos['contracts'])
+                    if tamano > 0:
+                        # Cierre Puro: Vender lo comprado (o comprar lo vendido)
+                        lado_cierre = 'sell' if pos['side'] == 'long' else 'buy'
                     
-                    if lado_cierre == 'sell':
-                         self.exchange.create_market_sell_order(self.activo_actual, tamano)
-                    else:
-                         self.exchange.create_market_buy_order(self.activo_actual, tamano)
+                        if lado_cierre == 'sell':
+                             self.exchange.create_market_sell_order(self.activo_actual, tamano)
+                        else:
+                             self.exchange.create_market_buy_order(self.activo_actual, tamano)
 
-                    print(f"✅ POSICIÓN CERRADA EXITOSAMENTE.")
-                    notificador.enviar("VENTA", f"Salida: {motivo}", {"Par": self.activo_actual})
+                        self.cuenta.invalidar()
+                        print(f"✅ POSICIÓN CERRADA EXITOSAMENTE.")
+                        notificador.enviar("VENTA", f"Salida: {motivo}", {"Par": self.activo_actual})
 
-            # Resetear estado
-            self.activo_actual = None
-            self.posicion_abierta = 0
-            self.precio_entrada = 0.0
+                # Resetear estado
+                self.activo_actual = None
+                self.posicion_abierta = 0
+                self.precio_entrada = 0.0
             
-            puente_visual.actualizar_estado({"posicion": 0, "par_activo": "ESPERANDO..."})
+                puente_visual.actualizar_estado({"posicion": 0, "par_activo": "ESPERANDO..."})
 
-        except Exception as e:
-            print(f"⚠️ ERROR CERRANDO: {e}")
+            except Exception as e:
+                print(f"⚠️ ERROR CERRANDO: {e}")
 
     # --------------------------------------------------------------------------
     # 💼 GESTIÓN DE CARTERA Y JSON
@@ -1479,12 +1778,14 @@ class OperadorDepredador:
                     return
                 raise RuntimeError("Sin conexión a Bitget.")
 
-            balance = self.exchange.fetch_balance()
+            # Instantánea compartida (flujo WebSocket privado si está sincronizado; si no, REST)
+            instantanea = self.cuenta.mantener()
+            balance = instantanea.balance
             total_usdt = balance['USDT']['total']
             free_usdt = balance['USDT']['free']
             
             # Obtener posiciones abiertas (riesgo real)
-            raw_positions = self.exchange.fetch_positions(None) 
+            raw_positions = instantanea.posiciones
             posiciones_activas = []
 
             # Blacklist/Cuarentena (Bitget API no gestionable)
@@ -1872,7 +2173,7 @@ class OperadorDepredador:
                     self._registrar_paso("Modo Vigilancia Activa")
                     self._modo_vigilancia()
                     self._registrar_paso("Durmiendo (Vigilancia)")
-                    if self._stop_solicitado():
+                    if self.detener_solicitado or self._stop_solicitado():
                         self._shutdown_seguro("STOP solicitado")
                         return True
                     time.sleep(5)
@@ -1901,8 +2202,9 @@ class OperadorDepredador:
                         if self.modo_mantenimiento or self.exchange is None:
                             equity_actual = float(getattr(self, "balance_mantenimiento_usdt", 100.0))
                         else:
-                            balance_riesgo = self.exchange.fetch_balance()
-                            equity_actual = float((balance_riesgo.get("USDT") or {}).get("total") or 0.0)
+                            equity_actual = self.cuenta.obtener(
+                                max_edad_s=getattr(config, "CUENTA_MAX_EDAD_SIZING_S", 2.0)
+                            ).equity
 
                         operativo, motivo, etiqueta_estado = gestor_riesgo.verificar_circuit_breaker(equity_actual)
                         self.entradas_habilitadas_riesgo = bool(operativo)
@@ -1948,27 +2250,63 @@ class OperadorDepredador:
 
                 # --- 1. ESCANEO VISUAL (Paginado) ---
                 # Recorremos el mercado para que el usuario VEA los precios pasar
-                activos_top = self.obtener_top_activos()
+                t_pasada = time.perf_counter()
+                with self.tiempos.tramo("mercado_tickers"):
+                    activos_top = self.obtener_top_activos()
                 self._reportar_por_que_no_entra(getattr(self, "_ultimo_info_no_entra", {}))
-                print(f"📡 RADAR ACTIVO: Escaneando {len(activos_top)} objetivos...")
 
-                for i, simbolo in enumerate(activos_top):
-                    if self._stop_solicitado():
+                # Agenda adaptativa: solo los símbolos a los que les toca turno
+                objetivos = activos_top
+                if self.agenda_simbolos is not None:
+                    objetivos = self.agenda_simbolos.pendientes(activos_top)
+                    if not objetivos:
+                        self._registrar_paso("Esperando turno de la agenda")
+                        time.sleep(max(0.5, min(5.0, self.agenda_simbolos.segundos_hasta_proximo(activos_top))))
+                        continue
+                print(f"📡 RADAR ACTIVO: Escaneando {len(objetivos)}/{len(activos_top)} objetivos...")
+
+                # 1. Descargar (en paralelo; cada símbolo se evalúa en cuanto llegan sus velas)
+                for i, (simbolo, df) in enumerate(self.pool_velas.iterar(objetivos, self.descargar_velas)):
+                    if self.detener_solicitado or self._stop_solicitado():
                         self._shutdown_seguro("STOP solicitado")
                         return True
 
-                    # 1. Descargar
-                    df = self.descargar_velas(simbolo)
                     if df is None: continue
                     
                     precio = df.iloc[-1]['close']
                     volumen = df.iloc[-1]['volume']
-                    rsi = self._calcular_rsi(df['close']).iloc[-1]
-                    atr = self._calcular_atr(df).iloc[-1] if self._calcular_atr(df) is not None else 0.0
+                    with self.tiempos.tramo("indicadores_radar", simbolo):
+                        # O(1) por vela nueva (mismos valores que indicadores.rsi/atr sobre el frame)
+                        try:
+                            vivos = self.indicadores_vivos.sincronizar(simbolo, df)
+                            rsi = float(vivos["rsi"])
+                            atr = float(vivos["atr"])
+                        except Exception:
+                            # Contexto memoizado del frame (el motor determinista reutiliza las series)
+                            ctx_ind = contexto_indicadores(df)
+                            rsi = float(ctx_ind.rsi(14).iloc[-1])
+                            atr = float(ctx_ind.atr(14).iloc[-1])
+                        # Retornos de las velas cerradas nuevas -> covarianza de cartera (O(n) por vela)
+                        if self.riesgo_cartera is not None:
+                            try:
+                                self.riesgo_cartera.sincronizar(simbolo, df)
+                            except Exception:
+                                pass
 
                     # --- MOTOR DETERMINISTA (PRIMERA CAPA, ANTES DEL LLM) ---
                     try:
-                        senal_det = evaluar_setup_determinista(df, simbolo=simbolo, temporalidad=config.TEMPORALIDAD)
+                        perezosa = bool(getattr(config, "MOTOR_PEREZOSO", False))
+                        with self.tiempos.tramo("motor_determinista", simbolo):
+                            if self.cache_senales is not None:
+                                senal_det = self.cache_senales.evaluar(df, simbolo, config.TEMPORALIDAD, perezosa=perezosa)
+                            else:
+                                senal_det = evaluar_setup_determinista(
+                                    df,
+                                    simbolo=simbolo,
+                                    temporalidad=config.TEMPORALIDAD,
+                                    perezosa=perezosa,
+                                    swings=self.swings_fibo,
+                                )
                     except Exception as e_det:
                         senal_det = {
                             "setup": False,
@@ -1984,13 +2322,25 @@ class OperadorDepredador:
                             "detalle_setup": {"patron": None, "fibo": None, "divergencias": None, "indicadores": {}, "volumen": None},
                             "plan": {"sl": None, "tp": None, "rr": None, "apalancamiento_sugerido": 1},
                         }
+
+                    # Próximo turno del símbolo según score, ATR% y cierre de vela
+                    if self.agenda_simbolos is not None:
+                        try:
+                            self.agenda_simbolos.registrar(
+                                simbolo,
+                                (senal_det or {}).get("score", 0),
+                                atr_pct=(float(atr) / float(precio) * 100.0) if precio else None,
+                                ts_ultima_vela_ms=float(df["timestamp"].iloc[-1]),
+                            )
+                        except Exception:
+                            pass
                     
                     # ⚡ ACTUALIZACIÓN VISUAL EN TIEMPO REAL (HEARTBEAT) ⚡
                     timestamp = datetime.now().strftime('%H:%M:%S')
                     
                     # Recuperar posiciones reales para evitar parpadeo
                     try:
-                        saldo_actual = self.exchange.fetch_balance()['USDT']['total']
+                        saldo_actual = self.cuenta.obtener().equity  # UI: vale cualquier antigüedad
                     except:
                         saldo_actual = 0.0
 
@@ -2017,13 +2367,14 @@ class OperadorDepredador:
                             f"[{timestamp}] 👁️ Analizando {simbolo} (RSI: {rsi:.1f})",
                             f"[{timestamp}] 📡 Radar de Volumen: {volumen:.0f}",
                          ],
-                         "estado_sistema": f"ESCANANDO {simbolo} ({i+1}/{len(activos_top)})",
-                         "progreso": int((i / len(activos_top)) * 100),
+                         "estado_sistema": f"ESCANANDO {simbolo} ({i+1}/{len(objetivos)})",
+                         "progreso": int((i / len(objetivos)) * 100),
+                         "agenda_radar": self.agenda_simbolos.resumen() if self.agenda_simbolos is not None else {},
                          # IMPORTANTE: Usar cache para no borrar la tabla visible
                          "posiciones": self.posiciones_cache 
                     }
-                    puente_visual.actualizar_estado(datos_live)
-                    time.sleep(0.5) # PAUSA VISUAL (Solicitada por usuario)
+                    # PAUSA VISUAL: la marca el publicador UI (config.UI_CADENCIA_S), no el escáner
+                    self.publicador_ui.publicar(datos_live)
 
                     # 3. CONSULTA A LA IA (¿Atacamos?)
                     # SI RSI está en extremos, consultamos al módulo IA (Mente Maestra — desactivada)
@@ -2037,6 +2388,8 @@ class OperadorDepredador:
 
                     if senal_compra or senal_venta:
                         direccion_tecnica = "LONG" if senal_compra else "SHORT"
+                        # Solo los candidatos pagan razones/confluencias/detalle (RAG, LLM, ejecución)
+                        senal_det = materializar_senal(senal_det)
                         print(f"🔎 CANDIDATO DETERMINISTA: {simbolo} -> {decision_det} ({confianza_det}%). {(senal_det or {}).get('razon','')}")
                         
                         # PREPARAR CONTEXTO PARA CEREBRO LOCAL
@@ -2055,7 +2408,8 @@ class OperadorDepredador:
                         try:
                             if getattr(self, "academia", None) is not None:
                                 consulta_rag = f"{simbolo} {decision_det} {direccion_tecnica} RSI {rsi:.1f} ATR {atr:.6f} | {str((senal_det or {}).get('razon',''))[:200]}"
-                                rag = self.academia.buscar(consulta_rag, k=5)
+                                with self.tiempos.tramo("rag", simbolo):
+                                    rag = self.academia.buscar(consulta_rag, k=5)
                                 rag_recortado = []
                                 for r in (rag or []):
                                     try:
@@ -2070,7 +2424,8 @@ class OperadorDepredador:
                         
                         # CONSULTA A OLLAMA (si falla, seguimos con determinista)
                         try:
-                            juicio_ia = mente_maestra.analizar_oportunidad(contexto_ia)
+                            with self.tiempos.tramo("llm", simbolo):
+                                juicio_ia = mente_maestra.analizar_oportunidad(contexto_ia)
                         except Exception as e_ia:
                             juicio_ia = {"accion_sugerida": "ESPERAR", "confianza": 0, "tecnico": f"IA offline: {e_ia}"}
                         
@@ -2132,9 +2487,8 @@ class OperadorDepredador:
                         )
                         if exito:
                             break
-                    
-                    # Pausa táctica anti-ban
-                    time.sleep(0.5)
+
+                self.tiempos.registrar("pasada_radar", time.perf_counter() - t_pasada)
 
             except KeyboardInterrupt:
                 print("\n🛑 APAGADO DE EMERGENCIA ACTIVADO.")
@@ -2147,6 +2501,11 @@ class OperadorDepredador:
         """Vigila la posición abierta para cerrar con ganancia o Stop Loss."""
         df = self.descargar_velas(self.activo_actual)
         if df is None: return
+        if self.riesgo_cartera is not None:
+            try:
+                self.riesgo_cartera.sincronizar(self.activo_actual, df)
+            except Exception:
+                pass
         
         precio_actual = df.iloc[-1]['close']
         rsi = self._calcular_rsi(df['close']).iloc[-1]
@@ -2336,7 +2695,10 @@ if __name__ == "__main__":
                 break
 
             bot = OperadorDepredador()
-            detener = bot.ejecutar_ciclo_depredador()
+            if getattr(bot, "usar_motor_async", False) and not bot.detener_solicitado:
+                detener = motor_async.MotorAsync(bot).ejecutar(getattr(config, "CUENTA_CADENCIA_S", 1.0))
+            else:
+                detener = bot.ejecutar_ciclo_depredador()
             if detener:
                 break
         except KeyboardInterrupt:
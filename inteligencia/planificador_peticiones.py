@@ -0,0 +1,308 @@
+import asyncio
+import contextvars
+import heapq
+import inspect
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+# ==============================================================================
+# 🚦 PLANIFICADOR DE PETICIONES BITGET (PRESUPUESTO POR PESO + PRIORIDADES)
+# ==============================================================================
+# El limitador de CCXT (enableRateLimit) es una cola FIFO única: un cierre de
+# posición podía quedar detrás de 30 fetch_ohlcv del escáner, y los 429 acababan
+# disparando el backoff global.
+#
+# Aquí cada llamada pertenece a un presupuesto (como los límites de Bitget):
+#   - publico  : datos de mercado (velas, tickers, metadatos)     ~20 req/s por IP
+#   - privado  : cuenta (balance, posiciones, órdenes abiertas)  ~10 req/s por UID
+#   - trading  : envío/cancelación de órdenes y ajustes         ~10 req/s por UID
+# Cada presupuesto es un token bucket con cola por PRIORIDAD:
+#   CRITICA (cierres, reduceOnly, cancelaciones) > ALTA (entradas) > NORMAL (cuenta) > BAJA (escáner/UI)
+# Las prioridades bajas además dejan una reserva libre, así un cierre siempre
+# encuentra presupuesto aunque el escáner esté a tope.
+# Un 429 penaliza solo a su presupuesto (deuda de tokens) en lugar de todo el bot.
+# Como el limitador de CCXT queda apagado, toda petición HTTP del cliente (fetch2) pasa
+# también por aquí. Dentro de un método de PESOS_METODOS las `peso` primeras peticiones de
+# su presupuesto ya están pagadas; el resto (llamadas internas de CCXT como
+# load_time_difference, endpoints implícitos public*/private*, métodos sin peso propio)
+# pagan PESO_DEFECTO en el presupuesto de su API.
+# ==============================================================================
+
+CRITICA = 0
+ALTA = 1
+NORMAL = 2
+BAJA = 3
+
+NOMBRES_PRIORIDAD = {CRITICA: "CRITICA", ALTA: "ALTA", NORMAL: "NORMAL", BAJA: "BAJA"}
+
+# Fracción de la capacidad que cada prioridad debe dejar libre
+RESERVA_POR_PRIORIDAD = {CRITICA: 0.0, ALTA: 0.0, NORMAL: 0.10, BAJA: 0.25}
+
+# método CCXT -> (presupuesto, peso, prioridad por defecto)
+PESOS_METODOS = {
+    "fetch_ohlcv": ("publico", 1, BAJA),
+    "fetch_ticker": ("publico", 1, BAJA),
+    "fetch_tickers": ("publico", 1, BAJA),
+    "fetch_order_book": ("publico", 1, BAJA),
+    "fetch_time": ("publico", 1, BAJA),
+    "load_markets": ("publico", 3, BAJA),
+    "fetch_markets": ("publico", 3, BAJA),
+    "fetch_balance": ("privado", 1, NORMAL),
+    "fetch_positions": ("privado", 1, NORMAL),
+    "fetch_position": ("privado", 1, NORMAL),
+    "fetch_open_orders": ("privado", 1, NORMAL),
+    "fetch_order": ("privado", 1, NORMAL),
+    "fetch_my_trades": ("privado", 1, NORMAL),
+    "create_order": ("trading", 1, ALTA),
+    "create_market_order": ("trading", 1, ALTA),
+    "create_market_buy_order": ("trading", 1, ALTA),
+    "create_market_sell_order": ("trading", 1, ALTA),
+    "create_limit_order": ("trading", 1, ALTA),
+    "cancel_order": ("trading", 1, CRITICA),
+    "cancel_all_orders": ("trading", 1, CRITICA),
+    "set_leverage": ("trading", 1, ALTA),
+    "set_margin_mode": ("trading", 1, ALTA),
+    "set_position_mode": ("trading", 1, ALTA),
+}
+
+# Peticiones HTTP sin método propio en PESOS_METODOS
+PESO_DEFECTO = 1
+
+ERRORES_LIMITE = ("RateLimitExceeded", "DDoSProtection")
+
+# Llamada planificada en curso (hilo o tarea): peticiones HTTP ya pagadas y su prioridad
+_LLAMADA = contextvars.ContextVar("llamada_planificada", default=None)
+
+
+def _es_limite_excedido(error):
+    if type(error).__name__ in ERRORES_LIMITE:
+        return True
+    for attr in ("http_status_code", "status_code", "code"):
+        try:
+            if int(getattr(error, attr, 0) or 0) == 429:
+                return True
+        except (TypeError, ValueError):
+            continue
+    return "429" in str(error)[:200]
+
+
+def _es_reduce_only(args, kwargs):
+    params = kwargs.get("params")
+    if params is None:
+        params = next((a for a in args if isinstance(a, dict)), None)
+    if not isinstance(params, dict):
+        return False
+    return bool(params.get("reduceOnly") or params.get("stop") or params.get("stopLossPrice") or params.get("takeProfitPrice"))
+
+
+class Presupuesto:
+    """Token bucket con cola de espera ordenada por (prioridad, llegada)."""
+
+    def __init__(self, nombre, tasa_por_s):
+        self.nombre = nombre
+        self.tasa = max(0.1, float(tasa_por_s))
+        self.capacidad = max(1.0, self.tasa)  # ráfaga de ~1 s
+        self.tokens = self.capacidad
+        self._ultimo = time.monotonic()
+        self._cond = threading.Condition()
+        self._cola = []
+        self._secuencia = itertools.count()
+        self.llamadas = 0
+        self.espera_total_s = 0.0
+        self.http_429 = 0
+
+    def _recargar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    def adquirir(self, peso=1, prioridad=NORMAL):
+        peso = float(peso)
+        reserva = self.capacidad * RESERVA_POR_PRIORIDAD.get(prioridad, 0.0)
+        entrada = (prioridad, next(self._secuencia))
+        inicio = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._cola, entrada)
+            try:
+                while True:
+                    self._recargar()
+                    necesario = peso + reserva
+                    if self._cola[0] == entrada and self.tokens >= necesario:
+                        heapq.heappop(self._cola)
+                        self.tokens -= peso
+                        break
+                    falta = max(0.0, necesario - self.tokens)
+                    self._cond.wait(timeout=max(0.005, falta / self.tasa))
+            except BaseException:
+                if entrada in self._cola:
+                    self._cola.remove(entrada)
+                    heapq.heapify(self._cola)
+                raise
+            finally:
+                self._cond.notify_all()
+            espera = time.monotonic() - inicio
+            self.llamadas += 1
+            self.espera_total_s += espera
+        return espera
+
+    def penalizar_429(self):
+        """Bitget nos frenó: deuda de media capacidad (pausa ~0.5 s del presupuesto)."""
+        with self._cond:
+            self._recargar()
+            self.tokens = min(self.tokens, 0.0) - self.capacidad * 0.5
+            self.http_429 += 1
+
+    def estado(self):
+        with self._cond:
+            self._recargar()
+            return {
+                "disponible": round(self.tokens, 2),
+                "capacidad": round(self.capacidad, 2),
+                "tasa_s": self.tasa,
+                "en_espera": len(self._cola),
+                "llamadas": self.llamadas,
+                "espera_media_ms": round(self.espera_total_s / self.llamadas * 1000.0, 2) if self.llamadas else 0.0,
+                "http_429": self.http_429,
+            }
+
+
+class PlanificadorPeticiones:
+    def __init__(self, tasa_publica=18.0, tasa_privada=9.0, tasa_trading=9.0):
+        self.presupuestos = {
+            "publico": Presupuesto("publico", tasa_publica),
+            "privado": Presupuesto("privado", tasa_privada),
+            "trading": Presupuesto("trading", tasa_trading),
+        }
+        self._local = threading.local()
+
+    @contextmanager
+    def prioridad(self, nivel):
+        """Fuerza la prioridad de todas las llamadas del hilo actual dentro del bloque."""
+        previa = getattr(self._local, "prioridad", None)
+        self._local.prioridad = nivel
+        try:
+            yield
+        finally:
+            self._local.prioridad = previa
+
+    def _prioridad_llamada(self, metodo, por_defecto, args, kwargs):
+        forzada = getattr(self._local, "prioridad", None)
+        if metodo.startswith("create_") and _es_reduce_only(args, kwargs):
+            por_defecto = CRITICA
+        if forzada is None:
+            return por_defecto
+        return min(forzada, por_defecto)
+
+    def ejecutar(self, metodo, funcion, *args, **kwargs):
+        grupo, peso, prioridad = PESOS_METODOS.get(metodo, ("privado", 1, NORMAL))
+        prioridad = self._prioridad_llamada(metodo, prioridad, args, kwargs)
+        presupuesto = self.presupuestos[grupo]
+        presupuesto.adquirir(peso, prioridad)
+        marca = _LLAMADA.set({"grupo": grupo, "pagadas": peso, "prioridad": prioridad})
+        try:
+            return funcion(*args, **kwargs)
+        except Exception as e:
+            if _es_limite_excedido(e):
+                presupuesto.penalizar_429()
+            raise
+        finally:
+            _LLAMADA.reset(marca)
+
+    def _cobro_http(self, api, metodo_http):
+        """(presupuesto, prioridad) de una petición HTTP, o None si su llamada ya la pagó."""
+        if "private" in str(api).lower():
+            grupo = "privado" if str(metodo_http).upper() == "GET" else "trading"
+        else:
+            grupo = "publico"
+        llamada = _LLAMADA.get()
+        if llamada is not None and llamada["grupo"] == grupo and llamada["pagadas"] > 0:
+            llamada["pagadas"] -= 1
+            return None
+        if llamada is not None:
+            prioridad = llamada["prioridad"]
+        else:
+            prioridad = self._prioridad_llamada("", NORMAL, (), {})
+        return self.presupuestos[grupo], prioridad
+
+    def _limitar_http(self, cliente):
+        """Sustituye cliente.fetch2 (por donde pasa toda petición REST de CCXT) por una versión presupuestada."""
+        original = getattr(cliente, "fetch2", None)
+        if original is None or getattr(original, "_planificado", False):
+            return
+        planificador = self
+
+        if inspect.iscoroutinefunction(original):
+            async def fetch2(path, api="public", method="GET", *args, **kwargs):
+                cobro = planificador._cobro_http(api, method)
+                if cobro is not None:
+                    await asyncio.to_thread(cobro[0].adquirir, PESO_DEFECTO, cobro[1])
+                try:
+                    return await original(path, api, method, *args, **kwargs)
+                except Exception as e:
+                    if cobro is not None and _es_limite_excedido(e):
+                        cobro[0].penalizar_429()
+                    raise
+        else:
+            def fetch2(path, api="public", method="GET", *args, **kwargs):
+                cobro = planificador._cobro_http(api, method)
+                if cobro is not None:
+                    cobro[0].adquirir(PESO_DEFECTO, cobro[1])
+                try:
+                    return original(path, api, method, *args, **kwargs)
+                except Exception as e:
+                    if cobro is not None and _es_limite_excedido(e):
+                        cobro[0].penalizar_429()
+                    raise
+
+        fetch2._planificado = True
+        try:
+            setattr(cliente, "fetch2", fetch2)
+        except Exception:
+            pass
+
+    def estado(self):
+        return {nombre: p.estado() for nombre, p in self.presupuestos.items()}
+
+    def envolver(self, exchange):
+        """Devuelve el exchange con todas sus llamadas REST pasando por el planificador."""
+        if exchange is None or isinstance(exchange, ExchangePlanificado):
+            return exchange
+        try:
+            # El planificador sustituye al limitador FIFO de CCXT
+            exchange.enableRateLimit = False
+        except Exception:
+            pass
+        self._limitar_http(getattr(exchange, "interno", exchange))
+        return ExchangePlanificado(exchange, self)
+
+
+class ExchangePlanificado:
+    """Proxy de un exchange CCXT: los métodos de PESOS_METODOS pasan por el planificador."""
+
+    def __init__(self, exchange, planificador):
+        object.__setattr__(self, "_exchange", exchange)
+        object.__setattr__(self, "_planificador", planificador)
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._exchange, nombre)
+        if nombre not in PESOS_METODOS or not callable(atributo):
+            return atributo
+        planificador = self._planificador
+
+        def _llamada(*args, **kwargs):
+            return planificador.ejecutar(nombre, atributo, *args, **kwargs)
+
+        _llamada.__name__ = nombre
+        return _llamada
+
+    def __setattr__(self, nombre, valor):
+        setattr(self._exchange, nombre, valor)
+
+    def __bool__(self):
+        return True
+
+    @property
+    def interno(self):
+        return self._exchange
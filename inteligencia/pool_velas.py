@@ -0,0 +1,90 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ==============================================================================
+# 📥 POOL DE DESCARGA DE VELAS (RADAR EN PARALELO)
+# ==============================================================================
+# El escáner pedía las velas símbolo a símbolo: 30 pares = 30 latencias en serie.
+# Aquí lanzamos las descargas en un pool acotado de hilos, espaciando el envío de
+# cada petición según `exchange.rateLimit` (mismo ritmo que el limitador de CCXT),
+# y entregamos cada resultado al evaluador en cuanto llega.
+# ==============================================================================
+
+
+class PoolDescargaVelas:
+    def __init__(self, exchange_getter, max_workers=8):
+        """
+        exchange_getter: callable que devuelve el exchange CCXT actual (puede ser None).
+        max_workers: descargas simultáneas máximas (config.MAXIMO_DESCARGAS_CONCURRENTES).
+        """
+        try:
+            max_workers = int(max_workers)
+        except Exception:
+            max_workers = 8
+        self.max_workers = max(1, max_workers)
+        self._exchange_getter = exchange_getter
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pool_velas")
+        self._lock_turno = threading.Lock()
+        self._ultimo_envio = 0.0
+
+    def _intervalo_envio_s(self):
+        """Separación mínima entre peticiones (s), tomada del limitador de CCXT."""
+        try:
+            exchange = self._exchange_getter()
+        except Exception:
+            exchange = None
+        if exchange is None or not getattr(exchange, "enableRateLimit", False):
+            return 0.0
+        try:
+            return max(0.0, float(getattr(exchange, "rateLimit", 0) or 0) / 1000.0)
+        except Exception:
+            return 0.0
+
+    def _esperar_turno(self):
+        """
+        Reserva el siguiente hueco de envío. Solo se serializa el DESPACHO; la espera
+        de red de cada petición se solapa con las demás.
+        """
+        intervalo = self._intervalo_envio_s()
+        if intervalo <= 0:
+            return
+        with self._lock_turno:
+            ahora = time.monotonic()
+            turno = max(ahora, self._ultimo_envio + intervalo)
+            self._ultimo_envio = turno
+        espera = turno - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+
+    def _tarea(self, funcion_descarga, simbolo):
+        self._esperar_turno()
+        return funcion_descarga(simbolo)
+
+    def iterar(self, simbolos, funcion_descarga):
+        """
+        Generador: descarga en paralelo y produce (simbolo, resultado) según van llegando.
+        Si el consumidor corta el bucle (break/return), se cancelan las descargas pendientes.
+        """
+        futuros = {}
+        try:
+            for simbolo in simbolos or []:
+                futuros[self._executor.submit(self._tarea, funcion_descarga, simbolo)] = simbolo
+
+            for futuro in as_completed(futuros):
+                simbolo = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    print(f"⚠️ Error descargando datos de {simbolo}: {e}")
+                    resultado = None
+                yield simbolo, resultado
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+
+    def cerrar(self):
+        try:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        except Exception:
+            pass
@@ -0,0 +1,159 @@
+import threading
+
+import numpy as np
+
+# ==============================================================================
+# 🔭 PREFILTRO DE TICKERS (ESCÁNER EN DOS ETAPAS)
+# ==============================================================================
+# Etapa 1 (barata): con el fetch_tickers masivo que ya tenemos se puntúa TODO el
+# universo de futuros USDT con NumPy vectorizado:
+#   - rango 24h %           (high - low) / last
+#   - cambio 24h % absoluto |percentage|
+#   - z-score de volumen    log(quoteVolume) contra su propia media móvil (EWMA por símbolo)
+#   - cercanía a extremos   distancia de last al high/low de 24h (0 = en el extremo)
+#   - liquidez              log(quoteVolume) en percentil transversal
+# Etapa 2 (cara): solo los promovidos bajan velas y pasan por evaluar_setup_determinista.
+# ==============================================================================
+
+PESOS = {
+    "rango": 0.25,
+    "cambio": 0.20,
+    "z_volumen": 0.25,
+    "extremo": 0.15,
+    "liquidez": 0.15,
+}
+MIN_OBSERVACIONES_Z = 5  # ciclos de historia antes de fiarse del z-score de volumen
+
+
+def _percentil(x):
+    """Rango percentil 0..1 de cada elemento (empates resueltos por orden)."""
+    n = x.shape[0]
+    if n <= 1:
+        return np.ones(n)
+    rangos = np.empty(n)
+    rangos[np.argsort(x, kind="stable")] = np.arange(n)
+    return rangos / (n - 1)
+
+
+def matriz_tickers(simbolos, tickers):
+    """Columnas (last, high, low, percentage, quoteVolume) como arrays float; NaN si falta el dato."""
+    campos = ("last", "high", "low", "percentage", "quoteVolume")
+    datos = np.full((len(simbolos), len(campos)), np.nan)
+    for i, s in enumerate(simbolos):
+        t = tickers.get(s) if tickers else None
+        if not t:
+            continue
+        for j, campo in enumerate(campos):
+            v = t.get(campo)
+            if v is not None:
+                try:
+                    datos[i, j] = float(v)
+                except Exception:
+                    pass
+    return datos
+
+
+class PrefiltroTickers:
+    def __init__(self, ventana_base=96, volumen_min_usdt=1_000_000.0):
+        """
+        ventana_base: ciclos equivalentes de la media móvil (EWMA) del volumen por símbolo.
+        volumen_min_usdt: liquidez mínima (quoteVolume 24h) para ser promovido.
+        """
+        self.alpha = 2.0 / (max(2, int(ventana_base)) + 1.0)
+        self.volumen_min_usdt = float(volumen_min_usdt)
+        self._indice = {}
+        self._media = np.zeros(0)
+        self._var = np.zeros(0)
+        self._obs = np.zeros(0, dtype=np.int64)
+        self._lock = threading.Lock()
+        self.ultimo_resumen = {}
+
+    def _filas(self, simbolos):
+        nuevos = [s for s in simbolos if s not in self._indice]
+        if nuevos:
+            base = len(self._indice)
+            for k, s in enumerate(nuevos):
+                self._indice[s] = base + k
+            extra = len(nuevos)
+            self._media = np.concatenate([self._media, np.zeros(extra)])
+            self._var = np.concatenate([self._var, np.zeros(extra)])
+            self._obs = np.concatenate([self._obs, np.zeros(extra, dtype=np.int64)])
+        return np.fromiter((self._indice[s] for s in simbolos), dtype=np.int64, count=len(simbolos))
+
+    def _z_volumen(self, filas, log_vol):
+        """z-score contra la EWMA previa y actualización de la base (solo filas con dato)."""
+        with self._lock:
+            media = self._media[filas]
+            var = self._var[filas]
+            obs = self._obs[filas]
+            valido = np.isfinite(log_vol)
+
+            desv = np.sqrt(np.maximum(var, 1e-12))
+            z = np.where(valido & (obs >= MIN_OBSERVACIONES_Z), (log_vol - media) / desv, 0.0)
+
+            primera = valido & (obs == 0)
+            delta = np.where(valido, log_vol - media, 0.0)
+            nueva_media = np.where(primera, log_vol, media + self.alpha * delta)
+            nueva_var = np.where(primera, 0.0, (1.0 - self.alpha) * (var + self.alpha * delta * delta))
+            self._media[filas] = np.where(valido, nueva_media, media)
+            self._var[filas] = np.where(valido, nueva_var, var)
+            self._obs[filas] = obs + valido
+        return np.clip(z, -6.0, 6.0)
+
+    def puntuar(self, simbolos, tickers):
+        """Devuelve (puntuacion, apto) alineados con `simbolos`."""
+        simbolos = list(simbolos or [])
+        n = len(simbolos)
+        if n == 0:
+            return np.zeros(0), np.zeros(0, dtype=bool)
+
+        datos = matriz_tickers(simbolos, tickers)
+        last, high, low, cambio, qv = (datos[:, j] for j in range(5))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rango = high - low
+            rango_pct = np.where(last > 0, rango / last * 100.0, np.nan)
+            pos = np.where(rango > 0, (last - low) / rango, np.nan)
+            dist_extremo = np.minimum(pos, 1.0 - pos)  # 0 = pegado al high o al low
+            log_vol = np.where(qv > 0, np.log(qv), np.nan)
+
+        z_vol = self._z_volumen(self._filas(simbolos), log_vol)
+
+        apto = (
+            np.isfinite(last) & (last > 0)
+            & np.isfinite(rango_pct) & (rango_pct > 0)
+            & np.isfinite(qv) & (qv >= self.volumen_min_usdt)
+        )
+
+        def _pct(x, defecto=0.0):
+            return _percentil(np.where(np.isfinite(x), x, defecto))
+
+        puntuacion = (
+            PESOS["rango"] * _pct(rango_pct)
+            + PESOS["cambio"] * _pct(np.abs(cambio))
+            + PESOS["z_volumen"] * _pct(z_vol)
+            + PESOS["extremo"] * (1.0 - 2.0 * np.nan_to_num(np.clip(dist_extremo, 0.0, 0.5), nan=0.5))
+            + PESOS["liquidez"] * _pct(log_vol, defecto=-np.inf)
+        )
+        return np.where(apto, puntuacion, -np.inf), apto
+
+    def seleccionar(self, simbolos, tickers, maximo):
+        """Símbolos promovidos a la etapa cara (velas + scoring), de mayor a menor puntuación."""
+        simbolos = list(simbolos or [])
+        puntuacion, apto = self.puntuar(simbolos, tickers)
+        n_aptos = int(apto.sum())
+        k = max(0, min(int(maximo), n_aptos))
+        if k == 0:
+            self.ultimo_resumen = {"universo": len(simbolos), "aptos": n_aptos, "promovidos": 0}
+            return []
+
+        idx = np.argpartition(-puntuacion, k - 1)[:k]
+        idx = idx[np.argsort(-puntuacion[idx], kind="stable")]
+        promovidos = [simbolos[i] for i in idx]
+        self.ultimo_resumen = {
+            "universo": len(simbolos),
+            "aptos": n_aptos,
+            "promovidos": k,
+            "corte": round(float(puntuacion[idx[-1]]), 4),
+        }
+        return promovidos
@@ -0,0 +1,104 @@
+import queue
+import threading
+import time
+
+import puente_visual
+import tiempos_ciclo
+
+# ==============================================================================
+# 🖥️ PUBLICADOR UI (COLA ACOTADA + CADENCIA PROPIA)
+# ==============================================================================
+# El escáner dormía 0.5s por símbolo para que el panel "viera pasar" los precios
+# (+0.5s más de pausa "anti-ban"): 30 s muertos por pasada.
+#
+# Ahora el escáner va a toda velocidad y deja cada resultado en una cola acotada;
+# este hilo los reproduce hacia puente_visual a la cadencia que quiera el panel.
+# Si la cola se llena se descarta lo más antiguo: la UI siempre muestra lo reciente
+# y el escáner nunca se bloquea esperando a la interfaz.
+# Solo se encolan los campos del símbolo escaneado (CLAVES_RADAR). El estado compartido
+# (posiciones, saldo, estado, agenda...) se agrupa por clave y se publica el último en
+# la siguiente escritura: nunca se reproduce uno viejo encima de lo que ya escribieron
+# el vigilante o el circuit breaker.
+# (El ritmo de peticiones al exchange lo marca el limitador de CCXT/pool, no esto.)
+# ==============================================================================
+
+CLAVES_RADAR = frozenset((
+    "simbolo",
+    "precio",
+    "mercado",
+    "cortex_ia",
+    "flujo_neuronal",
+    "estado_sistema",
+    "progreso",
+))
+
+
+class PublicadorUI:
+    def __init__(self, cadencia_s=0.5, capacidad=64):
+        try:
+            self.cadencia_s = max(0.0, float(cadencia_s))
+        except Exception:
+            self.cadencia_s = 0.5
+        self._cola = queue.Queue(maxsize=max(1, int(capacidad)))
+        self._lock = threading.Lock()
+        self._compartido = {}
+        self._aviso = threading.Event()
+        self._hilo = None
+        self._corriendo = False
+        self.publicados = 0
+        self.descartados = 0
+
+    def iniciar(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        self._corriendo = True
+        self._hilo = threading.Thread(target=self._bucle, daemon=True, name="publicador_ui")
+        self._hilo.start()
+
+    def detener(self):
+        self._corriendo = False
+
+    def publicar(self, datos):
+        """No bloquea nunca: si la cola está llena, se descarta el radar más antiguo."""
+        radar = {k: v for k, v in datos.items() if k in CLAVES_RADAR}
+        if len(radar) < len(datos):
+            with self._lock:
+                self._compartido.update((k, v) for k, v in datos.items() if k not in CLAVES_RADAR)
+        while radar:
+            try:
+                self._cola.put_nowait(radar)
+                break
+            except queue.Full:
+                try:
+                    self._cola.get_nowait()
+                    self.descartados += 1
+                except queue.Empty:
+                    pass
+        self._aviso.set()
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def _bucle(self):
+        while self._corriendo:
+            if not self._aviso.wait(timeout=1.0):
+                continue
+            self._aviso.clear()
+            with self._lock:
+                datos, self._compartido = self._compartido, {}
+            try:
+                datos.update(self._cola.get_nowait())
+            except queue.Empty:
+                pass
+            if not self._cola.empty():
+                self._aviso.set()
+            if not datos:
+                continue
+            try:
+                with tiempos_ciclo.tramo("ui"):
+                    puente_visual.actualizar_estado(datos)
+                self.publicados += 1
+            except Exception as e:
+                print(f"⚠️ PUBLICADOR UI: {e}")
+            if self.cadencia_s > 0:
+                time.sleep(self.cadencia_s)
@@ -6,6 +6,7 @@ import time
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import configuracion as config
+import cache_mercados
 import gestor_riesgo
 import gestor_ordenes
 
@@ -23,7 +24,7 @@ def reconstruir_blindaje():
             'password': config.CONTRASENA_API,
             'options': {'defaultType': 'swap', 'adjustForTimeDifference': True}
         })
-        exchange.load_markets()
+        cache_mercados.preparar_exchange(exchange)  # metadatos desde disco si no han caducado
     except Exception as e:
         print(f"❌ ERROR CONEXIÓN EXCHANGE: {e}")
         return
@@ -0,0 +1,370 @@
+import copy
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+
+import archivos_vigilados
+
+try:
+    import configuracion as config
+except Exception:
+    config = None
+
+# ==============================================================================
+# 🎛️ REGISTRO DE PARÁMETROS ACTIVOS (INSTANTÁNEA INMUTABLE + RECARGA EN CALIENTE)
+# ==============================================================================
+# parametros_activos.json lo leían por separado gestor_riesgo, tpsl_profesional y
+# entrenador_parametros (cada uno con sus defaults y en cada llamada).
+#
+# Aquí:
+#   - Un único registro por proceso (REGISTRO). Parsea el fichero, completa defaults,
+#     valida tipos y recorta a límites duros -> instantánea inmutable con número de versión.
+#   - Como mucho una comprobación del fichero cada INTERVALO_CHEQUEO_S: stat (firma
+#     mtime/tamaño/inodo) y, si cambió, hash del JSON parseado (forma canónica). Solo un
+#     contenido distinto genera versión nueva (tocar el fichero, reescribir lo mismo o
+#     cambiar el formato no cuenta).
+#   - JSON ilegible (p. ej. editado a mano a medias): se mantiene la última instantánea
+#     válida. Sin fichero: defaults.
+#   - publicar(): escritura atómica + versión nueva en el momento (el auto-tuner no espera
+#     al siguiente chequeo). suscribir(): callbacks con cada versión nueva.
+# ==============================================================================
+
+RUTA_PARAMETROS_ACTIVOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "parametros_activos.json")
+INTERVALO_CHEQUEO_S = float(getattr(config, "PARAMETROS_INTERVALO_CHEQUEO_S", 1.0) or 0.0)
+
+# Secciones anidadas que se fusionan clave a clave con sus defaults
+SECCIONES = ("riesgo", "apalancamiento", "objetivo", "tpsl")
+
+# (sección o None, clave, mínimo, máximo, tipo). Valores no numéricos, negativos o 0 con
+# mínimo > 0 -> default (los consumidores ya hacían `x or default`); fuera de rango -> recorte.
+LIMITES = (
+    (None, "riesgo_base_pct", 0.01, 10.0, float),
+    (None, "k_atr_mult", 1.0, 3.0, float),
+    (None, "r_reward_mult", 0.8, 1.25, float),
+    (None, "daily_loss_soft_pct", 0.01, 100.0, float),
+    (None, "daily_loss_hard_pct", 0.01, 100.0, float),
+    (None, "cooldown_min", 0.0, 7 * 24 * 60.0, float),
+    (None, "OBJETIVO_EUR", 1.0, 1e12, int),
+    ("riesgo", "riesgo_min_pct", 0.01, 5.0, float),
+    ("riesgo", "riesgo_max_pct", 0.01, 10.0, float),
+    ("riesgo", "utilizacion_riesgo", 0.2, 1.0, float),
+    ("riesgo", "dd_reduccion_1", 0.05, 1.0, float),
+    ("riesgo", "dd_reduccion_2", 0.05, 1.0, float),
+    ("riesgo", "dd_reduccion_3", 0.05, 1.0, float),
+    ("apalancamiento", "leverage_max", 1, 125, int),
+    ("apalancamiento", "liq_buffer", 0.05, 0.95, float),
+    ("objetivo", "OBJETIVO_EUR", 1.0, 1e12, int),
+    ("tpsl", "rr_min", 0.8, 10.0, float),
+    ("tpsl", "rr_max", 0.8, 10.0, float),
+)
+
+
+def defaults():
+    """Defaults de todos los consumidores (los de gestor_riesgo + el bloque tpsl)."""
+    objetivo_eur = int(getattr(config, "OBJETIVO_EUR", 10000000) or 10000000)
+    return {
+        "timezone": "Europe/Madrid",
+        "daily_loss_soft_pct": 3.0,
+        "daily_loss_hard_pct": 10.0,
+        "cooldown_min": 60,
+        "riesgo_base_pct": 1.0,
+        "k_atr_mult": 1.5,
+        "r_reward_mult": 1.0,
+        "riesgo": {
+            "riesgo_min_pct": 0.25,
+            "riesgo_max_pct": 2.0,
+            "utilizacion_riesgo": 1.0,
+            "dd_reduccion_1": 0.9,
+            "dd_reduccion_2": 0.75,
+            "dd_reduccion_3": 0.5,
+        },
+        "apalancamiento": {"leverage_max": int(getattr(config, "APALANCAMIENTO_MAX", 5) or 5), "liq_buffer": 0.8},
+        "objetivo": {
+            "OBJETIVO_EUR": objetivo_eur,
+            "PERFIL_RIESGO": str(getattr(config, "PERFIL_RIESGO", "AGRESIVO_CONTROLADO") or "AGRESIVO_CONTROLADO"),
+        },
+        # Compatibilidad: KPI interno también en raíz (no implica promesa de ganancias)
+        "OBJETIVO_EUR": objetivo_eur,
+        "tpsl": {
+            "rr_min": 1.2,
+            "rr_max": 5.0,
+            # Si se define (p.ej. 2.0), usa RR fijo en vez de RR dinámico.
+            "rr_objetivo": None,
+        },
+    }
+
+
+# ------------------------------------------------------------------------------
+# Inmutabilidad
+# ------------------------------------------------------------------------------
+class DictCongelado(dict):
+    """dict de solo lectura (sigue siendo dict para los isinstance de los consumidores)."""
+
+    __slots__ = ()
+
+    def _solo_lectura(self, *_, **__):
+        raise TypeError("parámetros activos de solo lectura: usa descongelar() o publicar()")
+
+    __setitem__ = __delitem__ = __ior__ = _solo_lectura
+    update = pop = popitem = setdefault = clear = _solo_lectura
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return descongelar(self)
+
+    def __reduce__(self):
+        return (dict, (descongelar(self),))
+
+
+def congelar(valor):
+    if isinstance(valor, dict):
+        return DictCongelado((k, congelar(v)) for k, v in valor.items())
+    if isinstance(valor, (list, tuple)):
+        return tuple(congelar(v) for v in valor)
+    return valor
+
+
+def descongelar(valor):
+    """Copia mutable (dict/list) de una instantánea."""
+    if isinstance(valor, dict):
+        return {k: descongelar(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [descongelar(v) for v in valor]
+    return valor
+
+
+# ------------------------------------------------------------------------------
+# Validación
+# ------------------------------------------------------------------------------
+def _numero(valor, tipo, minimo=0.0):
+    if isinstance(valor, bool):
+        return None
+    try:
+        x = float(valor)
+    except Exception:
+        return None
+    if not math.isfinite(x) or x < 0 or (x == 0 and minimo > 0):
+        return None
+    return int(x) if tipo is int else x
+
+
+def normalizar(datos):
+    """
+    Defaults + `datos` (merge shallow + secciones conocidas), con tipos validados y
+    límites duros. Devuelve (dict, avisos).
+    """
+    base = defaults()
+    avisos = []
+    out = dict(base)
+    if isinstance(datos, dict):
+        out.update(datos)
+    elif datos is not None:
+        avisos.append(f"raíz no es un objeto JSON ({type(datos).__name__})")
+        datos = {}
+    else:
+        datos = {}
+
+    for seccion in SECCIONES:
+        fusion = dict(base[seccion])
+        valor = datos.get(seccion)
+        if isinstance(valor, dict):
+            fusion.update(valor)
+        elif valor is not None:
+            avisos.append(f"{seccion}: no es un objeto, se usan defaults")
+        out[seccion] = fusion
+
+    for seccion, clave, lo, hi, tipo in LIMITES:
+        destino = out if seccion is None else out[seccion]
+        defecto = (base if seccion is None else base[seccion])[clave]
+        x = _numero(destino.get(clave), tipo, lo)
+        if x is None:
+            avisos.append(f"{clave}={destino.get(clave)!r} inválido -> {defecto}")
+            destino[clave] = defecto
+        elif not lo <= x <= hi:
+            recortado = tipo(max(lo, min(hi, x)))
+            avisos.append(f"{clave}={x} fuera de [{lo}, {hi}] -> {recortado}")
+            destino[clave] = recortado
+        else:
+            destino[clave] = x
+
+    riesgo = out["riesgo"]
+    if riesgo["riesgo_max_pct"] < riesgo["riesgo_min_pct"]:
+        avisos.append("riesgo_max_pct < riesgo_min_pct -> riesgo_max_pct = riesgo_min_pct")
+        riesgo["riesgo_max_pct"] = riesgo["riesgo_min_pct"]
+    tpsl = out["tpsl"]
+    if tpsl["rr_max"] < tpsl["rr_min"]:
+        avisos.append("tpsl.rr_max < tpsl.rr_min -> rr_max = rr_min")
+        tpsl["rr_max"] = tpsl["rr_min"]
+    rr_objetivo = tpsl.get("rr_objetivo")
+    if rr_objetivo not in (None, ""):
+        x = _numero(rr_objetivo, float)
+        if x is None:
+            avisos.append(f"rr_objetivo={rr_objetivo!r} inválido -> None")
+        tpsl["rr_objetivo"] = x
+    if not isinstance(out.get("timezone"), str) or not out.get("timezone"):
+        avisos.append(f"timezone={out.get('timezone')!r} inválido -> {base['timezone']}")
+        out["timezone"] = base["timezone"]
+    return out, avisos
+
+
+# ------------------------------------------------------------------------------
+# Registro
+# ------------------------------------------------------------------------------
+class Instantanea:
+    """Parámetros validados e inmutables de una versión del fichero."""
+
+    __slots__ = ("version", "parametros", "hash", "origen", "avisos", "ts")
+
+    def __init__(self, version, parametros, hash_, origen, avisos):
+        self.version = version
+        self.parametros = parametros
+        self.hash = hash_
+        self.origen = origen
+        self.avisos = tuple(avisos)
+        self.ts = time.time()
+
+    def __repr__(self):
+        return f"Instantanea(version={self.version}, hash={str(self.hash)[:8]}, origen={self.origen!r})"
+
+
+class RegistroParametros:
+    """Parámetros activos del proceso (ver cabecera)."""
+
+    def __init__(self, ruta=RUTA_PARAMETROS_ACTIVOS, intervalo_s=INTERVALO_CHEQUEO_S):
+        self.ruta = ruta
+        self.intervalo_s = max(0.0, float(intervalo_s))
+        self._lock = threading.RLock()
+        self._instantanea = None
+        self._crudo = None
+        self._firma = None
+        self._proximo = 0.0
+        self._suscriptores = []
+        self.recargas = 0
+
+    # --- lectura (camino caliente) ---
+    def actual(self):
+        inst = self._instantanea
+        if inst is not None and time.monotonic() < self._proximo:
+            return inst
+        return self.comprobar()
+
+    def obtener(self):
+        """Dict de parámetros de la versión vigente (solo lectura)."""
+        return self.actual().parametros
+
+    @property
+    def version(self):
+        return self.actual().version
+
+    # --- recarga ---
+    def comprobar(self, forzar=False, origen="fichero"):
+        """Mira el fichero ya (stat + hash si cambió) y devuelve la instantánea vigente."""
+        nueva = None
+        with self._lock:
+            self._proximo = time.monotonic() + self.intervalo_s
+            f = archivos_vigilados.firma(self.ruta)
+            if (
+                not forzar
+                and self._instantanea is not None
+                and f == self._firma
+                and not archivos_vigilados._reciente(f)
+            ):
+                return self._instantanea
+            nueva = self._recargar(f, origen)
+            inst = self._instantanea
+        if nueva is not None:
+            self._notificar(nueva)
+        return inst
+
+    def _recargar(self, f, origen):
+        # Llamar con el lock. Devuelve la instantánea nueva si cambió el contenido.
+        contenido = None
+        if f is not None:
+            try:
+                with open(self.ruta, "rb") as fh:
+                    contenido = fh.read()
+            except OSError:
+                contenido = None
+        self._firma = f
+
+        crudo = None
+        hash_ = None
+        if contenido is not None:
+            try:
+                crudo = json.loads(contenido.decode("utf-8"))
+                canonico = json.dumps(crudo, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+                hash_ = hashlib.sha1(canonico.encode("utf-8")).hexdigest()
+            except Exception as e:
+                if self._instantanea is not None:
+                    print(f"⚠️ PARÁMETROS: {os.path.basename(self.ruta)} ilegible ({e}); se mantiene la versión {self._instantanea.version}")
+                    return None
+                crudo = None
+        if self._instantanea is not None and hash_ == self._instantanea.hash:
+            return None
+        parametros, avisos = normalizar(crudo)
+        version = (self._instantanea.version + 1) if self._instantanea is not None else 1
+        for aviso in avisos:
+            print(f"⚠️ PARÁMETROS v{version}: {aviso}")
+        self._crudo = crudo if isinstance(crudo, dict) else None
+        self._instantanea = Instantanea(version, congelar(parametros), hash_, origen, avisos)
+        self.recargas += 1
+        return self._instantanea
+
+    def invalidar(self):
+        with self._lock:
+            self._proximo = 0.0
+            self._firma = None
+
+    # --- escritura (auto-tuner) ---
+    def crudo(self):
+        """Copia mutable de lo que hay en el fichero (sin defaults ni recortes); {} si no hay."""
+        self.comprobar()
+        with self._lock:
+            return copy.deepcopy(self._crudo) if self._crudo is not None else {}
+
+    def publicar(self, params, origen="publicar"):
+        """Escribe `params` en el fichero (atómico) y lo deja vigente en el momento."""
+        if not isinstance(params, dict):
+            raise TypeError("los parámetros activos deben ser un dict")
+        with self._lock:
+            archivos_vigilados.escribir_json_atomico(self.ruta, descongelar(params))
+        return self.comprobar(forzar=True, origen=origen)
+
+    # --- suscripciones ---
+    def suscribir(self, callback):
+        """callback(instantanea) con cada versión nueva (en el hilo que la detecta)."""
+        with self._lock:
+            if callback not in self._suscriptores:
+                self._suscriptores.append(callback)
+        return callback
+
+    def desuscribir(self, callback):
+        with self._lock:
+            if callback in self._suscriptores:
+                self._suscriptores.remove(callback)
+
+    def _notificar(self, inst):
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for callback in suscriptores:
+            try:
+                callback(inst)
+            except Exception as e:
+                print(f"⚠️ PARÁMETROS: suscriptor {getattr(callback, '__name__', callback)} falló: {e}")
+
+
+REGISTRO = RegistroParametros()
+
+
+def obtener():
+    """Parámetros activos (dict de solo lectura) del registro del proceso."""
+    return REGISTRO.obtener()
+
+
+def suscribir(callback):
+    return REGISTRO.suscribir(callback)
@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import pandas as pd
+
+try:
+    import websockets
+except Exception:
+    websockets = None
+
+from flujo_mercado import TIPO_INSTRUMENTO, canal_vela
+
+# ==============================================================================
+# 🎞️ REPLAY DE MERCADO (SERVIDOR WEBSOCKET LOCAL CON FORMATO BITGET V2)
+# ==============================================================================
+# Sustituto local del WebSocket público de Bitget para probar el flujo sin red:
+# reproduce un CSV de `datos/` (timestamp,open,high,low,close,volume) como mensajes
+# `candleXX` (snapshot + updates) y `ticker`, respondiendo a subscribe y ping.
+#
+# Uso:
+#   python replay_mercado.py --puerto 8765 --velocidad 50
+#   FLUJO_MERCADO=1 FLUJO_MERCADO_URL_PUBLICA=ws://127.0.0.1:8765 python operador_maestro.py
+#
+# Cualquier símbolo suscrito recibe la misma serie (sirve para medir latencia y
+# throughput, no para simular un mercado real).
+# ==============================================================================
+
+RUTA_CSV_DEFECTO = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "datos", "btc_usdt_15m.csv"))
+VELAS_SNAPSHOT = 100
+
+
+def cargar_serie(ruta_csv):
+    df = pd.read_csv(ruta_csv)
+    columnas = ["timestamp", "open", "high", "low", "close", "volume"]
+    return df[columnas].astype(float).values.tolist()
+
+
+def _fila_bitget(v):
+    # [ts, o, h, l, c, baseVol, quoteVol, usdtVol] como strings (igual que Bitget)
+    return [str(int(v[0])), str(v[1]), str(v[2]), str(v[3]), str(v[4]), str(v[5]), str(v[5] * v[4]), str(v[5] * v[4])]
+
+
+def _ticker_bitget(inst_id, v, apertura):
+    cambio = (v[4] - apertura) / apertura if apertura else 0.0
+    return {
+        "instId": inst_id,
+        "lastPr": str(v[4]),
+        "high24h": str(v[2]),
+        "low24h": str(v[3]),
+        "open24h": str(apertura),
+        "change24h": str(round(cambio, 6)),
+        "baseVolume": str(v[5]),
+        "quoteVolume": str(v[5] * v[4]),
+        "ts": str(int(time.time() * 1000)),
+    }
+
+
+class ServidorReplay:
+    def __init__(self, serie, velocidad=1.0, timeframe="15m", pasos_por_vela=4):
+        """
+        velocidad: velas por segundo reproducidas (1.0 = una vela cerrada por segundo).
+        pasos_por_vela: actualizaciones de la vela en formación antes de cerrarla.
+        """
+        self.serie = serie
+        self.velocidad = max(0.01, float(velocidad))
+        self.canal = canal_vela(timeframe)
+        self.pasos_por_vela = max(1, int(pasos_por_vela))
+        self.enviados = 0
+
+    def _mensaje(self, accion, canal, inst_id, datos):
+        return json.dumps({
+            "action": accion,
+            "arg": {"instType": TIPO_INSTRUMENTO, "channel": canal, "instId": inst_id},
+            "data": datos,
+            "ts": int(time.time() * 1000),
+        })
+
+    async def _atender(self, ws):
+        suscritos = {}  # (canal, instId) -> True
+        enviar = asyncio.Queue()
+
+        async def _lector():
+            async for raw in ws:
+                if raw == "ping":
+                    await ws.send("pong")
+                    continue
+                try:
+                    msg = json.loads(raw)
+                except Exception:
+                    continue
+                if msg.get("op") != "subscribe":
+                    continue
+                for arg in msg.get("args") or []:
+                    clave = (arg.get("channel"), arg.get("instId"))
+                    await ws.send(json.dumps({"event": "subscribe", "arg": arg}))
+                    if clave not in suscritos:
+                        suscritos[clave] = True
+                        await enviar.put(clave)
+
+        lector = asyncio.ensure_future(_lector())
+        try:
+            inicio = min(VELAS_SNAPSHOT, len(self.serie) - 1)
+            # Cada suscripción nueva de velas recibe primero su snapshot
+            i = inicio
+            intervalo = 1.0 / (self.velocidad * self.pasos_por_vela)
+            while not lector.done():
+                while not enviar.empty():
+                    canal, inst_id = enviar.get_nowait()
+                    if canal == self.canal:
+                        filas = [_fila_bitget(v) for v in self.serie[max(0, i - VELAS_SNAPSHOT) : i + 1]]
+                        await ws.send(self._mensaje("snapshot", canal, inst_id, filas))
+                        self.enviados += 1
+
+                v = self.serie[i % len(self.serie)]
+                apertura = self.serie[max(0, i - 96) % len(self.serie)][1]
+                for paso in range(1, self.pasos_por_vela + 1):
+                    # Vela en formación: el cierre avanza hacia el real en cada paso
+                    f = paso / self.pasos_por_vela
+                    parcial = [v[0], v[1], v[2], v[3], v[1] + (v[4] - v[1]) * f, v[5] * f]
+                    for canal, inst_id in list(suscritos):
+                        if canal == self.canal:
+                            await ws.send(self._mensaje("update", canal, inst_id, [_fila_bitget(parcial)]))
+                        elif canal == "ticker":
+                            await ws.send(self._mensaje("snapshot", canal, inst_id, [_ticker_bitget(inst_id, parcial, apertura)]))
+                        else:
+                            continue
+                        self.enviados += 1
+                    await asyncio.sleep(intervalo)
+                i += 1
+        except Exception:
+            pass
+        finally:
+            lector.cancel()
+
+    async def servir(self, host="127.0.0.1", puerto=8765):
+        async with websockets.serve(self._atender, host, puerto):
+            print(f"🎞️ REPLAY MERCADO en ws://{host}:{puerto} ({len(self.serie)} velas, {self.velocidad} velas/s)")
+            await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor WebSocket local que reproduce velas en formato Bitget v2.")
+    parser.add_argument("--csv", default=RUTA_CSV_DEFECTO)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--velocidad", type=float, default=1.0, help="Velas por segundo")
+    parser.add_argument("--temporalidad", default="15m")
+    args = parser.parse_args()
+
+    if websockets is None:
+        raise SystemExit("Falta la librería `websockets` (pip install websockets).")
+    servidor = ServidorReplay(cargar_serie(args.csv), velocidad=args.velocidad, timeframe=args.temporalidad)
+    try:
+        asyncio.run(servidor.servir(args.host, args.puerto))
+    except KeyboardInterrupt:
+        print(f"🎞️ REPLAY detenido. Mensajes enviados: {servidor.enviados}")
+
+
+if __name__ == "__main__":
+    main()
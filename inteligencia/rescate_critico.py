@@ -7,6 +7,7 @@ import traceback
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import configuracion as config
+import cache_mercados
 
 # Configuraciones
 ARCHIVO_SNAPSHOT = os.path.join(os.path.dirname(__file__), "..", "tmp", "zerox_snapshot_posiciones.txt")
@@ -34,7 +35,7 @@ def ejecutar_rescate():
             'password': config.CONTRASENA_API,
             'options': {'adjustForTimeDifference': True} 
         })
-        exchange.load_markets()
+        cache_mercados.preparar_exchange(exchange)  # metadatos desde disco si no han caducado
         
         # Sincronización Tiempo
         exchange.load_time_difference()
@@ -0,0 +1,490 @@
+import math
+import threading
+from statistics import NormalDist
+
+import numpy as np
+
+# ==============================================================================
+# 🧮 RIESGO DE CARTERA: COVARIANZA ONLINE + VaR MARGINAL DEL CANDIDATO
+# ==============================================================================
+# El sizing (gestor_riesgo) mira cada operación sola: riesgo % del saldo hasta el SL.
+# Con varias posiciones a la vez, dos longs en monedas que se mueven juntas son casi
+# la misma apuesta dos veces.
+#
+# Aquí:
+#   - CovarianzaOnline: covarianza EWMA (RiskMetrics, media cero) de los retornos log
+#     por vela de todo el universo escaneado. Cada vela cerrada nueva de un símbolo
+#     actualiza su varianza y su covarianza con los símbolos que ya tienen retorno en
+#     ese mismo timestamp: O(n) por vela, la matriz nunca se recalcula entera. Cada
+#     celda lleva su suma de pesos (S/W): un par con pocas velas en común ya da una
+#     estimación sin sesgo de arranque; `min_obs` decide desde cuándo se usa.
+#   - RiesgoCartera: se sincroniza con los frames del escáner como RegistroMotores
+#     (todas las filas menos la última son velas cerradas) y evalúa un candidato contra
+#     las posiciones abiertas: VaR paramétrico de la cartera con y sin él, VaR
+#     incremental y marginal, correlaciones y exposición ajustada por correlación.
+#   - limitar_riesgo: recorta el riesgo % del candidato para que la cartera no pase del
+#     presupuesto de VaR (o lo bloquea si queda por debajo del mínimo).
+# Solo en memoria: con el frame de 100 velas del escáner cada símbolo trae ~99 retornos
+# desde la primera pasada. Ver scripts/paridad_riesgo_cartera.py.
+# ==============================================================================
+
+LAMBDA = 0.97
+MIN_OBS = 30
+RETENER_VELAS = 256
+# Pares sin historia común suficiente: correlación supuesta (prudente para cripto)
+CORRELACION_DEFECTO = 0.8
+
+
+class CovarianzaOnline:
+    """Covarianza EWMA por pares de retornos alineados por timestamp."""
+
+    def __init__(self, lam=LAMBDA, retener_velas=RETENER_VELAS, paso_ms=0):
+        self.lam = float(lam)
+        if not 0.0 < self.lam < 1.0:
+            raise ValueError("lambda debe estar en (0, 1)")
+        self.retener_velas = max(2, int(retener_velas))
+        self.paso_ms = int(paso_ms or 0)
+        self.indice = {}
+        self.simbolos = []
+        self._cap = 0
+        # Planos [S, N]: suma ponderada de productos y velas en común. La suma de pesos de
+        # cada celda solo decae con sus propias actualizaciones: W = 1 - lam^N, no se guarda.
+        # Juntos, cada vela es una lectura y dos escrituras con índice (fila y columna)
+        self.M = np.zeros((2, 0, 0))
+        self._mult = np.array([[self.lam], [1.0]])
+        # ts -> [índices, retornos, cuántos] de los símbolos que ya tienen esa vela (arrays que crecen)
+        self._por_ts = {}
+        self._ts_max = None
+        self.actualizaciones = 0
+
+    def _fila(self, simbolo):
+        i = self.indice.get(simbolo)
+        if i is not None:
+            return i
+        i = len(self.simbolos)
+        if i >= self._cap:
+            cap = max(16, 2 * self._cap)
+            nuevo = np.zeros((2, cap, cap))
+            nuevo[:, : self._cap, : self._cap] = self.M
+            self.M = nuevo
+            self._cap = cap
+        self.indice[simbolo] = i
+        self.simbolos.append(simbolo)
+        return i
+
+    def agregar(self, simbolo, ts, r):
+        """Retorno `r` de `simbolo` en la vela `ts`: O(símbolos con esa vela)."""
+        r = float(r)
+        if not math.isfinite(r):
+            return False
+        ts = int(ts)
+        if self._ts_max is not None and self.paso_ms > 0 and ts <= self._ts_max - self.retener_velas * self.paso_ms:
+            return False
+        i = self._fila(simbolo)
+        M = self.M
+        lam = self.lam
+        a = 1.0 - lam
+
+        M[0, i, i] = lam * M[0, i, i] + a * r * r
+        M[1, i, i] += 1.0
+
+        otros = self._por_ts.get(ts)
+        if otros is None:
+            otros = self._por_ts[ts] = [np.empty(16, dtype=np.int64), np.empty(16), 0]
+        k = otros[2]
+        if k:
+            js = otros[0][:k]
+            bloque = M[:, i, js]
+            bloque *= self._mult
+            bloque[0] += (a * r) * otros[1][:k]
+            bloque[1] += 1.0
+            M[:, i, js] = bloque
+            M[:, js, i] = bloque
+        if k == len(otros[0]):
+            otros[0] = np.concatenate([otros[0], np.empty(k, dtype=np.int64)])
+            otros[1] = np.concatenate([otros[1], np.empty(k)])
+        otros[0][k] = i
+        otros[1][k] = r
+        otros[2] = k + 1
+        self.actualizaciones += 1
+
+        if self._ts_max is None or ts > self._ts_max:
+            self._ts_max = ts
+            self._podar()
+        return True
+
+    @property
+    def S(self):
+        return self.M[0]
+
+    @property
+    def N(self):
+        return self.M[1]
+
+    @property
+    def W(self):
+        return self._pesos(self.M[1])
+
+    def _pesos(self, n):
+        return -np.expm1(n * math.log(self.lam))
+
+    def _podar(self):
+        if self.paso_ms <= 0 or len(self._por_ts) <= self.retener_velas:
+            return
+        limite = self._ts_max - self.retener_velas * self.paso_ms
+        for ts in [t for t in self._por_ts if t <= limite]:
+            del self._por_ts[ts]
+
+    def varianza(self, simbolo):
+        i = self.indice.get(simbolo)
+        if i is None or self.N[i, i] <= 0:
+            return None
+        return self.S[i, i] / self._pesos(self.N[i, i])
+
+    def observaciones(self, a, b=None):
+        i = self.indice.get(a)
+        j = self.indice.get(a if b is None else b)
+        if i is None or j is None:
+            return 0
+        return int(self.N[i, j])
+
+    def covarianza(self, a, b):
+        i = self.indice.get(a)
+        j = self.indice.get(b)
+        if i is None or j is None or self.N[i, j] <= 0:
+            return None
+        return self.S[i, j] / self._pesos(self.N[i, j])
+
+    def correlacion(self, a, b):
+        c = self.covarianza(a, b)
+        va = self.varianza(a)
+        vb = self.varianza(b)
+        if c is None or not va or not vb:
+            return None
+        return max(-1.0, min(1.0, c / math.sqrt(va * vb)))
+
+    def matriz(self, simbolos, min_obs=MIN_OBS, correlacion_defecto=CORRELACION_DEFECTO):
+        """
+        Covarianza (por vela) de `simbolos`, simétrica y semidefinida positiva.
+        Varianzas con menos de `min_obs` velas -> mediana del universo; pares con menos
+        de `min_obs` velas en común -> `correlacion_defecto`. Devuelve (matriz, sin_datos).
+        """
+        m = len(simbolos)
+        idx = np.array([self.indice.get(s, -1) for s in simbolos], dtype=np.int64)
+        conocidos = idx >= 0
+        var = np.full(m, np.nan)
+        ok = np.zeros(m, dtype=bool)
+        if conocidos.any():
+            k = idx[conocidos]
+            diag_n = self.N[k, k]
+            v = self.S[k, k] / self._pesos(np.maximum(diag_n, 1.0))
+            v[diag_n < min_obs] = np.nan
+            var[conocidos] = v
+            ok = np.isfinite(var) & (var > 0)
+        sin_datos = [s for s, b in zip(simbolos, ok) if not b]
+        if not ok.all():
+            var[~ok] = self.varianza_mediana(min_obs)
+
+        sigma = np.sqrt(var)
+        corr = np.full((m, m), float(correlacion_defecto))
+        if m > 1 and ok.sum() > 1:
+            pos = np.nonzero(ok)[0]
+            k = idx[pos]
+            Nk = self.N[np.ix_(k, k)]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                c = self.S[np.ix_(k, k)] / self._pesos(np.maximum(Nk, 1.0)) / np.outer(sigma[pos], sigma[pos])
+            usar = (Nk >= min_obs) & np.isfinite(c)
+            bloque = corr[np.ix_(pos, pos)]
+            bloque[usar] = np.clip(c[usar], -1.0, 1.0)
+            corr[np.ix_(pos, pos)] = bloque
+        np.fill_diagonal(corr, 1.0)
+        corr = _semidefinida(corr)
+        return corr * np.outer(sigma, sigma), sin_datos
+
+    def varianza_mediana(self, min_obs=MIN_OBS):
+        n = len(self.simbolos)
+        if n == 0:
+            return float("nan")
+        k = np.arange(n)
+        diag_n = self.N[k, k]
+        validas = diag_n >= min_obs
+        if not validas.any():
+            return float("nan")
+        return float(np.median(self.S[k, k][validas] / self._pesos(diag_n[validas])))
+
+    def olvidar(self, simbolo):
+        """Borra la historia de `simbolo` (la fila se reutiliza si vuelve a aparecer)."""
+        i = self.indice.get(simbolo)
+        if i is None:
+            return
+        self.M[:, i, :] = 0.0
+        self.M[:, :, i] = 0.0
+        for otros in self._por_ts.values():
+            k = otros[2]
+            quedan = otros[0][:k] != i
+            n = int(quedan.sum())
+            if n < k:
+                otros[0][:n] = otros[0][:k][quedan]
+                otros[1][:n] = otros[1][:k][quedan]
+                otros[2] = n
+
+
+def _semidefinida(corr):
+    """Correlación con pares estimados por separado (o supuestos) -> la PSD más cercana por autovalores."""
+    if len(corr) < 2:
+        return corr
+    try:
+        valores, vectores = np.linalg.eigh(corr)
+    except np.linalg.LinAlgError:
+        return np.eye(len(corr))
+    if valores[0] >= -1e-12:
+        return corr
+    valores = np.clip(valores, 0.0, None)
+    ajustada = (vectores * valores) @ vectores.T
+    d = np.sqrt(np.clip(np.diag(ajustada), 1e-18, None))
+    ajustada = ajustada / np.outer(d, d)
+    np.fill_diagonal(ajustada, 1.0)
+    return ajustada
+
+
+def posiciones_netas(posiciones, tabla=None):
+    """
+    Posiciones del exchange (formato CCXT o flujo_mercado) -> {símbolo: notional USDT con
+    signo} (+ long, - short). Tamaño de contrato de la posición, de la tabla de
+    cache_mercados o 1.
+    """
+    netas = {}
+    for pos in posiciones or []:
+        try:
+            contratos = abs(float(pos.get("contracts") or 0))
+        except (TypeError, ValueError):
+            continue
+        simbolo = pos.get("symbol")
+        if contratos <= 0 or not simbolo:
+            continue
+        lado = str(pos.get("side") or "").lower()
+        signo = -1.0 if lado == "short" else 1.0
+        notional = None
+        try:
+            notional = abs(float(pos.get("notional")))
+        except (TypeError, ValueError):
+            notional = None
+        if not notional:
+            precio = pos.get("markPrice") or pos.get("entryPrice") or 0
+            tamano = pos.get("contractSize")
+            if not tamano and tabla is not None:
+                fila = tabla.indice.get(simbolo, -1)
+                if fila >= 0 and len(tabla.tamano_contrato):
+                    tamano = tabla.tamano_contrato[fila]
+            try:
+                tamano = float(tamano) if tamano and math.isfinite(float(tamano)) and float(tamano) > 0 else 1.0
+                notional = contratos * tamano * float(precio)
+            except (TypeError, ValueError):
+                continue
+        if notional and math.isfinite(notional):
+            netas[simbolo] = netas.get(simbolo, 0.0) + signo * notional
+    return netas
+
+
+class RiesgoCartera:
+    """
+    CovarianzaOnline alimentada con los frames del escáner + VaR de la cartera con un
+    candidato. VaR paramétrico normal a `confianza` sobre `horizonte_velas` velas.
+    """
+
+    def __init__(self, paso_ms=0, lam=LAMBDA, retener_velas=RETENER_VELAS, min_obs=MIN_OBS,
+                 confianza=0.99, horizonte_velas=1, correlacion_defecto=CORRELACION_DEFECTO):
+        self.cov = CovarianzaOnline(lam=lam, retener_velas=retener_velas, paso_ms=paso_ms)
+        self.min_obs = max(2, int(min_obs))
+        self.confianza = min(0.9999, max(0.5, float(confianza)))
+        self.horizonte_velas = max(1, int(horizonte_velas))
+        self.correlacion_defecto = max(-1.0, min(1.0, float(correlacion_defecto)))
+        self.z = NormalDist().inv_cdf(self.confianza)
+        self._ultimo = {}  # símbolo -> (ts, close) de la última vela cerrada vista
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Alimentación
+    # ------------------------------------------------------------------
+    def sincronizar(self, simbolo, df):
+        """Alimenta los retornos de las velas cerradas nuevas de `df`. Devuelve cuántos."""
+        if df is None or len(df) < 2:
+            return 0
+        ts = df["timestamp"].to_numpy(dtype=float)
+        close = df["close"].to_numpy(dtype=float)
+        with self._lock:
+            return self._sincronizar(simbolo, ts, close)
+
+    def _sincronizar(self, simbolo, ts, close):
+        n = len(ts) - 1  # la última fila es la vela en formación
+        ultimo = self._ultimo.get(simbolo)
+        paso = self.cov.paso_ms or (ts[1] - ts[0])
+        if self.cov.paso_ms <= 0 and paso > 0:
+            self.cov.paso_ms = int(paso)
+
+        if ultimo is not None:
+            t_nuevo = float(ts[n - 1])
+            if t_nuevo <= ultimo[0]:
+                return 0  # sin vela cerrada nueva (la mayoría de pasadas)
+            if n >= 2 and float(ts[n - 2]) == ultimo[0]:
+                # Una vela cerrada nueva: sin arrays
+                c_prev, c = ultimo[1], float(close[n - 1])
+                self._ultimo[simbolo] = (t_nuevo, c)
+                if t_nuevo - ultimo[0] != paso or not (c_prev > 0 and c > 0) or not math.isfinite(c):
+                    return 0
+                return int(self.cov.agregar(simbolo, t_nuevo, math.log(c / c_prev)))
+        inicio = 0 if ultimo is None else int(np.searchsorted(ts[:n], ultimo[0], side="right"))
+        if inicio >= n:
+            return 0
+
+        # Vela anterior de cada vela nueva: la fila previa del frame o la última vista
+        previo_ts = np.empty(n - inicio)
+        previo_c = np.empty(n - inicio)
+        previo_ts[1:] = ts[inicio:n - 1]
+        previo_c[1:] = close[inicio:n - 1]
+        if inicio > 0:
+            previo_ts[0], previo_c[0] = ts[inicio - 1], close[inicio - 1]
+        elif ultimo is not None:
+            previo_ts[0], previo_c[0] = ultimo
+        else:
+            previo_ts[0], previo_c[0] = np.nan, np.nan
+
+        nuevos_ts = ts[inicio:n]
+        nuevos_c = close[inicio:n]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = np.log(nuevos_c / previo_c)
+        # Huecos (velas que faltan) o precios rotos: ese retorno no se usa
+        validos = (nuevos_ts - previo_ts == paso) & (previo_c > 0) & (nuevos_c > 0) & np.isfinite(r)
+
+        alimentados = 0
+        for t, ri in zip(nuevos_ts[validos].tolist(), r[validos].tolist()):
+            alimentados += self.cov.agregar(simbolo, t, ri)
+        self._ultimo[simbolo] = (float(ts[n - 1]), float(close[n - 1]))
+        return alimentados
+
+    def invalidar(self, simbolo=None):
+        with self._lock:
+            if simbolo is None:
+                self.cov = CovarianzaOnline(lam=self.cov.lam, retener_velas=self.cov.retener_velas, paso_ms=self.cov.paso_ms)
+                self._ultimo.clear()
+                return
+            self._ultimo.pop(simbolo, None)
+            self.cov.olvidar(simbolo)
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def evaluar(self, simbolo, notional, posiciones):
+        """
+        Candidato `simbolo` con `notional` USDT con signo (+ long, - short) frente a
+        `posiciones` ({símbolo: notional con signo}, ver posiciones_netas). VaR en USDT.
+        """
+        notional = float(notional)
+        libro = {s: float(v) for s, v in (posiciones or {}).items() if v and math.isfinite(float(v))}
+        simbolos = list(libro)
+        if simbolo not in libro:
+            simbolos.append(simbolo)
+        c = simbolos.index(simbolo)
+
+        with self._lock:
+            sigma, sin_datos = self.cov.matriz(simbolos, self.min_obs, self.correlacion_defecto)
+            obs = self.cov.observaciones(simbolo)
+        if not np.isfinite(sigma).all():
+            return {"disponible": False, "simbolo": simbolo, "notional": notional, "sin_datos": sin_datos}
+
+        w = np.array([libro.get(s, 0.0) for s in simbolos])
+        e = np.zeros(len(simbolos))
+        e[c] = notional
+        sw = sigma @ w
+        a = max(0.0, float(w @ sw))           # varianza de la cartera
+        b = float(notional * sw[c])           # covarianza cartera-candidato
+        cc = max(0.0, float(notional * notional * sigma[c, c]))  # varianza del candidato
+        k = self.z * math.sqrt(self.horizonte_velas)
+        var_cartera = k * math.sqrt(a)
+        var_total = k * math.sqrt(max(0.0, a + 2.0 * b + cc))
+
+        # Marginal: dVaR/dnotional del candidato con él dentro (Euler: componente = notional * marginal)
+        sigma_total = (var_total / k) if k > 0 else 0.0
+        total = w + e
+        marginal = (k * float((sigma @ total)[c]) / sigma_total) if sigma_total > 0 else 0.0
+
+        signo = 1.0 if notional >= 0 else -1.0
+        sig = np.sqrt(np.diag(sigma))
+        correlaciones = {}
+        exposicion_corr = 0.0
+        max_corr = None
+        for j, s in enumerate(simbolos):
+            if j == c or not libro.get(s):
+                continue
+            rho = float(sigma[c, j] / (sig[c] * sig[j])) if sig[c] > 0 and sig[j] > 0 else 0.0
+            correlaciones[s] = round(rho, 4)
+            # Parte del libro que se mueve con el candidato (en su dirección)
+            exposicion_corr += signo * rho * libro[s]
+            misma_apuesta = rho * signo * (1.0 if libro[s] > 0 else -1.0)
+            if max_corr is None or misma_apuesta > max_corr[1]:
+                max_corr = (s, misma_apuesta)
+
+        return {
+            "disponible": True,
+            "simbolo": simbolo,
+            "notional": notional,
+            "observaciones": obs,
+            "sin_datos": sin_datos,
+            "sigma_vela": float(sig[c]),
+            "var_cartera": var_cartera,
+            "var_con_candidato": var_total,
+            "var_incremental": var_total - var_cartera,
+            "var_marginal": marginal,
+            "var_componente": notional * marginal,
+            "correlaciones": correlaciones,
+            "correlacion_max": max_corr,
+            "exposicion_correlacionada": exposicion_corr,
+            "exposicion_ajustada": abs(notional) + exposicion_corr,
+            # varianzas para limitar_riesgo: VaR(f) = k * sqrt(a + 2 f b + f^2 c)
+            "_k": k,
+            "_abc": (a, b, cc),
+        }
+
+    def resumen(self):
+        with self._lock:
+            return {
+                "simbolos": len(self.cov.simbolos),
+                "velas_en_memoria": len(self.cov._por_ts),
+                "actualizaciones": self.cov.actualizaciones,
+                "lambda": self.cov.lam,
+                "confianza": self.confianza,
+                "horizonte_velas": self.horizonte_velas,
+            }
+
+
+def limitar_riesgo(evaluacion, equity, riesgo_pct, var_max_pct, riesgo_min_pct=0.0):
+    """
+    Riesgo % del candidato para que el VaR de cartera con él no pase de `var_max_pct` % del
+    equity. El notional escala con el riesgo, así que se busca el mayor f <= 1 con
+    VaR(cartera + f * candidato) <= presupuesto (cuadrática en f). Devuelve (riesgo_pct, motivo):
+    motivo None si no se toca, "VAR_CARTERA_REDUCIDO" si se recorta y "VAR_CARTERA" si el
+    riesgo resultante queda por debajo de `riesgo_min_pct` (-> riesgo 0, no entra).
+    """
+    try:
+        equity = float(equity)
+        var_max_pct = float(var_max_pct)
+    except (TypeError, ValueError):
+        return riesgo_pct, None
+    if not evaluacion or not evaluacion.get("disponible") or equity <= 0 or var_max_pct <= 0:
+        return riesgo_pct, None
+    presupuesto = equity * var_max_pct / 100.0
+    if evaluacion["var_con_candidato"] <= presupuesto:
+        return riesgo_pct, None
+
+    k = evaluacion["_k"]
+    a, b, c = evaluacion["_abc"]
+    q = (presupuesto / k) ** 2 if k > 0 else 0.0
+    if a >= q or c <= 0:
+        f = 0.0
+    else:
+        f = (-b + math.sqrt(b * b - c * (a - q))) / c
+    f = max(0.0, min(1.0, f))
+    nuevo = float(riesgo_pct) * f
+    if f <= 0.0 or nuevo < float(riesgo_min_pct or 0.0):
+        return 0.0, "VAR_CARTERA"
+    return round(nuevo, 3), "VAR_CARTERA_REDUCIDO"
@@ -0,0 +1,445 @@
+import argparse
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+import registro_parametros
+
+# ==============================================================================
+# 🎲 SIMULADOR MONTE CARLO DE RUINA (PARÁMETROS DE gestor_riesgo, VECTORIZADO)
+# ==============================================================================
+# El riesgo por operación (obtener_riesgo_pct_operativo), el multiplicador de RR
+# (obtener_rr_mult_operativo) y los límites diarios se ajustan a mano o con
+# entrenador_parametros.auto_tunning mirando winrate / profit factor. Aquí se simulan
+# N caminos de equity con una configuración candidata:
+#   - Resultados: distribución empírica de operaciones en múltiplos de R (PnL / riesgo
+#     al entrar) leída de operaciones/*.json. Con `r_multiple` o `pnl_real`+`riesgo_usdt`
+#     el R es exacto; con solo `pnl_real` se normaliza por la pérdida mediana (una
+#     pérdida típica = -1R, el SL completo).
+#   - Cada paso de cada camino remuestrea un resultado (bootstrap por ganadoras /
+#     perdedoras) y aplica las mismas reglas que el bot: riesgo base x factor de
+#     drawdown diario x factor de progreso al objetivo, recortado a [riesgo_min, riesgo_max];
+#     RR base x sus factores, recortado a [0.8, 1.25]. Un RR mayor que el de los datos
+#     estira las ganadoras y (por defecto) baja la probabilidad de acierto conservando
+#     la ventaja sobre un paseo aleatorio: p = p0 * (1 + w0) / (1 + w0 * escala).
+#   - Límites diarios (daily_loss_soft_pct -> pausa de cooldown_min, daily_loss_hard_pct
+#     -> resto del día parado) con `operaciones_dia` operaciones repartidas en el día.
+#     verificar_circuit_breaker los tiene neutralizados ahora mismo: limites_diarios=False
+#     reproduce eso.
+#   - Ruina: equity <= max(saldo_minimo, capital * (1 - ruina_dd_pct / 100)); el camino
+#     se detiene. Objetivo: equity >= capital * objetivo_x (se mide cuándo llega).
+# Todo es NumPy sobre bloques de caminos (memoria acotada por `bloque`, no por `caminos`).
+# Con la misma semilla dos configuraciones ven los mismos números aleatorios
+# (comparación justa entre candidatas).
+#
+# Uso:
+#   python simulador_ruina.py --caminos 100000 --operaciones 500
+#   python simulador_ruina.py --sintetico 0.45,2.0 --riesgo 1.5 --rr 1.1 --json
+#   from simulador_ruina import cargar_resultados, simular, evaluar_candidatos
+# ==============================================================================
+
+RUTA_OPERACIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "operaciones")
+IGNORAR = ("historico_entrenador.json",)
+
+CAMINOS = 100_000
+OPERACIONES = 500
+BLOQUE = 20_000
+
+
+# ------------------------------------------------------------------------------
+# Resultados en R
+# ------------------------------------------------------------------------------
+def resultados_r(registros):
+    """
+    Registros de operaciones (dicts) -> (array de R, info). Exactos: `r_multiple` o
+    `pnl_real` / `riesgo_usdt`. Solo `pnl_real`: / pérdida mediana de esos mismos.
+    """
+    exactos = []
+    solo_pnl = []
+    for reg in registros:
+        if not isinstance(reg, dict):
+            continue
+        try:
+            if reg.get("r_multiple") is not None:
+                exactos.append(float(reg["r_multiple"]))
+                continue
+            if reg.get("pnl_real") is None:
+                continue
+            pnl = float(reg["pnl_real"])
+            riesgo = reg.get("riesgo_usdt")
+            if riesgo is not None and float(riesgo) > 0:
+                exactos.append(pnl / float(riesgo))
+            else:
+                solo_pnl.append(pnl)
+        except (TypeError, ValueError):
+            continue
+
+    normalizados = []
+    escala = None
+    perdidas = [abs(p) for p in solo_pnl if p < 0]
+    if perdidas:
+        escala = float(np.median(perdidas))
+        normalizados = [p / escala for p in solo_pnl]
+    r = np.array([x for x in exactos + normalizados if math.isfinite(x)], dtype=float)
+    info = {
+        "operaciones": int(len(r)),
+        "r_exacto": len(exactos),
+        "r_por_perdida_mediana": len(normalizados),
+        "descartadas": len(solo_pnl) - len(normalizados),
+        "perdida_mediana_usdt": escala,
+    }
+    return r, info
+
+
+def cargar_resultados(ruta=RUTA_OPERACIONES):
+    """Recorre `ruta` (operaciones/AAAA-MM-DD/*.json) y devuelve resultados_r de lo que haya."""
+    registros = []
+    if os.path.isdir(ruta):
+        for raiz, _, ficheros in os.walk(ruta):
+            for nombre in ficheros:
+                if not nombre.endswith(".json") or nombre in IGNORAR:
+                    continue
+                try:
+                    with open(os.path.join(raiz, nombre), "r", encoding="utf-8") as f:
+                        datos = json.load(f)
+                except Exception:
+                    continue
+                registros.extend(datos if isinstance(datos, list) else [datos])
+    return resultados_r(registros)
+
+
+def resultados_sinteticos(winrate, rr, n=2000, semilla=None):
+    """Distribución de prueba: ganadoras a +rr R, perdedoras a -1R, con `winrate` exacto."""
+    n = max(2, int(n))
+    ganadoras = int(round(n * min(1.0, max(0.0, float(winrate)))))
+    r = np.concatenate([np.full(ganadoras, float(rr)), np.full(n - ganadoras, -1.0)])
+    np.random.default_rng(semilla).shuffle(r)
+    return r
+
+
+# ------------------------------------------------------------------------------
+# Configuración (mismas claves que parametros_activos.json)
+# ------------------------------------------------------------------------------
+def _config(params, rr_base):
+    vigentes = registro_parametros.obtener()
+    p, avisos = registro_parametros.normalizar(params if params is not None else vigentes)
+    riesgo = p["riesgo"]
+    # Los resultados registrados salieron con el RR vigente (salvo que se diga otro)
+    rr_base = float(vigentes["r_reward_mult"] if rr_base is None else rr_base)
+    return {
+        "riesgo_base": float(p["riesgo_base_pct"]),
+        "riesgo_min": float(riesgo["riesgo_min_pct"]),
+        "riesgo_max": float(riesgo["riesgo_max_pct"]),
+        "dd_reduccion": (float(riesgo["dd_reduccion_1"]), float(riesgo["dd_reduccion_2"]), float(riesgo["dd_reduccion_3"])),
+        "rr_mult": float(p["r_reward_mult"]),
+        "rr_base": rr_base if rr_base > 0 else 1.0,
+        "objetivo_eur": float((p.get("objetivo") or {}).get("OBJETIVO_EUR") or p.get("OBJETIVO_EUR") or 10000000),
+        "soft_pct": float(p["daily_loss_soft_pct"]),
+        "hard_pct": float(p["daily_loss_hard_pct"]),
+        "cooldown_min": float(p["cooldown_min"]),
+        "avisos": list(avisos),
+    }
+
+
+def _factores(dd, progreso, cfg):
+    """(riesgo %, multiplicador RR): obtener_riesgo_pct_operativo / obtener_rr_mult_operativo."""
+    dd = np.asarray(dd, dtype=float)
+    progreso = np.asarray(progreso, dtype=float)
+    d1, d2, d3 = cfg["dd_reduccion"]
+    f_dd = np.where(dd <= -0.03, d3, np.where(dd <= -0.02, d2, np.where(dd <= -0.01, d1, 1.0)))
+    # Mismo orden de ramas que gestor_riesgo (la de > 0.2 nunca llega a aplicarse)
+    f_prog = np.where(progreso < 0.0005, 1.15, np.where(progreso < 0.0025, 1.05, np.where(progreso > 0.05, 0.85, 1.0)))
+    riesgo = np.clip(cfg["riesgo_base"] * f_dd * f_prog, cfg["riesgo_min"], cfg["riesgo_max"])
+
+    f_dd_rr = np.where(dd <= -0.03, 0.9, np.where(dd <= -0.02, 0.95, np.where(dd >= 0.02, 1.05, 1.0)))
+    f_prog_rr = np.where(progreso < 0.0005, 1.05, np.where(progreso > 0.05, 0.95, 1.0))
+    rr = np.clip(cfg["rr_mult"] * f_dd_rr * f_prog_rr, 0.8, 1.25)
+    return riesgo, rr
+
+
+# Los factores son escalones del drawdown del día y del progreso al objetivo: 5 x 4 casillas.
+# Se calculan una vez con _factores y en cada paso solo se buscan.
+_DD_REPRESENTANTES = (0.05, 0.0, -0.015, -0.025, -0.05)
+_PROGRESO_REPRESENTANTES = (0.0001, 0.001, 0.01, 0.1)
+
+
+def _casillas(eq, eq_dia, objetivo_eur):
+    dd = eq / eq_dia - 1.0
+    k = (dd < 0.02).astype(np.int64)
+    k += dd <= -0.01
+    k += dd <= -0.02
+    k += dd <= -0.03
+    progreso = eq / objetivo_eur
+    k *= 4
+    k += progreso >= 0.0005
+    k += progreso >= 0.0025
+    k += progreso > 0.05
+    return k
+
+
+def _tablas(cfg, p0, w0, rr_afecta_winrate):
+    """(riesgo %, escala de las ganadoras, prob. de acierto) por casilla."""
+    dd = np.repeat(_DD_REPRESENTANTES, len(_PROGRESO_REPRESENTANTES))
+    progreso = np.tile(_PROGRESO_REPRESENTANTES, len(_DD_REPRESENTANTES))
+    riesgo, rr = _factores(dd, progreso, cfg)
+    escala = rr / cfg["rr_base"]
+    if rr_afecta_winrate and 0.0 < p0 < 1.0:
+        p = np.clip(p0 * (1.0 + w0) / (1.0 + w0 * escala), 0.0, 1.0)
+    else:
+        p = np.full(len(escala), p0)
+    return riesgo / 100.0, escala, p
+
+
+def _bloque(n, ganadoras, perdedoras, p0, w0, cfg, opc, rng):
+    """Simula `n` caminos. Devuelve (equity final, drawdown máx, paso de ruina, paso de objetivo) por camino."""
+    capital = opc["capital"]
+    eq = np.full(n, capital)
+    pico = eq.copy()
+    dd_max = np.zeros(n)
+    vivo = np.ones(n, dtype=bool)
+    t_ruina = np.full(n, -1, dtype=np.int64)
+    t_objetivo = np.full(n, -1, dtype=np.int64)
+    umbral_ruina = max(opc["saldo_minimo"], capital * (1.0 - opc["ruina_dd_pct"] / 100.0))
+    meta = capital * opc["objetivo_x"]
+
+    por_dia = opc["operaciones_dia"]
+    limites = opc["limites_diarios"]
+    # La pausa suave dura cooldown_min: en operaciones, con el día repartido a partes iguales
+    huecos_cooldown = int(math.ceil(cfg["cooldown_min"] / (1440.0 / por_dia))) if limites else 0
+    eq_dia = eq.copy()
+    parado_dia = np.zeros(n, dtype=bool)
+    suave_usado = np.zeros(n, dtype=bool)
+    cooldown = np.zeros(n, dtype=np.int64)
+    sin_ganadoras = len(ganadoras) == 0
+    sin_perdedoras = len(perdedoras) == 0
+    riesgo_t, escala_t, p_t = _tablas(cfg, p0, w0, opc["rr_afecta_winrate"])
+
+    for t in range(opc["operaciones"]):
+        if t and t % por_dia == 0:
+            eq_dia = eq.copy()
+            parado_dia[:] = False
+            suave_usado[:] = False
+            cooldown[:] = 0
+
+        k = _casillas(eq, eq_dia, cfg["objetivo_eur"])
+        gana = rng.random(n) < p_t[k]
+        r = np.where(
+            gana,
+            (ganadoras[rng.integers(0, len(ganadoras), n)] * escala_t[k]) if not sin_ganadoras else 0.0,
+            perdedoras[rng.integers(0, len(perdedoras), n)] if not sin_perdedoras else 0.0,
+        )
+
+        opera = vivo & ~parado_dia & (cooldown == 0)
+        np.subtract(cooldown, 1, out=cooldown, where=cooldown > 0)
+        r *= riesgo_t[k]
+        r *= opera
+        eq = eq + eq * r
+
+        if limites:
+            pnl_dia_pct = (eq / eq_dia - 1.0) * 100.0
+            parado_dia |= opera & (pnl_dia_pct <= -cfg["hard_pct"])
+            suave = opera & ~suave_usado & (pnl_dia_pct <= -cfg["soft_pct"])
+            cooldown[suave] = huecos_cooldown
+            suave_usado |= suave
+
+        arruinado = vivo & (eq <= umbral_ruina)
+        t_ruina[arruinado] = t + 1
+        vivo &= ~arruinado
+        np.maximum(pico, eq, out=pico)
+        np.maximum(dd_max, 1.0 - eq / pico, out=dd_max)
+        llega = (t_objetivo < 0) & (eq >= meta)
+        t_objetivo[llega] = t + 1
+    return eq, dd_max, t_ruina, t_objetivo
+
+
+def _cuantiles(x, qs):
+    if len(x) == 0:
+        return {f"p{int(q * 100)}": None for q in qs}
+    v = np.quantile(x, qs)
+    return {f"p{int(q * 100)}": float(round(val, 6)) for q, val in zip(qs, v)}
+
+
+def _wilson(k, n, z=1.96):
+    if n <= 0:
+        return (0.0, 1.0)
+    p = k / n
+    d = 1 + z * z / n
+    centro = (p + z * z / (2 * n)) / d
+    radio = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / d
+    return (max(0.0, centro - radio), min(1.0, centro + radio))
+
+
+# ------------------------------------------------------------------------------
+# API
+# ------------------------------------------------------------------------------
+def simular(
+    resultados,
+    params=None,
+    capital=1000.0,
+    caminos=CAMINOS,
+    operaciones=OPERACIONES,
+    operaciones_dia=10,
+    objetivo_x=2.0,
+    ruina_dd_pct=50.0,
+    saldo_minimo=5.0,
+    limites_diarios=True,
+    rr_afecta_winrate=True,
+    rr_base=None,
+    bloque=BLOQUE,
+    semilla=None,
+):
+    """
+    Monte Carlo de `caminos` caminos de `operaciones` operaciones con la configuración
+    `params` (forma de parametros_activos.json; None = la vigente). `resultados`: array
+    de R (cargar_resultados / resultados_sinteticos). `rr_base`: r_reward_mult con el que
+    se obtuvieron los resultados (None = el vigente). Devuelve un dict de métricas.
+    """
+    t0 = time.perf_counter()
+    r = np.asarray(resultados, dtype=float)
+    r = r[np.isfinite(r)]
+    if len(r) == 0:
+        raise ValueError("sin resultados de operaciones para remuestrear")
+    cfg = _config(params, rr_base)
+    opc = {
+        "capital": float(capital),
+        "operaciones": max(1, int(operaciones)),
+        "operaciones_dia": max(1, int(operaciones_dia)),
+        "objetivo_x": float(objetivo_x),
+        "ruina_dd_pct": min(100.0, max(0.0, float(ruina_dd_pct))),
+        "saldo_minimo": float(saldo_minimo),
+        "limites_diarios": bool(limites_diarios),
+        "rr_afecta_winrate": bool(rr_afecta_winrate),
+    }
+    if opc["capital"] <= 0:
+        raise ValueError("capital debe ser > 0")
+
+    ganadoras = r[r > 0]
+    perdedoras = r[r <= 0]
+    p0 = len(ganadoras) / len(r)
+    w0 = float(ganadoras.mean()) if len(ganadoras) else 0.0
+
+    caminos = max(1, int(caminos))
+    bloque = max(1, int(bloque))
+    semillas = np.random.SeedSequence(semilla).spawn(int(math.ceil(caminos / bloque)))
+    partes = []
+    for k, ss in enumerate(semillas):
+        n = min(bloque, caminos - k * bloque)
+        partes.append(_bloque(n, ganadoras, perdedoras, p0, w0, cfg, opc, np.random.default_rng(ss)))
+    eq, dd_max, t_ruina, t_objetivo = (np.concatenate(x) for x in zip(*partes))
+
+    ruinas = int((t_ruina > 0).sum())
+    llegan = t_objetivo > 0
+    qs = (0.1, 0.5, 0.9)
+    return {
+        "caminos": caminos,
+        "operaciones": opc["operaciones"],
+        "capital": opc["capital"],
+        "config": {k: v for k, v in cfg.items()},
+        "resultados": {
+            "n": int(len(r)),
+            "winrate": round(p0, 4),
+            "r_medio": round(float(r.mean()), 4),
+            "r_ganadora_media": round(w0, 4),
+            "r_perdedora_media": round(float(perdedoras.mean()), 4) if len(perdedoras) else None,
+        },
+        "prob_ruina": ruinas / caminos,
+        "prob_ruina_ic95": tuple(round(x, 6) for x in _wilson(ruinas, caminos)),
+        "operaciones_hasta_ruina": _cuantiles(t_ruina[t_ruina > 0], qs),
+        "prob_objetivo": float(llegan.mean()),
+        "operaciones_hasta_objetivo": _cuantiles(t_objetivo[llegan], qs),
+        "dias_hasta_objetivo": _cuantiles(t_objetivo[llegan] / opc["operaciones_dia"], qs),
+        "drawdown_max_pct": {k: (None if v is None else round(v * 100.0, 3)) for k, v in _cuantiles(dd_max, (0.5, 0.9, 0.95, 0.99)).items()},
+        "equity_final": dict(_cuantiles(eq, (0.05, 0.5, 0.95)), media=round(float(eq.mean()), 4)),
+        "segundos": round(time.perf_counter() - t0, 3),
+    }
+
+
+def evaluar_candidatos(resultados, candidatos, **kwargs):
+    """simular() de cada candidata con la misma semilla (mismos números aleatorios). Lista de dicts."""
+    kwargs.setdefault("semilla", 12345)
+    return [simular(resultados, params=c, **kwargs) for c in candidatos]
+
+
+# ------------------------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------------------------
+def _imprimir(res):
+    r = res["resultados"]
+    lo, hi = res["prob_ruina_ic95"]
+    print(f"🎲 {res['caminos']} caminos x {res['operaciones']} operaciones | capital {res['capital']:.2f} | {res['segundos']:.2f} s")
+    print(f"   Resultados: n={r['n']} winrate={r['winrate'] * 100:.1f}% R medio={r['r_medio']:+.3f} (ganadora {r['r_ganadora_media']:+.2f}, perdedora {r['r_perdedora_media']})")
+    c = res["config"]
+    print(f"   Config: riesgo {c['riesgo_base']}% [{c['riesgo_min']}, {c['riesgo_max']}] | RR x{c['rr_mult']} (datos x{c['rr_base']}) | diario -{c['soft_pct']}% / -{c['hard_pct']}%")
+    print(f"   Ruina: {res['prob_ruina'] * 100:.3f}% (IC95 {lo * 100:.3f}-{hi * 100:.3f}%) | operaciones hasta ruina {res['operaciones_hasta_ruina']}")
+    print(f"   Objetivo: {res['prob_objetivo'] * 100:.2f}% | operaciones {res['operaciones_hasta_objetivo']} | días {res['dias_hasta_objetivo']}")
+    print(f"   Drawdown máx %: {res['drawdown_max_pct']}")
+    print(f"   Equity final: {res['equity_final']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo de riesgo de ruina con la configuración de gestor_riesgo.")
+    parser.add_argument("--ruta", default=RUTA_OPERACIONES, help="Directorio de operaciones (*.json con pnl_real / r_multiple)")
+    parser.add_argument("--sintetico", default=None, help="winrate,rr: resultados de prueba en vez de los reales")
+    parser.add_argument("--params", default=None, help="JSON con la configuración candidata (por defecto la vigente)")
+    parser.add_argument("--riesgo", type=float, default=None, help="Sobrescribe riesgo_base_pct")
+    parser.add_argument("--rr", type=float, default=None, help="Sobrescribe r_reward_mult")
+    parser.add_argument("--rr-base", type=float, default=None, help="r_reward_mult con el que se obtuvieron los resultados")
+    parser.add_argument("--capital", type=float, default=1000.0)
+    parser.add_argument("--caminos", type=int, default=CAMINOS)
+    parser.add_argument("--operaciones", type=int, default=OPERACIONES)
+    parser.add_argument("--por-dia", type=int, default=10, help="Operaciones por día (límites diarios y días hasta objetivo)")
+    parser.add_argument("--objetivo", type=float, default=2.0, help="Objetivo como múltiplo del capital")
+    parser.add_argument("--ruina-dd", type=float, default=50.0, help="Ruina: caída desde el capital inicial en %%")
+    parser.add_argument("--sin-limites-diarios", action="store_true")
+    parser.add_argument("--rr-fijo-winrate", action="store_true", help="El RR no cambia la probabilidad de acierto")
+    parser.add_argument("--bloque", type=int, default=BLOQUE)
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.sintetico:
+        winrate, rr = (float(x) for x in args.sintetico.split(","))
+        resultados = resultados_sinteticos(winrate, rr, semilla=args.semilla)
+    else:
+        resultados, info = cargar_resultados(args.ruta)
+        if len(resultados) == 0:
+            raise SystemExit(
+                f"Sin operaciones con pnl_real / r_multiple en {args.ruta} ({info}). "
+                "Prueba con --sintetico 0.45,2.0"
+            )
+
+    params = registro_parametros.descongelar(registro_parametros.obtener())
+    if args.params:
+        with open(args.params, "r", encoding="utf-8") as f:
+            params = json.load(f)
+    if args.riesgo is not None:
+        params["riesgo_base_pct"] = args.riesgo
+    if args.rr is not None:
+        params["r_reward_mult"] = args.rr
+
+    res = simular(
+        resultados,
+        params=params,
+        capital=args.capital,
+        caminos=args.caminos,
+        operaciones=args.operaciones,
+        operaciones_dia=args.por_dia,
+        objetivo_x=args.objetivo,
+        ruina_dd_pct=args.ruina_dd,
+        limites_diarios=not args.sin_limites_diarios,
+        rr_afecta_winrate=not args.rr_fijo_winrate,
+        rr_base=args.rr_base,
+        bloque=args.bloque,
+        semilla=args.semilla,
+    )
+    if args.json:
+        print(json.dumps(res, indent=2, ensure_ascii=False))
+    else:
+        _imprimir(res)
+
+
+if __name__ == "__main__":
+    main()
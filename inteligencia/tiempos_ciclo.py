@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# ==============================================================================
+# ⏱️ TIEMPOS DEL CICLO (TRAMOS + PERCENTILES p50/p95/p99)
+# ==============================================================================
+# _registrar_paso solo dice en qué paso estamos (sirve para detectar cuelgues).
+# Esto mide CUÁNTO tarda cada etapa del camino caliente:
+#   mercado_tickers, mercado_velas, indicadores_radar, motor_determinista (y dentro:
+#   indicadores, patrones, fibonacci_divergencias), rag, llm, sizing, orden, ui,
+#   cartera y pasada_radar (la pasada completa del escáner)
+# Se guardan ventanas móviles por etapa y por (etapa, símbolo), y se publican en
+# `tiempos_ciclo.json` junto a heartbeat.json. Coste por tramo: dos perf_counter y
+# un append en un deque.
+# ==============================================================================
+
+RUTA_TIEMPOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tiempos_ciclo.json")
+MUESTRAS_POR_ETAPA = 512
+MUESTRAS_POR_SIMBOLO = 64
+MAX_SIMBOLOS = 200
+INTERVALO_PUBLICACION_S = 5.0
+
+
+def _percentiles_ms(muestras):
+    datos = np.fromiter(muestras, dtype=np.float64) * 1000.0
+    if datos.size == 0:
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(datos, (50, 95, 99))
+    return {
+        "n": int(datos.size),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(datos.max()), 2),
+    }
+
+
+class MedidorTiempos:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_etapa = {}
+        self._por_simbolo = {}  # simbolo -> {etapa: deque}
+        self._ultima_publicacion = 0.0
+
+    def registrar(self, etapa, segundos, simbolo=None):
+        with self._lock:
+            cola = self._por_etapa.get(etapa)
+            if cola is None:
+                cola = self._por_etapa[etapa] = deque(maxlen=MUESTRAS_POR_ETAPA)
+            cola.append(segundos)
+
+            if simbolo:
+                etapas = self._por_simbolo.get(simbolo)
+                if etapas is None:
+                    if len(self._por_simbolo) >= MAX_SIMBOLOS:
+                        return
+                    etapas = self._por_simbolo[simbolo] = {}
+                cola_s = etapas.get(etapa)
+                if cola_s is None:
+                    cola_s = etapas[etapa] = deque(maxlen=MUESTRAS_POR_SIMBOLO)
+                cola_s.append(segundos)
+
+    @contextmanager
+    def tramo(self, etapa, simbolo=None):
+        """Mide el bloque `with` (también si lanza excepción)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - inicio, simbolo)
+
+    def resumen(self, max_simbolos=10):
+        """Percentiles por etapa y los símbolos más lentos (por p95 de su etapa más cara)."""
+        with self._lock:
+            por_etapa = {e: list(c) for e, c in self._por_etapa.items()}
+            por_simbolo = {s: {e: list(c) for e, c in et.items()} for s, et in self._por_simbolo.items()}
+
+        etapas = {e: _percentiles_ms(m) for e, m in por_etapa.items()}
+        simbolos = {}
+        for s, et in por_simbolo.items():
+            simbolos[s] = {e: _percentiles_ms(m) for e, m in et.items()}
+
+        def _peor_p95(item):
+            return max((v.get("p95_ms", 0.0) for v in item[1].values()), default=0.0)
+
+        lentos = dict(sorted(simbolos.items(), key=_peor_p95, reverse=True)[: max(0, int(max_simbolos))])
+        return {"timestamp": time.time(), "etapas": etapas, "simbolos_lentos": lentos}
+
+    def publicar(self, ruta=RUTA_TIEMPOS, forzar=False):
+        """Escritura atómica de tiempos_ciclo.json (como mucho cada INTERVALO_PUBLICACION_S)."""
+        ahora = time.time()
+        if not forzar and (ahora - self._ultima_publicacion) < INTERVALO_PUBLICACION_S:
+            return False
+        self._ultima_publicacion = ahora
+        ruta_tmp = ruta + ".tmp"
+        try:
+            with open(ruta_tmp, "w", encoding="utf-8") as f:
+                json.dump(self.resumen(), f, ensure_ascii=False)
+            os.replace(ruta_tmp, ruta)
+            return True
+        except Exception as e:
+            print(f"⚠️ TIEMPOS CICLO: no se pudo publicar: {e}")
+            return False
+
+
+# Medidor compartido del proceso (operador, análisis técnico, publicador UI)
+MEDIDOR = MedidorTiempos()
+
+
+def tramo(etapa, simbolo=None):
+    return MEDIDOR.tramo(etapa, simbolo)
@@ -4,34 +4,21 @@ from typing import Any, Dict, Optional, Tuple
 
 import pandas as pd
 
+import registro_parametros
+
+# Contexto de indicadores compartido con el motor determinista (mismo frame de velas)
+try:
+    from analisis_tecnico import contexto_indicadores
+except Exception:
+    contexto_indicadores = None
+
 RUTA_BLACKLIST = os.path.join(os.path.dirname(__file__), "simbolos_bloqueados.json")
-RUTA_PARAMETROS_ACTIVOS = os.path.join(os.path.dirname(__file__), "parametros_activos.json")
+RUTA_PARAMETROS_ACTIVOS = registro_parametros.RUTA_PARAMETROS_ACTIVOS
 
 
 def _cargar_parametros_activos() -> Dict[str, Any]:
-    defaults: Dict[str, Any] = {
-        "tpsl": {
-            "rr_min": 1.2,
-            "rr_max": 5.0,
-            # Si se define (p.ej. 2.0), usa RR fijo en vez de RR dinámico.
-            "rr_objetivo": None,
-        }
-    }
-    try:
-        if os.path.exists(RUTA_PARAMETROS_ACTIVOS):
-            with open(RUTA_PARAMETROS_ACTIVOS, "r", encoding="utf-8") as f:
-                data = json.load(f) or {}
-                if isinstance(data, dict):
-                    out = dict(defaults)
-                    out.update(data)
-                    tpsl_cfg = dict((defaults.get("tpsl") or {}) if isinstance(defaults.get("tpsl"), dict) else {})
-                    if isinstance(data.get("tpsl"), dict):
-                        tpsl_cfg.update(data.get("tpsl") or {})
-                    out["tpsl"] = tpsl_cfg
-                    return out
-    except Exception:
-        return defaults
-    return defaults
+    # Defaults del bloque "tpsl", validación y recarga: registro_parametros (solo lectura)
+    return registro_parametros.obtener()
 
 
 def _cargar_blacklist() -> Dict[str, Any]:
@@ -118,6 +105,14 @@ def _rr_dinamico(confianza: float, atr_pct: float) -> float:
     return float(max(1.2, min(5.0, rr)))
 
 
+def _extremos_estructura(df: pd.DataFrame, ventana: int = 50) -> Tuple[float, float]:
+    """(swing_low, swing_high) de las últimas `ventana` velas, memoizado por frame si se puede."""
+    if contexto_indicadores is not None:
+        return contexto_indicadores.contexto_de(df).extremos(ventana)
+    sub = df.iloc[-ventana:] if len(df) >= ventana else df
+    return float(sub["low"].astype(float).min()), float(sub["high"].astype(float).max())
+
+
 def _sl_por_estructura(
     df: Optional[pd.DataFrame],
     direccion: str,
@@ -142,10 +137,8 @@ def _sl_por_estructura(
     except Exception:
         atr = 0.0
 
-    sub = df.iloc[-50:] if len(df) >= 50 else df
     try:
-        swing_low = float(sub["low"].astype(float).min())
-        swing_high = float(sub["high"].astype(float).max())
+        swing_low, swing_high = _extremos_estructura(df, 50)
     except Exception:
         return None, info
 
@@ -190,10 +183,8 @@ def _tp_por_rr_y_confluencia(
     candidatos = []
 
     if df is not None and len(df) >= 30:
-        sub = df.iloc[-50:] if len(df) >= 50 else df
         try:
-            swing_low = float(sub["low"].astype(float).min())
-            swing_high = float(sub["high"].astype(float).max())
+            swing_low, swing_high = _extremos_estructura(df, 50)
             r = float(swing_high - swing_low)
             if r > 0:
                 if direccion == "LONG":
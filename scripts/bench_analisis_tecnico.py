@@ -0,0 +1,351 @@
+"""
+Benchmark del paquete analisis_tecnico con línea base JSON.
+
+Cronometra cada función pública de `indicadores`, `patrones_chartistas`,
+`fibonacci` y `scoring_confluencias` (más evaluar_setup_determinista de punta a
+punta) sobre varios tamaños de ventana y varios conjuntos de velas:
+  - sintéticos deterministas (semilla fija): paseo aleatorio, tendencia, rango y huecos
+  - grabado: datos/btc_usdt_15m.csv (últimas N velas, encadenado si no alcanza)
+
+Cada medida usa una copia nueva del frame (el contexto memoizado de
+contexto_indicadores empieza vacío), así que los tiempos son "en frío" por símbolo.
+
+Uso:
+  python scripts/bench_analisis_tecnico.py --guardar tmp/bench_at_base.json
+  python scripts/bench_analisis_tecnico.py --comparar tmp/bench_at_base.json [--umbral 0.25]
+  python scripts/bench_analisis_tecnico.py --filtro scoring --ventanas 100
+
+Con --comparar sale con código 1 si algún caso empeora más que `--umbral`
+(relativo) y más que `--minimo-us` (absoluto, para no saltar por ruido). Por
+defecto se compara `relativo`: el mínimo de cada tanda (como timeit) dividido por
+una carga de calibración medida junto a ella, mediana entre tandas. Así la línea base se puede
+reutilizar aunque la máquina vaya más lenta o más rápida ese día; con
+`--metrica min_us` se comparan microsegundos tal cual. Los casos que salen peor se
+vuelven a medir (`--reconfirmar`) antes de darlos por regresión.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+from analisis_tecnico import fibonacci, indicadores, patrones_chartistas, scoring_confluencias  # noqa: E402
+
+COLUMNAS = ["timestamp", "open", "high", "low", "close", "volume"]
+VERSION_INFORME = 1
+PASO_MS = 15 * 60 * 1000
+
+
+# =========================================================
+# Velas de prueba
+# =========================================================
+def _ohlcv_desde_cierres(cierres, rng, huecos=None):
+    """OHLCV coherente (high >= max(open, close), low <= min) a partir de cierres."""
+    n = len(cierres)
+    aperturas = np.empty(n)
+    aperturas[0] = cierres[0]
+    aperturas[1:] = cierres[:-1]
+    if huecos is not None:
+        aperturas = aperturas * huecos
+    cuerpo_hi = np.maximum(aperturas, cierres)
+    cuerpo_lo = np.minimum(aperturas, cierres)
+    mecha = np.abs(rng.normal(0.0, 0.002, n)) * cierres
+    volumen = rng.lognormal(mean=6.0, sigma=0.6, size=n)
+    return pd.DataFrame(
+        {
+            "timestamp": 1_700_000_000_000.0 + np.arange(n) * PASO_MS,
+            "open": aperturas,
+            "high": cuerpo_hi + mecha,
+            "low": cuerpo_lo - mecha * rng.uniform(0.5, 1.5, n),
+            "close": cierres,
+            "volume": volumen,
+        }
+    )
+
+
+def velas_sinteticas(regimen, n, semilla=7):
+    """Velas deterministas por régimen: paseo | tendencia | rango | huecos."""
+    rng = np.random.default_rng(semilla)
+    if regimen == "paseo":
+        cierres = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n)))
+        return _ohlcv_desde_cierres(cierres, rng)
+    if regimen == "tendencia":
+        cierres = 100.0 * np.exp(np.cumsum(rng.normal(0.0012, 0.003, n)))
+        return _ohlcv_desde_cierres(cierres, rng)
+    if regimen == "rango":
+        # Ornstein-Uhlenbeck alrededor de 100
+        x = np.empty(n)
+        x[0] = 0.0
+        ruido = rng.normal(0.0, 0.004, n)
+        for i in range(1, n):
+            x[i] = x[i - 1] * 0.9 + ruido[i]
+        return _ohlcv_desde_cierres(100.0 * np.exp(x), rng)
+    if regimen == "huecos":
+        cierres = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.004, n)))
+        huecos = np.where(rng.random(n) < 0.03, 1.0 + rng.normal(0.0, 0.02, n), 1.0)
+        df = _ohlcv_desde_cierres(cierres, rng, huecos=huecos)
+        df.loc[rng.random(n) < 0.01, "volume"] = 0.0  # velas sin volumen (VWAP / ratio)
+        return df
+    raise ValueError(f"régimen desconocido: {regimen}")
+
+
+def velas_grabadas(ruta_csv, n):
+    """Últimas n velas del CSV; si no alcanza, se encadena con desplazamiento de precio."""
+    base = pd.read_csv(ruta_csv)[COLUMNAS].astype(float)
+    if len(base) >= n:
+        return base.tail(n).reset_index(drop=True)
+    partes = []
+    total = 0
+    desplazamiento = 0.0
+    while total < n:
+        parte = base.copy()
+        for col in ("open", "high", "low", "close"):
+            parte[col] = parte[col] + desplazamiento
+        parte["timestamp"] = parte["timestamp"] + total * PASO_MS
+        desplazamiento = float(parte["close"].iloc[-1]) - float(base["close"].iloc[0])
+        partes.append(parte)
+        total += len(parte)
+    return pd.concat(partes, ignore_index=True).iloc[-n:].reset_index(drop=True)
+
+
+# =========================================================
+# Casos
+# =========================================================
+def casos():
+    """{nombre: fn(df)}; cada fn recibe un frame recién copiado."""
+    c = {
+        "indicadores.ema": lambda d: indicadores.ema(d["close"], 20),
+        "indicadores.rsi": lambda d: indicadores.rsi(d["close"], 14),
+        "indicadores.macd": lambda d: indicadores.macd(d["close"]),
+        "indicadores.rango_verdadero": indicadores.rango_verdadero,
+        "indicadores.atr": lambda d: indicadores.atr(d, 14),
+        "indicadores.adx": lambda d: indicadores.adx(d, 14),
+        "indicadores.vwap": indicadores.vwap,
+        "indicadores.obv": indicadores.obv,
+        "indicadores.volumen_ratio": lambda d: indicadores.volumen_ratio(d, 20),
+        "patrones.pivotes_kernel": lambda d: patrones_chartistas.pivotes_kernel(
+            d["high"].to_numpy(dtype=float), d["low"].to_numpy(dtype=float), 3
+        ),
+    }
+    for nombre in (
+        "detectar_doble_techo_suelo",
+        "detectar_hch",
+        "detectar_triangulo",
+        "detectar_bandera_simple",
+        "detectar_triple_techo_suelo",
+        "detectar_triangulo_asc_desc",
+        "detectar_rectangulo",
+        "detectar_cuna",
+        "detectar_patron",
+    ):
+        fn = getattr(patrones_chartistas, nombre)
+        c[f"patrones.{nombre}"] = lambda d, fn=fn: fn(d, atr=float(d["close"].iloc[-1]) * 0.004)
+
+    def _swing_y_niveles(d):
+        swing = fibonacci.detectar_swing_basico(d, lookback=60)
+        if swing is not None:
+            retro = fibonacci.niveles_retroceso(swing)
+            fibonacci.niveles_extension(swing)
+            fibonacci.nivel_cercano(float(d["close"].iloc[-1]), retro, fibonacci.tolerancia_por_atr(1.0))
+
+    c["fibonacci.detectar_swing_basico"] = lambda d: fibonacci.detectar_swing_basico(d, lookback=60)
+    c["fibonacci.swing_y_niveles"] = _swing_y_niveles
+    c["scoring.analizar_estructura"] = scoring_confluencias.analizar_estructura
+    c["scoring.evaluar_setup_determinista"] = lambda d: scoring_confluencias.evaluar_setup_determinista(
+        d, simbolo="BENCH", temporalidad="15m"
+    )
+    return c
+
+
+_REF_SERIE = pd.Series(np.random.default_rng(0).normal(size=500)).cumsum()
+
+
+def _calibrar(reps=5):
+    """
+    Mínimo (s) de una carga fija (pandas + numpy + Python puro). En máquinas
+    compartidas la velocidad cambia por fases de ~1 s que afectan a todo por igual:
+    dividir cada tanda por la calibración medida junto a ella quita casi todo el ruido.
+    """
+    mejor = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        _REF_SERIE.rolling(14).mean()
+        np.sort(_REF_SERIE.values)
+        sum(i * i for i in range(2000))
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+def muestrear(fn, df, min_tiempo_s, max_reps):
+    """Una tanda: (tiempos_s, calibración_s) con un frame nuevo por repetición; la copia no se cuenta."""
+    muestras = []
+    gastado = 0.0
+    gc_activo = gc.isenabled()
+    gc.disable()  # como timeit: sin pausas del recolector dentro de la medida
+    try:
+        antes = _calibrar()
+        while len(muestras) < max_reps and (gastado < min_tiempo_s or len(muestras) < 3):
+            d = df.copy()
+            t0 = time.perf_counter()
+            fn(d)
+            dt = time.perf_counter() - t0
+            muestras.append(dt)
+            gastado += dt
+        cal = (antes + _calibrar()) / 2.0
+    finally:
+        if gc_activo:
+            gc.enable()
+    return muestras, cal
+
+
+def resumir(tandas):
+    """
+    Mínimo, mediana y p90 en µs (todas las repeticiones) y `relativo`: mediana
+    entre tandas de (mínimo de la tanda / calibración de la tanda).
+    """
+    m = np.concatenate([np.asarray(t, dtype=float) for t, _ in tandas]) * 1e6
+    return {
+        "min_us": round(float(m.min()), 2),
+        "mediana_us": round(float(np.median(m)), 2),
+        "p90_us": round(float(np.percentile(m, 90)), 2),
+        "relativo": round(float(np.median([min(t) / cal for t, cal in tandas])), 5),
+        "reps": len(m),
+        "tandas": len(tandas),
+    }
+
+
+def preparar(ventanas, regimenes, ruta_csv, filtro, semilla):
+    """Lista de (clave, fn, df) con clave "caso|velas|ventana" (ya calentados)."""
+    fns = {k: v for k, v in casos().items() if not filtro or filtro in k}
+    trabajos = []
+    for ventana in ventanas:
+        fixtures = {r: velas_sinteticas(r, ventana, semilla) for r in regimenes}
+        if ruta_csv:
+            fixtures["btc_15m"] = velas_grabadas(ruta_csv, ventana)
+        for nombre_fx, df in fixtures.items():
+            for nombre, fn in fns.items():
+                fn(df.copy())  # calentamiento (imports perezosos, caches de numpy)
+                trabajos.append((f"{nombre}|{nombre_fx}|{ventana}", fn, df))
+    return trabajos
+
+
+def medir(trabajos, min_tiempo_s, max_reps, rondas, muestras=None):
+    """
+    Recorre los trabajos `rondas` veces repartiendo el presupuesto: si la máquina
+    va lenta durante unos segundos, solo contamina una ronda de cada caso.
+    """
+    rondas = max(1, int(rondas))
+    muestras = {} if muestras is None else muestras
+    for _ in range(rondas):
+        for clave, fn, df in trabajos:
+            muestras.setdefault(clave, []).append(
+                muestrear(fn, df, min_tiempo_s / rondas, max(3, max_reps // rondas))
+            )
+    return muestras
+
+
+def comparar(base, actual, umbral, minimo_us, metrica="relativo"):
+    """Lista de (clave, base, actual, ratio, regresion) y nº de regresiones."""
+    filas = []
+    regresiones = 0
+    for clave, med in sorted(actual.items()):
+        ref = base.get(clave)
+        if ref is None or metrica not in ref:
+            continue
+        b = float(ref[metrica])
+        a = float(med[metrica])
+        ratio = a / b if b > 0 else float("inf")
+        # Empeoramiento en µs estimado sobre el mínimo de la base (sirve para cualquier métrica)
+        delta_us = float(ref.get("min_us", b)) * (ratio - 1.0)
+        regresion = a > b * (1.0 + umbral) and delta_us > minimo_us
+        regresiones += regresion
+        filas.append((clave, b, a, ratio, regresion))
+    return filas, regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos", "btc_usdt_15m.csv"))
+    parser.add_argument("--ventanas", default="100,500,2000", help="tamaños de ventana separados por comas")
+    parser.add_argument("--regimenes", default="paseo,tendencia,rango,huecos")
+    parser.add_argument("--filtro", default="", help="solo casos cuyo nombre contenga este texto")
+    parser.add_argument("--semilla", type=int, default=7)
+    parser.add_argument("--min-tiempo", type=float, default=0.15, help="segundos mínimos por caso")
+    parser.add_argument("--max-reps", type=int, default=200)
+    parser.add_argument("--rondas", type=int, default=5, help="pasadas intercaladas sobre todos los casos")
+    parser.add_argument("--guardar", default="", help="escribe el informe JSON (línea base)")
+    parser.add_argument("--comparar", default="", help="línea base JSON contra la que comparar")
+    parser.add_argument("--umbral", type=float, default=0.25, help="empeoramiento relativo tolerado")
+    parser.add_argument("--minimo-us", type=float, default=5.0, help="empeoramiento absoluto mínimo para contar")
+    parser.add_argument("--reconfirmar", type=int, default=4, help="rondas extra para los casos que salen peor")
+    parser.add_argument("--metrica", default="relativo", choices=("relativo", "min_us", "mediana_us", "p90_us"))
+    args = parser.parse_args()
+
+    ventanas = [int(v) for v in args.ventanas.split(",") if v.strip()]
+    regimenes = [r.strip() for r in args.regimenes.split(",") if r.strip()]
+    ruta_csv = args.csv if args.csv and os.path.exists(args.csv) else ""
+
+    trabajos = preparar(ventanas, regimenes, ruta_csv, args.filtro, args.semilla)
+    muestras = medir(trabajos, args.min_tiempo, args.max_reps, args.rondas)
+    resultados = {clave: resumir(m) for clave, m in muestras.items()}
+    for clave, r in resultados.items():
+        print(f"{clave:<62} min {r['min_us']:>10.1f} us  mediana {r['mediana_us']:>10.1f} us")
+    informe = {
+        "version": VERSION_INFORME,
+        "meta": {
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "procesador": platform.processor() or platform.machine(),
+            "semilla": args.semilla,
+            "rondas": args.rondas,
+            "ventanas": ventanas,
+        },
+        "resultados": resultados,
+    }
+
+    if args.guardar:
+        os.makedirs(os.path.dirname(os.path.abspath(args.guardar)), exist_ok=True)
+        tmp = args.guardar + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, args.guardar)
+        print(f"\nlínea base guardada en {args.guardar} ({len(resultados)} casos)")
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        filas, regresiones = comparar(base.get("resultados", {}), resultados, args.umbral, args.minimo_us, args.metrica)
+        if regresiones and args.reconfirmar > 0:
+            # Los sospechosos se vuelven a medir: una regresión real sigue ahí, el ruido no
+            sospechosos = {f[0] for f in filas if f[4]}
+            print(f"\nreconfirmando {len(sospechosos)} casos ({args.reconfirmar} rondas)...")
+            medir([t for t in trabajos if t[0] in sospechosos], args.min_tiempo, args.max_reps, args.reconfirmar, muestras)
+            resultados.update({clave: resumir(muestras[clave]) for clave in sospechosos})
+            filas, regresiones = comparar(base.get("resultados", {}), resultados, args.umbral, args.minimo_us, args.metrica)
+        print(f"\ncomparación contra {args.comparar} ({base.get('meta', {}).get('fecha', '?')})")
+        for clave, b, a, ratio, regresion in filas:
+            marca = "PEOR" if regresion else ("mejor" if ratio < 1.0 / (1.0 + args.umbral) else "")
+            print(f"{clave:<62} {b:>10.4g} -> {a:>10.4g}  x{ratio:5.2f} {marca}")
+        print(
+            f"\n{len(filas)} casos comparados ({args.metrica}), {regresiones} regresiones "
+            f"(umbral {args.umbral:.0%}, mínimo {args.minimo_us} us)"
+        )
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Caché de señales por vela cerrada (analisis_tecnico.cache_senales).
+
+Simula el escáner sobre un CSV de `datos/`: por cada vela, `--pasadas` evaluaciones
+con la vela en formación a medio camino (precio interpolado entre open y close).
+Comprueba y mide:
+  1. fallo de caché (1ª pasada de la vela) == evaluar_setup_determinista (exacto)
+  2. acierto con el mismo frame y refresco de precio == evaluar_setup_determinista (exacto)
+  3. tasa de aciertos y tiempo por pasada: motor completo vs caché
+  4. deriva del compromiso: pasadas en las que la decisión con estructura congelada
+     difiere de la del motor completo sobre ese frame
+
+Uso:
+  python scripts/bench_cache_senales.py [--velas 100] [--pasadas 45]
+Sale con código 1 si falla 1 o 2.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+from analisis_tecnico.cache_senales import CacheSenales  # noqa: E402
+from analisis_tecnico.scoring_confluencias import evaluar_setup_determinista  # noqa: E402
+
+COLUMNAS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def sin_meta_cache(senal):
+    senal = dict(senal)
+    senal["meta"] = {k: v for k, v in senal["meta"].items() if k != "cache"}
+    return senal
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos", "btc_usdt_15m.csv"))
+    parser.add_argument("--velas", type=int, default=100)
+    parser.add_argument("--pasadas", type=int, default=45, help="pasadas del escáner por vela (15m / 20s = 45)")
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.csv)[COLUMNAS].astype(float)
+    paso = float(base["timestamp"].iloc[1] - base["timestamp"].iloc[0])
+    cache = CacheSenales(paso_ms=paso)
+    errores = 0
+    deriva = 0
+    t_completo = 0.0
+    t_cache = 0.0
+    pasadas = 0
+
+    for fin in range(len(base) - args.velas, len(base)):
+        vela = base.iloc[fin]
+        for k in range(args.pasadas):
+            # Vela en formación: el close avanza del open al close final
+            frac = (k + 1) / args.pasadas
+            df = base.iloc[fin - 99 : fin + 1].reset_index(drop=True)
+            df.loc[len(df) - 1, "close"] = vela["open"] + (vela["close"] - vela["open"]) * frac
+            df.loc[len(df) - 1, "volume"] = vela["volume"] * frac
+            ahora = vela["timestamp"] + paso * frac * 0.99  # dentro de la vela
+
+            t0 = time.perf_counter()
+            ref = evaluar_setup_determinista(df.copy(), simbolo="X", temporalidad="15m")
+            t_completo += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            senal = cache.evaluar(df.copy(), "X", "15m", ahora_ms=ahora)
+            t_cache += time.perf_counter() - t0
+            pasadas += 1
+
+            if k == 0:
+                # misma vela, mismo frame: el acierto con refresco debe ser exacto
+                repetida = cache.evaluar(df.copy(), "X", "15m", ahora_ms=ahora)
+                errores += senal["meta"]["cache"] != "CALCULADA" or sin_meta_cache(senal) != ref
+                errores += repetida["meta"]["cache"] != "REFRESCO" or sin_meta_cache(repetida) != ref
+            elif senal["decision"] != ref["decision"]:
+                deriva += 1
+
+    r = cache.resumen()
+    print(f"velas={args.velas}  pasadas/vela={args.pasadas}  pasadas={pasadas}")
+    print(f"motor completo : {t_completo / pasadas * 1e3:7.3f} ms/pasada")
+    print(f"con caché      : {t_cache / pasadas * 1e3:7.3f} ms/pasada  ({t_completo / t_cache:.1f}x)")
+    print(f"aciertos={r['aciertos'] - args.velas}  fallos={r['fallos']}  tasa={(r['aciertos'] - args.velas) / pasadas:.3f}")
+    print(f"decisión distinta por estructura congelada: {deriva}/{pasadas - args.velas}")
+    print("PARIDAD OK" if not errores else f"PARIDAD CON {errores} FALLOS")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+Estado de riesgo en memoria (gestor_riesgo.EstadoRiesgo + archivos_vigilados).
+
+Trabaja en un directorio temporal (no toca los JSON reales de inteligencia/) y:
+  1. mide verificar_circuit_breaker, obtener_riesgo_pct_operativo y
+     obtener_rr_mult_operativo (µs/llamada) y cuenta lecturas/escrituras de disco
+  2. comprueba que se ven los cambios externos: parametros_activos.json editado,
+     flag tmp/reset_riesgo_hoy.flag creado, riesgo_persistencia.json borrado
+  3. comprueba la escritura diferida: muchas actualizaciones -> pocos volcados, el
+     fichero acaba con lo que hay en memoria y no quedan .tmp a medias
+
+Uso:
+  python scripts/bench_estado_riesgo.py [--llamadas 2000]
+Sale con código 1 si falla 2 o 3.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+import gestor_riesgo  # noqa: E402
+import registro_parametros  # noqa: E402
+
+
+def preparar(base):
+    os.makedirs(os.path.join(base, "tmp"), exist_ok=True)
+    gestor_riesgo.RUTA_PERSISTENCIA = os.path.join(base, "riesgo_persistencia.json")
+    gestor_riesgo.RUTA_ESTADO_DIA = os.path.join(base, "estado_dia.json")
+    gestor_riesgo.RUTA_PARAMETROS_ACTIVOS = os.path.join(base, "parametros_activos.json")
+    gestor_riesgo.RUTA_FLAG_RESET_DIA = os.path.join(base, "tmp", "reset_dia.flag")
+    gestor_riesgo.RUTA_FLAG_RESET_RIESGO_HOY = os.path.join(base, "tmp", "reset_riesgo_hoy.flag")
+    # Registro propio sobre el directorio temporal y sin intervalo: las ediciones se ven en la llamada siguiente
+    parametros = registro_parametros.RegistroParametros(gestor_riesgo.RUTA_PARAMETROS_ACTIVOS, intervalo_s=0.0)
+    gestor_riesgo.ESTADO = gestor_riesgo.EstadoRiesgo(retardo_volcado_s=0.2, parametros=parametros)
+
+
+def medir(fn, n):
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llamadas", type=int, default=2000)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="estado_riesgo_")
+    preparar(base)
+    estado = gestor_riesgo.ESTADO
+    errores = []
+    n = args.llamadas
+
+    # 1. Coste por llamada (equity oscilando: el máximo del día cambia a veces)
+    equities = [1000.0 + (k % 50) * 0.5 for k in range(n + 1)]
+    it = iter(equities * 3)
+    us_cb = medir(lambda: gestor_riesgo.verificar_circuit_breaker(next(it)), n)
+    us_riesgo = medir(lambda: gestor_riesgo.obtener_riesgo_pct_operativo(995.0), n)
+    us_rr = medir(lambda: gestor_riesgo.obtener_rr_mult_operativo(995.0), n)
+    estado.volcar()
+    r = estado.resumen()
+    print(f"verificar_circuit_breaker    : {us_cb:7.1f} us")
+    print(f"obtener_riesgo_pct_operativo : {us_riesgo:7.1f} us")
+    print(f"obtener_rr_mult_operativo    : {us_rr:7.1f} us")
+    print(f"disco en {3 * n + 2} llamadas: lecturas={r['lecturas_disco']} escrituras={r['escrituras_disco']}")
+
+    # 2. Cambios externos
+    riesgo_antes = gestor_riesgo.obtener_riesgo_pct_operativo(995.0)
+    with open(gestor_riesgo.RUTA_PARAMETROS_ACTIVOS, "w", encoding="utf-8") as f:
+        json.dump({"riesgo_base_pct": 1.5}, f)
+    if gestor_riesgo.obtener_riesgo_pct_operativo(995.0) == riesgo_antes:
+        errores.append("parametros_activos.json editado por fuera no se ve")
+
+    open(gestor_riesgo.RUTA_FLAG_RESET_RIESGO_HOY, "w").close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, motivo, _ = gestor_riesgo.verificar_circuit_breaker(990.0)
+    if "RESET" not in motivo or os.path.exists(gestor_riesgo.RUTA_FLAG_RESET_RIESGO_HOY):
+        errores.append(f"flag reset_riesgo_hoy no aplicado: {motivo}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        gestor_riesgo.forzar_bloqueo("PRUEBA")
+        bloqueado, _, _ = gestor_riesgo.verificar_circuit_breaker(990.0)
+        os.remove(gestor_riesgo.RUTA_PERSISTENCIA)
+        libre, _, _ = gestor_riesgo.verificar_circuit_breaker(990.0)
+    if bloqueado or not libre:
+        errores.append("bloqueo manual / borrado externo de riesgo_persistencia.json")
+
+    # 3. Escritura diferida
+    antes = estado.almacen.escrituras_disco
+    with contextlib.redirect_stdout(io.StringIO()):
+        for k in range(200):
+            gestor_riesgo.verificar_circuit_breaker(2000.0 + k)
+    volcados_inmediatos = estado.almacen.escrituras_disco - antes
+    time.sleep(0.5)
+    volcados = estado.almacen.escrituras_disco - antes
+    with open(gestor_riesgo.RUTA_ESTADO_DIA, "r", encoding="utf-8") as f:
+        en_disco = json.load(f)
+    print(f"200 máximos nuevos: {volcados_inmediatos} volcados durante el bucle, {volcados} tras el retardo")
+    if en_disco.get("equity_max_dia") != 2199.0:
+        errores.append(f"estado_dia.json no refleja la memoria tras el retardo: {en_disco}")
+    if volcados > 10:
+        errores.append(f"la escritura diferida no agrupa ({volcados} volcados)")
+    restos = [n for n in os.listdir(base) if n.endswith(".tmp")]
+    if restos:
+        errores.append(f"temporales a medias: {restos}")
+
+    for e in errores:
+        print("FALLO:", e)
+    print("OK" if not errores else f"{len(errores)} FALLOS")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Evaluación por panel vs evaluar_setup_determinista símbolo a símbolo.
+
+Construye N "símbolos" con ventanas de un CSV de `datos/` (dos longitudes, --velas y
+--velas + 150, para que haya más de un panel) y compara:
+  - tiempo: bucle por símbolo vs evaluar_panel
+  - resultados: deben ser idénticos (indicadores sembrados desde el panel)
+
+Uso:
+  python scripts/bench_panel.py [--simbolos 200] [--velas 300]
+Sale con código 1 si algún resultado difiere.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+from analisis_tecnico import evaluacion_panel  # noqa: E402
+from analisis_tecnico.scoring_confluencias import evaluar_setup_determinista  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos", "btc_usdt_15m.csv"))
+    parser.add_argument("--simbolos", type=int, default=200)
+    parser.add_argument("--velas", type=int, default=300)
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.csv)[["timestamp", "open", "high", "low", "close", "volume"]].astype(float)
+    largo = args.velas + 150
+    paso = max(1, (len(base) - largo) // args.simbolos)
+    frames = {
+        f"S{i:03d}/USDT:USDT": base.iloc[i * paso : i * paso + (largo if i % 2 else args.velas)].reset_index(drop=True)
+        for i in range(args.simbolos)
+    }
+
+    inicio = time.perf_counter()
+    uno_a_uno = {s: evaluar_setup_determinista(df.copy(), simbolo=s, temporalidad="15m") for s, df in frames.items()}
+    t_uno = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    panel = evaluacion_panel.evaluar_panel({s: df.copy() for s, df in frames.items()}, "15m")
+    t_panel = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    simbolos, arr, _ = evaluacion_panel.construir_panel({s: df for s, df in frames.items() if len(df) == args.velas})
+    evaluacion_panel.indicadores_panel(arr)
+    t_vector = time.perf_counter() - inicio
+
+    setups = sum(1 for r in uno_a_uno.values() if r["setup"])
+    # El panel añade meta["scores_indicadores"]; el resto debe ser idéntico
+    con_scores = sum(1 for r in panel.values() if "scores_indicadores" in r.get("meta", {}))
+    for r in panel.values():
+        r.get("meta", {}).pop("scores_indicadores", None)
+    distintos = [s for s in frames if panel[s] != uno_a_uno[s]]
+    for s in distintos[:5]:
+        print(f"DIFERENCIA {s}\n  panel     ={panel[s]}\n  por símbolo={uno_a_uno[s]}")
+
+    n = len(frames)
+    print(f"símbolos={n}  velas={args.velas}/{largo}  setups={setups}  con scores_indicadores={con_scores}")
+    print(f"por símbolo          : {t_uno * 1e3:9.1f} ms  ({t_uno / n * 1e3:.2f} ms/símbolo)")
+    print(f"panel                : {t_panel * 1e3:9.1f} ms  ({t_uno / t_panel:.1f}x)")
+    print(f"bloque vectorizado   : {t_vector * 1e3:9.1f} ms  ({t_vector / len(simbolos) * 1e6:.0f} us/símbolo, {len(simbolos)} de {args.velas} velas)")
+    print("PARIDAD OK" if not distintos else f"PARIDAD CON {len(distintos)} FALLOS")
+    return 1 if distintos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Micro-benchmark de la detección de pivotes (patrones_chartistas._pivotes).
+
+Compara, para 100 / 1.000 / 100.000 velas:
+  - bucle      : la implementación anterior (np.max/np.min sobre un slice por vela)
+  - kernel     : pivotes_kernel (máximo/mínimo deslizante sobre vistas con strides)
+  - compartido : detectar_patron completo llamando _pivotes ~8 veces sobre el mismo frame
+                 (1ª llamada calcula, el resto sale del contexto del frame)
+y verifica que los índices coinciden exactamente.
+
+Uso:
+  python scripts/bench_pivotes.py [--csv datos/btc_usdt_15m.csv] [--ventana 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+from analisis_tecnico import patrones_chartistas  # noqa: E402
+
+
+def pivotes_bucle(highs, lows, ventana):
+    """Implementación anterior (referencia)."""
+    piv_hi, piv_lo = [], []
+    for i in range(ventana, len(highs) - ventana):
+        if highs[i] == np.max(highs[i - ventana : i + ventana + 1]):
+            piv_hi.append(i)
+        if lows[i] == np.min(lows[i - ventana : i + ventana + 1]):
+            piv_lo.append(i)
+    return piv_hi, piv_lo
+
+
+def cronometrar(fn, repeticiones):
+    fn()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        fn()
+    return (time.perf_counter() - inicio) / repeticiones
+
+
+def serie(df_base, n):
+    """n velas: el CSV si alcanza; si no, se encadena con desplazamiento de precio."""
+    partes = []
+    total = 0
+    desplazamiento = 0.0
+    while total < n:
+        parte = df_base.copy()
+        for col in ("open", "high", "low", "close"):
+            parte[col] = parte[col] + desplazamiento
+        desplazamiento = float(parte["close"].iloc[-1]) - float(df_base["close"].iloc[0])
+        partes.append(parte)
+        total += len(parte)
+    return pd.concat(partes, ignore_index=True).iloc[:n].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos", "btc_usdt_15m.csv"))
+    parser.add_argument("--ventana", type=int, default=3)
+    args = parser.parse_args()
+
+    base = pd.read_csv(args.csv)[["timestamp", "open", "high", "low", "close", "volume"]].astype(float)
+    v = args.ventana
+    print(f"{'velas':>8} {'bucle':>12} {'kernel':>12} {'x':>8} {'patron_antes':>14} {'patron_ahora':>14} {'x':>6}")
+    for n in (100, 1_000, 100_000):
+        df = serie(base, n)
+        highs = df["high"].values
+        lows = df["low"].values
+        reps = 200 if n <= 1_000 else 3
+
+        ref = pivotes_bucle(highs, lows, v)
+        hi, lo = patrones_chartistas.pivotes_kernel(highs, lows, v)
+        assert ref[0] == hi.tolist() and ref[1] == lo.tolist(), f"pivotes distintos con {n} velas"
+
+        t_bucle = cronometrar(lambda: pivotes_bucle(highs, lows, v), reps)
+        t_kernel = cronometrar(lambda: patrones_chartistas.pivotes_kernel(highs, lows, v), reps)
+
+        # detectar_patron: antes ~8 bucles por frame; ahora 1 kernel + 7 lecturas del contexto
+        t_antes = t_bucle * 8
+
+        def _patron_ahora():
+            frame = df.copy()  # frame nuevo: el contexto empieza vacío
+            for _ in range(8):
+                patrones_chartistas._pivotes(frame, v)
+
+        t_ahora = cronometrar(_patron_ahora, reps) - cronometrar(df.copy, reps)
+
+        print(
+            f"{n:>8} {t_bucle * 1e3:>10.3f}ms {t_kernel * 1e3:>10.3f}ms {t_bucle / t_kernel:>7.1f}x "
+            f"{t_antes * 1e3:>12.3f}ms {t_ahora * 1e3:>12.3f}ms {t_antes / t_ahora:>5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
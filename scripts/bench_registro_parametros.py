@@ -0,0 +1,147 @@
+"""
+Registro de parámetros activos (registro_parametros) sobre un directorio temporal.
+
+  1. mide obtener() contra lo que hacía cada consumidor (abrir + json.load en cada llamada)
+  2. comprueba la recarga: contenido nuevo -> versión nueva; tocar el fichero o reescribir
+     lo mismo -> misma versión; JSON a medias -> se mantiene la última válida; borrado ->
+     defaults; publicar() -> versión nueva en el momento y aviso a los suscriptores
+  3. comprueba validación y recortes (valores fuera de rango, tipos malos) e inmutabilidad
+
+Uso:
+  python scripts/bench_registro_parametros.py [--llamadas 20000]
+Sale con código 1 si falla 2 o 3.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+import registro_parametros  # noqa: E402
+
+
+def escribir(ruta, datos):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2)
+
+
+def medir(fn, n):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llamadas", type=int, default=20000)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="registro_parametros_")
+    ruta = os.path.join(base, "parametros_activos.json")
+    shutil.copy(os.path.join(RAIZ, "inteligencia", "parametros_activos.json"), ruta)
+    errores = []
+
+    def comprobar(condicion, mensaje):
+        if not condicion:
+            errores.append(mensaje)
+
+    # 1) coste por llamada
+    def leer_json():
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    registro = registro_parametros.RegistroParametros(ruta, intervalo_s=1.0)
+    sin_intervalo = registro_parametros.RegistroParametros(ruta, intervalo_s=0.0)
+    t_json = medir(leer_json, args.llamadas // 10)
+    t_reg = medir(registro.obtener, args.llamadas)
+    t_stat = medir(sin_intervalo.obtener, args.llamadas // 10)
+    print(f"json.load por llamada       : {t_json:8.2f} us")
+    print(f"obtener() (intervalo 1 s)   : {t_reg:8.2f} us")
+    print(f"obtener() (stat por llamada): {t_stat:8.2f} us")
+    print(f"recargas: {registro.recargas} / {sin_intervalo.recargas}")
+
+    # 2) recarga
+    reg = sin_intervalo
+    avisos = []
+    reg.suscribir(avisos.append)
+    v0 = reg.version
+    os.utime(ruta)
+    comprobar(reg.version == v0, "tocar el fichero genera versión nueva")
+    escribir(ruta, json.load(open(ruta, encoding="utf-8")))
+    comprobar(reg.version == v0, "reescribir el mismo contenido genera versión nueva")
+
+    datos = reg.crudo()
+    datos["riesgo_base_pct"] = 1.3
+    escribir(ruta, datos)
+    comprobar(reg.version == v0 + 1 and reg.obtener()["riesgo_base_pct"] == 1.3, "edición externa no se ve")
+
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write('{"riesgo_base_pct": 1.')
+    with contextlib.redirect_stdout(io.StringIO()):
+        inst = reg.actual()
+    comprobar(inst.version == v0 + 1 and inst.parametros["riesgo_base_pct"] == 1.3, "JSON a medias no mantiene la última versión válida")
+
+    os.remove(ruta)
+    comprobar(reg.obtener()["riesgo_base_pct"] == registro_parametros.defaults()["riesgo_base_pct"], "sin fichero no vuelve a defaults")
+
+    datos["r_reward_mult"] = 1.1
+    inst = reg.publicar(datos, origen="bench")
+    comprobar(inst.origen == "bench" and inst.parametros["r_reward_mult"] == 1.1, "publicar() no deja vigente lo publicado")
+    comprobar(json.load(open(ruta, encoding="utf-8")) == datos, "publicar() no escribe el fichero")
+    comprobar(not [n for n in os.listdir(base) if n.endswith(".tmp")], "quedan .tmp tras publicar()")
+    comprobar([a.version for a in avisos] == [v0 + 1, v0 + 2, v0 + 3], f"suscriptores: {[a.version for a in avisos]}")
+
+    # Con intervalo, la edición externa se ve como mucho un intervalo después
+    reg_lento = registro_parametros.RegistroParametros(ruta, intervalo_s=0.3)
+    v = reg_lento.version
+    datos["k_atr_mult"] = 2.0
+    escribir(ruta, datos)
+    time.sleep(0.35)
+    comprobar(reg_lento.version == v + 1, "con intervalo la edición externa no se ve tras el intervalo")
+
+    # 3) validación e inmutabilidad
+    with contextlib.redirect_stdout(io.StringIO()):
+        p, avisos_val = registro_parametros.normalizar({
+            "riesgo_base_pct": "1.5",
+            "r_reward_mult": 9,
+            "cooldown_min": 0,
+            "riesgo": {"riesgo_min_pct": 1.0, "riesgo_max_pct": 0.5, "dd_reduccion_1": 0},
+            "apalancamiento": {"leverage_max": 500, "liq_buffer": "x"},
+            "tpsl": "roto",
+        })
+    comprobar(p["riesgo_base_pct"] == 1.5, "número como texto no se convierte")
+    comprobar(p["r_reward_mult"] == 1.25, "r_reward_mult no se recorta")
+    comprobar(p["cooldown_min"] == 0, "cooldown_min=0 no se respeta")
+    comprobar(p["riesgo"]["riesgo_max_pct"] == 1.0, "riesgo_max_pct < riesgo_min_pct no se corrige")
+    comprobar(p["riesgo"]["dd_reduccion_1"] == 0.9, "dd_reduccion_1=0 no vuelve al default")
+    comprobar(p["apalancamiento"] == {"leverage_max": 125, "liq_buffer": 0.8}, f"apalancamiento: {p['apalancamiento']}")
+    comprobar(p["tpsl"]["rr_min"] == 1.2 and p["tpsl"]["rr_objetivo"] is None, "tpsl no objeto no vuelve a defaults")
+    comprobar(len(avisos_val) == 6, f"avisos: {avisos_val}")
+
+    congelado = reg.obtener()
+    for mutar in (lambda: congelado.__setitem__("x", 1), lambda: congelado["riesgo"].update(x=1)):
+        try:
+            mutar()
+            errores.append("la instantánea se puede modificar")
+        except TypeError:
+            pass
+
+    shutil.rmtree(base, ignore_errors=True)
+    for e in errores:
+        print("FALLO:", e)
+    print("OK" if not errores else f"{len(errores)} FALLOS")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
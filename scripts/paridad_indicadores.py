@@ -0,0 +1,153 @@
+"""
+Paridad del motor incremental de indicadores contra la versión batch (pandas).
+
+Recorre un CSV de velas de `datos/` y comprueba, vela a vela:
+  1. cerrar_vela() == indicadores.* sobre la misma historia (todas las series)
+  2. vela_en_vivo() == indicadores.* con la vela en formación añadida, sin tocar el estado
+  3. estado() -> JSON -> desde_estado() continúa exactamente igual (arranque en caliente)
+  4. RegistroMotores.sincronizar() sobre ventanas de 100 velas == batch en RSI/ATR/ADX
+
+Uso:
+  python scripts/paridad_indicadores.py [--csv datos/btc_usdt_15m.csv] [--velas 3000]
+Sale con código 1 si alguna diferencia supera la tolerancia.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+from analisis_tecnico import indicadores  # noqa: E402
+from analisis_tecnico.indicadores_incrementales import MotorIndicadores, RegistroMotores  # noqa: E402
+
+COLUMNAS = ["timestamp", "open", "high", "low", "close", "volume"]
+TOLERANCIA_REL = 1e-9
+
+
+def series_batch(df):
+    close = df["close"].astype(float)
+    macd_line, macd_sig, macd_hist = indicadores.macd(close)
+    vol = df["volume"].astype(float)
+    media_vol = vol.rolling(window=20, min_periods=10).mean()
+    ratio = (vol / media_vol).where(media_vol > 0, 0.0).fillna(0.0)
+    ratio.iloc[:2] = 0.0
+    return {
+        "ema_20": indicadores.ema(close, 20),
+        "ema_50": indicadores.ema(close, 50),
+        "rsi": indicadores.rsi(close, 14),
+        "macd": macd_line,
+        "macd_signal": macd_sig,
+        "macd_hist": macd_hist,
+        "atr": indicadores.atr(df, 14),
+        "adx": indicadores.adx(df, 14),
+        "vwap": indicadores.vwap(df),
+        "obv": indicadores.obv(df),
+        "volumen_ratio": ratio,
+    }
+
+
+def diferencia(a, b):
+    a, b = float(a), float(b)
+    if math.isnan(a) and math.isnan(b):
+        return 0.0
+    return abs(a - b) / max(1.0, abs(a), abs(b))
+
+
+class Informe:
+    def __init__(self):
+        self.max_dif = {}
+        self.exactos = {}
+        self.total = {}
+
+    def anotar(self, prueba, nombre, a, b):
+        clave = (prueba, nombre)
+        d = diferencia(a, b)
+        self.max_dif[clave] = max(self.max_dif.get(clave, 0.0), d)
+        self.exactos[clave] = self.exactos.get(clave, 0) + (d == 0.0)
+        self.total[clave] = self.total.get(clave, 0) + 1
+
+    def imprimir(self):
+        fallos = 0
+        for clave in sorted(self.max_dif):
+            d = self.max_dif[clave]
+            ok = d <= TOLERANCIA_REL
+            fallos += not ok
+            print(
+                f"{'OK ' if ok else 'ERR'} {clave[0]:<12} {clave[1]:<14} max_dif_rel={d:.2e} "
+                f"exactos={self.exactos[clave]}/{self.total[clave]}"
+            )
+        return fallos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos", "btc_usdt_15m.csv"))
+    parser.add_argument("--velas", type=int, default=3000)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv)[COLUMNAS].astype(float).tail(args.velas).reset_index(drop=True)
+    filas = df.values
+    informe = Informe()
+
+    # 1 + 2: cierre y vela en vivo contra batch
+    batch = series_batch(df)
+    motor = MotorIndicadores()
+    t_cierre = 0.0
+    t_vivo = 0.0
+    for i, fila in enumerate(filas):
+        if i > 0 and i % 7 == 0:
+            # vela en formación: la misma vela con precios intermedios y luego los finales
+            parcial = fila.copy()
+            parcial[4] = (fila[1] + fila[4]) / 2.0
+            parcial[5] = fila[5] / 2.0
+            t0 = time.perf_counter()
+            motor.vela_en_vivo(parcial)
+            vivo = motor.vela_en_vivo(fila)
+            t_vivo += time.perf_counter() - t0
+            for nombre, serie in batch.items():
+                informe.anotar("en_vivo", nombre, vivo[nombre], serie.iloc[i])
+        t0 = time.perf_counter()
+        valores = motor.cerrar_vela(fila)
+        t_cierre += time.perf_counter() - t0
+        for nombre, serie in batch.items():
+            informe.anotar("cierre", nombre, valores[nombre], serie.iloc[i])
+
+    # 3: arranque en caliente a mitad de la serie
+    mitad = len(filas) // 2
+    motor_a = MotorIndicadores()
+    motor_a.cargar_historia(filas[:mitad])
+    motor_b = MotorIndicadores.desde_estado(json.loads(json.dumps(motor_a.estado())))
+    for fila in filas[mitad:]:
+        va = motor_a.cerrar_vela(fila)
+        vb = motor_b.cerrar_vela(fila)
+        for nombre in batch:
+            informe.anotar("estado_json", nombre, va[nombre], vb[nombre])
+
+    # 4: registro sobre ventanas deslizantes de 100 velas (como el escáner)
+    registro = RegistroMotores()
+    for fin in range(100, len(filas), 3):
+        ventana = df.iloc[fin - 100 : fin].reset_index(drop=True)
+        vivos = registro.sincronizar("TEST", ventana)
+        for nombre, fn in (
+            ("rsi", lambda d: indicadores.rsi(d["close"], 14)),
+            ("atr", lambda d: indicadores.atr(d, 14)),
+            ("adx", lambda d: indicadores.adx(d, 14)),
+        ):
+            informe.anotar("registro", nombre, vivos[nombre], fn(ventana).iloc[-1])
+
+    fallos = informe.imprimir()
+    n = len(filas)
+    print(f"\nvelas={n}  cerrar_vela={t_cierre / n * 1e6:.1f} us/vela  vela_en_vivo={t_vivo / max(1, n // 7) / 2 * 1e6:.1f} us/tick")
+    print("PARIDAD OK" if not fallos else f"PARIDAD CON {fallos} FALLOS")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Paridad del núcleo de patrones (analisis_tecnico.patrones_kernel) contra los detect_*.
+
+Recorre ventanas deslizantes de velas grabadas (`datos/`) y, para cada una,
+compara la lista completa de candidatos de los 8 detectores (no solo el ganador)
+y el resultado de detectar_patron:
+  - referencia : patrones_chartistas._candidatos_detectores (df.iloc / pandas)
+  - motor      : _candidatos_kernel (Numba si está instalado; si no, NumPy)
+  - python     : núcleo sin compilar (solo si hay Numba, para comparar ambos)
+con el ATR real de la ventana, con ATR=0 (tolerancias por % de precio) y con el
+rango medio de las últimas 10 velas (borde exacto de la consolidación de la bandera).
+También la serie invertida (precio -> 2*media - precio), para que salgan los
+patrones de los dos lados, y copias con el último close fuera del rango de la
+consolidación (como un ticker que adelanta a la vela): con OHLC coherente
+low <= close <= high y la bandera nunca saltaría.
+
+Uso:
+  python scripts/paridad_patrones.py [--ventanas 100,500] [--paso 20]
+Sale con código 1 si algún candidato difiere.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+from analisis_tecnico import indicadores, patrones_chartistas, patrones_kernel  # noqa: E402
+
+COLUMNAS = ["timestamp", "open", "high", "low", "close", "volume"]
+CSVS = ("btc_usdt_15m.csv", "conjunto_datos_maestro_v2.csv")
+
+
+def invertir(df):
+    """Espejo de precios: techos <-> suelos, mismas distancias."""
+    eje = float(df["close"].mean()) * 2.0
+    out = df.copy()
+    out["open"] = eje - df["open"]
+    out["close"] = eje - df["close"]
+    out["high"] = eje - df["low"]
+    out["low"] = eje - df["high"]
+    return out
+
+
+def forzar_ruptura(df, arriba=True):
+    out = df.copy()
+    if arriba:
+        out.loc[len(out) - 1, "close"] = float(df["high"].iloc[-10:].max()) * 1.001
+    else:
+        out.loc[len(out) - 1, "close"] = float(df["low"].iloc[-10:].min()) * 0.999
+    return out
+
+
+def candidatos_python(df, atr):
+    """_candidatos_kernel con las variantes sin compilar del núcleo."""
+    high = df["high"].to_numpy(dtype=float)
+    low = df["low"].to_numpy(dtype=float)
+    if len(df) < 16:
+        piv_hi = piv_lo = np.empty(0, dtype=np.int64)
+    else:
+        piv_hi, piv_lo = patrones_kernel.pivotes_py(high, low, 3)
+    matriz = patrones_kernel.evaluar_detectores_py(high, low, float(df["close"].iloc[-1]), float(atr), piv_hi, piv_lo)
+    return [
+        patrones_chartistas._patron_desde_fila(k, matriz[k])
+        for k in range(patrones_kernel.N_DETECTORES)
+        if matriz[k, patrones_kernel.ACTIVO]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ventanas", default="100,500")
+    parser.add_argument("--paso", type=int, default=20)
+    args = parser.parse_args()
+
+    ventanas = [int(v) for v in args.ventanas.split(",") if v.strip()]
+    numba = patrones_kernel.NUMBA_DISPONIBLE
+    print(f"numba={'sí' if numba else 'no (NumPy)'}")
+
+    fallos = 0
+    casos = 0
+    disparos = Counter()
+    ganadores = Counter()
+    t_ref = 0.0
+    t_motor = 0.0
+
+    for nombre_csv in CSVS:
+        ruta = os.path.join(RAIZ, "datos", nombre_csv)
+        if not os.path.exists(ruta):
+            continue
+        base = pd.read_csv(ruta)[COLUMNAS].astype(float)
+        for ventana in ventanas:
+            for fin in range(ventana, len(base) + 1, args.paso * (1 if ventana <= 100 else 5)):
+                original = base.iloc[fin - ventana : fin].reset_index(drop=True)
+                variantes = (original, invertir(original), forzar_ruptura(original), forzar_ruptura(original, False))
+                for df in variantes:
+                    atr_real = float(indicadores.atr(df, 14).iloc[-1])
+                    atr_bandera = float((df["high"].iloc[-10:] - df["low"].iloc[-10:]).mean())
+                    for atr in (atr_real, 0.0, atr_bandera):
+                        casos += 1
+                        t0 = time.perf_counter()
+                        ref = patrones_chartistas._candidatos_detectores(df.copy(), atr)
+                        t1 = time.perf_counter()
+                        motor = patrones_chartistas._candidatos_kernel(df.copy(), atr)
+                        t2 = time.perf_counter()
+                        t_ref += t1 - t0
+                        t_motor += t2 - t1
+                        distinto = motor != ref
+                        if numba:
+                            distinto = distinto or candidatos_python(df, atr) != ref
+                        distinto = distinto or (
+                            patrones_chartistas.detectar_patron(df.copy(), atr)
+                            != patrones_chartistas.detectar_patron(df.copy(), atr, rapido=False)
+                        )
+                        if distinto:
+                            fallos += 1
+                            if fallos <= 5:
+                                print(f"DIFERENCIA {nombre_csv} fin={fin} ventana={ventana} atr={atr}")
+                                print("  ref  :", ref)
+                                print("  motor:", motor)
+                        for p in ref:
+                            disparos[p.nombre] += 1
+                        if ref:
+                            ganadores[patrones_chartistas.detectar_patron(df.copy(), atr, rapido=False).nombre] += 1
+
+    print(f"\ncasos={casos}  con algún patrón={sum(ganadores.values())}")
+    for nombre, n in sorted(disparos.items()):
+        print(f"  {nombre:<22} candidato={n:>7}  ganador={ganadores[nombre]:>6}")
+    print(f"\ncandidatos por frame: referencia {t_ref / casos * 1e6:8.1f} us  motor {t_motor / casos * 1e6:8.1f} us  ({t_ref / t_motor:.1f}x)")
+    print("PARIDAD OK" if not fallos else f"PARIDAD CON {fallos} FALLOS")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Covarianza online de riesgo_cartera contra el recálculo completo, sobre un universo sintético.
+
+Los retornos salen de un modelo de factores (mercado + sector + propio) con huecos en las
+velas. El escáner se simula con pasadas en orden aleatorio: en cada pasada entra solo una
+parte de los símbolos (agenda) y cada frame trae las últimas 100 velas más la vela en
+formación. Se comprueba:
+  1. S, W y N de CovarianzaOnline == EWMA por pares recalculada entera, en orden de
+     timestamp, con las mismas velas que vio el escáner
+  2. el resultado no depende del orden de las pasadas (otra semilla de orden, mismas celdas)
+  3. evaluar(): VaR con la matriz recalculada == el de la online; el long correlacionado
+     suma más VaR que el short (cobertura); limitar_riesgo deja la cartera justo en el presupuesto
+  4. coste: actualización online de una vela nueva de todo el universo contra recalcular la
+     EWMA de todos los pares sobre la ventana del frame (lo que costaría sin estado)
+
+Uso:
+  python scripts/paridad_riesgo_cartera.py [--simbolos 150] [--velas 400] [--semilla 3]
+Sale con código 1 si falla 1, 2 o 3.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+import riesgo_cartera  # noqa: E402
+
+PASO_MS = 900_000
+FRAME = 100
+
+
+def universo(n, velas, rnd):
+    """Precios (velas+1, n) de un modelo de factores y máscara de velas existentes."""
+    np_rnd = np.random.default_rng(rnd.randrange(1 << 30))
+    sectores = np_rnd.integers(0, 6, n)
+    beta = np_rnd.uniform(0.5, 1.5, n)
+    mercado = np_rnd.normal(0, 0.004, velas)
+    sector = np_rnd.normal(0, 0.003, (velas, 6))
+    propio = np_rnd.normal(0, 1, (velas, n)) * np_rnd.uniform(0.002, 0.008, n)
+    r = mercado[:, None] * beta + sector[:, sectores] + propio
+    precios = np.vstack([np.full(n, 100.0), 100.0 * np.exp(np.cumsum(r, axis=0))])
+    # Algunos símbolos con velas que faltan (mantenimiento, listados nuevos)
+    existe = np.ones_like(precios, dtype=bool)
+    for i in np_rnd.choice(n, max(1, n // 10), replace=False):
+        a = int(np_rnd.integers(0, velas - 20))
+        existe[a:a + int(np_rnd.integers(1, 15)), i] = False
+    return precios, existe
+
+
+def frame(precios, existe, i, fin):
+    """Frame del escáner del símbolo i con la vela `fin` en formación."""
+    filas = [t for t in range(max(0, fin - FRAME), fin + 1) if existe[t, i]]
+    if len(filas) < 2 or filas[-1] != fin:
+        return None
+    return pd.DataFrame({
+        "timestamp": [t * PASO_MS for t in filas],
+        "close": precios[filas, i],
+    })
+
+
+def escanear(precios, existe, simbolos, orden_seed, lam, vistos=None):
+    """Pasadas del escáner: una por vela, parte de los símbolos y en orden aleatorio."""
+    rnd = random.Random(orden_seed)
+    motor = riesgo_cartera.RiesgoCartera(paso_ms=PASO_MS, lam=lam, retener_velas=512)
+    n_velas = precios.shape[0]
+    tiempos = []
+    velas_nuevas = 0
+    for fin in range(FRAME // 2, n_velas):
+        orden = list(range(len(simbolos)))
+        rnd.shuffle(orden)
+        # Agenda: todos al cierre cada 4 velas, si no ~40 %
+        elegidos = orden if fin % 4 == 0 or fin == n_velas - 1 else orden[: int(len(orden) * 0.4)]
+        for i in elegidos:
+            df = frame(precios, existe, i, fin)
+            if df is None:
+                continue
+            if vistos is not None:
+                for t in df["timestamp"].to_numpy()[:-1] // PASO_MS:
+                    vistos[int(t), i] = True
+            t0 = time.perf_counter()
+            nuevas = motor.sincronizar(simbolos[i], df)
+            tiempos.append((time.perf_counter() - t0, nuevas))
+            velas_nuevas += nuevas
+    return motor, tiempos, velas_nuevas
+
+
+def recalculo(precios, vistos, lam):
+    """EWMA por pares recalculada desde cero, en orden de timestamp."""
+    n_velas, n = precios.shape
+    r = np.zeros((n_velas, n))
+    r[1:] = np.log(precios[1:] / precios[:-1])
+    valido = np.zeros_like(vistos)
+    valido[1:] = vistos[1:] & vistos[:-1]
+    S = np.zeros((n, n))
+    W = np.zeros((n, n))
+    N = np.zeros((n, n), dtype=np.int64)
+    for t in range(1, n_velas):
+        m = valido[t]
+        if not m.any():
+            continue
+        pares = np.outer(m, m)
+        rt = np.where(m, r[t], 0.0)
+        S = np.where(pares, lam * S + (1 - lam) * np.outer(rt, rt), S)
+        W = np.where(pares, lam * W + (1 - lam), W)
+        N += pares
+    return S, W, N
+
+
+def celdas(motor, simbolos):
+    cov = motor.cov
+    idx = np.array([cov.indice[s] for s in simbolos])
+    sel = np.ix_(idx, idx)
+    return cov.S[sel], cov.W[sel], cov.N[sel]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--simbolos", type=int, default=150)
+    parser.add_argument("--velas", type=int, default=400)
+    parser.add_argument("--semilla", type=int, default=3)
+    parser.add_argument("--lam", type=float, default=0.97)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semilla)
+    precios, existe = universo(args.simbolos, args.velas, rnd)
+    simbolos = [f"S{i}/USDT:USDT" for i in range(args.simbolos)]
+    errores = []
+
+    def comprobar(condicion, mensaje):
+        if not condicion:
+            errores.append(mensaje)
+
+    # 1) online == recálculo completo
+    vistos = np.zeros_like(existe)
+    t0 = time.perf_counter()
+    motor, tiempos, velas_nuevas = escanear(precios, existe, simbolos, args.semilla, args.lam, vistos)
+    t_total = time.perf_counter() - t0
+    S, W, N = celdas(motor, simbolos)
+    t0 = time.perf_counter()
+    S_ref, W_ref, N_ref = recalculo(precios, vistos, args.lam)
+    t_ref = time.perf_counter() - t0
+    comprobar(np.array_equal(N, N_ref), f"N difiere en {(N != N_ref).sum()} celdas")
+    err_s = float(np.max(np.abs(S - S_ref)) / max(1e-300, np.max(np.abs(S_ref))))
+    err_w = float(np.max(np.abs(W - W_ref)))
+    comprobar(err_s < 1e-12 and err_w < 1e-12, f"S/W difieren (rel {err_s:.2e}, abs {err_w:.2e})")
+    print(f"celdas={N.size}  pares con historia={int((N_ref > 0).sum())}  error S rel={err_s:.1e}  W abs={err_w:.1e}  "
+          f"(recálculo completo {t_ref:.2f} s)")
+
+    # 2) independiente del orden de las pasadas (salvo redondeo: (a*r_i)*r_j o (a*r_j)*r_i según quién llegue segundo)
+    otro, _, _ = escanear(precios, existe, simbolos, args.semilla + 1000, args.lam)
+    S2, W2, N2 = celdas(otro, simbolos)
+    comprobar(np.array_equal(N2, N) and np.max(np.abs(S2 - S)) < 1e-12 * np.max(np.abs(S)),
+              "otro orden de escaneo da otra matriz")
+
+    # 3) evaluar / limitar_riesgo
+    libro = {simbolos[0]: 400.0, simbolos[1]: -250.0, simbolos[2]: 300.0}
+    cand = simbolos[3]
+    ev = motor.evaluar(cand, 500.0, libro)
+    syms = list(libro) + [cand]
+    idx = [simbolos.index(s) for s in syms]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov_ref = S_ref[np.ix_(idx, idx)] / W_ref[np.ix_(idx, idx)]
+    w = np.array([libro.get(s, 0.0) for s in syms])
+    w_tot = w.copy()
+    w_tot[-1] += 500.0
+    k = ev["_k"]
+    var_ref = k * math.sqrt(w @ cov_ref @ w)
+    var_tot_ref = k * math.sqrt(w_tot @ cov_ref @ w_tot)
+    # Con todos los pares por encima de min_obs y matriz PSD ambas deben coincidir
+    comprobar(abs(ev["var_cartera"] - var_ref) < 1e-9 * max(1.0, var_ref), f"VaR cartera {ev['var_cartera']} != {var_ref}")
+    comprobar(abs(ev["var_con_candidato"] - var_tot_ref) < 1e-9 * max(1.0, var_tot_ref), "VaR con candidato difiere del recálculo")
+    comprobar(abs(ev["var_componente"] + sum(
+        w_tot[j] * k * (cov_ref @ w_tot)[j] / (var_tot_ref / k) for j in range(len(syms) - 1)
+    ) - var_tot_ref) < 1e-6 * var_tot_ref, "Euler: las componentes no suman el VaR")
+
+    largo = motor.evaluar(cand, 500.0, {simbolos[0]: 400.0})
+    corto = motor.evaluar(cand, -500.0, {simbolos[0]: 400.0})
+    rho = largo["correlaciones"][simbolos[0]]
+    comprobar((largo["var_incremental"] > corto["var_incremental"]) == (rho > 0), "long/short correlacionado: VaR incremental al revés")
+    print(f"VaR cartera={ev['var_cartera']:.3f}  con candidato={ev['var_con_candidato']:.3f}  "
+          f"incremental={ev['var_incremental']:.3f}  marginal={ev['var_marginal']:.5f}  "
+          f"exposición ajustada={ev['exposicion_ajustada']:.1f}  rho({simbolos[0]})={rho:+.3f}")
+
+    equity = 1000.0
+    var_max_pct = 100.0 * (ev["var_cartera"] + 0.4 * ev["var_incremental"]) / equity
+    nuevo, motivo = riesgo_cartera.limitar_riesgo(ev, equity, 1.0, var_max_pct, riesgo_min_pct=0.0)
+    ev_f = motor.evaluar(cand, 500.0 * nuevo, libro)
+    comprobar(motivo == "VAR_CARTERA_REDUCIDO" and 0 < nuevo < 1.0, f"limitar_riesgo: {nuevo} {motivo}")
+    comprobar(abs(ev_f["var_con_candidato"] - equity * var_max_pct / 100.0) < 2e-3 * equity * var_max_pct / 100.0,
+              f"con riesgo recortado el VaR ({ev_f['var_con_candidato']:.4f}) no queda en el presupuesto")
+    comprobar(riesgo_cartera.limitar_riesgo(ev, equity, 1.0, 100.0 * ev["var_cartera"] / equity * 0.99)[1] == "VAR_CARTERA",
+              "sin hueco de VaR no bloquea")
+    comprobar(riesgo_cartera.limitar_riesgo(ev, equity, 1.0, 100.0)[1] is None, "con presupuesto holgado recorta")
+    sin = motor.evaluar("NUEVO/USDT:USDT", 100.0, libro)
+    comprobar(sin["disponible"] and sin["sin_datos"] == ["NUEVO/USDT:USDT"], "símbolo sin historia no usa la varianza mediana")
+
+    # 4) coste
+    una = [t for t, nv in tiempos if nv == 1]
+    sin_velas = [t for t, nv in tiempos if not nv]
+    print(f"\nsincronizar (columnas del frame incluidas): {np.mean(una) * 1e6:7.1f} us con 1 vela nueva, "
+          f"{np.mean(sin_velas) * 1e6:7.1f} us sin vela nueva  ({len(tiempos)} frames, {velas_nuevas} retornos, {t_total:.1f} s)")
+    t_sig = int(motor.cov._ts_max) + PASO_MS
+    r_sig = np.random.default_rng(0).normal(0, 0.005, len(simbolos)).tolist()
+    t0 = time.perf_counter()
+    for s, r in zip(simbolos, r_sig):
+        motor.cov.agregar(s, t_sig, r)
+    t_online = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    recalculo(precios[-FRAME:], vistos[-FRAME:], args.lam)
+    t_full = time.perf_counter() - t0
+    print(f"vela nueva de los {len(simbolos)} símbolos: online {t_online * 1e3:7.2f} ms "
+          f"({t_online / len(simbolos) * 1e6:.1f} us por símbolo)  recálculo de la ventana {t_full * 1e3:7.2f} ms "
+          f"({t_full / t_online:.0f}x)")
+    ev_t = time.perf_counter()
+    for _ in range(200):
+        motor.evaluar(cand, 500.0, libro)
+    print(f"evaluar (3 posiciones + candidato): {(time.perf_counter() - ev_t) / 200 * 1e6:.1f} us")
+
+    for e in errores:
+        print("FALLO:", e)
+    print("PARIDAD OK" if not errores else f"PARIDAD CON {len(errores)} FALLOS")
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
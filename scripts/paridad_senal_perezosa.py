@@ -0,0 +1,124 @@
+"""
+Modo perezoso del motor determinista (scoring_confluencias, perezosa=True).
+
+Recorre ventanas de velas grabadas (`datos/`) y, para cada una, comprueba:
+  1. las claves de la señal perezosa valen lo mismo que en la señal completa
+  2. materializar_senal(perezosa) == completa (mismo JSON, mismo orden de claves)
+  3. lo mismo a través de CacheSenales (fallo, refresco y acierto sin refresco)
+y mide componer_senal completo vs perezoso con la estructura ya calculada (el coste
+que paga cada pasada con la caché de señales) y el coste de materializar.
+
+Uso:
+  python scripts/paridad_senal_perezosa.py [--ventana 100] [--paso 50]
+Sale con código 1 si algo difiere.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+from analisis_tecnico.cache_senales import CacheSenales  # noqa: E402
+from analisis_tecnico.scoring_confluencias import (  # noqa: E402
+    CLAVE_DIFERIDA,
+    analizar_estructura,
+    componer_senal,
+    es_perezosa,
+    evaluar_setup_determinista,
+    materializar_senal,
+)
+
+COLUMNAS = ["timestamp", "open", "high", "low", "close", "volume"]
+CSVS = ("btc_usdt_15m.csv", "conjunto_datos_maestro_v2.csv")
+
+
+def iguales(a, b):
+    return json.dumps(a, default=str) == json.dumps(b, default=str)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ventana", type=int, default=100)
+    parser.add_argument("--paso", type=int, default=50)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    fallos = 0
+    casos = 0
+    decisiones = Counter()
+    t_completa = t_perezosa = t_materializar = 0.0
+    n_tiempos = 0
+    n_materializadas = 0
+
+    for nombre_csv in CSVS:
+        ruta = os.path.join(RAIZ, "datos", nombre_csv)
+        if not os.path.exists(ruta):
+            continue
+        base = pd.read_csv(ruta)[COLUMNAS].astype(float)
+        paso_ms = float(base["timestamp"].iloc[1] - base["timestamp"].iloc[0])
+        for fin in range(args.ventana, len(base) + 1, args.paso):
+            df = base.iloc[fin - args.ventana : fin].reset_index(drop=True)
+            casos += 1
+            completa = evaluar_setup_determinista(df.copy(), simbolo="X", temporalidad="15m")
+            perezosa = evaluar_setup_determinista(df.copy(), simbolo="X", temporalidad="15m", perezosa=True)
+            decisiones[completa["decision"]] += 1
+
+            error = not es_perezosa(perezosa)
+            error |= any(not iguales(v, completa.get(k)) for k, v in perezosa.items() if k != CLAVE_DIFERIDA)
+            error |= not iguales(materializar_senal(perezosa), completa)
+            error |= materializar_senal(completa) is not completa
+
+            # A través de la caché: fallo, refresco y acierto sin refresco (copia de la perezosa)
+            ahora = float(df["timestamp"].iloc[-1]) + paso_ms * 0.5
+            for refrescar in (True, False):
+                cache = CacheSenales(paso_ms=paso_ms, refrescar_precio=refrescar)
+                for _ in range(2):
+                    s = cache.evaluar(df.copy(), "X", "15m", ahora_ms=ahora, perezosa=True)
+                    s = materializar_senal(s)
+                    s["meta"].pop("cache", None)
+                    error |= not iguales(s, completa)
+                s = cache.evaluar(df.copy(), "X", "15m", ahora_ms=ahora)
+                s["meta"].pop("cache", None)
+                error |= not iguales(s, completa)
+
+            if error:
+                fallos += 1
+                if fallos <= 5:
+                    print(f"DIFERENCIA {nombre_csv} fin={fin}")
+
+            # Coste por pasada con la estructura ya calculada (acierto de caché)
+            estructura = analizar_estructura(df.copy(), simbolo="X")
+            precio = float(df["close"].iloc[-1])
+            t0 = time.perf_counter()
+            for _ in range(args.repeticiones):
+                componer_senal(estructura, precio, simbolo="X", temporalidad="15m")
+            t1 = time.perf_counter()
+            for _ in range(args.repeticiones):
+                lazy = componer_senal(estructura, precio, simbolo="X", temporalidad="15m", perezosa=True)
+            t2 = time.perf_counter()
+            for _ in range(args.repeticiones):
+                materializar_senal(lazy)
+            t3 = time.perf_counter()
+            t_completa += t1 - t0
+            t_perezosa += t2 - t1
+            t_materializar += t3 - t2
+            n_tiempos += args.repeticiones
+            n_materializadas += lazy["decision"] != "ESPERAR"
+
+    print(f"casos={casos}  decisiones={dict(decisiones)}")
+    print(f"componer_senal completa : {t_completa / n_tiempos * 1e6:7.1f} us")
+    print(f"componer_senal perezosa : {t_perezosa / n_tiempos * 1e6:7.1f} us  ({t_completa / t_perezosa:.1f}x)")
+    print(f"materializar_senal      : {t_materializar / n_tiempos * 1e6:7.1f} us (solo candidatos: {n_materializadas}/{casos})")
+    print("PARIDAD OK" if not fallos else f"PARIDAD CON {fallos} FALLOS")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
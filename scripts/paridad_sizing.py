@@ -0,0 +1,182 @@
+"""
+Paridad del sizing vectorizado (gestor_riesgo.dimensionar_candidatos) contra el escalar
+(_calcular_tamano_posicion_ccxt) sobre mercados sintéticos.
+
+Los mercados cubren límites ausentes o a 0, contratos distintos de 1 y pasos de cantidad
+desde 0.0001 hasta 10 (también sin paso). Los candidatos varían entrada, distancia al SL
+(los dos lados), saldo (cuenta pequeña, viable, grande), riesgo (% y fracción) y
+apalancamiento sugerido.
+
+El exchange es un doble mínimo: market() y amount_to_precision(). Este último usa el
+decimal_to_precision de CCXT si está instalado y, si no, su misma aritmética decimal
+(TRUNCATE, TICK_SIZE; "0" -> InvalidOrder). Cada candidato se dimensiona con el
+escalar dos veces:
+  - tabla: constantes de cache_mercados.TablaMercados
+  - dict : constantes del dict de CCXT (sin tabla compartida)
+Se comparan cantidad, apalancamiento y motivo.
+
+Uso:
+  python scripts/paridad_sizing.py [--mercados 300] [--casos 20] [--semilla 7]
+Sale con código 1 si algún candidato difiere.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from collections import Counter
+from decimal import Decimal
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+import cache_mercados  # noqa: E402
+import gestor_riesgo  # noqa: E402
+
+try:
+    from ccxt.base.decimal_to_precision import TICK_SIZE, TRUNCATE, decimal_to_precision
+except Exception:
+    decimal_to_precision = None
+
+
+def _truncar_como_ccxt(cantidad, paso):
+    if decimal_to_precision is not None:
+        return decimal_to_precision(cantidad, TRUNCATE, paso, TICK_SIZE)
+    dec = Decimal(str(cantidad))
+    paso_dec = Decimal(str(paso))
+    resto = abs(dec) % paso_dec
+    if resto != 0:
+        dec = dec - resto if dec >= 0 else dec + resto
+    decimales = max(0, -paso_dec.normalize().as_tuple().exponent)
+    return "{:f}".format(dec.quantize(Decimal(1).scaleb(-decimales))) if decimales else "{:f}".format(dec.to_integral_value())
+
+
+class ExchangeDoble:
+    precisionMode = cache_mercados.TICK_SIZE
+
+    def __init__(self, mercados):
+        self.markets = mercados
+
+    def market(self, simbolo):
+        return self.markets[simbolo]
+
+    def amount_to_precision(self, simbolo, cantidad):
+        paso = self.markets[simbolo]["precision"]["amount"]
+        if paso is None:
+            raise ValueError("sin precisión de cantidad")
+        resultado = _truncar_como_ccxt(cantidad, paso)
+        if float(resultado) == 0:
+            raise ValueError("InvalidOrder: cantidad por debajo de la precisión")
+        return resultado
+
+
+def mercados_sinteticos(n, rnd):
+    mercados = {}
+    for i in range(n):
+        simbolo = f"S{i}/USDT:USDT"
+        lmax = rnd.choice([None, 0, 5, 10, 20, 50, 75, 125])
+        mercados[simbolo] = {
+            "symbol": simbolo,
+            "id": f"S{i}USDT",
+            "swap": True,
+            "quote": "USDT",
+            "active": True,
+            "contractSize": rnd.choice([None, 1, 1, 1, 0.001, 0.1, 10, 0]),
+            "precision": {"amount": rnd.choice([None, 0.0001, 0.001, 0.01, 0.1, 0.5, 1, 10]), "price": 0.0001},
+            "limits": {
+                "cost": {"min": rnd.choice([None, 0, 1, 5, 5, 10, 100])},
+                "amount": {"min": rnd.choice([None, 0, 0.001, 0.01, 1, 10])},
+                "leverage": {"min": rnd.choice([None, 1, 1, 2]), "max": lmax},
+            },
+        }
+    return mercados
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mercados", type=int, default=300)
+    parser.add_argument("--casos", type=int, default=20)
+    parser.add_argument("--semilla", type=int, default=7)
+    args = parser.parse_args()
+
+    rnd = random.Random(args.semilla)
+    mercados = mercados_sinteticos(args.mercados, rnd)
+    exchange = ExchangeDoble(mercados)
+    tabla = cache_mercados.TablaMercados(mercados, modo_precision=exchange.precisionMode)
+    compartida = cache_mercados.cache_compartida()
+    print(f"decimal_to_precision: {'ccxt' if decimal_to_precision else 'emulado'}")
+
+    motivos = []
+    gestor_riesgo._log_no_entra = lambda payload: motivos.append(payload.get("motivo"))
+
+    casos = []
+    for simbolo in mercados:
+        for _ in range(args.casos):
+            pe = 10 ** rnd.uniform(-4, 5)
+            dist = rnd.choice([0.0, 0.0005, 0.002, 0.01, 0.03, 0.08, 0.25]) * rnd.uniform(0.5, 1.5)
+            sl = pe * (1 - dist) if rnd.random() < 0.5 else pe * (1 + dist)
+            casos.append((
+                simbolo,
+                pe,
+                rnd.choice([sl, sl, sl, None]) if rnd.random() < 0.05 else sl,
+                rnd.choice([0, 3, 20, 120, 249, 1000, 25000]) * rnd.uniform(0.9, 1.1),
+                rnd.choice([1.0, 1.0, 0.5, 2.0, 0.01, 0.3, 0.1, 5.0, -1]),
+                rnd.choice([1, 3, 5, 10, 20, 50, 0, "x"]),
+            ))
+
+    def escalar(con_tabla):
+        compartida._tabla = tabla if con_tabla else None
+        out = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for simbolo, pe, sl, saldo, riesgo, lev in casos:
+                motivos.clear()
+                cantidad, apal = gestor_riesgo._calcular_tamano_posicion_ccxt(
+                    exchange, simbolo, pe, sl, saldo, riesgo_pct=riesgo, apalancamiento=lev
+                )
+                out.append((float(cantidad), int(apal), motivos[-1] if motivos else "OK"))
+        return out
+
+    t0 = time.perf_counter()
+    ref_tabla = escalar(True)
+    t1 = time.perf_counter()
+    ref_dict = escalar(False)
+    t2 = time.perf_counter()
+    lote = gestor_riesgo.dimensionar_candidatos(
+        [c[0] for c in casos],
+        [c[1] for c in casos],
+        [c[2] for c in casos],
+        [c[3] for c in casos],
+        riesgo_pct=[c[4] for c in casos],
+        apalancamiento=[c[5] for c in casos],
+        tabla=tabla,
+    )
+    t3 = time.perf_counter()
+
+    fallos = 0
+    conteo = Counter()
+    for k, caso in enumerate(casos):
+        vec = (float(lote["cantidad"][k]), int(lote["apalancamiento"][k]), lote["motivo"][k])
+        conteo[vec[2]] += 1
+        if not (vec == ref_tabla[k] == ref_dict[k]):
+            fallos += 1
+            if fallos <= 10:
+                print(f"DIFERENCIA {caso}\n  tabla={ref_tabla[k]}\n  dict ={ref_dict[k]}\n  lote ={vec}")
+
+    n = len(casos)
+    print(f"candidatos={n}")
+    for motivo, c in conteo.most_common():
+        print(f"  {motivo:<36} {c:>6}")
+    print(
+        f"\nescalar (tabla) {(t1 - t0) / n * 1e6:7.1f} us/candidato  "
+        f"escalar (dict) {(t2 - t1) / n * 1e6:7.1f} us/candidato  "
+        f"lote {(t3 - t2) / n * 1e6:6.2f} us/candidato ({(t1 - t0) / (t3 - t2):.0f}x)"
+    )
+    print("PARIDAD OK" if not fallos else f"PARIDAD CON {fallos} FALLOS")
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
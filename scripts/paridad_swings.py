@@ -0,0 +1,154 @@
+"""
+Paridad y coste de los swings incrementales (analisis_tecnico.swings_incrementales).
+
+Recorre las velas grabadas de `datos/` vela a vela, como el escáner (frame de las
+últimas 100 velas; la última es la vela en formación), y comprueba:
+  1. swing base (lookback 60) == fibonacci.detectar_swing_basico(frame, 60), índices incluidos
+  2. lookbacks más largos que el frame == detectar_swing_basico sobre toda la historia vista
+  3. IndiceNiveles.cercano == fibonacci.nivel_cercano (precios sobre, entre y en mitad
+     de los niveles: empates de distancia incluidos)
+  4. evaluar_setup_determinista con RegistroSwings((60,)) == sin él (cada --paso velas)
+y mide la consulta por pasada: nivel_cercano lineal vs índice con varios lookbacks.
+
+Uso:
+  python scripts/paridad_swings.py [--paso 25] [--lookbacks 60,120,240]
+Sale con código 1 si algo difiere.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(RAIZ, "inteligencia"))
+
+from analisis_tecnico import fibonacci  # noqa: E402
+from analisis_tecnico.scoring_confluencias import evaluar_setup_determinista  # noqa: E402
+from analisis_tecnico.swings_incrementales import RegistroSwings  # noqa: E402
+
+COLUMNAS = ["timestamp", "open", "high", "low", "close", "volume"]
+CSVS = ("btc_usdt_15m.csv", "conjunto_datos_maestro_v2.csv")
+FRAME = 100
+
+
+def precios_prueba(niveles, rng):
+    """Cada nivel, los puntos medios entre niveles vecinos (empates) y algunos al azar."""
+    valores = sorted(niveles.values())
+    if not valores:
+        return []
+    out = list(valores)
+    out += [(a + b) / 2.0 for a, b in zip(valores, valores[1:])]
+    ancho = (valores[-1] - valores[0]) or abs(valores[0]) * 0.01 or 1.0
+    out += [rng.uniform(valores[0] - ancho * 0.2, valores[-1] + ancho * 0.2) for _ in range(8)]
+    return out
+
+
+def comparar_indice(niveles, rng, tolerancias):
+    indice = fibonacci.IndiceNiveles((n, p, None) for n, p in niveles.items())
+    fallos = 0
+    for precio in precios_prueba(niveles, rng):
+        for tol in tolerancias:
+            ref = fibonacci.nivel_cercano(precio, niveles, tolerancia_abs=tol)
+            hallado = indice.cercano(precio, tol)
+            fallos += (ref is None) != (hallado is None) or (ref is not None and ref != hallado[:3])
+    return fallos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--paso", type=int, default=25, help="cada cuántas velas se compara el motor completo")
+    parser.add_argument("--lookbacks", default="60,120,240")
+    args = parser.parse_args()
+
+    lookbacks = tuple(int(x) for x in args.lookbacks.split(",") if x.strip())
+    rng = random.Random(7)
+    fallos = {"swing_base": 0, "swing_largo": 0, "indice": 0, "motor": 0}
+    casos = 0
+    casos_motor = 0
+    t_lineal = t_indice = 0.0
+    consultas = 0
+    niveles_indice = 0
+
+    for nombre_csv in CSVS:
+        ruta = os.path.join(RAIZ, "datos", nombre_csv)
+        if not os.path.exists(ruta):
+            continue
+        base = pd.read_csv(ruta)[COLUMNAS].astype(float)
+        registro = RegistroSwings(lookbacks)
+        registro_motor = RegistroSwings((60,))
+        for fin in range(FRAME, len(base) + 1):
+            df = base.iloc[fin - FRAME : fin].reset_index(drop=True)
+            casos += 1
+            swing, retrocesos, extensiones = registro.niveles("X", df)
+            fallos["swing_base"] += swing != fibonacci.detectar_swing_basico(df, lookback=lookbacks[0])
+
+            rastreador = registro.rastreadores["X"]
+            for lb in lookbacks[1:]:
+                if lb > fin:
+                    continue
+                ref = fibonacci.detectar_swing_basico(base.iloc[:fin], lookback=lb)
+                largo = rastreador.swing(lb, df["high"].iloc[-1], df["low"].iloc[-1], n_frame=FRAME)
+                desfase = fin - FRAME
+                fallos["swing_largo"] += (
+                    ref.high != largo.high
+                    or ref.low != largo.low
+                    or ref.direccion != largo.direccion
+                    or ref.high_idx - desfase != largo.high_idx
+                    or ref.low_idx - desfase != largo.low_idx
+                )
+
+            if swing is None:
+                continue
+            retro = fibonacci.niveles_retroceso(swing)
+            if fin % 5 == 0:
+                tol = fibonacci.tolerancia_por_atr(float((df["high"] - df["low"]).iloc[-14:].mean()))
+                fallos["indice"] += comparar_indice(retro, rng, (tol, tol * 4, 1e9))
+                fallos["indice"] += comparar_indice(fibonacci.niveles_extension(swing), rng, (tol, 1e9))
+
+            # Coste por pasada: todos los niveles de todos los lookbacks, lineal vs índice
+            todos = {n: p for n, p, _ in zip(retrocesos.nombres, retrocesos.precios, retrocesos.datos)}
+            precio = float(df["close"].iloc[-1])
+            tol = precio * 0.002
+            t0 = time.perf_counter()
+            for _ in range(20):
+                fibonacci.nivel_cercano(precio, todos, tolerancia_abs=tol)
+            t1 = time.perf_counter()
+            for _ in range(20):
+                retrocesos.cercano(precio, tol)
+            t2 = time.perf_counter()
+            t_lineal += t1 - t0
+            t_indice += t2 - t1
+            consultas += 20
+            niveles_indice += len(retrocesos)
+
+            if fin % args.paso == 0:
+                casos_motor += 1
+                con = evaluar_setup_determinista(df.copy(), simbolo="X", temporalidad="15m", swings=registro_motor)
+                sin = evaluar_setup_determinista(df.copy(), simbolo="X", temporalidad="15m")
+                fallos["motor"] += con != sin
+            else:
+                registro_motor.niveles("X", df)
+
+    # Empates exactos y niveles repetidos (sintético)
+    sinteticos = {"a": 1.0, "b": 2.0, "c": 2.0, "d": 3.0, "e": float("nan")}
+    fallos["indice"] += comparar_indice(sinteticos, rng, (0.5, 1.0, 5.0))
+
+    print(f"frames={casos}  lookbacks={lookbacks}  motor comparado en {casos_motor} frames")
+    for nombre, n in fallos.items():
+        print(f"  {nombre:<12} fallos={n}")
+    if consultas:
+        print(
+            f"nivel más cercano ({niveles_indice / (consultas / 20):.0f} niveles): "
+            f"lineal {t_lineal / consultas * 1e6:6.2f} us  índice {t_indice / consultas * 1e6:6.2f} us"
+        )
+    total = sum(fallos.values())
+    print("PARIDAD OK" if not total else f"PARIDAD CON {total} FALLOS")
+    return 1 if total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())